@@ -0,0 +1,59 @@
+"""/diceroll rolling cost: the old list-comprehension path vs the dice engine.
+
+  listcomp  the previous command: [random.randint(1, sides) for _ in range(n)]
+            rolled three times (two animation frames and the final roll)
+  python    utils.dice with random.Random (the fallback without NumPy)
+  numpy     utils.dice with a NumPy Generator
+
+Each size is rolled --repeat times; the table shows the median per roll.
+
+Usage:
+    python -m benchmarks.dice
+    python -m benchmarks.dice --sides 20 --sizes 100 10000 1000000 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from utils import dice
+
+def roll_listcomp(n, sides):
+    for _ in range(2):
+        temp_rolls = [random.randint(1, sides) for _ in range(n)]
+        sum(temp_rolls)
+    rolls = [random.randint(1, sides) for _ in range(n)]
+    return sum(rolls)
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sides", type=int, default=6)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    modes = {
+        "listcomp": lambda n: roll_listcomp(n, args.sides),
+        "python": lambda n: dice.roll(dice.DiceExpression([dice.DiceTerm(1, n, args.sides)], 0, ""), random.Random()),
+    }
+    if dice.np is not None:
+        rng = dice.np.random.default_rng()
+        modes["numpy"] = lambda n: dice.roll(dice.DiceExpression([dice.DiceTerm(1, n, args.sides)], 0, ""), rng)
+    else:
+        print("NumPy is not installed; skipping the numpy mode")
+
+    print(f"{'dice':>10} " + " ".join(f"{mode:>12}" for mode in modes))
+    for n in args.sizes:
+        row = [timed(lambda: fn(n), args.repeat) for fn in modes.values()]
+        print(f"{n:>10,} " + " ".join(f"{seconds * 1000:>10.2f}ms" for seconds in row))
+
+if __name__ == "__main__":
+    main()
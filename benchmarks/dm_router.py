@@ -0,0 +1,188 @@
+"""Guess Number with thousands of concurrent DM players: router vs wait_for listeners.
+
+Every simulated player plays a full game by binary search. A single gateway
+coroutine delivers their DMs one at a time, interleaved with guild chatter,
+the way Discord's gateway does. Two delivery modes are compared:
+
+  router     the /guess-num command as shipped; DMs go through dm_router.dispatch
+  listeners  the old pattern; each game awaits discord.Client.wait_for("message")
+             and the real Client.dispatch evaluates every pending check per message
+
+Usage:
+    python -m benchmarks.dm_router
+    python -m benchmarks.dm_router --players 5000 --noise 2 --modes router listeners
+"""
+import argparse
+import asyncio
+import collections
+import random
+import statistics
+import time
+from unittest import mock
+
+import discord
+
+from benchmarks.fakes import FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeMember, FakeSupabase
+from commands import guess_number
+from utils.dm_router import dm_router
+
+
+class SimMessage:
+    __slots__ = ("author", "guild", "content", "channel")
+
+    def __init__(self, author, content, guild=None):
+        self.author = author
+        self.guild = guild
+        self.content = content
+        self.channel = None
+
+
+class Gateway:
+    """Delivers queued messages one at a time and times each dispatch call."""
+
+    def __init__(self, dispatch, guild, noise, rng):
+        self.dispatch = dispatch
+        self.guild = guild
+        self.noise = noise
+        self.rng = rng
+        self.pending = collections.deque()
+        self.wakeup = asyncio.Event()
+        self.timings = []
+        self.delivered = 0
+        self.chatter = FakeMember()
+
+    def post(self, message):
+        self.pending.append(message)
+        self.wakeup.set()
+
+    async def run(self, done):
+        while not done.is_set():
+            if not self.pending:
+                self.wakeup.clear()
+                waiter = asyncio.ensure_future(self.wakeup.wait())
+                finished = asyncio.ensure_future(done.wait())
+                await asyncio.wait((waiter, finished), return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                finished.cancel()
+                continue
+            message = self.pending.popleft()
+            for _ in range(self.noise):
+                self._deliver(SimMessage(self.chatter, "hello", self.guild))
+            self._deliver(message)
+            # Let the game coroutines run between gateway messages
+            if self.delivered % 64 == 0:
+                await asyncio.sleep(0)
+
+    def _deliver(self, message):
+        start = time.perf_counter()
+        self.dispatch(message)
+        self.timings.append(time.perf_counter() - start)
+        self.delivered += 1
+
+
+class SimPlayer(FakeMember):
+    """Guesses by binary search, answering every bot DM through the gateway."""
+
+    def __init__(self, gateway):
+        super().__init__()
+        self.gateway = gateway
+        self.low, self.high = guess_number.MIN_NUMBER, guess_number.MAX_NUMBER
+        self.guess = None
+        self.replies = 0
+
+    async def send(self, content=None, **kwargs):
+        self.replies += 1
+        if self.guess is not None:
+            if "higher" in content:
+                self.low = self.guess + 1
+            elif "lower" in content:
+                self.high = self.guess - 1
+        if "tries left" in content:
+            self.guess = (self.low + self.high) // 2
+            self.gateway.post(SimMessage(self, str(self.guess)))
+
+
+async def run_router(players, noise, seed):
+    rng = random.Random(seed)
+    guild = FakeGuild()
+    channel = FakeChannel(guild)
+    gateway = Gateway(dm_router.dispatch, guild, noise, rng)
+    bot = FakeBot()
+    guess_number.setup(bot, FakeSupabase())
+    command = bot.tree.commands["guess-num"]
+
+    sims = [SimPlayer(gateway) for _ in range(players)]
+    done = asyncio.Event()
+    pump = asyncio.create_task(gateway.run(done))
+    start = time.perf_counter()
+    with mock.patch.object(guess_number.random, "randint", lambda a, b: rng.randint(a, b)):
+        await asyncio.gather(*(command(FakeInteraction(sim, channel)) for sim in sims))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await pump
+    return gateway, sims, elapsed, gateway.delivered
+
+
+async def run_listeners(players, noise, seed):
+    rng = random.Random(seed)
+    guild = FakeGuild()
+    client = discord.Client(intents=discord.Intents.none())
+    client.loop = asyncio.get_running_loop()
+    checks = 0
+
+    def dispatch(message):
+        client.dispatch("message", message)
+
+    gateway = Gateway(dispatch, guild, noise, rng)
+    sims = [SimPlayer(gateway) for _ in range(players)]
+
+    async def legacy_game(user):
+        nonlocal checks
+
+        def check(message):
+            nonlocal checks
+            checks += 1
+            return message.author == user and message.guild is None and message.content.isdigit()
+
+        game = guess_number.GuessNumberGame(rng.randint(guess_number.MIN_NUMBER, guess_number.MAX_NUMBER))
+        await user.send(f"🎮 Welcome!\n{game.prompt()}")
+        await guess_number.play_guess_number(user, game, lambda: client.wait_for("message", check=check))
+
+    done = asyncio.Event()
+    pump = asyncio.create_task(gateway.run(done))
+    start = time.perf_counter()
+    await asyncio.gather(*(legacy_game(sim) for sim in sims))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await pump
+    return gateway, sims, elapsed, checks
+
+
+MODES = {"router": run_router, "listeners": run_listeners}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--noise", type=int, default=1, help="guild messages delivered before each guess")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.players:,} concurrent players, {args.noise} guild message(s) per guess\n")
+    print(f"{'mode':<10} {'seconds':>8} {'messages':>10} {'msg/sec':>10} {'checks/msg':>11} {'p50 us':>8} {'p99 us':>9}")
+    for mode in args.modes:
+        gateway, sims, elapsed, checks = asyncio.run(MODES[mode](args.players, args.noise, args.seed))
+        timings = sorted(gateway.timings)
+        p50 = statistics.median(timings) * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        per_message = checks / gateway.delivered if mode == "listeners" else 1.0
+        print(f"{mode:<10} {elapsed:>8.2f} {gateway.delivered:>10,} {gateway.delivered / elapsed:>10,.0f} "
+              f"{per_message:>11.1f} {p50:>8.2f} {p99:>9.2f}")
+        unfinished = sum(1 for sim in sims if sim.replies < 2)
+        if unfinished:
+            print(f"  {unfinished} players never finished")
+
+
+if __name__ == "__main__":
+    main()
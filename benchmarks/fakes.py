@@ -0,0 +1,251 @@
+"""In-memory stand-ins for the Discord and Supabase objects the game modules touch.
+
+They implement only the attributes and coroutines the commands actually use,
+so game Views can be driven headlessly without a gateway or a database.
+"""
+import asyncio
+import itertools
+
+_ids = itertools.count(10_000)
+_real_sleep = asyncio.sleep
+
+
+class FakeGuild:
+    def __init__(self, guild_id=1):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.icon = None
+
+    def get_member(self, user_id):
+        return None
+
+
+class FakeMember:
+    def __init__(self, user_id=None, bot=False):
+        self.id = user_id if user_id is not None else next(_ids)
+        self.name = f"player{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = bot
+        self.avatar = None
+
+    async def send(self, *args, **kwargs):
+        return FakeMessage()
+
+
+class FakeMessage:
+    """Message returned by sends; counts edits and optionally simulates API latency."""
+
+    io_latency = 0.0
+
+    def __init__(self, channel=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        self.edits += 1
+        if self.io_latency:
+            await _real_sleep(self.io_latency)
+        return self
+
+    async def delete(self):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, guild):
+        self.id = next(_ids)
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+        return FakeMessage(self)
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self):
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self._done = True
+        if FakeMessage.io_latency:
+            await _real_sleep(FakeMessage.io_latency)
+
+    async def defer(self, *args, **kwargs):
+        await self._respond()
+
+    async def send_message(self, *args, **kwargs):
+        await self._respond()
+
+    async def edit_message(self, **kwargs):
+        await self._respond()
+        self._interaction.message.edits += 1
+
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        return FakeMessage()
+
+
+class FakeInteraction:
+    """One button click or slash-command invocation."""
+
+    def __init__(self, user, channel, message=None, custom_id=None):
+        self.user = user
+        self.channel = channel
+        self.guild = channel.guild
+        self.guild_id = channel.guild.id
+        self.message = message or FakeMessage(channel)
+        self.data = {"custom_id": custom_id} if custom_id is not None else {}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup()
+
+    def is_expired(self):
+        return False
+
+    async def original_response(self):
+        return self.message
+
+
+class FakeTree:
+    """Collects slash-command callbacks registered by a module's setup()."""
+
+    def __init__(self):
+        self.commands = {}
+
+    def command(self, name, description=None, **kwargs):
+        def decorator(func):
+            self.commands[name] = func
+            return func
+        return decorator
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeMember(user_id=1, bot=True)
+        self.tree = FakeTree()
+
+    def event(self, func):
+        return func
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data) if isinstance(data, list) else None
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self._rows = rows
+        self._op = "select"
+        self._payload = None
+        self._filters = []
+        self._order = None
+        self._limit = None
+
+    def select(self, *columns, **kwargs):
+        self._op = "select"
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self._op, self._payload = "update", payload
+        return self
+
+    def upsert(self, payload, **kwargs):
+        self._op, self._payload = "upsert", payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _matches(self):
+        return [row for row in self._rows if all(f(row) for f in self._filters)]
+
+    def execute(self):
+        if self._op == "insert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            rows = [dict(row) for row in rows]
+            self._rows.extend(rows)
+            return FakeResult(rows)
+        if self._op == "upsert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            by_id = {row.get("user_id"): row for row in self._rows}
+            for row in rows:
+                if row.get("user_id") in by_id:
+                    by_id[row["user_id"]].update(row)
+                else:
+                    self._rows.append(dict(row))
+            return FakeResult(rows)
+        if self._op == "update":
+            matched = self._matches()
+            for row in matched:
+                row.update(self._payload)
+            return FakeResult(matched)
+        if self._op == "delete":
+            matched = self._matches()
+            self._rows[:] = [row for row in self._rows if row not in matched]
+            return FakeResult(matched)
+        rows = self._matches()
+        if self._order:
+            column, desc = self._order
+            rows.sort(key=lambda row: row.get(column) or 0, reverse=desc)
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return FakeResult([dict(row) for row in rows])
+
+
+class FakeRpc:
+    def execute(self):
+        return FakeResult(None)
+
+
+class FakeSupabase:
+    """Dict-of-lists table store that answers the query-builder calls used in utils.database."""
+
+    def __init__(self):
+        self.tables = {}
+        self.queries = 0
+
+    def table(self, name):
+        self.queries += 1
+        return FakeQuery(self.tables.setdefault(name, []))
+
+    def rpc(self, name, params=None):
+        self.queries += 1
+        return FakeRpc()
@@ -0,0 +1,64 @@
+"""Simulated-play benchmark for the Flip & Find engine.
+
+Run from the repository root:
+
+    python -m benchmarks.flipnfind_board --games 20000 --difficulty extreme
+"""
+import argparse
+import random
+import time
+
+from commands.flipnfind import FlipnFindGame
+
+
+class FakePlayer:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+
+
+def play_game(game, rng):
+    """Click random face-down cards until the game ends, mirroring FlipnFindView.button_callback."""
+    size = game.grid_size
+    cells = range(size * size)
+    while game.running:
+        idx = rng.choice([i for i in cells if not (game.revealed[i] or game.matched[i] or game.star_claimed[i])])
+        row, col = divmod(idx, size)
+        result = game.flip_card(row, col)
+        if result == "star_card":
+            game.hide_card(row, col)
+            game.next_turn()
+        elif result == "no_match":
+            game.hide_cards(row, col)
+            game.next_turn()
+        game.take_dirty()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--difficulty", default="extreme")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    p1, p2 = FakePlayer(1), FakePlayer(2)
+
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        game = FlipnFindGame(p1, p2, args.difficulty)
+        play_game(game, rng)
+        turns += game.turns
+    elapsed = time.perf_counter() - start
+
+    print(f"difficulty={args.difficulty} games={args.games}")
+    print(f"elapsed: {elapsed:.3f}s")
+    print(f"games/sec: {args.games / elapsed:,.0f}")
+    print(f"turns/sec: {turns / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Response bytes per database helper: select-all vs the projected columns.
+
+Every helper in utils/database.py names the columns its callers read. This
+runs each one against an in-memory store filled with rows shaped like the
+real tables (timestamps, generated sort keys, the legacy guesses/guess_gaps
+arrays, the 100-slot gap histogram, analytics summaries) twice: once with
+a store that answers every select with whole rows, as `select("*")` did,
+and once with a store that returns only the selected columns, as PostgREST
+does. The size reported is the JSON the client would have decoded.
+
+Usage:
+    python -m benchmarks.payload
+    python -m benchmarks.payload --players 500 --guesses 2000
+"""
+import argparse
+import json
+import random
+
+from benchmarks.fakes import FakeQuery, FakeResult, FakeSupabase
+from utils import database
+
+GUILD = "1"
+USER = "100000000000000000"
+STAMP = "2026-10-19T12:34:56.789012+00:00"
+
+
+class ProjectingQuery(FakeQuery):
+    """FakeQuery that returns only the columns named in select(), like PostgREST."""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self._columns = None
+
+    def select(self, *columns, **kwargs):
+        self._columns = [column.strip() for column in columns[0].split(",")] if columns else None
+        return super().select(*columns, **kwargs)
+
+    def execute(self):
+        result = super().execute()
+        if self._op != "select" or not self._columns or "*" in self._columns:
+            return result
+        return FakeResult([{column: row.get(column) for column in self._columns} for row in result.data])
+
+
+class MeteredSupabase(FakeSupabase):
+    """FakeSupabase that counts the JSON bytes of every response it returns."""
+
+    def __init__(self, tables, project):
+        super().__init__()
+        self.tables = tables
+        self.project = project
+        self.bytes = 0
+
+    def table(self, name):
+        self.queries += 1
+        query = (ProjectingQuery if self.project else FakeQuery)(self.tables.setdefault(name, []))
+        execute = query.execute
+
+        def metered():
+            result = execute()
+            self.bytes += len(json.dumps(result.data, default=str))
+            return result
+
+        query.execute = metered
+        return query
+
+
+def _analytics(rng, metrics):
+    return {
+        metric: {
+            "count": rng.randint(10, 500), "mean": rng.random() * 60, "m2": rng.random() * 900,
+            "min": rng.random(), "max": rng.random() * 120, "ewma": rng.random() * 60,
+            "p2": {q: {"heights": [rng.random() * 60 for _ in range(5)], "positions": [1, 2, 3, 4, 5]}
+                   for q in ("p50", "p90", "p99")},
+        }
+        for metric in metrics
+    }
+
+
+def _rating(rng):
+    rating, rd = rng.uniform(1200, 1900), rng.uniform(50, 350)
+    return {"rating": rating, "rating_rd": rd, "rating_vol": 0.06, "rating_score": rating - 2 * rd}
+
+
+def build_tables(players, guesses, rng):
+    """Whole rows for every table the helpers read, keyed by table name."""
+    users = [USER] + [str(100000000000000001 + i) for i in range(players - 1)]
+    tables = {}
+    stamps = {"created_at": STAMP, "updated_at": STAMP}
+
+    def add(table, row):
+        tables.setdefault(table, []).append(row)
+
+    for user in users:
+        wins, losses, ties = rng.randint(0, 200), rng.randint(0, 200), rng.randint(0, 50)
+        total = wins + losses + ties
+        add(f"rps_stats_{GUILD}", {
+            "user_id": user, "wins": wins, "losses": losses, "ties": ties, "total_games": total,
+            "win_rate": wins / total if total else 0,
+        })
+        correct, incorrect = rng.randint(1, 300), rng.randint(0, 300)
+        add(f"guess_number_stats_{GUILD}", {
+            "user_id": user, "correct_guesses": correct, "incorrect_guesses": incorrect,
+            "total_games": correct + incorrect, "success_rate": correct / (correct + incorrect),
+            "guesses": [rng.randint(1, 100) for _ in range(guesses)],
+            "guess_gaps": [rng.randint(0, 99) for _ in range(guesses)],
+            "gap_count": guesses, "gap_sum": guesses * 20,
+            "gap_histogram": [rng.randint(0, 50) for _ in range(100)],
+            "analytics": _analytics(rng, ["gap", "attempts"]),
+        })
+        add(f"tictactoe_stats_{GUILD}", {
+            "user_id": user, "wins": wins, "losses": losses, "draws": ties, "total_games": total,
+            **_rating(rng), **stamps,
+        })
+        add(f"battle_stats_{GUILD}", {
+            "user_id": user, "wins": wins, "losses": losses, "total_games": wins + losses, **_rating(rng), **stamps,
+        })
+        for difficulty in ("easy", "medium", "hard", "extreme"):
+            add(f"flipnfind_stats_{GUILD}", {
+                "user_id": f"{user}_{difficulty}", "wins": wins, "losses": losses, "total_games": wins + losses,
+                "best_time": rng.uniform(10, 90), "best_turns": rng.randint(8, 40),
+                "total_turns": rng.randint(100, 9000), "total_time": rng.uniform(100, 9000),
+                "star_cards": rng.randint(0, 30), **_rating(rng),
+                "analytics": _analytics(rng, ["time", "turns"]), **stamps,
+            })
+        add(f"flipnfind_totals_{GUILD}", {
+            "user_id": user, "wins": 4 * wins, "losses": 4 * losses, "total_games": 4 * (wins + losses),
+            "star_cards": rng.randint(0, 120),
+        })
+        add(f"kidnapped_jack_stats_{GUILD}", {
+            "user_id": user, "games_played": total, "escapes": wins, "kidnapper_count": losses,
+            "total_time": rng.uniform(100, 9000), "best_time": rng.uniform(10, 90), "best_placement": rng.randint(1, 6),
+            "total_wins": wins, "total_placements": total, "placement_sum": 3 * total,
+            "analytics": _analytics(rng, ["time", "placement"]),
+        })
+        add(f"roulette_stats_{GUILD}", {
+            "user_id": user, "games_played": total, "games_won": wins, "games_lost": losses,
+            "total_bet": 100 * total, "total_won": 120 * wins, "total_lost": 100 * losses,
+            "biggest_win": rng.randint(0, 50000), "biggest_loss": rng.randint(0, 50000), **stamps,
+        })
+        add("economy", {
+            "user_id": user, "balance": rng.randint(0, 10 ** 7), "total_earned": rng.randint(0, 10 ** 8),
+            "total_spent": rng.randint(0, 10 ** 8), "last_daily": STAMP, **stamps,
+        })
+        add("jobs", {
+            "id": len(tables.get("jobs", [])) + 1, "user_id": user, "current_job": "Chef",
+            "experience": rng.randint(0, 900), "last_work": STAMP, "work_count": rng.randint(0, 500),
+            "grace_period_start": None, "total_earned": rng.randint(0, 10 ** 7), **stamps,
+        })
+        for game in database.GLOBAL_GAMES:
+            add("global_stats", {
+                "user_id": user, "game": game, "wins": wins, "losses": losses, "draws": ties,
+                "total_games": total, "updated_at": STAMP,
+            })
+    return tables
+
+
+HELPERS = [
+    ("get_rps_stats", lambda s: database.get_rps_stats(s, GUILD, USER)),
+    ("get_guess_stats", lambda s: database.get_guess_stats(s, GUILD, USER)),
+    ("get_tictactoe_stats", lambda s: database.get_tictactoe_stats(s, GUILD, USER)),
+    ("get_battle_stats", lambda s: database.get_battle_stats(s, GUILD, USER)),
+    ("get_flipnfind_stats", lambda s: database.get_flipnfind_stats(s, GUILD, f"{USER}_hard")),
+    ("get_flipnfind_stats_by_difficulty", lambda s: database.get_flipnfind_stats_by_difficulty(s, GUILD, USER, ["easy", "medium", "hard", "extreme"])),
+    ("get_kidnapped_jack_stats", lambda s: database.get_kidnapped_jack_stats(s, GUILD, USER)),
+    ("get_roulette_stats", lambda s: database.get_roulette_stats(s, GUILD, USER)),
+    ("get_user_balance", lambda s: database.get_user_balance(s, USER)),
+    ("get_job_data", lambda s: database.get_job_data(s, USER)),
+    ("get_global_profile", lambda s: database.get_global_profile(s, USER)),
+    ("get_rps_leaderboard", lambda s: database.get_rps_leaderboard(s, GUILD)),
+    ("get_guess_number_leaderboard", lambda s: database.get_guess_number_leaderboard(s, GUILD)),
+    ("get_tictactoe_leaderboard", lambda s: database.get_tictactoe_leaderboard(s, GUILD)),
+    ("get_battle_leaderboard", lambda s: database.get_battle_leaderboard(s, GUILD)),
+    ("get_flipnfind_leaderboard", lambda s: database.get_flipnfind_leaderboard(s, GUILD)),
+    ("get_kidnapped_jack_leaderboard", lambda s: database.get_kidnapped_jack_leaderboard(s, GUILD)),
+    ("get_roulette_leaderboard", lambda s: database.get_roulette_leaderboard(s, GUILD)),
+    ("get_global_leaderboard", lambda s: database.get_global_leaderboard(s, "rps")),
+]
+
+
+def measure(tables, project):
+    sizes = {}
+    for name, call in HELPERS:
+        supabase = MeteredSupabase(tables, project)
+        call(supabase)
+        sizes[name] = supabase.bytes
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=100, help="rows per table")
+    parser.add_argument("--guesses", type=int, default=500, help="entries in each legacy guesses/guess_gaps array")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tables = build_tables(args.players, args.guesses, random.Random(args.seed))
+    before, after = measure(tables, project=False), measure(tables, project=True)
+
+    print(f"{'helper':<34} {'select *':>10} {'projected':>10} {'saved':>7}")
+    for name, _ in HELPERS:
+        saved = 1 - after[name] / before[name] if before[name] else 0
+        print(f"{name:<34} {before[name]:>10,} {after[name]:>10,} {saved:>7.0%}")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"{'total':<34} {total_before:>10,} {total_after:>10,} {1 - total_after / total_before:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Headless bot-vs-bot self-play harness for every game engine.
+
+Each engine's View is driven through its real button callbacks using the fake
+Discord objects in benchmarks.fakes, with many games in flight on one event
+loop. Wall-clock timers (turn timeouts, lobby timeouts, move timers) are not
+started; the short "reveal" pauses inside callbacks are scaled by
+--delay-scale (0 by default).
+
+Run from the repository root:
+
+    python -m benchmarks.selfplay --games 500 --concurrency 100
+    python -m benchmarks.selfplay --engines battle tictactoe --io-latency 0.05
+    python -m benchmarks.selfplay --json baseline.json
+    python -m benchmarks.selfplay --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import sys
+import time
+from unittest import mock
+
+from discord import app_commands
+
+from benchmarks.fakes import (
+    FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeMember, FakeMessage, FakeSupabase, _real_sleep
+)
+from commands import rps, tictactoe, battle, flipnfind, kidnapped_jack
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Safety valve so a pathological game cannot spin forever
+MAX_CLICKS = 1000
+
+RPS_CHOICES = [
+    app_commands.Choice(name="Rock", value="rock"),
+    app_commands.Choice(name="Paper", value="paper"),
+    app_commands.Choice(name="Scissors", value="scissors"),
+]
+BATTLE_MODES = ["normal", "nohealing", "poison", "blind", "regen", "stun"]
+BATTLE_ACTIONS = ["punch", "kick", "defend", "heal"]
+BATTLE_WEIGHTS = [0.45, 0.3, 0.15, 0.1]
+
+
+class Run:
+    """Shared state and counters for one engine's benchmark run."""
+
+    def __init__(self, rng, args):
+        self.rng = rng
+        self.args = args
+        self.bot = FakeBot()
+        self.supabase = FakeSupabase()
+        self.channel = FakeChannel(FakeGuild())
+        self.latencies = []
+        self.clicks = 0
+        self.errors = 0
+
+    async def click(self, view, item, user, message):
+        """Dispatch a button press the way discord.ui.View does: interaction_check, then callback."""
+        interaction = FakeInteraction(user, self.channel, message, item.custom_id)
+        start = time.perf_counter()
+        if await view.interaction_check(interaction):
+            await item.callback(interaction)
+        self.latencies.append(time.perf_counter() - start)
+        self.clicks += 1
+
+    async def command(self, callback, user, *args):
+        interaction = FakeInteraction(user, self.channel)
+        start = time.perf_counter()
+        await callback(interaction, *args)
+        self.latencies.append(time.perf_counter() - start)
+        self.clicks += 1
+
+
+def find_item(view, custom_id):
+    return next(item for item in view.children if item.custom_id == custom_id)
+
+
+async def play_rps(run):
+    if not hasattr(run, "rps_command"):
+        rps.setup(run.bot, run.supabase)
+        run.rps_command = run.bot.tree.commands["rps"]
+    await run.command(run.rps_command, FakeMember(), run.rng.choice(RPS_CHOICES))
+
+
+async def play_tictactoe(run):
+    p1, p2 = FakeMember(), FakeMember()
+    game = tictactoe.TicTacToeGame(p1, p2)
+    view = tictactoe.TicTacToeView(game, run.supabase)
+    view.message = FakeMessage(run.channel)
+    clicks = 0
+    while not game.winner and not game.is_draw:
+        if clicks >= MAX_CLICKS:
+            await run.click(view, find_item(view, "ttt_quit"), game.current_player, view.message)
+            break
+        free = [(r, c) for r in range(3) for c in range(3) if game.board[r][c] == '⬜']
+        r, c = run.rng.choice(free)
+        await run.click(view, find_item(view, f"ttt_{r}_{c}"), game.current_player, view.message)
+        clicks += 1
+
+
+async def play_battle(run):
+    p1 = battle.BattlePlayer(FakeMember())
+    p2 = battle.BattlePlayer(FakeMember())
+    game = battle.BattleGame(p1, p2, run.rng.choice(BATTLE_MODES))
+    view = battle.BattleView(game, None, run.supabase, FakeInteraction(p1.user, run.channel), run.bot)
+    view._turn_loop_task.cancel()
+    view.message = FakeMessage(run.channel)
+    clicks = 0
+    while game.running:
+        action = "run" if clicks >= MAX_CLICKS else run.rng.choices(BATTLE_ACTIONS, BATTLE_WEIGHTS)[0]
+        await run.click(view, getattr(view, action), game.current().user, view.message)
+        clicks += 1
+
+
+async def play_flipnfind(run):
+    p1, p2 = FakeMember(), FakeMember()
+    game = flipnfind.FlipnFindGame(p1, p2, run.args.difficulty)
+    view = flipnfind.FlipnFindView(game, run.supabase, run.channel, run.bot)
+    view._turn_loop_task.cancel()
+    view.message = FakeMessage(run.channel)
+    cells = range(game.grid_size * game.grid_size)
+    clicks = 0
+    while game.running:
+        if clicks >= MAX_CLICKS and view._quit_button:
+            await run.click(view, view._quit_button, game.current_player, view.message)
+            break
+        idx = run.rng.choice([i for i in cells if not (game.revealed[i] or game.matched[i] or game.star_claimed[i])])
+        await run.click(view, view._cell_buttons[idx], game.current_player, view.message)
+        clicks += 1
+
+
+async def play_kidnapped_jack(run):
+    host = kidnapped_jack.KidnappedJackPlayer(FakeMember())
+    game = kidnapped_jack.KidnappedJackGame([host])
+    view = kidnapped_jack.KidnappedJackView(game, run.supabase, run.channel, run.bot)
+    view.message = FakeMessage(run.channel)
+    for _ in range(run.rng.randint(kidnapped_jack.MIN_PLAYERS, run.args.jack_players) - 1):
+        await run.click(view, find_item(view, "join"), FakeMember(), view.message)
+    await run.click(view, find_item(view, "start"), host.user, view.message)
+    clicks = 0
+    while not game.game_over:
+        current = game.get_current_player().user
+        targets = [item for item in view.children if item.custom_id.startswith("draw_")]
+        if clicks >= MAX_CLICKS or not targets:
+            await run.click(view, find_item(view, "quit"), current, view.message)
+            break
+        await run.click(view, run.rng.choice(targets), current, view.message)
+        clicks += 1
+    view._cancel_timeout()
+
+
+ENGINES = {
+    "rps": play_rps,
+    "tictactoe": play_tictactoe,
+    "battle": play_battle,
+    "flipnfind": play_flipnfind,
+    "kidnapped_jack": play_kidnapped_jack,
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def current_rss_mb():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    # ru_maxrss is already a peak, reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def sample_rss(peak):
+    while True:
+        peak[0] = max(peak[0], current_rss_mb())
+        await _real_sleep(0.01)
+
+
+async def run_engine(name, args, seed):
+    run = Run(random.Random(seed), args)
+    play = ENGINES[name]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one_game():
+        async with semaphore:
+            try:
+                await play(run)
+            except Exception:
+                run.errors += 1
+                if run.errors == 1:
+                    logger.exception(f"{name}: game raised")
+
+    peak = [current_rss_mb()]
+    sampler = asyncio.create_task(sample_rss(peak))
+    start = time.perf_counter()
+    await asyncio.gather(*(one_game() for _ in range(args.games)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    peak[0] = max(peak[0], current_rss_mb())
+
+    latencies = sorted(run.latencies)
+    return {
+        "engine": name,
+        "games": args.games,
+        "clicks": run.clicks,
+        "errors": run.errors,
+        "elapsed_s": elapsed,
+        "games_per_sec": args.games / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak[0],
+        "db_queries": run.supabase.queries,
+    }
+
+
+def scaled_sleep(scale):
+    async def sleep(delay, result=None):
+        return await _real_sleep(delay * scale, result)
+    return sleep
+
+
+def compare(results, baseline_path, tolerance):
+    """Return the names of engines whose throughput fell more than ``tolerance`` below the baseline."""
+    with open(baseline_path) as f:
+        baseline = {row["engine"]: row for row in json.load(f)}
+    regressions = []
+    for row in results:
+        base = baseline.get(row["engine"])
+        if base and row["games_per_sec"] < base["games_per_sec"] * (1 - tolerance):
+            regressions.append(row["engine"])
+            print(f"REGRESSION {row['engine']}: {row['games_per_sec']:,.0f} games/sec "
+                  f"vs baseline {base['games_per_sec']:,.0f}")
+    return regressions
+
+
+async def main_async(args):
+    FakeMessage.io_latency = args.io_latency
+    results = []
+    with mock.patch.object(asyncio, "sleep", scaled_sleep(args.delay_scale)):
+        for i, name in enumerate(args.engines):
+            results.append(await run_engine(name, args, args.seed + i))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--games", type=int, default=500, help="games per engine")
+    parser.add_argument("--concurrency", type=int, default=100, help="games in flight at once")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--difficulty", default="extreme", help="Flip & Find difficulty")
+    parser.add_argument("--jack-players", type=int, default=6, help="max players per Kidnapped Jack game")
+    parser.add_argument("--delay-scale", type=float, default=0.0, help="multiplier for in-callback asyncio.sleep pauses")
+    parser.add_argument("--io-latency", type=float, default=0.0, help="simulated seconds per Discord API call")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare games/sec against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed games/sec drop vs baseline")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(args.seed)
+    results = asyncio.run(main_async(args))
+
+    print(f"{'engine':<16}{'games/sec':>12}{'clicks':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}{'errors':>8}")
+    for row in results:
+        print(f"{row['engine']:<16}{row['games_per_sec']:>12,.0f}{row['clicks']:>10}"
+              f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['peak_rss_mb']:>13.1f}{row['errors']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = any(row["errors"] for row in results)
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
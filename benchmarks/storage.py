@@ -0,0 +1,102 @@
+"""Database latency of common commands on each storage backend.
+
+Seeds a test guild with --players players (stats in several games, a
+balance and a job each), then times the helper calls behind each command
+--repeat times, cycling through the players, and prints the median and
+99th percentile per call. The sqlite backend runs on a fresh database file
+in WAL mode, as DATABASE_BACKEND=sqlite would. The supabase backend runs
+when SUPABASE_URL and SUPABASE_KEY are set (or with --backends supabase),
+against the live project: its numbers include the network round trips,
+and the seeded rows are deleted afterwards.
+
+Usage:
+    python -m benchmarks.storage
+    python -m benchmarks.storage --players 1000 --repeat 500
+    python -m benchmarks.storage --backends sqlite supabase --guild 1
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from tools.storage_conformance import cleanup, open_backend
+from utils import database
+
+JOB = "Benchmark Runner"
+JOB_INFO = {"work_frequency": {"times": 1000, "hours": 24}, "grace_period": 12, "exp_loss": 0}
+
+# (command, the helper calls it makes); each call gets the client, the guild and one player
+COMMANDS = [
+    ("/rps (record result)", lambda db, guild, user: database.update_rps_stats(db, guild, user, "win")),
+    ("/guess (record game)", lambda db, guild, user: database.update_guess_stats(db, guild, user, "correct", [50, 25, 30], 30)),
+    ("/stats", lambda db, guild, user: database.get_player_summary(db, guild, user)),
+    ("/profile", lambda db, guild, user: database.get_global_profile(db, user)),
+    ("/leaderboard (2 pages)", lambda db, guild, user: database.get_rps_leaderboard(
+        db, guild, after=database.get_rps_leaderboard(db, guild)[-1])),
+    ("/balance", lambda db, guild, user: database.get_user_balance(db, user)),
+    ("/daily (cooldown)", lambda db, guild, user: database.claim_reward(db, user, "daily")),
+    ("/work", lambda db, guild, user: database.record_work(db, user, JOB, JOB_INFO, 10, 1)),
+]
+
+def seed(db, guild, users, rng):
+    database.create_server_tables(db, guild)
+    for user in users:
+        for _ in range(rng.randint(1, 5)):
+            database.update_rps_stats(db, guild, user, rng.choice(["win", "loss", "tie"]))
+        database.update_flipnfind_stats(db, guild, f"{user}_easy", rng.choice(["win", "loss"]), rng.uniform(20, 90), rng.randint(8, 40), 1)
+        database.get_user_balance(db, user)
+        database.claim_reward(db, user, "daily")
+        database.create_job_data(db, user)
+        database.assign_job(db, user, JOB, JOB_INFO)
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure(db, guild, users, repeat):
+    results = {}
+    for name, call in COMMANDS:
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            call(db, guild, users[i % len(users)])
+            timings.append(time.perf_counter() - started)
+        results[name] = (statistics.median(timings), percentile(timings, 0.99))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=["sqlite", "supabase"], default=None,
+                        help="default: sqlite, plus supabase when its credentials are set")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--guild", default="1", help="test guild id for the seeded tables")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    backends = args.backends or ["sqlite"] + (["supabase"] if os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY") else [])
+    users = [f"8000000000{i:08d}" for i in range(args.players)]
+    results = {}
+    for backend in backends:
+        directory = tempfile.mkdtemp() if backend == "sqlite" else None
+        db = open_backend(backend, os.path.join(directory, "benchmark.db") if directory else None)
+        try:
+            seed(db, args.guild, users, random.Random(args.seed))
+            results[backend] = measure(db, args.guild, users, args.repeat)
+        finally:
+            if directory:
+                db.close()
+                shutil.rmtree(directory)
+            else:
+                cleanup(db, [args.guild], users)
+
+    print(f"{'command':<22} " + " ".join(f"{backend + ' p50':>14} {backend + ' p99':>14}" for backend in backends))
+    for name, _ in COMMANDS:
+        cells = [f"{results[backend][name][0] * 1000:>12.2f}ms {results[backend][name][1] * 1000:>12.2f}ms" for backend in backends]
+        print(f"{name:<22} " + " ".join(cells))
+
+if __name__ == "__main__":
+    main()
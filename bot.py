@@ -1,11 +1,17 @@
 import discord
 from discord.ext import commands
 import os
+import math
 import logging
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client
 from utils.database import create_server_tables, clean_missing_users_data
-from commands import basic, rps, guess_number, tictactoe, battle, flipnfind, kidnapped_jack, moderation, economy, roulette, job
+from utils.db_client import ResilientClient
+from utils.db_pool import KEEPALIVE_EXPIRY, POOL_SIZE, prewarm, use_pool
+from utils.sqlite_backend import DEFAULT_PATH, SQLiteClient
+from utils.dm_router import dm_router
+from utils.ratelimit import RateLimited, SupabaseBackend, limiter
+from commands import basic, rps, guess_number, tictactoe, battle, flipnfind, kidnapped_jack, moderation, economy, roulette, job, queue, profile
 from keep_alive import keep_alive
 
 # Set up logging
@@ -17,32 +23,62 @@ load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# "supabase" (default) or "sqlite" for a local database file (see utils/sqlite_backend.py)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "supabase").lower()
 
 # Validate environment variables
-if not all([TOKEN, SUPABASE_URL, SUPABASE_KEY]):
-    missing_vars = []
-    if not TOKEN: missing_vars.append("DISCORD_TOKEN")
+if DATABASE_BACKEND not in ("supabase", "sqlite"):
+    raise ValueError(f"Unknown DATABASE_BACKEND: {DATABASE_BACKEND} (expected supabase or sqlite)")
+missing_vars = []
+if not TOKEN: missing_vars.append("DISCORD_TOKEN")
+if DATABASE_BACKEND == "supabase":
     if not SUPABASE_URL: missing_vars.append("SUPABASE_URL")
     if not SUPABASE_KEY: missing_vars.append("SUPABASE_KEY")
+if missing_vars:
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
 # Initialize bot with necessary intents
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True  # Required for reading message content
+# Online counts in /serverinfo need the privileged presence intent; enable it in the portal first
+intents.presences = os.getenv("ENABLE_PRESENCES") == "1"
 bot = commands.Bot(command_prefix="!", intents=intents)
 
-# Initialize Supabase with error handling
-try:
-    logger.info("Initializing Supabase client...")
-    # Create client with older API for compatibility
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    logger.info("Supabase client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {str(e)}")
-    logger.error("This might be due to version compatibility issues.")
-    logger.error("Try running: pip install supabase==1.2.0")
-    raise
+# Initialize the database client with error handling
+if DATABASE_BACKEND == "sqlite":
+    # Same table/rpc interface as the supabase client, on a local file
+    supabase = SQLiteClient(os.getenv("SQLITE_PATH", DEFAULT_PATH))
+    logger.info(f"Using the SQLite database at {supabase.path} ({supabase.journal_mode} journal)")
+else:
+    try:
+        logger.info("Initializing Supabase client...")
+        # Create client with older API for compatibility, on a pooled HTTP/2
+        # connection (see utils/db_pool.py), wrapped for retries, timeouts and
+        # the circuit breaker (see utils/db_client.py)
+        client = use_pool(
+            create_client(SUPABASE_URL, SUPABASE_KEY),
+            pool_size=POOL_SIZE,
+            keepalive_expiry=float(os.getenv("DB_KEEPALIVE_EXPIRY", KEEPALIVE_EXPIRY))
+        )
+        prewarm(client)
+        hedge_ms = os.getenv("DB_HEDGE_MS")
+        supabase = ResilientClient(
+            client,
+            timeout=float(os.getenv("DB_TIMEOUT", "10")),
+            hedge_after=float(hedge_ms) / 1000 if hedge_ms else None,
+            max_workers=POOL_SIZE
+        )
+        logger.info("Supabase client initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize Supabase client: {str(e)}")
+        logger.error("This might be due to version compatibility issues.")
+        logger.error("Try running: pip install supabase==1.2.0")
+        raise
+
+# Share command rate limits across processes when asked to; in-memory otherwise
+if os.getenv("RATE_LIMIT_BACKEND") == "supabase":
+    limiter.backend = SupabaseBackend(supabase)
 
 # Load commands
 @bot.event
@@ -84,6 +120,23 @@ async def on_guild_join(guild):
         print("Make sure you've created the create_guild_tables function in your Supabase SQL editor.")
         print("Visit the bot status page for setup instructions.")
 
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    if not isinstance(error, RateLimited):
+        command = interaction.command.name if interaction.command else "unknown"
+        logger.error(f"Error in /{command}: {str(error)}", exc_info=error)
+        return
+    message = f"⏳ Slow down! You can use `/{error.name}` again in {math.ceil(error.retry_after)}s."
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
+@bot.listen("on_message")
+async def route_direct_messages(message):
+    # DM games (Guess Number) read their player's messages from the router
+    dm_router.dispatch(message)
+
 # Add command modules
 basic.setup(bot)
 rps.setup(bot, supabase)
@@ -96,6 +149,8 @@ moderation.setup(bot, supabase)
 economy.setup(bot, supabase)
 roulette.setup(bot, supabase)
 job.setup(bot, supabase)
+queue.setup(bot, supabase)
+profile.setup(bot, supabase)
 
 # Keep bot alive with Supabase keepalive
 keep_alive(supabase, bot)
@@ -7,10 +7,42 @@ import time
 import random
 import re
 import asyncio
+from utils.dice import DiceError, histogram_text, parse as parse_dice, roll as roll_dice
+from utils.guild_stats import guild_stats_cache
+from utils.ratelimit import rate_limit
 
 logger = logging.getLogger(__name__)
 
 def setup(bot):
+    # Keep /serverinfo's counters current between full rescans
+    @bot.listen("on_member_join")
+    async def count_member_join(member):
+        guild_stats_cache.member_join(member)
+
+    @bot.listen("on_member_remove")
+    async def count_member_remove(member):
+        guild_stats_cache.member_remove(member)
+
+    @bot.listen("on_presence_update")
+    async def count_presence_update(before, after):
+        guild_stats_cache.presence_update(before, after)
+
+    @bot.listen("on_guild_channel_create")
+    async def count_channel_create(channel):
+        guild_stats_cache.channel_create(channel)
+
+    @bot.listen("on_guild_channel_delete")
+    async def count_channel_delete(channel):
+        guild_stats_cache.channel_delete(channel)
+
+    @bot.listen("on_guild_channel_update")
+    async def count_channel_update(before, after):
+        guild_stats_cache.channel_update(before, after)
+
+    @bot.listen("on_guild_remove")
+    async def forget_guild(guild):
+        guild_stats_cache.forget(guild)
+
     @bot.tree.command(name="ping", description="Check your current ping!")
     async def ping(interaction: discord.Interaction):
         try:
@@ -65,21 +97,19 @@ def setup(bot):
             
             guild = interaction.guild
             
-            # Get member counts with more detailed stats
+            # Counts come from the event-maintained cache instead of scanning members and channels
+            counts = guild_stats_cache.get(guild)
             total_members = guild.member_count
-            bot_count = len([m for m in guild.members if m.bot])
+            bot_count = counts.bots
             human_count = total_members - bot_count
-            online_members = len([m for m in guild.members if m.status != discord.Status.offline])
+            online_members = counts.online
             offline_members = total_members - online_members
             
-            # Get channel counts with more details
-            text_channels = len(guild.text_channels)
-            voice_channels = len(guild.voice_channels)
-            categories = len(guild.categories)
-            # Count news channels by checking channel type
-            news_channels = len([c for c in guild.text_channels if isinstance(c, discord.TextChannel) and c.is_news()])
-            # Count forum channels by checking channel type
-            forum_channels = len([c for c in guild.channels if isinstance(c, discord.ForumChannel)])
+            text_channels = counts.text
+            voice_channels = counts.voice
+            categories = counts.categories
+            news_channels = counts.news
+            forum_channels = counts.forums
             
             # Get role count and highest role
             role_count = len(guild.roles)
@@ -347,110 +377,98 @@ def setup(bot):
 
     @bot.tree.command(name="diceroll", description="Roll dice with elegant formatting")
     @app_commands.describe(
-        dice="Number of dice to roll (e.g., '2d20' for two 20-sided dice)",
+        dice="Dice expression, e.g. '2d20', '4d6kh3+2d8-1', '3d6!' (exploding) or 'adv'",
         modifier="Optional modifier to add/subtract (e.g., '+5' or '-3')"
     )
+    @rate_limit("diceroll", 10, 60)
     async def diceroll(interaction: discord.Interaction, dice: str, modifier: str = None):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # Parse the dice notation
-            match = re.match(r'(\d+)d(\d+)', dice.lower())
-            if not match:
-                await interaction.followup.send("❌ Invalid dice notation. Please use format like '2d20' (2 twenty-sided dice).", ephemeral=True)
-                return
-                
-            num_dice = int(match.group(1))
-            sides = int(match.group(2))
-            
-            # Validate input
-            if num_dice > 100:
-                await interaction.followup.send("❌ Maximum 100 dice can be rolled at once.", ephemeral=True)
-                return
-            if sides > 100:
-                await interaction.followup.send("❌ Maximum 100 sides per die.", ephemeral=True)
-                return
-                
-            # Parse modifier if provided
-            mod_value = 0
+            expression_text = dice
             if modifier:
-                mod_match = re.match(r'([+-]?\d+)', modifier)
-                if mod_match:
-                    mod_value = int(mod_match.group(1))
-            
-            # Create initial embed for animation
-            embed = discord.Embed(
-                title="🎲 Rolling Dice...",
-                description="The dice are tumbling...",
-                color=discord.Color.blue()
-            )
-            
-            # Send initial message
-            message = await interaction.followup.send(embed=embed, ephemeral=True)
-            
-            # Animate the roll
-            for _ in range(2):  # Faster animation
-                temp_rolls = [random.randint(1, sides) for _ in range(num_dice)]
-                temp_total = sum(temp_rolls) + mod_value
-                
-                embed.description = f"Rolling...\nCurrent total: **{temp_total}**"
-                await message.edit(embed=embed)
-                await asyncio.sleep(0.1) # Faster animation
+                mod_match = re.fullmatch(r'\s*([+-]?\d+)\s*', modifier)
+                if not mod_match:
+                    await interaction.followup.send("❌ Invalid modifier. Use a number like '+5' or '-3'.", ephemeral=True)
+                    return
+                expression_text += f"{int(mod_match.group(1)):+d}"
+            
+            try:
+                expression = parse_dice(expression_text)
+            except DiceError as e:
+                await interaction.followup.send(f"❌ {e} Try something like '2d20', '4d6kh3+2' or 'adv'.", ephemeral=True)
+                return
             
-            # Final roll
-            rolls = [random.randint(1, sides) for _ in range(num_dice)]
-            total = sum(rolls) + mod_value
+            # Million-die rolls and exact keep/drop expectations take a while; keep them off the event loop
+            result, expected = await asyncio.to_thread(lambda: (roll_dice(expression), expression.expected()))
             
-            # Create final embed
             final_embed = discord.Embed(
                 title="🎲 Dice Roll Result",
                 color=discord.Color.blue()
             )
             
-            # Add fields with elegant formatting
-            final_embed.add_field(
-                name="🎯 Roll Details",
-                value=f"**Dice:** {num_dice}d{sides}\n"
-                      f"**Modifier:** {mod_value:+d}\n"
-                      f"**Total:** {total}",
-                inline=False
-            )
-            
-            # Format individual rolls
-            if num_dice <= 10:  # Only show individual rolls if 10 or fewer dice
-                rolls_text = " ".join(f"`{roll}`" for roll in rolls)
-                final_embed.add_field(
-                    name="📊 Individual Rolls",
-                    value=rolls_text,
-                    inline=False
-                )
-            
-            # Add special messages for certain rolls
-            if num_dice == 1:
-                if rolls[0] == sides:
-                    final_embed.add_field(
-                        name="✨ Special Roll",
-                        value="🎉 **Critical Success!**",
-                        inline=False
-                    )
-                elif rolls[0] == 1:
-                    final_embed.add_field(
-                        name="✨ Special Roll",
-                        value="💔 **Critical Failure!**",
-                        inline=False
-                    )
+            details = f"**Dice:** {expression.text}\n"
+            if expression.modifier:
+                details += f"**Modifier:** {expression.modifier:+d}\n"
+            details += f"**Total:** {result.total:,}"
+            if expected is not None:
+                value, exact = expected
+                details += f"\n**Expected:** {'' if exact else '≈'}{value:,.2f}"
+            final_embed.add_field(name="🎯 Roll Details", value=details, inline=False)
+            
+            # Individual dice per term, trimmed for big rolls
+            lines = []
+            for term_roll in result.terms:
+                term = term_roll.term
+                rolls_text = " ".join(f"`{roll}`" for roll in term_roll.shown)
+                if term.count > len(term_roll.shown):
+                    rolls_text += f" … ({term.count:,} dice, mean {term_roll.mean:.2f})"
+                line = f"**{term.notation}** → {term_roll.subtotal:,}: {rolls_text}"
+                if term_roll.dropped:
+                    line += f" · {term_roll.dropped:,} dropped"
+                if term_roll.explosions:
+                    line += f" · 💥 {term_roll.explosions:,}"
+                lines.append(line)
+            if lines:
+                final_embed.add_field(name="📊 Individual Rolls", value="\n".join(lines)[:1024], inline=False)
+            
+            # Face distribution for the largest term once there are enough dice to be interesting
+            largest = max(result.terms, key=lambda term_roll: term_roll.term.count, default=None)
+            if largest and largest.term.count >= 50:
+                chart = histogram_text(largest.histogram, largest.term.sides)
+                final_embed.add_field(name=f"📈 Distribution ({largest.term.notation})", value=f"```{chart}```", inline=False)
+            
+            # Add special messages for a single kept die
+            if len(result.terms) == 1:
+                term = result.terms[0].term
+                single = term.count == 1 or (term.keep is not None and term.keep[1] == 1)
+                if single and not term.explode:
+                    face = result.terms[0].subtotal
+                    if face == term.sides:
+                        final_embed.add_field(
+                            name="✨ Special Roll",
+                            value="🎉 **Critical Success!**",
+                            inline=False
+                        )
+                    elif face == 1:
+                        final_embed.add_field(
+                            name="✨ Special Roll",
+                            value="💔 **Critical Failure!**",
+                            inline=False
+                        )
             
             # Add footer
             final_embed.set_footer(text=f"Rolled by {interaction.user.name}")
             
-            # Send final result
-            await message.edit(embed=final_embed)
+            # One message with the result; no animation edits
+            await interaction.followup.send(embed=final_embed, ephemeral=True)
             
         except Exception as e:
             logger.error(f"Error in diceroll command: {str(e)}")
             await interaction.followup.send("❌ An error occurred while rolling the dice.", ephemeral=True)
 
     @bot.tree.command(name="coinflip", description="Flip a coin with a realistic animation")
+    @rate_limit("coinflip", 10, 60)
     async def coinflip(interaction: discord.Interaction):
         try:
             await interaction.response.defer(ephemeral=True)
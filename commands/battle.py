@@ -4,8 +4,11 @@ import asyncio
 import logging
 import time
 from discord import app_commands
-from utils.database import get_battle_stats, update_battle_stats, get_battle_leaderboard, update_user_balance, get_user_balance
-from collections import defaultdict
+from utils.database import get_battle_stats, update_battle_stats, get_battle_leaderboard, update_user_balance, get_user_balance, update_game_ratings
+from utils.leaderboard import LeaderboardView
+from utils.embeds import CachedEmbed, battle_player_block
+from utils.rating import rating_text
+from utils.ratelimit import rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +35,6 @@ POISON_AMOUNT = 5
 REGEN_AMOUNT = 5
 STUN_CHANCE = 0.25  # 25% chance to stun on attack
 
-# Cooldown tracking
-default_cooldowns = defaultdict(float)
-
 # Reward constants
 BASE_REWARD = 50  # Base reward for winning
 MOVE_REWARD = 5   # Reward per move in the battle
@@ -92,6 +92,12 @@ LOSE_MESSAGES = [
     "💀 {loser} has been defeated!",
     "😵 {loser} couldn't keep up!",
 ]
+MODE_DESCRIPTIONS = {
+    "poison": "☠️ Poison Mode: Both players lose 5 HP after every turn.",
+    "regen": "💧 Regen Mode: Both players heal 5 HP after every turn.",
+    "stun": "⚡ Stun Mode: Attacks have a chance to stun the opponent (skip their next turn).",
+    "blind": "👁️ Blind Mode: You can only see your own stats!"
+}
 
 class BattlePlayer:
     def __init__(self, user, is_bot=False):
@@ -146,6 +152,8 @@ class BattleGame:
         self.turn_start_time = None
         self.history = []  # List of (desc, timestamp)
         self.move_count = 0  # Track total number of moves
+        self._embed = CachedEmbed()
+        self._result_msg = None
 
     def current(self):
         return self.players[self.turn]
@@ -169,55 +177,43 @@ class BattleGame:
 
     def get_status_embed(self, timeout_left=None):
         p1, p2 = self.players
-        embed = discord.Embed(
-            title="⚔️ Battle!",
-            color=discord.Color.red() if self.is_over() else discord.Color.blurple()
-        )
-        def hp_bar(hp):
-            hp = max(0, hp)  # Never show negative HP
-            hearts = "❤️" * (hp // 10) + "🖤" * ((MAX_HP - hp) // 10)
-            return f"{hearts} ({hp}/{MAX_HP})"
-        def def_bar(defense):
-            shields = "🛡️" * defense + "⚪" * (MAX_DEF - defense)
-            return f"{shields} ({defense}/{MAX_DEF})"
-        def heal_bar(heals):
-            return f"{'💚' * heals}{'⬜' * (MAX_HEALS - heals)} ({heals}/{MAX_HEALS})"
+        fields = []
         # Blind mode: only show current player's stats
         if self.gamemode == "blind":
             current = self.current()
-            embed.add_field(name=f"{current.user.display_name}", value=f"HP: {hp_bar(current.hp)}\nDEF: {def_bar(current.defense)}\nHeals: {heal_bar(current.heals)}", inline=True)
-            embed.add_field(name="Opponent", value="❓ Stats are hidden in Blind Mode!", inline=True)
+            fields.append((f"{current.user.display_name}", battle_player_block(current.hp, current.defense, current.heals, MAX_HP, MAX_DEF, MAX_HEALS), True))
+            fields.append(("Opponent", "❓ Stats are hidden in Blind Mode!", True))
         else:
-            embed.add_field(name=f"{p1.user.display_name}", value=f"HP: {hp_bar(p1.hp)}\nDEF: {def_bar(p1.defense)}\nHeals: {heal_bar(p1.heals)}", inline=True)
-            embed.add_field(name=f"{p2.user.display_name}", value=f"HP: {hp_bar(p2.hp)}\nDEF: {def_bar(p2.defense)}\nHeals: {heal_bar(p2.heals)}", inline=True)
+            fields.append((f"{p1.user.display_name}", battle_player_block(p1.hp, p1.defense, p1.heals, MAX_HP, MAX_DEF, MAX_HEALS), True))
+            fields.append((f"{p2.user.display_name}", battle_player_block(p2.hp, p2.defense, p2.heals, MAX_HP, MAX_DEF, MAX_HEALS), True))
+        footer = None
         if self.is_over() and self.winner is not None and self.loser is not None:
-            result_msg = random.choice(WIN_MESSAGES).format(winner=self.winner.user.mention) + "\n" + \
-                         random.choice(LOSE_MESSAGES).format(loser=self.loser.user.mention) + "\n" + \
-                         f"Reason: {self.last_action_result}"
-            embed.add_field(name="Result", value=result_msg, inline=False)
+            # Pick the flavour text once so re-renders don't reshuffle it
+            if self._result_msg is None:
+                self._result_msg = random.choice(WIN_MESSAGES).format(winner=self.winner.user.mention) + "\n" + \
+                                   random.choice(LOSE_MESSAGES).format(loser=self.loser.user.mention) + "\n" + \
+                                   f"Reason: {self.last_action_result}"
+            fields.append(("Result", self._result_msg, False))
         else:
             turn_text = f"It's {self.current().user.mention}'s turn!"
             if self.gamemode == "stun" and self.current().stunned:
                 turn_text += " (Stunned, skips turn!)"
-            embed.add_field(name="Turn", value=turn_text, inline=False)
+            fields.append(("Turn", turn_text, False))
             if timeout_left is not None:
                 hourglasses = "⏳" * (timeout_left // 2)
                 footer = f"{timeout_left}s left | {hourglasses}"
                 if timeout_left <= 5:
                     footer += "  ⚠️ Hurry up!"
-                embed.set_footer(text=footer)
-        if self.last_action_desc:
-            embed.description = self.last_action_desc
         # Add mode info
-        if self.gamemode in ["poison", "regen", "stun", "blind"]:
-            mode_desc = {
-                "poison": "☠️ Poison Mode: Both players lose 5 HP after every turn.",
-                "regen": "💧 Regen Mode: Both players heal 5 HP after every turn.",
-                "stun": "⚡ Stun Mode: Attacks have a chance to stun the opponent (skip their next turn).",
-                "blind": "👁️ Blind Mode: You can only see your own stats!"
-            }[self.gamemode]
-            embed.add_field(name="Game Mode", value=mode_desc, inline=False)
-        return embed
+        if self.gamemode in MODE_DESCRIPTIONS:
+            fields.append(("Game Mode", MODE_DESCRIPTIONS[self.gamemode], False))
+        return self._embed.render(
+            title="⚔️ Battle!",
+            description=self.last_action_desc or None,
+            color=discord.Color.red() if self.is_over() else discord.Color.blurple(),
+            fields=fields,
+            footer=footer
+        )
 
 class BattleView(discord.ui.View):
     def __init__(self, game, ctx, supabase, interaction, bot):
@@ -298,21 +294,24 @@ class BattleView(discord.ui.View):
                 self.running = False # Stop loops if message is gone
     
     async def finish_battle(self):
-        if not self.game.running:
+        # game.end() has already stopped the game; the view flag makes this run once
+        if not self.running:
             return
             
         self.running = False
         
         # Update battle stats in database
-        guild_id = str(self.interaction.guild.id) if self.interaction and hasattr(self.interaction, 'guild') and self.interaction.guild else None
+        source = self.interaction or self.ctx
+        guild_id = str(source.guild.id) if source and hasattr(source, 'guild') and source.guild else None
         
         if guild_id and not (self.game.winner.is_bot and self.game.loser.is_bot):
             # Only update stats and rewards for battles with at least one human player
             if not self.game.winner.is_bot or not self.game.loser.is_bot:
                 # Update winner stats and get reward info
+                winner_id = str(self.game.winner.user.id)
+                loser_id = str(self.game.loser.user.id)
                 if not self.game.winner.is_bot:
-                    winner_stats = update_battle_stats(self.supabase, guild_id, str(self.game.winner.user.id), "win")
-                    winner_balance = update_user_balance(self.supabase, guild_id, str(self.game.winner.user.id), "hxc", "battle_win")
+                    winner_stats = update_battle_stats(self.supabase, guild_id, winner_id, "win")
                     
                     # Calculate rewards
                     base_reward = BASE_REWARD
@@ -324,20 +323,26 @@ class BattleView(discord.ui.View):
                     streak_bonus = int((base_reward * streak_bonus_pct) / 100)
                     
                     total_reward = base_reward + move_bonus + streak_bonus
+                    update_user_balance(self.supabase, winner_id, total_reward)
+                    winner_balance = get_user_balance(self.supabase, winner_id)
                     
                     # Update loser stats and apply penalty (if human)
                     if not self.game.loser.is_bot:
-                        loser_stats = update_battle_stats(self.supabase, guild_id, str(self.game.loser.user.id), "loss")
-                        loser_balance = update_user_balance(self.supabase, guild_id, str(self.game.loser.user.id), "hxc", "battle_loss")
+                        update_battle_stats(self.supabase, guild_id, loser_id, "loss")
+                        update_user_balance(self.supabase, loser_id, LOSER_PENALTY, "subtract")
+                        loser_balance = get_user_balance(self.supabase, loser_id)
                         penalty = LOSER_PENALTY
+                        # Ratings only move in PvP games
+                        update_game_ratings(self.supabase, "battle", guild_id, winner_id, loser_id, 1)
                     else:
-                        loser_balance = get_user_balance(self.supabase, guild_id, str(self.game.loser.user.id), "hxc")
+                        loser_balance = {"balance": 0}
                         penalty = 0
                 else:
                     # If winner is a bot, just update the human loser's stats
                     if not self.game.loser.is_bot:
-                        loser_stats = update_battle_stats(self.supabase, guild_id, str(self.game.loser.user.id), "loss")
-                        loser_balance = update_user_balance(self.supabase, guild_id, str(self.game.loser.user.id), "hxc", "battle_loss")
+                        update_battle_stats(self.supabase, guild_id, loser_id, "loss")
+                        update_user_balance(self.supabase, loser_id, LOSER_PENALTY, "subtract")
+                        loser_balance = get_user_balance(self.supabase, loser_id)
                         penalty = LOSER_PENALTY
                     else:
                         loser_balance = {"balance": 0}
@@ -347,6 +352,7 @@ class BattleView(discord.ui.View):
                     base_reward = 0
                     move_bonus = 0
                     streak_bonus = 0
+                    streak_bonus_pct = 0
                     total_reward = 0
                     winner_balance = {"balance": 0}
                 
@@ -530,6 +536,9 @@ class BattleView(discord.ui.View):
         # Check for game over
         if not opp.is_alive():
             self.game.end(player, opp, reason="knockout")
+        elif not player.is_alive():
+            # Poison can knock out the attacker on their own turn
+            self.game.end(opp, player, reason="knockout")
         self._turn_event.set()
         # This needs to happen before finish_battle but after the event is set
         await self.update_message()
@@ -583,6 +592,22 @@ class BattleView(discord.ui.View):
             except Exception:
                 pass
 
+async def start_battle(channel, user1, user2, supabase, bot, gamemode="normal"):
+    """Start a PvP battle in the given channel without an invite (used by matchmaking)."""
+    p1 = BattlePlayer(user1)
+    p2 = BattlePlayer(user2)
+    game = BattleGame(p1, p2, gamemode=gamemode)
+    active_battles[user1.id] = game
+    active_battles[user2.id] = game
+    # The channel stands in for the command context so finish_battle can find the guild
+    view = BattleView(game, channel, supabase, None, bot)
+    view.message = await channel.send(
+        f"⚔️ {user1.mention} vs {user2.mention}",
+        embed=game.get_status_embed(timeout_left=TURN_TIMEOUT),
+        view=view
+    )
+    return game
+
 def setup(bot, supabase):
     @bot.tree.command(name="battle", description="Challenge another user or the bot to a battle!")
     @app_commands.describe(opponent="The user you want to battle", gamemode="Game mode: normal, nohealing, poison, blind, regen, stun")
@@ -594,14 +619,8 @@ def setup(bot, supabase):
         app_commands.Choice(name="Regen", value="regen"),
         app_commands.Choice(name="Stun", value="stun"),
     ])
+    @rate_limit("battle", 1, 30)
     async def battle(interaction: discord.Interaction, opponent: discord.Member, gamemode: app_commands.Choice[str] = None):
-        # Cooldown check
-        now = time.time()
-        if default_cooldowns[interaction.user.id] > now:
-            wait = int(default_cooldowns[interaction.user.id] - now)
-            await interaction.response.send_message(f"⏳ Please wait {wait}s before starting another battle.", ephemeral=True)
-            return
-        default_cooldowns[interaction.user.id] = now + 30
         gamemode_val = gamemode.value if gamemode else "normal"
         if opponent.id == interaction.user.id:
             await interaction.response.send_message("❌ You can't battle yourself!", ephemeral=True)
@@ -726,41 +745,48 @@ def setup(bot, supabase):
             await interaction.followup.send("This command can only be used in a server.")
             return
         try:
-            leaderboard_data = get_battle_leaderboard(supabase, guild_id, 10)
-            if not leaderboard_data:
+            async def render_page(rows, first_rank):
+                embed = discord.Embed(
+                    title="⚔️ Battle Leaderboard 🏆",
+                    description="Players ranked by rating",
+                    color=discord.Color.red()
+                )
+                if interaction.guild.icon:
+                    embed.set_thumbnail(url=interaction.guild.icon.url)
+                embed.set_author(name=interaction.guild.name)
+                embed.set_footer(text=f"Requested by {interaction.user.name}", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
+                leaderboard_text = ""
+                bot_marks = set()
+                for i, player_data in enumerate(rows, first_rank):
+                    user_id = int(player_data.get("user_id", "0"))
+                    member = interaction.guild.get_member(user_id)
+                    is_bot = member.bot if member else False
+                    display_name = member.display_name if member else f"Unknown Player"
+                    wins = player_data.get("wins", 0)
+                    losses = player_data.get("losses", 0)
+                    total = player_data.get("total_games", 0)
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                    mark = " 🤖" if is_bot else ""
+                    if is_bot:
+                        bot_marks.add(i)
+                    leaderboard_text += f"**{medal} {display_name}{mark}**\n"
+                    leaderboard_text += f"┣ Rating: **{rating_text(player_data)}**\n"
+                    leaderboard_text += f"┣ Wins: **{wins}** ┃ Losses: **{losses}**\n"
+                    leaderboard_text += f"┗ Total Games: **{total}**\n\n"
+                embed.description = f"Players ranked by rating\n\n{leaderboard_text}"
+                if bot_marks:
+                    embed.add_field(name="Bot Players", value=f"Players marked with 🤖 are bots.", inline=False)
+                return embed
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_battle_leaderboard(supabase, guild_id, limit, after),
+                render_page
+            )
+            embed = await view.start()
+            if embed is None:
                 await interaction.followup.send("No one has played Battle yet!")
                 return
-            embed = discord.Embed(
-                title="⚔️ Battle Leaderboard 🏆",
-                description="Top 10 players ranked by wins",
-                color=discord.Color.red()
-            )
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
-            embed.set_author(name=interaction.guild.name)
-            embed.set_footer(text=f"Requested by {interaction.user.name}", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
-            leaderboard_text = ""
-            bot_marks = set()
-            for i, player_data in enumerate(leaderboard_data, 1):
-                user_id = int(player_data.get("user_id", "0"))
-                member = interaction.guild.get_member(user_id)
-                is_bot = member.bot if member else False
-                display_name = member.display_name if member else f"Unknown Player"
-                wins = player_data.get("wins", 0)
-                losses = player_data.get("losses", 0)
-                total = player_data.get("total_games", 0)
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
-                mark = " 🤖" if is_bot else ""
-                if is_bot:
-                    bot_marks.add(i)
-                leaderboard_text += f"**{medal} {display_name}{mark}**\n"
-                leaderboard_text += f"┣ Wins: **{wins}** ┃ Losses: **{losses}**\n"
-                leaderboard_text += f"┗ Total Games: **{total}**\n\n"
-            embed.description = f"Top 10 players ranked by wins\n\n{leaderboard_text}"
-            if bot_marks:
-                bot_indices = ", ".join(f"#{idx}" for idx in sorted(bot_marks))
-                embed.add_field(name="Bot Players", value=f"Players marked with 🤖 are bots.", inline=False)
-            await interaction.followup.send(embed=embed)
+            await view.send(interaction, embed)
         except Exception as e:
             logger.error(f"Failed to get Battle leaderboard: {str(e)}")
             await interaction.followup.send("⚠️ Could not retrieve the leaderboard due to an error.") 
\ No newline at end of file
@@ -1,14 +1,38 @@
+import asyncio
 import discord
 from discord import app_commands
 import logging
-from utils.database import get_user_balance, update_user_balance, get_economy_leaderboard, can_claim_reward, claim_reward
+from utils.database import get_user_balance, update_user_balance, get_economy_leaderboard, get_user_rank, refresh_economy_top, claim_reward, ECONOMY_TOP_SIZE
+from utils.leaderboard import LeaderboardView
 
 logger = logging.getLogger(__name__)
 
 # HXC Emoji - Replace with your actual emoji ID from Discord Developer Portal
 HXC_EMOJI = "<:hxc:1408428556308189378>"  # Replace YOUR_EMOJI_ID_HERE with actual ID
 
+def format_time_left(seconds):
+    """Cooldown remaining as "5h 12m" or "12m"."""
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, _ = divmod(remainder, 60)
+    return f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+
+LEADERBOARD_REFRESH_INTERVAL = 300  # Seconds between economy_top refreshes
+
+async def refresh_leaderboard_loop(supabase):
+    """Keep the economy_top view current; the supabase client is synchronous, so run it off the event loop."""
+    while True:
+        await asyncio.to_thread(refresh_economy_top, supabase)
+        await asyncio.sleep(LEADERBOARD_REFRESH_INTERVAL)
+
 def setup(bot, supabase):
+    refresh_task = None
+
+    @bot.listen("on_ready")
+    async def start_leaderboard_refresh():
+        nonlocal refresh_task
+        if refresh_task is None or refresh_task.done():
+            refresh_task = asyncio.create_task(refresh_leaderboard_loop(supabase))
+
     @bot.tree.command(name="balance", description="Check your HXC (HexxaCoin) balance")
     @app_commands.describe(user="User to check balance for (optional)")
     async def balance(interaction: discord.Interaction, user: discord.Member = None):
@@ -44,6 +68,10 @@ def setup(bot, supabase):
             if balance < 0:
                 balance_text = f"🚨 **DEBT: {abs(balance):,}** {HXC_EMOJI} 🚨"
                 
+            rank = get_user_rank(supabase, str(target_user.id))
+            if rank:
+                balance_text += f"\n🏆 Rank **#{rank['rank']:,}** of {rank['total']:,}"
+                
             embed.add_field(
                 name="🪙 Current Balance", 
                 value=f"\n{balance_text}\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 
@@ -84,48 +112,70 @@ def setup(bot, supabase):
             await interaction.response.send_message("❌ An error occurred while retrieving balance.", ephemeral=True)
 
     @bot.tree.command(name="leaderboard", description="View the HXC leaderboard")
-    @app_commands.describe(limit="Number of users to show (1-25, default: 10)")
-    async def leaderboard(interaction: discord.Interaction, limit: int = 10):
+    @app_commands.describe(
+        limit="Users per page (1-25, default: 10)",
+        page="Page of the leaderboard to show (default: 1)"
+    )
+    async def leaderboard(interaction: discord.Interaction, limit: int = 10, page: int = 1):
         """Show the economy leaderboard."""
         try:
             # Validate limit
             if limit < 1 or limit > 25:
                 await interaction.response.send_message("❌ Limit must be between 1 and 25.", ephemeral=True)
                 return
-                
-            leaderboard_data = get_economy_leaderboard(supabase, limit)
-            
-            if not leaderboard_data:
-                await interaction.response.send_message("❌ No economy data found.", ephemeral=True)
+            if page < 1:
+                await interaction.response.send_message("❌ Page must be 1 or higher.", ephemeral=True)
                 return
-            
-            embed = discord.Embed(
-                title="🏆 HexxaCoin Leaderboard",
-                description="Top users by HXC balance",
-                color=0xffd700
+                
+            offset = (page - 1) * limit
+
+            async def render_page(rows, first_rank):
+                embed = discord.Embed(
+                    title="🏆 HexxaCoin Leaderboard",
+                    description="Top users by HXC balance",
+                    color=0xffd700
+                )
+                
+                leaderboard_text = ""
+                medals = ["🥇", "🥈", "🥉"]
+                
+                for position, user_data in enumerate(rows, first_rank - 1):
+                    try:
+                        user = bot.get_user(int(user_data["user_id"]))
+                        username = user.display_name if user else f"User {user_data['user_id'][:8]}..."
+                        
+                        medal = medals[position] if position < 3 else f"**{position+1}.**"
+                        balance = user_data["balance"]
+                        
+                        leaderboard_text += f"{medal} {username} - **{balance:,}** {HXC_EMOJI}\n"
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing user {user_data['user_id']}: {str(e)}")
+                        continue
+                
+                embed.description = leaderboard_text if leaderboard_text else "No users found."
+                footer = f"Requested by {interaction.user.display_name}"
+                # Rows carry a rank only when they came from the economy_top snapshot
+                if "rank" in rows[0]:
+                    footer += f" • Top {ECONOMY_TOP_SIZE:,} updated every {LEADERBOARD_REFRESH_INTERVAL // 60} minutes"
+                embed.set_footer(text=footer)
+                return embed
+
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, page_limit: get_economy_leaderboard(supabase, page_limit, after=after),
+                render_page,
+                page_size=limit,
+                first_rank=offset + 1
             )
+            embed = await view.start(await asyncio.to_thread(get_economy_leaderboard, supabase, limit + 1, offset))
             
-            leaderboard_text = ""
-            medals = ["🥇", "🥈", "🥉"]
-            
-            for i, user_data in enumerate(leaderboard_data):
-                try:
-                    user = bot.get_user(int(user_data["user_id"]))
-                    username = user.display_name if user else f"User {user_data['user_id'][:8]}..."
-                    
-                    medal = medals[i] if i < 3 else f"**{i+1}.**"
-                    balance = user_data["balance"]
-                    
-                    leaderboard_text += f"{medal} {username} - **{balance:,}** {HXC_EMOJI}\n"
-                    
-                except Exception as e:
-                    logger.error(f"Error processing user {user_data['user_id']}: {str(e)}")
-                    continue
-            
-            embed.description = leaderboard_text if leaderboard_text else "No users found."
-            embed.set_footer(text=f"Requested by {interaction.user.display_name}")
+            if embed is None:
+                message = "❌ That page is past the end of the leaderboard." if page > 1 else "❌ No economy data found."
+                await interaction.response.send_message(message, ephemeral=True)
+                return
             
-            await interaction.response.send_message(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Error in leaderboard command: {str(e)}")
@@ -137,10 +187,15 @@ def setup(bot, supabase):
         try:
             user_id = str(interaction.user.id)
             
-            # Check if user can claim
-            can_claim, time_left, current_streak = can_claim_reward(supabase, user_id, "daily")
+            # Cooldown check, streak and payout happen in one database call
+            result = claim_reward(supabase, user_id, "daily")
+            if not result:
+                await interaction.response.send_message("❌ Failed to claim daily reward. Please try again.", ephemeral=True)
+                return
             
-            if not can_claim:
+            if result["status"] == "cooldown":
+                time_left = format_time_left(result["seconds_left"])
+                current_streak = result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n⏰ **DAILY REWARD COOLDOWN** ⏰\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -160,10 +215,8 @@ def setup(bot, supabase):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
             
-            # Claim the reward
-            success, reward_amount, new_streak = claim_reward(supabase, user_id, "daily")
-            
-            if success:
+            if result["status"] == "claimed":
+                reward_amount, new_streak = result["amount"], result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n🎉 **DAILY REWARD CLAIMED** 🎉\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -180,8 +233,7 @@ def setup(bot, supabase):
                     inline=True
                 )
                 
-                # Calculate streak bonus percentage
-                streak_bonus = min((new_streak - 1) * 10, 100)
+                streak_bonus = result["bonus"]
                 if streak_bonus > 0:
                     embed.add_field(
                         name="⚡ Streak Bonus",
@@ -209,10 +261,15 @@ def setup(bot, supabase):
         try:
             user_id = str(interaction.user.id)
             
-            # Check if user can claim
-            can_claim, time_left, current_streak = can_claim_reward(supabase, user_id, "monthly")
+            # Cooldown check, streak and payout happen in one database call
+            result = claim_reward(supabase, user_id, "monthly")
+            if not result:
+                await interaction.response.send_message("❌ Failed to claim monthly reward. Please try again.", ephemeral=True)
+                return
             
-            if not can_claim:
+            if result["status"] == "cooldown":
+                time_left = format_time_left(result["seconds_left"])
+                current_streak = result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n⏰ **MONTHLY REWARD COOLDOWN** ⏰\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -232,10 +289,8 @@ def setup(bot, supabase):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
             
-            # Claim the reward
-            success, reward_amount, new_streak = claim_reward(supabase, user_id, "monthly")
-            
-            if success:
+            if result["status"] == "claimed":
+                reward_amount, new_streak = result["amount"], result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n🎊 **MONTHLY REWARD CLAIMED** 🎊\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -252,8 +307,7 @@ def setup(bot, supabase):
                     inline=True
                 )
                 
-                # Calculate streak bonus percentage
-                streak_bonus = min((new_streak - 1) * 10, 100)
+                streak_bonus = result["bonus"]
                 if streak_bonus > 0:
                     embed.add_field(
                         name="⚡ Streak Bonus",
@@ -281,10 +335,15 @@ def setup(bot, supabase):
         try:
             user_id = str(interaction.user.id)
             
-            # Check if user can claim
-            can_claim, time_left, current_streak = can_claim_reward(supabase, user_id, "yearly")
+            # Cooldown check, streak and payout happen in one database call
+            result = claim_reward(supabase, user_id, "yearly")
+            if not result:
+                await interaction.response.send_message("❌ Failed to claim yearly reward. Please try again.", ephemeral=True)
+                return
             
-            if not can_claim:
+            if result["status"] == "cooldown":
+                time_left = format_time_left(result["seconds_left"])
+                current_streak = result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n⏰ **YEARLY REWARD COOLDOWN** ⏰\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -304,10 +363,8 @@ def setup(bot, supabase):
                 await interaction.response.send_message(embed=embed, ephemeral=True)
                 return
             
-            # Claim the reward
-            success, reward_amount, new_streak = claim_reward(supabase, user_id, "yearly")
-            
-            if success:
+            if result["status"] == "claimed":
+                reward_amount, new_streak = result["amount"], result["streak"]
                 embed = discord.Embed(
                     title="🏛️ Social Economical Service (SES)",
                     description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n🏆 **YEARLY REWARD CLAIMED** 🏆\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
@@ -324,8 +381,7 @@ def setup(bot, supabase):
                     inline=True
                 )
                 
-                # Calculate streak bonus percentage
-                streak_bonus = min((new_streak - 1) * 10, 100)
+                streak_bonus = result["bonus"]
                 if streak_bonus > 0:
                     embed.add_field(
                         name="⚡ Streak Bonus",
@@ -4,8 +4,11 @@ import asyncio
 import logging
 import time
 from discord import app_commands
-from utils.database import get_flipnfind_stats, update_flipnfind_stats, get_flipnfind_leaderboard, create_flipnfind_table
-from collections import defaultdict
+from utils.database import get_flipnfind_stats, get_flipnfind_stats_by_difficulty, update_flipnfind_stats, update_game_ratings, get_flipnfind_leaderboard
+from utils.leaderboard import LeaderboardView
+from utils.embeds import CachedEmbed, flipnfind_player_block
+from utils.streaming import RunningStats, spread_text
+from utils.ratelimit import rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +23,6 @@ TIMED_MODE_DURATION = 90  # Increased for more fun
 INVITE_TIMEOUT = 60
 STAR_CARD_EMOJI = "⭐"
 
-# Cooldown tracking
-default_cooldowns = defaultdict(float)
-
 # --- Only the relevant changes are shown below ---
 # 1. Update constants and difficulty definitions
 DIFFICULTY_CONFIG = {
@@ -32,7 +32,28 @@ DIFFICULTY_CONFIG = {
     "extreme": {"grid": 5, "timed": True, "time_limit": 120},
 }
 
+# Card faces used on the board. CARD_EMOJIS contains a few repeats, so the
+# palette keeps the first occurrence of each emoji to guarantee that two
+# different pairs never share a face.
+CARD_PALETTE = tuple(dict.fromkeys(CARD_EMOJIS)) + (STAR_CARD_EMOJI,)
+STAR_FACE = len(CARD_PALETTE) - 1
+
 class FlipnFindGame:
+    """Flip & Find engine backed by flat per-cell arrays.
+
+    Cell ``idx`` maps to ``(idx // grid_size, idx % grid_size)``. ``faces`` holds
+    an index into CARD_PALETTE and ``revealed``/``matched``/``star_claimed`` are
+    0/1 flags, so flipping a card and checking for game over are O(1).
+    """
+
+    __slots__ = (
+        "players", "scores", "star_cards", "current_player", "difficulty",
+        "grid_size", "timed", "time_limit", "winner", "running", "start_time",
+        "turns", "faces", "revealed", "matched", "star_claimed",
+        "remaining_pairs", "stars_left", "first_selection", "is_processing",
+        "last_action_desc", "_dirty",
+    )
+
     def __init__(self, p1, p2, difficulty="easy"):
         config = DIFFICULTY_CONFIG[difficulty]
         self.players = [p1, p2]
@@ -47,7 +68,7 @@ class FlipnFindGame:
         self.running = True
         self.start_time = time.time()
         self.turns = 0
-        self.board = self._create_board()
+        self._create_board()
         self.first_selection = None
         self.is_processing = False
         self.last_action_desc = "The game has started!"
@@ -55,33 +76,46 @@ class FlipnFindGame:
     def _create_board(self):
         total_cells = self.grid_size * self.grid_size
         pair_count = total_cells // 2
-        emojis = random.sample(CARD_EMOJIS, pair_count) * 2
+        faces = random.sample(range(STAR_FACE), pair_count) * 2
         # Only add star card in Hard/Extreme (5x5)
         if self.grid_size == 5:
-            emojis.append(STAR_CARD_EMOJI)
-        random.shuffle(emojis)
-        board = []
-        for r in range(self.grid_size):
-            row = []
-            for c in range(self.grid_size):
-                emoji = emojis.pop()
-                row.append({'emoji': emoji, 'revealed': False, 'matched': False, 'star_claimed': False})
-            board.append(row)
-        return board
+            faces.append(STAR_FACE)
+        random.shuffle(faces)
+        self.faces = faces
+        self.revealed = bytearray(total_cells)
+        self.matched = bytearray(total_cells)
+        self.star_claimed = bytearray(total_cells)
+        self.remaining_pairs = pair_count
+        self.stars_left = total_cells - pair_count * 2
+        # Every cell starts dirty so the first render draws the whole board
+        self._dirty = set(range(total_cells))
+
+    def index(self, row, col):
+        return row * self.grid_size + col
+
+    def emoji(self, idx):
+        return CARD_PALETTE[self.faces[idx]]
+
+    def take_dirty(self):
+        """Return the cells changed since the last call and reset the set."""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
 
     def flip_card(self, row, col):
-        card = self.board[row][col]
-        if card['revealed'] or card['matched'] or card.get('star_claimed', False):
+        idx = self.index(row, col)
+        if self.revealed[idx] or self.matched[idx] or self.star_claimed[idx]:
             return None
-        card['revealed'] = True
+        self.revealed[idx] = 1
+        self._dirty.add(idx)
         # Only process star card in Hard/Extreme
-        if self.grid_size == 5 and card['emoji'] == STAR_CARD_EMOJI:
-            card['star_claimed'] = True
+        if self.faces[idx] == STAR_FACE:
+            self.star_claimed[idx] = 1
+            self.stars_left -= 1
             self.star_cards[self.current_player.id] += 1
             self.last_action_desc = f"🌟 {self.current_player.mention} found the Star Card! Turn ends."
             return "star_card"
-        if not self.first_selection:
-            self.first_selection = (row, col)
+        if self.first_selection is None:
+            self.first_selection = idx
             self.last_action_desc = f"{self.current_player.mention} flipped a card. What's the match?"
             return "first_card"
         else:
@@ -89,12 +123,14 @@ class FlipnFindGame:
             return self.check_match(row, col)
 
     def check_match(self, r2, c2):
-        r1, c1 = self.first_selection
-        card1 = self.board[r1][c1]
-        card2 = self.board[r2][c2]
-        if card1['emoji'] == card2['emoji']:
-            card1['matched'] = True
-            card2['matched'] = True
+        first = self.first_selection
+        second = self.index(r2, c2)
+        if self.faces[first] == self.faces[second]:
+            self.matched[first] = 1
+            self.matched[second] = 1
+            self._dirty.add(first)
+            self._dirty.add(second)
+            self.remaining_pairs -= 1
             self.scores[self.current_player.id] += 1
             self.first_selection = None
             self.last_action_desc = f"🎉 **Match found!** {self.current_player.mention} gets another turn."
@@ -106,20 +142,24 @@ class FlipnFindGame:
             return "no_match"
 
     def hide_cards(self, r2, c2):
-        r1, c1 = self.first_selection
-        self.board[r1][c1]['revealed'] = False
-        self.board[r2][c2]['revealed'] = False
+        first = self.first_selection
+        second = self.index(r2, c2)
+        self.revealed[first] = 0
+        self.revealed[second] = 0
+        self._dirty.add(first)
+        self._dirty.add(second)
         self.first_selection = None
 
+    def hide_card(self, row, col):
+        idx = self.index(row, col)
+        self.revealed[idx] = 0
+        self._dirty.add(idx)
+
     def next_turn(self):
         self.current_player = self.players[1] if self.current_player == self.players[0] else self.players[0]
 
     def is_game_over(self):
-        for row in self.board:
-            for card in row:
-                if not card['matched'] and not card.get('star_claimed', False):
-                    return False
-        return True
+        return self.remaining_pairs == 0 and self.stars_left == 0
 
     def end_game(self, reason="completed"):
         if not self.running: return
@@ -144,42 +184,56 @@ class FlipnFindView(discord.ui.View):
         self.channel = channel
         self.bot = bot
         self.message = None
+        self._embed = CachedEmbed()
         self._turn_event = asyncio.Event()
         self._turn_loop_task = asyncio.create_task(self.turn_loop())
         self._build_buttons()
 
     def _build_buttons(self):
         self.clear_items()
+        self._cell_buttons = []
         for r in range(self.game.grid_size):
             for c in range(self.game.grid_size):
                 button = discord.ui.Button(style=discord.ButtonStyle.secondary, label="❓", row=r, custom_id=f"flip_{r}_{c}")
                 button.callback = self.button_callback
                 self.add_item(button)
+                self._cell_buttons.append(button)
+        self._last_disable_all = False
+        self._quit_button = None
+        # A 5x5 board already uses all 25 component slots, so there is no room for Quit
+        if len(self.children) >= 25:
+            return
         # Place the quit button on the last row
-        quit_button = discord.ui.Button(label="Quit", style=discord.ButtonStyle.danger, row=self.game.grid_size if self.game.grid_size < 5 else 4, custom_id="quit")
+        quit_button = discord.ui.Button(label="Quit", style=discord.ButtonStyle.danger, row=self.game.grid_size, custom_id="quit")
         quit_button.callback = self.quit_callback
         self.add_item(quit_button)
+        self._quit_button = quit_button
 
     def _update_buttons_state(self, disable_all=False):
-        for r in range(self.game.grid_size):
-            for c in range(self.game.grid_size):
-                idx = r * self.game.grid_size + c
-                button = self.children[idx]
-                card = self.game.board[r][c]
-                if card['matched']:
-                    button.style = discord.ButtonStyle.success
-                    button.label = card['emoji']
-                    button.disabled = True
-                elif card['revealed']:
-                    button.style = discord.ButtonStyle.primary
-                    button.label = card['emoji']
-                    button.disabled = True if disable_all else False
-                else:
-                    button.style = discord.ButtonStyle.secondary
-                    button.label = "❓"
-                    button.disabled = disable_all
+        # Only cells the game marked dirty need restyling, unless the
+        # disable_all flag flipped, which touches every unmatched cell.
+        dirty = self.game.take_dirty()
+        if disable_all != self._last_disable_all:
+            dirty = range(len(self._cell_buttons))
+            self._last_disable_all = disable_all
+        game = self.game
+        for idx in dirty:
+            button = self._cell_buttons[idx]
+            if game.matched[idx]:
+                button.style = discord.ButtonStyle.success
+                button.label = game.emoji(idx)
+                button.disabled = True
+            elif game.revealed[idx]:
+                button.style = discord.ButtonStyle.primary
+                button.label = game.emoji(idx)
+                button.disabled = disable_all
+            else:
+                button.style = discord.ButtonStyle.secondary
+                button.label = "❓"
+                button.disabled = disable_all
         # Quit button is always enabled unless game is over
-        self.children[-1].disabled = not self.game.running
+        if self._quit_button:
+            self._quit_button.disabled = not self.game.running
 
     async def update_view(self, interaction: discord.Interaction = None, timeout_left=None, disable_all=False):
         embed = self.create_embed(timeout_left)
@@ -194,30 +248,34 @@ class FlipnFindView(discord.ui.View):
 
     def create_embed(self, timeout_left=None):
         p1, p2 = self.game.players
-        embed = discord.Embed(title="🎴 Flip & Find", color=discord.Color.blue())
-        embed.description = self.game.last_action_desc
-        if self.game.grid_size == 5:
-            embed.add_field(name=f"__Player 1:__ {p1.display_name}", value=f"**Pairs: {self.game.scores[p1.id]}**\n🌟 Star Cards: {self.game.star_cards[p1.id]}", inline=True)
-            embed.add_field(name=f"__Player 2:__ {p2.display_name}", value=f"**Pairs: {self.game.scores[p2.id]}**\n🌟 Star Cards: {self.game.star_cards[p2.id]}", inline=True)
-        else:
-            embed.add_field(name=f"__Player 1:__ {p1.display_name}", value=f"**Pairs: {self.game.scores[p1.id]}**", inline=True)
-            embed.add_field(name=f"__Player 2:__ {p2.display_name}", value=f"**Pairs: {self.game.scores[p2.id]}**", inline=True)
-        embed.add_field(name="Grid Size", value=f"{self.game.grid_size}x{self.game.grid_size}", inline=True)
+        fields = [
+            (f"__Player 1:__ {p1.display_name}", self._player_block(p1), True),
+            (f"__Player 2:__ {p2.display_name}", self._player_block(p2), True),
+            ("Grid Size", f"{self.game.grid_size}x{self.game.grid_size}", True),
+        ]
+        footer_text = None
         if self.game.running:
-            embed.add_field(name="Current Turn", value=self.game.current_player.mention, inline=False)
+            description = self.game.last_action_desc
+            color = discord.Color.blue()
+            fields.append(("Current Turn", self.game.current_player.mention, False))
             footer_text = f"Difficulty: {self.game.difficulty.title()} | Grid: {self.game.grid_size}x{self.game.grid_size}"
             if self.game.timed:
                 footer_text += f" | Time Limit: {self.game.time_limit}s"
             if timeout_left is not None:
                 footer_text += f" | Time left: {timeout_left}s ⏳"
-            embed.set_footer(text=footer_text)
         else:
             if self.game.winner:
-                embed.description = f"🎉 **{self.game.winner.mention} wins the game!**"
+                description = f"🎉 **{self.game.winner.mention} wins the game!**"
             else:
-                embed.description = "🤝 **It's a tie!**"
-            embed.color = discord.Color.gold()
-        return embed
+                description = "🤝 **It's a tie!**"
+            color = discord.Color.gold()
+        return self._embed.render(title="🎴 Flip & Find", description=description, color=color, fields=fields, footer=footer_text)
+
+    def _player_block(self, player):
+        pairs = self.game.scores[player.id]
+        if self.game.grid_size == 5:
+            return flipnfind_player_block(pairs, self.game.star_cards[player.id])
+        return flipnfind_player_block(pairs)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id == self.game.current_player.id:
@@ -278,7 +336,7 @@ class FlipnFindView(discord.ui.View):
         if result == "star_card":
             await self.update_view(interaction, disable_all=True)
             await asyncio.sleep(1.2)
-            self.game.board[r][c]['revealed'] = False
+            self.game.hide_card(r, c)
             await self.update_view()
             self.game.next_turn()
             self._turn_event.set()
@@ -310,12 +368,11 @@ class FlipnFindView(discord.ui.View):
         self._turn_loop_task.cancel()
         for child in self.children:
             child.disabled = True
-        await self.update_view(interaction)
+        await self.update_view(interaction, disable_all=True)
         guild_id = self.channel.guild.id
         game_time = time.time() - self.game.start_time
         p1 = self.game.players[0]
         p2 = self.game.players[1]
-        create_flipnfind_table(self.supabase, guild_id)
         if self.game.winner:
             winner = self.game.winner
             loser = p2 if winner.id == p1.id else p1
@@ -326,9 +383,23 @@ class FlipnFindView(discord.ui.View):
         else:
             if not p1.bot: update_flipnfind_stats(self.supabase, guild_id, f"{p1.id}_{self.game.difficulty}", "loss", game_time, self.game.turns, star_cards=self.game.star_cards[p1.id])
             if not p2.bot: update_flipnfind_stats(self.supabase, guild_id, f"{p2.id}_{self.game.difficulty}", "loss", game_time, self.game.turns, star_cards=self.game.star_cards[p2.id])
+        # Ratings are per difficulty, like the stats rows; a game with no winner rates as a draw
+        if not p1.bot and not p2.bot:
+            score = 0.5 if not self.game.winner else 1 if self.game.winner.id == p1.id else 0
+            update_game_ratings(self.supabase, "flipnfind", guild_id, f"{p1.id}_{self.game.difficulty}", f"{p2.id}_{self.game.difficulty}", score)
         active_games.pop(p1.id, None)
         active_games.pop(p2.id, None)
 
+async def start_flipnfind_game(channel, p1, p2, supabase, bot, difficulty="easy"):
+    """Start a game between two players in the given channel."""
+    active_games[p1.id] = True
+    active_games[p2.id] = True
+    game = FlipnFindGame(p1, p2, difficulty)
+    view = FlipnFindView(game, supabase, channel, bot)
+    msg = await channel.send(embed=view.create_embed(), view=view)
+    view.message = msg
+    return game
+
 def setup(bot, supabase):
     @bot.tree.command(name="flipnfind", description="Play Flip & Find with another user!")
     @app_commands.describe(opponent="The user you want to play against", difficulty="Choose difficulty: Easy, Medium, Hard, Extreme")
@@ -338,6 +409,7 @@ def setup(bot, supabase):
         app_commands.Choice(name="Hard (5x5, untimed)", value="hard"),
         app_commands.Choice(name="Extreme (5x5, 120s)", value="extreme"),
     ])
+    @rate_limit("flipnfind", 1, 30)
     async def flipnfind(interaction: discord.Interaction, opponent: discord.Member, difficulty: app_commands.Choice[str] = None):
         if opponent.bot:
             await interaction.response.send_message("❌ You cannot play Flip & Find against bots (yet 😉). Please choose a human opponent.", ephemeral=True)
@@ -352,14 +424,7 @@ def setup(bot, supabase):
         is_timed = config["timed"]
         channel = interaction.channel
         async def start_game():
-            p1 = interaction.user
-            p2 = opponent
-            active_games[p1.id] = True
-            active_games[p2.id] = True
-            game = FlipnFindGame(p1, p2, chosen)
-            view = FlipnFindView(game, supabase, channel, bot)
-            msg = await channel.send(embed=view.create_embed(), view=view)
-            view.message = msg
+            await start_flipnfind_game(channel, interaction.user, opponent, supabase, bot, chosen)
         if opponent.bot:
             await start_game()
         else:
@@ -423,8 +488,9 @@ def setup(bot, supabase):
         guild_id = interaction.guild_id
         stats_by_diff = {}
         total = {"wins": 0, "losses": 0, "total_games": 0, "best_time": None, "best_turns": None, "star_cards": 0}
+        rows = get_flipnfind_stats_by_difficulty(supabase, guild_id, target_user.id, DIFFICULTY_CONFIG.keys())
         for diff in DIFFICULTY_CONFIG.keys():
-            stats = get_flipnfind_stats(supabase, guild_id, f"{target_user.id}_{diff}")
+            stats = rows.get(diff)
             stats_by_diff[diff] = stats or {"wins": 0, "losses": 0, "total_games": 0, "best_time": None, "best_turns": None, "star_cards": 0}
             total["wins"] += stats_by_diff[diff]["wins"]
             total["losses"] += stats_by_diff[diff]["losses"]
@@ -436,34 +502,56 @@ def setup(bot, supabase):
             if stats_by_diff[diff]["best_turns"] is not None:
                 if total["best_turns"] is None or stats_by_diff[diff]["best_turns"] < total["best_turns"]:
                     total["best_turns"] = stats_by_diff[diff]["best_turns"]
+        def spread_lines(s):
+            analytics = s.get("analytics") or {}
+            lines = ""
+            if analytics.get("time"):
+                lines += f"\n⏱️ Time: {spread_text(analytics['time'], 's')}"
+                consistency = RunningStats(analytics["time"]).consistency()
+                if consistency is not None:
+                    lines += f"\n📐 Consistency: {consistency:.0f}%"
+            if analytics.get("turns"):
+                lines += f"\n🔁 Turns: {spread_text(analytics['turns'], digits=0)}"
+            return lines
+
         embed = discord.Embed(title=f"📊 {target_user.display_name}'s Flip & Find Stats", color=discord.Color.blue())
         embed.set_thumbnail(url=target_user.display_avatar.url)
         for diff, label in zip(DIFFICULTY_CONFIG.keys(), ["Easy", "Medium", "Hard", "Extreme"]):
             s = stats_by_diff[diff]
             if diff in ("hard", "extreme"):
-                embed.add_field(name=f"{label}", value=f"🏆 Wins: {s['wins']}\n❌ Losses: {s['losses']}\n🎮 Games: {s['total_games']}\n🌟 Star Cards: {s.get('star_cards', 0)}\n" + (f"⚡ Best Time: {s['best_time']:.1f}s\n" if s['best_time'] else "") + (f"🎯 Best Turns: {s['best_turns']}" if s['best_turns'] else ""), inline=False)
+                embed.add_field(name=f"{label}", value=f"🏆 Wins: {s['wins']}\n❌ Losses: {s['losses']}\n🎮 Games: {s['total_games']}\n🌟 Star Cards: {s.get('star_cards', 0)}\n" + (f"⚡ Best Time: {s['best_time']:.1f}s\n" if s['best_time'] else "") + (f"🎯 Best Turns: {s['best_turns']}" if s['best_turns'] else "") + spread_lines(s), inline=False)
             else:
-                embed.add_field(name=f"{label}", value=f"🏆 Wins: {s['wins']}\n❌ Losses: {s['losses']}\n🎮 Games: {s['total_games']}\n" + (f"⚡ Best Time: {s['best_time']:.1f}s\n" if s['best_time'] else "") + (f"🎯 Best Turns: {s['best_turns']}" if s['best_turns'] else ""), inline=False)
+                embed.add_field(name=f"{label}", value=f"🏆 Wins: {s['wins']}\n❌ Losses: {s['losses']}\n🎮 Games: {s['total_games']}\n" + (f"⚡ Best Time: {s['best_time']:.1f}s\n" if s['best_time'] else "") + (f"🎯 Best Turns: {s['best_turns']}" if s['best_turns'] else "") + spread_lines(s), inline=False)
         embed.add_field(name="Total", value=f"🏆 Wins: {total['wins']}\n❌ Losses: {total['losses']}\n🎮 Games: {total['total_games']}\n🌟 Star Cards: {total['star_cards']}\n" + (f"⚡ Best Time: {total['best_time']:.1f}s\n" if total['best_time'] else "") + (f"🎯 Best Turns: {total['best_turns']}" if total['best_turns'] else ""), inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @bot.tree.command(name="flipnfind-lb", description="Show the Flip & Find leaderboard")
     async def flipnfind_leaderboard(interaction: discord.Interaction):
         await interaction.response.defer()
-        leaderboard_data = get_flipnfind_leaderboard(supabase, interaction.guild_id, 10)
-        if not leaderboard_data:
+        guild_id = interaction.guild_id
+
+        async def render_page(rows, first_rank):
+            embed = discord.Embed(title="🎴 Flip & Find Leaderboard", color=discord.Color.gold())
+            if interaction.guild.icon:
+                embed.set_thumbnail(url=interaction.guild.icon.url)
+            lines = []
+            for i, entry in enumerate(rows, first_rank - 1):
+                try:
+                    member = await interaction.guild.fetch_member(int(entry['user_id']))
+                    name = member.display_name
+                except (discord.NotFound, discord.HTTPException):
+                    name = f"User ({entry['user_id'][-4:]})"
+                medal = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else f"**#{i+1}**"
+                lines.append(f"{medal} **{name}** — Wins: {entry.get('wins', 0)} | 🌟 Star Cards: {entry.get('star_cards', 0)}")
+            embed.description = "\n".join(lines)
+            return embed
+
+        view = LeaderboardView(
+            interaction.user.id,
+            lambda after, limit: get_flipnfind_leaderboard(supabase, guild_id, limit, after),
+            render_page
+        )
+        embed = await view.start()
+        if embed is None:
             return await interaction.followup.send("No one has played Flip & Find yet!")
-        embed = discord.Embed(title="🎴 Flip & Find Leaderboard", color=discord.Color.gold())
-        if interaction.guild.icon:
-            embed.set_thumbnail(url=interaction.guild.icon.url)
-        lines = []
-        for i, entry in enumerate(leaderboard_data):
-            try:
-                member = await interaction.guild.fetch_member(int(entry['user_id']))
-                name = member.display_name
-            except (discord.NotFound, discord.HTTPException):
-                name = f"User ({entry['user_id'][-4:]})"
-            medal = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else f"**#{i+1}**"
-            lines.append(f"{medal} **{name}** — Wins: {entry.get('wins', 0)} | 🌟 Star Cards: {entry.get('star_cards', 0)}")
-        embed.description = "\n".join(lines)
-        await interaction.followup.send(embed=embed) 
\ No newline at end of file
+        await view.send(interaction, embed) 
\ No newline at end of file
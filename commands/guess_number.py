@@ -4,8 +4,9 @@ import asyncio
 import logging
 from discord import app_commands
 from utils.database import get_guess_stats, update_guess_stats, get_guess_number_leaderboard
-import statistics
-from collections import Counter
+from utils.leaderboard import LeaderboardView
+from utils.dm_router import dm_router
+from utils.streaming import histogram_median, histogram_mode, spread_text
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,71 @@ async def resolve_member_name(guild, user_id):
     # Fall back to a nicer format than just the ID
     return f"Unknown Player"
 
+MIN_NUMBER = 1
+MAX_NUMBER = 100
+MAX_ATTEMPTS = 10
+GUESS_TIMEOUT = 60.0  # Seconds to wait for each guess
+
+class GuessNumberGame:
+    """One player's game as a state machine driven by their DM messages.
+
+    The game stays "guessing" until the number is found ("won"), the tries run
+    out ("lost") or the player goes quiet ("timeout"). feed() applies one
+    message and returns the reply to send, so the transitions do no I/O.
+    """
+
+    __slots__ = ("target", "attempts_left", "guesses", "state")
+
+    def __init__(self, target=None, attempts=MAX_ATTEMPTS):
+        self.target = target if target is not None else random.randint(MIN_NUMBER, MAX_NUMBER)
+        self.attempts_left = attempts
+        self.guesses = []
+        self.state = "guessing"
+
+    @property
+    def finished(self):
+        return self.state != "guessing"
+
+    def prompt(self):
+        return f"⏳ You have {self.attempts_left} tries left. Type your guess!"
+
+    def feed(self, content):
+        """Apply one message. Returns the reply text, or None for messages that aren't guesses."""
+        content = content.strip()
+        if self.finished or not content.isdigit():
+            return None
+        guess = int(content)
+        if guess < MIN_NUMBER or guess > MAX_NUMBER:
+            return f"❌ Please enter a number between {MIN_NUMBER} and {MAX_NUMBER}!\n{self.prompt()}"
+
+        self.guesses.append(guess)
+        self.attempts_left -= 1
+
+        if guess == self.target:
+            self.state = "won"
+            return f"🎉 Correct! You guessed the number {self.target}!"
+        hint = f"❌ Incorrect! The number is {'higher' if guess < self.target else 'lower'} than {guess}!"
+        if self.attempts_left == 0:
+            self.state = "lost"
+            return f"{hint}\nGame over! The correct number was {self.target}."
+        return f"{hint}\n{self.prompt()}"
+
+    def expire(self):
+        self.state = "timeout"
+        return f"⏰ Time's up! You took too long to respond!\nGame over! The correct number was {self.target}."
+
+async def play_guess_number(user, game, next_message, timeout=GUESS_TIMEOUT):
+    """Feed the player's messages into the game until it finishes, replying to each guess."""
+    while not game.finished:
+        try:
+            message = await asyncio.wait_for(next_message(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await user.send(game.expire())
+            return
+        reply = game.feed(message.content)
+        if reply:
+            await user.send(reply)
+
 def setup(bot, supabase):
     @bot.tree.command(name="guess-num", description="Guess the number (1-100). You have 10 tries!")
     async def guess_number(interaction: discord.Interaction):
@@ -35,58 +101,26 @@ def setup(bot, supabase):
             user = interaction.user
             guild_id = interaction.guild_id
             user_id = str(user.id)
-            target_number = random.randint(1, 100)
 
-            try:
-                await user.send("🎮 Welcome to the Guess Number game! Guess a number between 1 and 100.")
-                await interaction.followup.send("✅ The game has started in your DMs!", ephemeral=True)
-            except discord.errors.Forbidden:
-                await interaction.followup.send("❌ I can't DM you! Please enable DMs and try again.", ephemeral=True)
+            inbox = dm_router.open(user.id)
+            if inbox is None:
+                await interaction.followup.send("❌ You already have a game running in your DMs!", ephemeral=True)
                 return
 
-            attempts_left = 10
-            guesses = []
-            guess_gaps = []
-
-            def check(message):
-                return message.author == user and message.guild is None and message.content.isdigit()
-
-            while attempts_left > 0:
+            try:
+                game = GuessNumberGame()
                 try:
-                    await user.send(f"⏳ You have {attempts_left} tries left. Type your guess!")
-                    guess_message = await bot.wait_for('message', timeout=60.0, check=check)
-                    guess = int(guess_message.content)
-                    
-                    if guess < 1 or guess > 100:
-                        await user.send("❌ Please enter a number between 1 and 100!")
-                        continue
-                        
-                    gap = abs(target_number - guess)
-                    guesses.append(guess)
-                    guess_gaps.append(gap)
-                    attempts_left -= 1
-
-                    if guess == target_number:
-                        await user.send(f"🎉 Correct! You guessed the number {target_number}!")
-                        try:
-                            update_guess_stats(supabase, guild_id, user_id, "correct", guesses, guess_gaps)
-                        except Exception as e:
-                            logger.error(f"Failed to update guess stats: {str(e)}")
-                            await user.send("⚠️ Could not update stats due to a database error.")
-                        return
-                    else:
-                        hint = "higher" if guess < target_number else "lower"
-                        await user.send(f"❌ Incorrect! The number is {hint} than {guess}!")
-                except asyncio.TimeoutError:
-                    await user.send("⏰ Time's up! You took too long to respond!")
-                    break
-                except ValueError:
-                    await user.send("❌ Please enter a valid number!")
-                    continue
-
-            await user.send(f"Game over! The correct number was {target_number}.")
+                    await user.send(f"🎮 Welcome to the Guess Number game! Guess a number between {MIN_NUMBER} and {MAX_NUMBER}.\n{game.prompt()}")
+                    await interaction.followup.send("✅ The game has started in your DMs!", ephemeral=True)
+                except discord.errors.Forbidden:
+                    await interaction.followup.send("❌ I can't DM you! Please enable DMs and try again.", ephemeral=True)
+                    return
+                await play_guess_number(user, game, inbox.get)
+            finally:
+                dm_router.close(user.id)
+
             try:
-                update_guess_stats(supabase, guild_id, user_id, "incorrect", guesses, guess_gaps)
+                update_guess_stats(supabase, guild_id, user_id, "correct" if game.state == "won" else "incorrect", game.guesses, game.target)
             except Exception as e:
                 logger.error(f"Failed to update guess stats: {str(e)}")
                 await user.send("⚠️ Could not update stats due to a database error.")
@@ -123,56 +157,27 @@ def setup(bot, supabase):
                 await interaction.followup.send(f"{user_name} hasn't played the Guess Number game yet!", ephemeral=True)
                 return
 
-            # Get data with proper error handling for missing fields
-            guesses_str = user_data.get("guesses", "[]")
-            guess_gaps_str = user_data.get("guess_gaps", "[]")
-            
-            try:
-                import json
-                guesses = json.loads(guesses_str) if isinstance(guesses_str, str) else []
-                guess_gaps = json.loads(guess_gaps_str) if isinstance(guess_gaps_str, str) else []
-            except json.JSONDecodeError:
-                guesses = []
-                guess_gaps = []
-                logger.error(f"Failed to parse JSON for guesses or gaps")
-
-            if guesses and guess_gaps:
-                try:
-                    mean_gap = round(sum(guess_gaps) / len(guess_gaps), 2)
-                    median_gap = round(sorted(guess_gaps)[len(guess_gaps) // 2], 2)
-                    
-                    # Safe mode calculation (most common value)
-                    if guess_gaps:
-                        counter = Counter(guess_gaps)
-                        mode_gap = round(counter.most_common(1)[0][0], 2)
-                    else:
-                        mode_gap = 0
-                    
-                    await interaction.followup.send(
-                        f"📊 **{user_name}'s Guess Number Stats**\n\n"
-                        f"✅ Correct Guesses: {user_data.get('correct_guesses', 0)}\n"
-                        f"❌ Incorrect Guesses: {user_data.get('incorrect_guesses', 0)}\n"
-                        f"🎮 Total Games: {user_data.get('total_games', 0)}\n"
-                        f"📅 Total Attempts: {len(guesses)}\n"
-                        f"⏱️ Mean Guess Gap: {mean_gap}\n"
-                        f"📏 Median Guess Gap: {median_gap}\n"
-                        f"🛠 Mode Guess Gap: {mode_gap}"
-                    )
-                except Exception as e:
-                    logger.error(f"Error calculating stats: {str(e)}")
-                    await interaction.followup.send(
-                        f"📊 **{user_name}'s Guess Number Stats**\n\n"
-                        f"✅ Correct Guesses: {user_data.get('correct_guesses', 0)}\n"
-                        f"❌ Incorrect Guesses: {user_data.get('incorrect_guesses', 0)}\n"
-                        f"🎮 Total Games: {user_data.get('total_games', 0)}"
-                    )
-            else:
-                await interaction.followup.send(
-                    f"📊 **{user_name}'s Guess Number Stats**\n\n"
-                    f"✅ Correct Guesses: {user_data.get('correct_guesses', 0)}\n"
-                    f"❌ Incorrect Guesses: {user_data.get('incorrect_guesses', 0)}\n"
-                    f"🎮 Total Games: {user_data.get('total_games', 0)}"
+            summary = (
+                f"📊 **{user_name}'s Guess Number Stats**\n\n"
+                f"✅ Correct Guesses: {user_data.get('correct_guesses', 0)}\n"
+                f"❌ Incorrect Guesses: {user_data.get('incorrect_guesses', 0)}\n"
+                f"🎮 Total Games: {user_data.get('total_games', 0)}"
+            )
+
+            # Running aggregates: constant work however many games were played
+            gap_count = user_data.get("gap_count") or 0
+            histogram = user_data.get("gap_histogram") or []
+            if gap_count and histogram:
+                summary += (
+                    f"\n📅 Total Attempts: {gap_count}\n"
+                    f"⏱️ Mean Guess Gap: {round(user_data.get('gap_sum', 0) / gap_count, 2)}\n"
+                    f"📏 Median Guess Gap: {histogram_median(histogram)}\n"
+                    f"🛠 Mode Guess Gap: {histogram_mode(histogram)}"
                 )
+            attempts = (user_data.get("analytics") or {}).get("attempts")
+            if attempts:
+                summary += f"\n🔢 Guesses per Game: {spread_text(attempts, digits=0)}"
+            await interaction.followup.send(summary)
         except Exception as e:
             logger.error(f"Error in guess_number_stats command: {str(e)}")
             await interaction.followup.send("❌ An error occurred while retrieving stats.", ephemeral=True)
@@ -187,58 +192,64 @@ def setup(bot, supabase):
             return
             
         try:
-            leaderboard_data = get_guess_number_leaderboard(supabase, guild_id, 10)
-            
-            if not leaderboard_data:
-                await interaction.followup.send("No one has played the Guess Number game yet!")
-                return
+            async def render_page(rows, first_rank):
+                # Create a nice-looking embed for the leaderboard
+                embed = discord.Embed(
+                    title="🔢 Guess Number Leaderboard 🎮",
+                    description="Players ranked by success rate",
+                    color=0x3498db  # Blue color
+                )
                 
-            # Create a nice-looking embed for the leaderboard
-            embed = discord.Embed(
-                title="🔢 Guess Number Leaderboard 🎮",
-                description="Top 10 players ranked by success rate",
-                color=0x3498db  # Blue color
-            )
-            
-            # Add guild icon to the embed if available
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
+                # Add guild icon to the embed if available
+                if interaction.guild.icon:
+                    embed.set_thumbnail(url=interaction.guild.icon.url)
+                    
+                # Add server name
+                embed.set_author(name=interaction.guild.name)
                 
-            # Add server name
-            embed.set_author(name=interaction.guild.name)
-            
-            # Add footer with timestamp
-            embed.set_footer(text=f"Requested by {interaction.user.name}", 
-                           icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
-            embed.timestamp = discord.utils.utcnow()
-            
-            # Format the leaderboard
-            leaderboard_text = ""
-            
-            for i, player_data in enumerate(leaderboard_data, 1):
-                # Get user info if possible
-                user_id = int(player_data.get("user_id", "0"))
-                display_name = await resolve_member_name(interaction.guild, user_id)
+                # Add footer with timestamp
+                embed.set_footer(text=f"Requested by {interaction.user.name}", 
+                               icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
+                embed.timestamp = discord.utils.utcnow()
                 
-                # Calculate success rate
-                correct = player_data.get("correct_guesses", 0)
-                incorrect = player_data.get("incorrect_guesses", 0)
-                total = player_data.get("total_games", 0)
-                success_rate = (correct / total * 100) if total > 0 else 0
+                # Format the leaderboard
+                leaderboard_text = ""
                 
-                # Format medal for top 3
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                for i, player_data in enumerate(rows, first_rank):
+                    # Get user info if possible
+                    user_id = int(player_data.get("user_id", "0"))
+                    display_name = await resolve_member_name(interaction.guild, user_id)
+                    
+                    correct = player_data.get("correct_guesses", 0)
+                    incorrect = player_data.get("incorrect_guesses", 0)
+                    total = player_data.get("total_games", 0)
+                    success_rate = (correct / total * 100) if total > 0 else 0
+                    
+                    # Format medal for top 3
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                    
+                    # Add player to the leaderboard text with better formatting
+                    leaderboard_text += f"**{medal} {display_name}**\n"
+                    leaderboard_text += f"┣ Success Rate: **{success_rate:.1f}%**\n"
+                    leaderboard_text += f"┣ Correct: **{correct}** ┃ Incorrect: **{incorrect}**\n"
+                    leaderboard_text += f"┗ Total Games: **{total}**\n\n"
                 
-                # Add player to the leaderboard text with better formatting
-                leaderboard_text += f"**{medal} {display_name}**\n"
-                leaderboard_text += f"┣ Success Rate: **{success_rate:.1f}%**\n"
-                leaderboard_text += f"┣ Correct: **{correct}** ┃ Incorrect: **{incorrect}**\n"
-                leaderboard_text += f"┗ Total Games: **{total}**\n\n"
+                # Add the formatted text to the embed
+                embed.description = f"Players ranked by success rate\n\n{leaderboard_text}"
+                return embed
+            
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_guess_number_leaderboard(supabase, guild_id, limit, after),
+                render_page
+            )
+            embed = await view.start()
             
-            # Add the formatted text to the embed
-            embed.description = f"Top 10 players ranked by success rate\n\n{leaderboard_text}"
+            if embed is None:
+                await interaction.followup.send("No one has played the Guess Number game yet!")
+                return
             
-            await interaction.followup.send(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Failed to get Guess Number leaderboard: {str(e)}")
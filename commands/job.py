@@ -1,13 +1,19 @@
 import asyncio
 import discord
+import math
+import os
 import random
+import time
 import logging
+from dateutil.parser import isoparse
 from discord import app_commands
-from datetime import datetime, timedelta, timezone
 from utils.database import (
     get_job_data, create_job_data, update_job_data, assign_job, 
-    quit_job, add_work_experience, get_user_balance, update_user_balance
+    quit_job, record_work
 )
+from utils.ratelimit import Limit, limiter
+from utils.job_catalog import CatalogWatcher, JobCatalog
+from utils.job_sweeper import JobSweeper
 
 logger = logging.getLogger(__name__)
 
@@ -96,27 +102,53 @@ INTERVIEW_QUESTIONS = {
     ]
 }
 
-work_cooldowns = {}
+CATALOG_CHECK_INTERVAL = 30  # Seconds between checks of JOB_CATALOG_PATH for edits
+
+# Built-in jobs; a JSON/YAML file at JOB_CATALOG_PATH replaces them and is reloaded when edited
+catalog = JobCatalog(JOBS, INTERVIEW_QUESTIONS)
+_watcher = CatalogWatcher(os.getenv("JOB_CATALOG_PATH")) if os.getenv("JOB_CATALOG_PATH") else None
+_last_catalog_check = 0.0
+
+def refresh_catalog():
+    """Swap in the catalog file if it changed; checked at most every CATALOG_CHECK_INTERVAL seconds."""
+    global catalog, _last_catalog_check
+    if _watcher is None or time.monotonic() - _last_catalog_check < CATALOG_CHECK_INTERVAL:
+        return
+    _last_catalog_check = time.monotonic()
+    reloaded = _watcher.poll()
+    if reloaded is not None:
+        catalog = reloaded
+
+def current_catalog():
+    refresh_catalog()
+    return catalog
+
+def work_limit(job_info):
+    """One /work per the job's cooldown."""
+    return Limit(1, job_info["work_cooldown"])
 
 def get_job_by_name(job_name):
     """Get job details by name."""
-    return JOBS.get(job_name)
+    return catalog.get(job_name)
 
 def get_available_jobs(user_exp):
-    """Get list of jobs available for user's experience level."""
-    available = []
-    for job_name, job_data in JOBS.items():
-        if user_exp >= job_data["exp_required"]:
-            available.append((job_name, job_data))
-    return available
+    """Get list of jobs available for user's experience level, lowest requirement first."""
+    return catalog.available(user_exp)
 
 def get_locked_jobs(user_exp):
-    """Get list of jobs locked for user's experience level."""
-    locked = []
-    for job_name, job_data in JOBS.items():
-        if user_exp < job_data["exp_required"]:
-            locked.append((job_name, job_data))
-    return locked
+    """Get list of jobs locked for user's experience level, nearest first."""
+    return catalog.locked(user_exp)
+
+def quota_text(result, job_info):
+    """Progress towards the current quota window from a record_work result."""
+    times = job_info["work_frequency"]["times"]
+    # Postgres trims trailing zeros from fractional seconds, which fromisoformat rejects before 3.11
+    window_end = int(isoparse(result["window_end"]).timestamp())
+    text = f"{min(result['window_count'], times)}/{times} shifts this window (resets <t:{window_end}:R>)"
+    if result.get("grace_deadline"):
+        deadline = int(isoparse(result["grace_deadline"]).timestamp())
+        text += f"\n⚠️ Quota missed: meet it by <t:{deadline}:R> or lose {job_info['exp_loss']} EXP and your job"
+    return text
 
 # Work Question View
 class WorkQuestionView(discord.ui.View):
@@ -164,25 +196,34 @@ class WorkQuestionView(discord.ui.View):
                 earnings = random.randint(self.job_info["pay_min"], self.job_info["pay_max"])
                 exp_gained = self.job_info["exp_per_work"]
                 
-                # Update database
-                add_work_experience(self.supabase, str(self.user.id), exp_gained, earnings)
-                update_user_balance(self.supabase, str(self.user.id), earnings, "add")
-                
-                # Update cooldown
-                work_cooldowns[self.user.id] = datetime.now(timezone.utc) + timedelta(seconds=self.job_info["work_cooldown"])
+                # Quota, grace period, firing and payout are settled in one database call
+                result = record_work(self.supabase, str(self.user.id), self.job_data["current_job"], self.job_info, earnings, exp_gained)
                 
-                embed = discord.Embed(
-                    title="✅ Work Complete!",
-                    description=f"Great job! You earned **{earnings} HXC** and **{exp_gained} EXP**!",
-                    color=discord.Color.green()
-                )
-                
-                new_balance = get_user_balance(self.supabase, str(self.user.id))
-                updated_job_data = get_job_data(self.supabase, str(self.user.id))
-                
-                embed.add_field(name="💰 Earnings", value=f"Balance: {new_balance['balance']} HXC\nTotal Earned: {updated_job_data['total_earned']} HXC", inline=True)
-                embed.add_field(name="⭐ Progress", value=f"Experience: {updated_job_data['experience']} EXP\nWork Count: {updated_job_data['work_count']}", inline=True)
-                embed.set_footer(text=f"Next work in {self.job_info['work_cooldown']} seconds")
+                if not result or result["status"] == "no_job":
+                    embed = discord.Embed(title="❌ Error", description="Your shift couldn't be recorded. Please try again.", color=discord.Color.red())
+                elif result["status"] == "fired":
+                    embed = discord.Embed(
+                        title="📉 You've Been Fired",
+                        description=f"You missed your work quota and the grace period ran out.\nYou lost **{result['old_experience'] - result['experience']} EXP**; use `/job` to find a new position.",
+                        color=discord.Color.red()
+                    )
+                else:
+                    # Start the cooldown only after a successful shift
+                    limiter.acquire("work", self.user.id, work_limit(self.job_info))
+                    
+                    embed = discord.Embed(
+                        title="✅ Work Complete!",
+                        description=f"Great job! You earned **{earnings} HXC** and **{exp_gained} EXP**!",
+                        color=discord.Color.green()
+                    )
+                    
+                    embed.add_field(name="💰 Earnings", value=f"Balance: {result['balance']} HXC\nTotal Earned: {result['total_earned']} HXC", inline=True)
+                    embed.add_field(name="⭐ Progress", value=f"Experience: {result['experience']} EXP\nWork Count: {result['work_count']}", inline=True)
+                    embed.add_field(name="📅 Quota", value=quota_text(result, self.job_info), inline=False)
+                    unlocked = catalog.unlocked_between(result["old_experience"], result["experience"])
+                    if unlocked:
+                        embed.add_field(name="🔓 New Jobs Unlocked", value="\n".join(f"{info['emoji']} **{name}**" for name, info in unlocked), inline=False)
+                    embed.set_footer(text=f"Next work in {self.job_info['work_cooldown']} seconds")
                 
                 try:
                     await interaction.response.edit_message(embed=embed, view=None)
@@ -216,8 +257,17 @@ class WorkQuestionView(discord.ui.View):
                 pass
 
 def setup(bot, supabase):
+    refresh_catalog()
+    sweeper = JobSweeper(bot, supabase, current_catalog)
+
+    @bot.listen("on_ready")
+    async def start_job_sweeper():
+        # Fires players whose grace period ran out even if they never run /work again
+        sweeper.start()
+
     @bot.tree.command(name="work", description="Work at your job to earn HXC and experience")
     async def work(interaction: discord.Interaction):
+        refresh_catalog()
         user_id = str(interaction.user.id)
         
         # Get or create job data
@@ -230,20 +280,17 @@ def setup(bot, supabase):
             await interaction.response.send_message("❌ You don't have a job! Use `/job` to search for jobs and apply.", ephemeral=True)
             return
         
-        # Check cooldown
-        if interaction.user.id in work_cooldowns:
-            cooldown_end = work_cooldowns[interaction.user.id]
-            now = datetime.now(timezone.utc)
-            if now < cooldown_end:
-                remaining = int((cooldown_end - now).total_seconds())
-                await interaction.response.send_message(f"⏳ You need to wait **{remaining}s** before working again!", ephemeral=True)
-                return
-        
         # Get job info
         job_info = get_job_by_name(job_data["current_job"])
         if not job_info:
             await interaction.response.send_message("❌ Invalid job data!", ephemeral=True)
             return
+
+        # Check cooldown
+        remaining = limiter.peek("work", interaction.user.id, work_limit(job_info))
+        if remaining > 0:
+            await interaction.response.send_message(f"⏳ You need to wait **{math.ceil(remaining)}s** before working again!", ephemeral=True)
+            return
         
         # Generate memory question
         code = ''.join(random.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=6))
@@ -275,6 +322,7 @@ def setup(bot, supabase):
     
     @bot.tree.command(name="job", description="View and manage your job and career")
     async def job(interaction: discord.Interaction):
+        refresh_catalog()
         user_id = str(interaction.user.id)
         
         # Get or create job data
@@ -336,14 +384,14 @@ class JobMainView(discord.ui.View):
         
         if available:
             available_text = ""
-            for job_name, job_info in sorted(available, key=lambda x: x[1]["level"]):
+            for job_name, job_info in available:
                 emoji_indicator = "✅" if self.job_data["current_job"] == job_name else "🟢"
                 available_text += f"{emoji_indicator} **{job_info['emoji']} {job_name}** (Level {job_info['level']})\n   💵 Pay: {job_info['pay_min']}-{job_info['pay_max']} HXC\n   ⭐ Exp: +{job_info['exp_per_work']} per work\n\n"
             embed.add_field(name="🟢 Available Jobs", value=available_text or "None", inline=False)
         
         if locked:
             locked_text = ""
-            for job_name, job_info in sorted(locked, key=lambda x: x[1]["level"]):
+            for job_name, job_info in locked:
                 exp_needed = job_info["exp_required"] - self.job_data["experience"]
                 locked_text += f"🔒 **{job_info['emoji']} {job_name}** (Level {job_info['level']})\n   📊 Required: {job_info['exp_required']} exp ({exp_needed} more needed)\n\n"
             embed.add_field(name="🔒 Locked Jobs", value=locked_text or "None", inline=False)
@@ -370,16 +418,11 @@ class ApplyJobView(discord.ui.View):
         self.supabase = supabase
         self.job_data = job_data
         
-        available = get_available_jobs(job_data["experience"])
-        if available:
-            options = []
-            for job_name, job_info in sorted(available, key=lambda x: x[1]["level"]):
-                if job_name != job_data["current_job"]:
-                    options.append(discord.SelectOption(label=job_name, description=f"{job_info['description']} | Pay: {job_info['pay_min']}-{job_info['pay_max']} HXC", emoji=job_info['emoji']))
-            if options:
-                select = discord.ui.Select(placeholder="Select a job to apply for...", options=options[:25], custom_id="job_select")
-                select.callback = self.job_selected
-                self.add_item(select)
+        options = catalog.select_options(job_data["experience"], exclude=job_data["current_job"])
+        if options:
+            select = discord.ui.Select(placeholder="Select a job to apply for...", options=options, custom_id="job_select")
+            select.callback = self.job_selected
+            self.add_item(select)
     
     async def job_selected(self, interaction: discord.Interaction):
         if interaction.user.id != self.user.id:
@@ -389,14 +432,17 @@ class ApplyJobView(discord.ui.View):
         if self.job_data["current_job"]:
             await interaction.response.send_message(f"❌ You already have a job as **{self.job_data['current_job']}**! Please quit your current job before applying for a new one.", ephemeral=True)
             return
-        question_data = random.choice(INTERVIEW_QUESTIONS[selected_job])
+        job_info = get_job_by_name(selected_job)
+        if not job_info:
+            await interaction.response.send_message("❌ That job is no longer available. Use `/job` to see the current listings.", ephemeral=True)
+            return
+        question_data = catalog.draw_question(selected_job)
         view = InterviewView(self.user, self.supabase, self.job_data, selected_job, question_data)
         embed = discord.Embed(
             title=f"📝 Job Interview: {selected_job}",
             description=f"**Question:** {question_data['question']}\n\n⏳ Respond within **30 seconds**!",
             color=discord.Color.orange()
         )
-        job_info = get_job_by_name(selected_job)
         embed.set_footer(text=f"{job_info['emoji']} {job_info['description']} • ⏳ 30s timeout")
         await interaction.response.edit_message(embed=embed, view=view)
         view.message = interaction.message
@@ -429,8 +475,8 @@ class InterviewView(discord.ui.View):
                 return
             self.answered = True
             if option_index == self.question_data["correct"]:
-                assign_job(self.supabase, str(self.user.id), self.job_name)
                 job_info = get_job_by_name(self.job_name)
+                assign_job(self.supabase, str(self.user.id), self.job_name, job_info)
                 embed = discord.Embed(title="🎉 Congratulations!", description=f"You've been hired as a **{job_info['emoji']} {self.job_name}**!", color=discord.Color.green())
                 embed.add_field(name="Job Details", value=f"💵 Pay: {job_info['pay_min']}-{job_info['pay_max']} HXC per work\n⭐ Experience: +{job_info['exp_per_work']} per work\n⏱️ Cooldown: {job_info['work_cooldown']}s between works\n📅 Requirement: Work {job_info['work_frequency']['times']} times per {job_info['work_frequency']['hours']} hours", inline=False)
                 embed.set_footer(text=f"Use /work to start earning!")
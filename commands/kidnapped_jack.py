@@ -4,8 +4,11 @@ import asyncio
 import logging
 import time
 from discord import app_commands
-from utils.database import get_kidnapped_jack_stats, update_kidnapped_jack_stats, get_kidnapped_jack_leaderboard, create_kidnapped_jack_table
-from collections import defaultdict
+from utils.database import get_kidnapped_jack_stats, update_kidnapped_jack_stats, get_kidnapped_jack_leaderboard
+from utils.leaderboard import LeaderboardView
+from utils.embeds import CachedEmbed, progress_text
+from utils.streaming import RunningStats, spread_text
+from utils.ratelimit import rate_limit
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +21,6 @@ MAX_PLAYERS = 10
 TURN_TIMEOUT = 30
 INVITE_TIMEOUT = 60
 
-# Cooldown tracking
-default_cooldowns = defaultdict(float)
-
 # Card emojis and representations
 CARD_EMOJIS = {
     'A': '🂡', '2': '🂢', '3': '🂣', '4': '🂤', '5': '🂥', '6': '🂦', '7': '🂧', '8': '🂨', '9': '🂩', '10': '🂪', 'J': '🂫', 'Q': '🂭', 'K': '🂮'
@@ -33,6 +33,21 @@ SUIT_EMOJIS = {
 # Special Jack of Hearts emoji
 JACK_OF_HEARTS_EMOJI = '🂻'
 
+HOW_TO_PLAY_TEXT = (
+    "1. Be the **first** to get rid of all your cards to win!\n"
+    "2. Take turns drawing cards from other players.\n"
+    "3. Make pairs to remove them from your hand.\n"
+    "4. Last player with cards loses as the Kidnapper!"
+)
+
+FUN_FACTS = [
+    "The Kidnapper wins by being the first to be eliminated!",
+    "Did you know? The Kidnapper's goal is to get caught!",
+    "Pro tip: Watch for players trying to get eliminated early!",
+    "The best strategy changes based on how many players are left!",
+    "Eliminating players with few cards first can be a good strategy!"
+]
+
 class Card:
     def __init__(self, rank, suit):
         self.rank = rank
@@ -277,6 +292,8 @@ class KidnappedJackView(discord.ui.View):
         self.message = None
         self._turn_task = None
         self._timeout_task = None
+        self._embed = CachedEmbed()
+        self._fun_fact = None
         self._build_buttons()
         # Start timeout timer for game start (2 minutes)
         self._start_timeout_timer()
@@ -661,122 +678,6 @@ class KidnappedJackView(discord.ui.View):
         except discord.NotFound:
             logger.warning("Game message not found during update")
     
-    def create_embed(self):
-        """Create a clean, organized embed for the game"""
-        embed = discord.Embed(
-            title="🃏 The Kidnapped Jack",
-            color=discord.Color.purple()
-        )
-        
-        # Add game status based on state
-        if not self.game.game_started:
-            embed.description = "**⏳ Waiting for players to join...**\n\n📝 **Game Rules:**\n• Draw cards from other players\n• Remove pairs automatically (sometimes!)\n• First to be eliminated wins as the Kidnapper!"
-            
-            # Player list with visual indicators
-            if self.game.players:
-                player_list = "\n".join([f"👤 {player.user.mention}" for player in self.game.players])
-            else:
-                player_list = "🚫 No players yet - Click **Join Game** to start!"
-            
-            embed.add_field(
-                name=f"👥 Players ({len(self.game.players)}/{MAX_PLAYERS})",
-                value=player_list,
-                inline=False
-            )
-            
-            # Visual game flow diagram
-            embed.add_field(
-                name="🔄 Game Flow",
-                value="```\n1. Join Game → 2. Start Game → 3. Draw Cards → 4. First out wins!\n```",
-                inline=False
-            )
-            
-            # Warning about random clicking
-            embed.add_field(
-                name="⚠️ Important",
-                value="**Think before you click!** First player to be eliminated wins as the Kidnapper!",
-                inline=False
-            )
-            
-        elif not self.game.game_over:
-            # Game in progress with enhanced UI
-            current_player = self.game.get_current_player()
-            
-            # Create a visual turn indicator
-            turn_indicator = f"🎯 **{current_player.user.mention}'s Turn**\n👉 Choose a player to draw from below"
-            embed.description = turn_indicator
-            
-            # Player status with card counts and visual indicators
-            active_players = [p for p in self.game.players if not p.eliminated and len(p.hand) > 0]
-            player_status = []
-            
-            # Show winners first
-            if hasattr(self.game, 'winners') and self.game.winners:
-                for winner in sorted(self.game.winners, key=lambda p: p.win_place):
-                    if winner.is_kidnapper:
-                        player_status.append(f"🥇 {winner.user.mention} - Kidnapper (1st place)")
-                    else:
-                        player_status.append(f"🏅 {winner.user.mention} - {winner.win_place}{self._get_ordinal_suffix(winner.win_place)} place")
-                
-                if active_players:
-                    player_status.append("\n**Still in the game:**")
-            
-            # Then show active players
-            for player in self.game.players:
-                if player.eliminated:
-                    continue
-                    
-                if player == current_player:
-                    status = f"🎯 {player.user.mention} ({len(player.hand)} cards) ⭐"
-                else:
-                    status = f"🂴 {player.user.mention} ({len(player.hand)} cards)"
-                player_status.append(status)
-            
-            embed.add_field(
-                name=f"👥 Player Status ({len(active_players)} active)",
-                value="\n".join(player_status) or "No active players",
-                inline=False
-            )
-            
-            # Game progress with visual bar
-            total_cards = sum(len(p.hand) for p in self.game.players)
-            progress_bar = "█" * min(10, total_cards // 5) + "░" * (10 - min(10, total_cards // 5))
-            embed.add_field(
-                name="📈 Game Progress",
-                value=f"```\n[{progress_bar}] {total_cards} cards left\n```",
-                inline=False
-            )
-            
-            # Add game rules reminder
-            embed.add_field(
-                name="🎯 Goal",
-                value="Be the **first** to get eliminated to win as the Kidnapper!",
-                inline=False
-            )
-            
-        else:  # Game over
-            if hasattr(self.game, 'winners') and self.game.winners:
-                # Sort winners by their placement
-                winners = sorted(self.game.winners, key=lambda p: p.win_place)
-                winner_text = []
-                
-                for i, winner in enumerate(winners, 1):
-                    if i == 1:
-                        winner_text.append(f"🥇 **{winner.user.mention}** - Kidnapper (1st place)")
-                    else:
-                        winner_text.append(f"{i}. {winner.user.mention}")
-                
-                embed.description = "🏆 **Game Over - Final Standings**\n" + "\n".join(winner_text)
-            else:
-                embed.description = "🎮 Game Over!"
-            
-            # Add game statistics
-            embed.add_field(
-                name="📊 Game Stats",
-                value=f"⏱️ Game duration: {int(self.game.get_game_duration() // 60)}m {int(self.game.get_game_duration() % 60)}s",
-                inline=False
-            )
-    
     def _get_ordinal_suffix(self, n):
         """Helper to get ordinal suffix (1st, 2nd, 3rd, etc.)"""
         if 11 <= (n % 100) <= 13:
@@ -785,57 +686,48 @@ class KidnappedJackView(discord.ui.View):
         
     def create_embed(self):
         """Create a clean, organized embed for the game"""
-        embed = discord.Embed(
-            title=f"🎭 {self.game.jack_nickname} - Kidnapped Jack" if not self.game.game_over else f"🏁 Game Over - {self.game.jack_nickname}",
-            color=discord.Color.red() if not self.game.game_over else discord.Color.green()
-        )
+        title = f"🎭 {self.game.jack_nickname} - Kidnapped Jack" if not self.game.game_over else f"🏁 Game Over - {self.game.jack_nickname}"
+        color = discord.Color.red() if not self.game.game_over else discord.Color.green()
+        fields = []
+        footer = None
         
         # Add game status based on game state
         if not self.game.game_started:
             # Lobby/join phase
             player_list = "\n".join([f"👤 {p.user.mention}" for p in self.game.players])
-            embed.description = (
+            description = (
                 f"🃏 **A game of Kidnapped Jack is starting!**\n"
                 f"👥 Players: {len(self.game.players)}/{MAX_PLAYERS}\n"
                 f"\n**Players Joined:**\n{player_list or 'No players yet!'}"
             )
             
             # Add game rules
-            embed.add_field(
-                name="🎯 How to Play",
-                value=(
-                    "1. Be the **first** to get rid of all your cards to win!\n"
-                    "2. Take turns drawing cards from other players.\n"
-                    "3. Make pairs to remove them from your hand.\n"
-                    "4. Last player with cards loses as the Kidnapper!"
-                ),
-                inline=False
-            )
+            fields.append(("🎯 How to Play", HOW_TO_PLAY_TEXT, False))
             
             # Add join instructions
-            embed.set_footer(text="🔵 Click 'Join Game' to play!")
+            footer = "🔵 Click 'Join Game' to play!"
             
         elif not self.game.game_over:
             # Game in progress
             current_player = self.game.get_current_player()
-            turn_indicator = f"🎯 **{current_player.user.mention}'s Turn**\n👉 Choose a player to draw from below"
-            embed.description = turn_indicator
+            description = f"🎯 **{current_player.user.mention}'s Turn**\n👉 Choose a player to draw from below"
             
             # Player status with card counts and visual indicators
             active_players = [p for p in self.game.players if not p.eliminated and len(p.hand) > 0]
             player_status = []
             
-            if winner.is_kidnapper:
-                label = f"💀 {winner.user.mention} - Kidnapper (Lost)"
-            elif winner.win_place == 1:
-                label = f"🏆 {winner.user.mention} - Winner (1st place)"
-            else:
-                suffix = self._get_ordinal_suffix(winner.win_place)
-                label = f"🥈 {winner.user.mention} - {winner.win_place}{suffix} place"
-                player_status.append(label) # in-progress block
-                winner_text.append(label) # game-over block
+            # Show players who already escaped first
+            for winner in sorted(getattr(self.game, 'winners', []), key=lambda p: p.win_place):
+                if winner.is_kidnapper:
+                    label = f"💀 {winner.user.mention} - Kidnapper (Lost)"
+                elif winner.win_place == 1:
+                    label = f"🏆 {winner.user.mention} - Winner (1st place)"
+                else:
+                    suffix = self._get_ordinal_suffix(winner.win_place)
+                    label = f"🥈 {winner.user.mention} - {winner.win_place}{suffix} place"
+                player_status.append(label)
                 
-            if active_players:
+            if player_status and active_players:
                 player_status.append("\n**Still in the game:**")
             
             # Then show active players
@@ -849,42 +741,24 @@ class KidnappedJackView(discord.ui.View):
                     status = f"🂴 {player.user.mention} ({len(player.hand)} cards)"
                 player_status.append(status)
             
-            embed.add_field(
-                name=f"👥 Player Status ({len(active_players)} active)",
-                value="\n".join(player_status) or "No active players",
-                inline=False
-            )
+            fields.append((f"👥 Player Status ({len(active_players)} active)", "\n".join(player_status) or "No active players", False))
             
             # Game progress with visual bar
             total_cards = sum(len(p.hand) for p in self.game.players)
-            progress_bar = "█" * min(10, total_cards // 5) + "░" * (10 - min(10, total_cards // 5))
-            embed.add_field(
-                name="📈 Game Progress",
-                value=f"```\n[{progress_bar}] {total_cards} cards left\n```",
-                inline=False
-            )
+            fields.append(("📈 Game Progress", progress_text(total_cards), False))
             
             # Add game rules reminder
-            embed.add_field(
-                name="🎯 Goal",
-                value="Be the **first** to get eliminated to win as the Kidnapper!",
-                inline=False
-            )
+            fields.append(("🎯 Goal", "Be the **first** to get eliminated to win as the Kidnapper!", False))
             
             # Add recent actions if any
-            if hasattr(self.game, 'game_history') and self.game.game_history:
+            if self.game.game_history:
                 recent_actions = "\n".join(self.game.game_history[-3:])
                 if len(self.game.game_history) > 3:
                     recent_actions = f"...\n{recent_actions}"
-                
-                embed.add_field(
-                    name="📜 Recent Actions",
-                    value=recent_actions,
-                    inline=False
-                )
+                fields.append(("📜 Recent Actions", recent_actions, False))
             
             # Add footer with instructions
-            embed.set_footer(text="🔵 Click on a player button to draw from them - Choose wisely!")
+            footer = "🔵 Click on a player button to draw from them - Choose wisely!"
             
         else:  # Game over
             if hasattr(self.game, 'winners') and self.game.winners:
@@ -901,64 +775,32 @@ class KidnappedJackView(discord.ui.View):
                         suffix = self._get_ordinal_suffix(i)
                         winner_text.append(f"{i}{suffix}. {winner.user.mention}")
                 
-                embed.description = "🏆 **Game Over - Final Standings**\n" + "\n".join(winner_text)
+                description = "🏆 **Game Over - Final Standings**\n" + "\n".join(winner_text)
             else:
-                embed.description = "🎮 Game Over!"
+                description = "🎮 Game Over!"
             
             # Add game statistics
             duration = self.game.get_game_duration()
             minutes = int(duration // 60)
             seconds = int(duration % 60)
-            total_players = len(self.game.players)
-            
-            # Add more varied tips and facts
-            tips = [
-                "🔍 Pro Tip: Keep track of which cards other players are collecting to predict their moves.",
-                "🎲 Strategy: Try to get rid of high-value cards early to avoid being the last one holding them.",
-                "🧠 Did You Know? The game gets more strategic with more players - try it with 5-6 players!",
-                "⚡ Quick Tip: Pay attention to who's collecting which cards to avoid giving them a pair.",
-                "🏆 Champion Move: The best players remember which cards have been played to make better decisions.",
-                "🔄 Reminder: The first to get rid of all cards wins, while the last one becomes the Kidnapper!",
-                "🤔 Think Ahead: Sometimes it's better to keep a card that's already been paired to block others.",
-                "🎯 Expert Tip: Watch for players who are close to winning and try to block them.",
-                "💡 Strategy: In the endgame, try to keep your hand size similar to others to avoid being targeted.",
-                "🃏 Fun Fact: This game is actually adopted from the game 'Old Maid', but in some countries the game is altered with a twist!"
-            ]
-            
-            # Select 3 random tips
-            selected_tips = random.sample(tips, min(3, len(tips)))
-            tips_text = "\n\n".join(selected_tips)
-            embed.add_field(
-                name="📊 Game Stats",
-                value=f"⏱️ Game duration: {minutes}m {seconds}s",
-                inline=False
-            )
+            fields.append(("📊 Game Stats", f"⏱️ Game duration: {minutes}m {seconds}s", False))
             
-            # Add a fun fact or tip
-            fun_facts = [
-                "The Kidnapper wins by being the first to be eliminated!",
-                "Did you know? The Kidnapper's goal is to get caught!",
-                "Pro tip: Watch for players trying to get eliminated early!",
-                "The best strategy changes based on how many players are left!",
-                "Eliminating players with few cards first can be a good strategy!"
-            ]
-            
-            embed.add_field(
-                name="💡 Did You Know?",
-                value=random.choice(fun_facts),
-                inline=False
-            )
+            # Add a fun fact, picked once so repeated renders stay stable
+            if self._fun_fact is None:
+                self._fun_fact = random.choice(FUN_FACTS)
+            fields.append(("💡 Did You Know?", self._fun_fact, False))
             
             # Add footer with rematch instructions
-            embed.set_footer(text="🔄 Click 'Rematch' to play again with the same players!")
+            footer = "🔄 Click 'Rematch' to play again with the same players!"
         
-        return embed
+        return self._embed.render(title=title, description=description, color=color, fields=fields, footer=footer)
 
 def setup(bot, supabase):
     @bot.tree.command(name="kidnapped-jack", description="Start a game of The Kidnapped Jack!")
     @app_commands.describe(
         jack_nickname="Custom nickname for the Jack of Hearts (optional)"
     )
+    @rate_limit("kidnapped-jack", 1, 30)
     async def kidnapped_jack(interaction: discord.Interaction, jack_nickname: str = "Jack of Hearts"):
         # Check if user is already in a game
         if interaction.user.id in active_games:
@@ -1032,6 +874,22 @@ def setup(bot, supabase):
                 value=f"**{kidnapper_count}** ({kidnapper_rate:.1f}%)",
                 inline=True
             )
+
+            analytics = stats.get("analytics") or {}
+            if analytics.get("time"):
+                consistency = RunningStats(analytics["time"]).consistency()
+                embed.add_field(
+                    name="⏱️ Game Length",
+                    value=spread_text(analytics["time"], "s") + (f"\n📐 Consistency: {consistency:.0f}%" if consistency is not None else ""),
+                    inline=False
+                )
+            if analytics.get("place"):
+                place = RunningStats(analytics["place"])
+                embed.add_field(
+                    name="🏅 Placement",
+                    value=f"Average: **{place.mean:.1f}** ┃ Recent form: **{place.ewma:.1f}**\n{spread_text(analytics['place'], digits=0)}",
+                    inline=False
+                )
             
             await interaction.response.send_message(embed=embed, ephemeral=True)
             
@@ -1045,43 +903,50 @@ def setup(bot, supabase):
         guild_id = interaction.guild_id
         
         try:
-            leaderboard_data = get_kidnapped_jack_leaderboard(supabase, guild_id, 10)
-            
-            if not leaderboard_data:
-                await interaction.followup.send("No one has played The Kidnapped Jack yet!")
-                return
-            
-            embed = discord.Embed(
-                title="🃏 The Kidnapped Jack Leaderboard 🏆",
-                description="Top 10 players ranked by escapes",
-                color=discord.Color.purple()
-            )
-            
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
-            
-            embed.set_author(name=interaction.guild.name)
-            embed.set_footer(text=f"Requested by {interaction.user.name}")
-            
-            leaderboard_text = ""
-            for i, player_data in enumerate(leaderboard_data, 1):
-                user_id = int(player_data.get("user_id", "0"))
-                member = interaction.guild.get_member(user_id)
-                display_name = member.display_name if member else f"Unknown Player"
+            async def render_page(rows, first_rank):
+                embed = discord.Embed(
+                    title="🃏 The Kidnapped Jack Leaderboard 🏆",
+                    description="Players ranked by escapes",
+                    color=discord.Color.purple()
+                )
                 
-                games_played = player_data.get("games_played", 0)
-                escapes = player_data.get("escapes", 0)
-                kidnapper_count = player_data.get("kidnapper_count", 0)
+                if interaction.guild.icon:
+                    embed.set_thumbnail(url=interaction.guild.icon.url)
                 
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                embed.set_author(name=interaction.guild.name)
+                embed.set_footer(text=f"Requested by {interaction.user.name}")
                 
-                leaderboard_text += f"**{medal} {display_name}**\n"
-                leaderboard_text += f"┣ Escapes: **{escapes}** ┃ Games: **{games_played}**\n"
-                leaderboard_text += f"┗ Kidnapper: **{kidnapper_count}** times\n\n"
+                leaderboard_text = ""
+                for i, player_data in enumerate(rows, first_rank):
+                    user_id = int(player_data.get("user_id", "0"))
+                    member = interaction.guild.get_member(user_id)
+                    display_name = member.display_name if member else f"Unknown Player"
+                    
+                    games_played = player_data.get("games_played", 0)
+                    escapes = player_data.get("escapes", 0)
+                    kidnapper_count = player_data.get("kidnapper_count", 0)
+                    
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                    
+                    leaderboard_text += f"**{medal} {display_name}**\n"
+                    leaderboard_text += f"┣ Escapes: **{escapes}** ┃ Games: **{games_played}**\n"
+                    leaderboard_text += f"┗ Kidnapper: **{kidnapper_count}** times\n\n"
+                
+                embed.description = f"Players ranked by escapes\n\n{leaderboard_text}"
+                return embed
             
-            embed.description = f"Top 10 players ranked by escapes\n\n{leaderboard_text}"
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_kidnapped_jack_leaderboard(supabase, guild_id, limit, after),
+                render_page
+            )
+            embed = await view.start()
+            
+            if embed is None:
+                await interaction.followup.send("No one has played The Kidnapped Jack yet!")
+                return
             
-            await interaction.followup.send(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Failed to get Kidnapped Jack leaderboard: {str(e)}")
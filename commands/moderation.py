@@ -36,10 +36,11 @@ class CleanupConfirmationModal(discord.ui.Modal):
             tables = [
                 f"rps_stats_{self.guild_id}",
                 f"guess_number_stats_{self.guild_id}",
+                f"guess_number_games_{self.guild_id}",
                 f"tictactoe_stats_{self.guild_id}",
                 f"battle_stats_{self.guild_id}",
                 f"flipnfind_stats_{self.guild_id}",
-                f"kidnapped_jack_stats_{self.guild_id}"
+                f"kidnapped_jack_stats_{self.guild_id}",
                 f"roulette_stats_{self.guild_id}"
             ]
             
@@ -51,9 +52,9 @@ class CleanupConfirmationModal(discord.ui.Modal):
                     response = self.supabase.table(table).select("user_id").execute()
                     
                     if response.data:
-                        # Verify membership per user id without relying on cache
-                        for row in response.data:
-                            user_id = row.get("user_id")
+                        # Verify membership once per user id without relying on cache
+                        # (history tables hold many rows per user)
+                        for user_id in {row.get("user_id") for row in response.data}:
                             if not user_id:
                                 continue
                             try:
@@ -0,0 +1,178 @@
+import discord
+import logging
+from discord import app_commands
+from utils.database import get_global_profile, get_global_leaderboard, get_player_summary
+from utils.leaderboard import LeaderboardView
+from utils.rating import rating_text
+
+logger = logging.getLogger(__name__)
+
+# Game -> (title, label for wins, label for losses, label for draws or None),
+# in the order /profile lists them
+PROFILE_GAMES = {
+    "rps": ("✂️ Rock Paper Scissors", "Wins", "Losses", "Ties"),
+    "guess_number": ("🔢 Guess Number", "Correct", "Incorrect", None),
+    "tictactoe": ("❌ Tic Tac Toe", "Wins", "Losses", "Draws"),
+    "battle": ("⚔️ Battle", "Wins", "Losses", None),
+    "flipnfind": ("🎴 Flip & Find", "Wins", "Losses", None),
+    "kidnapped_jack": ("🃏 The Kidnapped Jack", "Escapes", "Kidnapper", None),
+    "roulette": ("🎰 Roulette", "Spins won", "Spins lost", None),
+}
+
+def record_text(game, row):
+    """One game's global record as embed text."""
+    _, wins_label, losses_label, draws_label = PROFILE_GAMES[game]
+    total = row.get("total_games", 0)
+    wins = row.get("wins", 0)
+    parts = [f"{wins_label}: **{wins:,}**", f"{losses_label}: **{row.get('losses', 0):,}**"]
+    if draws_label:
+        parts.append(f"{draws_label}: **{row.get('draws', 0):,}**")
+    win_rate = wins / total * 100 if total > 0 else 0
+    return f"{' ┃ '.join(parts)}\n┗ Games: **{total:,}** ({win_rate:.1f}% won)"
+
+def percent(part, whole):
+    return part / whole * 100 if whole else 0
+
+def summary_fields(summary):
+    """(name, value) embed fields for every game in a get_player_summary result the player has played."""
+    fields = []
+    rps = summary.get("rps")
+    if rps and rps.get("total_games"):
+        fields.append(("✂️ Rock Paper Scissors", (
+            f"W: **{rps['wins']}** ┃ L: **{rps['losses']}** ┃ T: **{rps['ties']}**\n"
+            f"┗ Win Rate: **{percent(rps['wins'], rps['total_games']):.1f}%** of {rps['total_games']} games"
+        )))
+    guess = summary.get("guess_number")
+    if guess and guess.get("total_games"):
+        value = (
+            f"Correct: **{guess['correct_guesses']}** ┃ Incorrect: **{guess['incorrect_guesses']}**\n"
+            f"┗ Success Rate: **{percent(guess['correct_guesses'], guess['total_games']):.1f}%**"
+        )
+        if guess.get("gap_count"):
+            value += f" ┃ Mean Gap: **{guess['gap_sum'] / guess['gap_count']:.2f}**"
+        fields.append(("🔢 Guess Number", value))
+    for game, title, draws in (("tictactoe", "❌ Tic Tac Toe", "draws"), ("battle", "⚔️ Battle", None)):
+        row = summary.get(game)
+        if row and row.get("total_games"):
+            record = f"W: **{row['wins']}** ┃ L: **{row['losses']}**" + (f" ┃ D: **{row[draws]}**" if draws else "")
+            fields.append((title, f"Rating: **{rating_text(row)}**\n┗ {record} of {row['total_games']} games"))
+    flipnfind = summary.get("flipnfind") or {}
+    lines = []
+    for difficulty in ("easy", "medium", "hard", "extreme"):
+        row = flipnfind.get(difficulty)
+        if row and row.get("total_games"):
+            line = f"{difficulty.title()}: **{row['wins']}**/{row['total_games']} won"
+            if row.get("best_time"):
+                line += f" ┃ ⚡ {row['best_time']:.1f}s"
+            if row.get("star_cards"):
+                line += f" ┃ 🌟 {row['star_cards']}"
+            lines.append(line)
+    if lines:
+        fields.append(("🎴 Flip & Find", "\n".join(lines)))
+    jack = summary.get("kidnapped_jack")
+    if jack and jack.get("games_played"):
+        value = f"Escapes: **{jack['escapes']}** of {jack['games_played']} ┃ Kidnapper: **{jack['kidnapper_count']}**"
+        if jack.get("best_placement"):
+            value += f"\n┗ Best Placement: **#{jack['best_placement']}**"
+        fields.append(("🃏 The Kidnapped Jack", value))
+    roulette = summary.get("roulette")
+    if roulette and roulette.get("games_played"):
+        net = roulette["total_won"] - roulette["total_bet"]
+        fields.append(("🎰 Roulette", (
+            f"Won: **{roulette['games_won']}** of {roulette['games_played']} spins\n"
+            f"┗ Net: **{net:+,}** HXC ┃ Biggest Win: **{roulette['biggest_win']:,}**"
+        )))
+    return fields
+
+def setup(bot, supabase):
+    @bot.tree.command(name="stats", description="Show a player's stats for every game in this server")
+    @app_commands.describe(user="The player to show (default: you)")
+    async def stats(interaction: discord.Interaction, user: discord.Member = None):
+        if not interaction.guild_id:
+            await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
+            return
+        target = user or interaction.user
+        summary = get_player_summary(supabase, interaction.guild_id, str(target.id))
+        if summary is None:
+            await interaction.response.send_message("⚠️ Could not retrieve stats due to an error.", ephemeral=True)
+            return
+        fields = summary_fields(summary)
+        if not fields:
+            await interaction.response.send_message(f"{target.display_name} hasn't played any games in this server yet!", ephemeral=True)
+            return
+        embed = discord.Embed(
+            title=f"📊 {target.display_name}'s Stats",
+            description=f"Every game in {interaction.guild.name}",
+            color=discord.Color.blue()
+        )
+        embed.set_thumbnail(url=target.display_avatar.url)
+        for name, value in fields:
+            embed.add_field(name=name, value=value, inline=False)
+        embed.set_footer(text="See /profile for totals across all servers")
+        await interaction.response.send_message(embed=embed)
+
+    @bot.tree.command(name="profile", description="Show a player's stats for every game across all servers")
+    @app_commands.describe(user="The player to show (default: you)")
+    async def profile(interaction: discord.Interaction, user: discord.User = None):
+        target = user or interaction.user
+        if target.bot:
+            await interaction.response.send_message("Bots don't have profiles!", ephemeral=True)
+            return
+        games = get_global_profile(supabase, str(target.id))
+        if games is None:
+            await interaction.response.send_message("⚠️ Could not retrieve the profile due to an error.", ephemeral=True)
+            return
+        played = [game for game in PROFILE_GAMES if games.get(game, {}).get("total_games", 0) > 0]
+        if not played:
+            await interaction.response.send_message(f"{target.display_name} hasn't played any games yet!", ephemeral=True)
+            return
+
+        total_games = sum(games[game]["total_games"] for game in played)
+        favourite = max(played, key=lambda game: games[game]["total_games"])
+        embed = discord.Embed(
+            title=f"🎮 {target.display_name}'s Profile",
+            description=f"Totals across every server\n\n🎲 Games played: **{total_games:,}**\n⭐ Favourite: **{PROFILE_GAMES[favourite][0]}**",
+            color=discord.Color.blurple()
+        )
+        embed.set_thumbnail(url=target.display_avatar.url)
+        for game in played:
+            embed.add_field(name=PROFILE_GAMES[game][0], value=record_text(game, games[game]), inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    @bot.tree.command(name="global-lb", description="Show a game's leaderboard across all servers")
+    @app_commands.describe(game="The game to rank")
+    @app_commands.choices(game=[app_commands.Choice(name=title, value=value) for value, (title, *_) in PROFILE_GAMES.items()])
+    async def global_leaderboard(interaction: discord.Interaction, game: app_commands.Choice[str]):
+        await interaction.response.defer()
+        title = PROFILE_GAMES[game.value][0]
+
+        async def render_page(rows, first_rank):
+            embed = discord.Embed(
+                title=f"🌍 {title} — Global Leaderboard",
+                description=f"Players ranked by {PROFILE_GAMES[game.value][1].lower()} across all servers",
+                color=discord.Color.gold()
+            )
+            lines = []
+            for i, row in enumerate(rows, first_rank):
+                player = bot.get_user(int(row["user_id"]))
+                name = player.display_name if player else f"User ({row['user_id'][-4:]})"
+                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                lines.append(f"**{medal} {name}**\n┣ {record_text(game.value, row)}")
+            embed.description += "\n\n" + "\n\n".join(lines)
+            embed.set_footer(text=f"Requested by {interaction.user.name}")
+            return embed
+
+        try:
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_global_leaderboard(supabase, game.value, limit, after),
+                render_page
+            )
+            embed = await view.start()
+            if embed is None:
+                await interaction.followup.send(f"No one has played {title} yet!")
+                return
+            await view.send(interaction, embed)
+        except Exception as e:
+            logger.error(f"Failed to get global leaderboard for {game.value}: {str(e)}")
+            await interaction.followup.send("⚠️ Could not retrieve the leaderboard due to an error.")
@@ -0,0 +1,135 @@
+import discord
+import asyncio
+import logging
+from discord import app_commands
+from utils.database import get_battle_stats, get_tictactoe_stats, get_flipnfind_stats
+from utils.matchmaking import Matchmaker, rating_from_stats
+from commands import battle, tictactoe, flipnfind, kidnapped_jack
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 5  # Seconds between matchmaking sweeps
+
+QUEUE_GAMES = {
+    "battle": "⚔️ Battle",
+    "tictactoe": "❌ Tic Tac Toe",
+    "flipnfind-easy": "🎴 Flip & Find (Easy)",
+    "flipnfind-medium": "🎴 Flip & Find (Medium)",
+    "flipnfind-hard": "🎴 Flip & Find (Hard)",
+    "flipnfind-extreme": "🎴 Flip & Find (Extreme)",
+}
+
+matchmaker = Matchmaker()
+_sweeper = None
+
+def is_busy(user_id):
+    """Whether the user is already playing one of the two-player or party games."""
+    return (
+        user_id in battle.active_battles
+        or user_id in tictactoe.active_games
+        or user_id in flipnfind.active_games
+        or user_id in kidnapped_jack.active_games
+    )
+
+def get_rating(supabase, game, guild_id, user_id):
+    """Skill rating for a player, derived from their existing stats row for the game."""
+    if game == "battle":
+        stats = get_battle_stats(supabase, guild_id, str(user_id))
+    elif game == "tictactoe":
+        stats = get_tictactoe_stats(supabase, guild_id, str(user_id))
+    else:
+        difficulty = game.split("-", 1)[1]
+        stats = get_flipnfind_stats(supabase, guild_id, f"{user_id}_{difficulty}")
+    return rating_from_stats(stats)
+
+async def start_match(game, channel, p1, p2, supabase, bot):
+    """Start a queued game between two matched players; p1 is the one who waited longest."""
+    if is_busy(p1.id) or is_busy(p2.id):
+        await channel.send(f"❌ Match between {p1.mention} and {p2.mention} cancelled: a player is already in a game.")
+        return
+    if game == "battle":
+        await battle.start_battle(channel, p1, p2, supabase, bot)
+    elif game == "tictactoe":
+        await tictactoe.start_tictactoe_game(channel, p1, p2, supabase)
+    else:
+        difficulty = game.split("-", 1)[1]
+        await flipnfind.start_flipnfind_game(channel, p1, p2, supabase, bot, difficulty)
+
+def setup(bot, supabase):
+    async def sweep_loop():
+        """Pair players whose skill band widened and expire stale tickets."""
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            try:
+                matches, expired = matchmaker.sweep()
+                for first, second in matches:
+                    await start_match(first.game, second.channel, first.user, second.user, supabase, bot)
+                for ticket in expired:
+                    await ticket.channel.send(f"⏰ {ticket.user.mention}, no opponent was found for {QUEUE_GAMES[ticket.game]}. You've been removed from the queue.")
+            except Exception as e:
+                logger.error(f"Error in matchmaking sweep: {str(e)}")
+
+    def ensure_sweeper():
+        global _sweeper
+        if _sweeper is None or _sweeper.done():
+            _sweeper = asyncio.create_task(sweep_loop())
+
+    @bot.tree.command(name="queue", description="Join the matchmaking queue for a game")
+    @app_commands.describe(
+        game="The game to queue for",
+        ranked="Prefer opponents with a similar record (may take longer)"
+    )
+    @app_commands.choices(game=[app_commands.Choice(name=name, value=value) for value, name in QUEUE_GAMES.items()])
+    async def queue(interaction: discord.Interaction, game: app_commands.Choice[str], ranked: bool = False):
+        if not interaction.guild_id:
+            await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
+            return
+        if is_busy(interaction.user.id):
+            await interaction.response.send_message("❌ You're already in a game!", ephemeral=True)
+            return
+        ticket = matchmaker.get_ticket(interaction.user.id)
+        if ticket:
+            await interaction.response.send_message(f"❌ You're already queued for {QUEUE_GAMES[ticket.game]}. Use `/queue-leave` first.", ephemeral=True)
+            return
+
+        ensure_sweeper()
+        rating = get_rating(supabase, game.value, interaction.guild_id, interaction.user.id) if ranked else None
+        opponent = matchmaker.enqueue(game.value, interaction.guild_id, interaction.user, interaction.channel, rating)
+
+        if opponent is None:
+            depth = matchmaker.depth(interaction.guild_id, game.value)
+            await interaction.response.send_message(
+                f"🔎 Searching for a {QUEUE_GAMES[game.value]} opponent...\n"
+                f"👥 Players waiting: {depth}" + (f"\n📊 Your rating: {rating}" if ranked else ""),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(f"✅ Match found! You're playing {opponent.user.mention}.", ephemeral=True)
+        try:
+            # The player who waited longest goes first
+            await start_match(game.value, interaction.channel, opponent.user, interaction.user, supabase, bot)
+        except Exception as e:
+            logger.error(f"Failed to start queued {game.value} match: {str(e)}")
+            await interaction.channel.send("❌ An error occurred while starting the match.")
+
+    @bot.tree.command(name="queue-leave", description="Leave the matchmaking queue")
+    async def queue_leave(interaction: discord.Interaction):
+        ticket = matchmaker.cancel(interaction.user.id)
+        if ticket:
+            await interaction.response.send_message(f"👋 You left the {QUEUE_GAMES[ticket.game]} queue.", ephemeral=True)
+        else:
+            await interaction.response.send_message("You're not in a queue.", ephemeral=True)
+
+    @bot.tree.command(name="queue-status", description="Show how many players are waiting in each queue")
+    async def queue_status(interaction: discord.Interaction):
+        guild_id = interaction.guild_id
+        embed = discord.Embed(title="🎯 Matchmaking Queues", color=discord.Color.blue())
+        for value, name in QUEUE_GAMES.items():
+            depth = matchmaker.depth(guild_id, value)
+            if depth:
+                wait = int(matchmaker.oldest_wait(guild_id, value))
+                embed.add_field(name=name, value=f"👥 {depth} waiting\n⏱️ Longest wait: {wait}s", inline=True)
+        if not embed.fields:
+            embed.description = "No one is waiting. Use `/queue` to start searching!"
+        await interaction.response.send_message(embed=embed, ephemeral=True)
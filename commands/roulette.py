@@ -1,62 +1,77 @@
 import discord
 from discord import app_commands
+import os
 import random
 import logging
 from utils.database import get_user_balance, update_user_balance, get_roulette_stats, update_roulette_stats, get_roulette_leaderboard
+from utils.leaderboard import LeaderboardView
+from utils.ratelimit import rate_limit
+from utils.roulette import LAYOUTS, RouletteError, bet_odds
 
 logger = logging.getLogger(__name__)
 
 # HXC Emoji - Replace with your actual emoji ID from Discord Developer Portal
 # Format: <:emoji_name:emoji_id>
 HXC_EMOJI = "<:hxc:1408428556308189378>"
+
+MAX_BET = 10000
+MAX_BETS_PER_SPIN = 5
+COLOR_EMOJI = {"red": "🔴", "black": "⚫", "green": "🟢"}
+
+# Wheel in play; every bet on the standard layouts keeps a small house edge so
+# roulette drains HXC on average however many people play
+wheel = LAYOUTS.get(os.getenv("ROULETTE_LAYOUT", "european"), LAYOUTS["european"])
+
 def setup(bot, supabase):
+    favourable = [wheel.bet_label((kind, selection)) for kind, selection, _, ev, _ in bet_odds(wheel) if ev > 0]
+    if favourable:
+        logger.warning(f"Roulette wheel {wheel.name} pays out more than it takes on: {', '.join(favourable[:5])}")
+
     @bot.tree.command(name="roulette", description="Play roulette and bet your HXC!")
     @app_commands.describe(
-        bet="Amount of HXC to bet (or 'all' for entire balance, 'max' for 10,000)",
-        choice="Choose red, black, or a number (1-24). Number 24 can be typed manually"
+        bet="HXC per bet (or 'all' to split your entire balance, 'max' for 10,000 each)",
+        choice="red, black, odd, even, low, high, dozen1-3, col1-3 or a number; up to 5, comma-separated"
     )
-    @app_commands.choices(choice=[
-        app_commands.Choice(name="Red", value="red"),
-        app_commands.Choice(name="Black", value="black"),
-        app_commands.Choice(name="1", value="1"),
-        app_commands.Choice(name="2", value="2"),
-        app_commands.Choice(name="3", value="3"),
-        app_commands.Choice(name="4", value="4"),
-        app_commands.Choice(name="5", value="5"),
-        app_commands.Choice(name="6", value="6"),
-        app_commands.Choice(name="7", value="7"),
-        app_commands.Choice(name="8", value="8"),
-        app_commands.Choice(name="9", value="9"),
-        app_commands.Choice(name="10", value="10"),
-        app_commands.Choice(name="11", value="11"),
-        app_commands.Choice(name="12", value="12"),
-        app_commands.Choice(name="13", value="13"),
-        app_commands.Choice(name="14", value="14"),
-        app_commands.Choice(name="15", value="15"),
-        app_commands.Choice(name="16", value="16"),
-        app_commands.Choice(name="17", value="17"),
-        app_commands.Choice(name="18", value="18"),
-        app_commands.Choice(name="19", value="19"),
-        app_commands.Choice(name="20", value="20"),
-        app_commands.Choice(name="21", value="21"),
-        app_commands.Choice(name="22", value="22"),
-        app_commands.Choice(name="23", value="23")
-    ])
+    @rate_limit("roulette", 6, 60)
     async def roulette(interaction: discord.Interaction, bet: str, choice: str):
         """Play roulette with HXC betting."""
         try:
+            # Parse the bets first so the stake per bet is known
+            try:
+                bets = [wheel.parse_bet(part) for part in choice.split(",") if part.strip()]
+            except RouletteError as e:
+                await interaction.response.send_message(f"❌ {e} Try red, black, odd, even, low, high, dozen1-3, col1-3 or a number.", ephemeral=True)
+                return
+            if not bets:
+                await interaction.response.send_message("❌ Choose at least one bet, e.g. 'red' or 'red, 17'.", ephemeral=True)
+                return
+            if len(bets) > MAX_BETS_PER_SPIN:
+                await interaction.response.send_message(f"❌ You can place up to {MAX_BETS_PER_SPIN} bets per spin.", ephemeral=True)
+                return
+            
             # Get user balance first for 'all' and 'max' options
             user_data = get_user_balance(supabase, str(interaction.user.id))
             if not user_data:
                 await interaction.response.send_message("❌ Error retrieving balance data!", ephemeral=True)
                 return
             
+            # Prevent zero/negative balance players from playing
+            if user_data["balance"] <= 0:
+                broke_messages = [
+                    f"💸 You need a positive balance to play roulette! Current balance: **{user_data['balance']:,}** {HXC_EMOJI}",
+                    f"🚫 Can't gamble with zero or negative balance. Get some {HXC_EMOJI} first! Balance: **{user_data['balance']:,}** {HXC_EMOJI}",
+                    f"💰 You're in debt! Come back when you have some {HXC_EMOJI} to bet. Balance: **{user_data['balance']:,}** {HXC_EMOJI}",
+                    f"⚠️ Insufficient funds for gambling. You need positive {HXC_EMOJI} to play! Balance: **{user_data['balance']:,}** {HXC_EMOJI}"
+                ]
+                await interaction.response.send_message(random.choice(broke_messages), ephemeral=True)
+                return
+            
             # Handle special bet amounts
-            original_bet = bet
-            if str(bet).lower() == "all":
-                bet = user_data["balance"]
-            elif str(bet).lower() == "max":
-                bet = 10000
+            original_bet = str(bet).lower()
+            if original_bet == "all":
+                bet = user_data["balance"] // len(bets)
+            elif original_bet == "max":
+                bet = MAX_BET
             else:
                 try:
                     bet = int(bet)
@@ -70,131 +85,89 @@ def setup(bot, supabase):
                 return
             
             # Only apply 10k limit if not using 'all' option
-            if original_bet != "all" and bet > 10000:
-                await interaction.response.send_message(f"❌ Maximum bet is 10,000 {HXC_EMOJI}! Use 'all' to bet your entire balance.", ephemeral=True)
-                return
-            
-            # Balance validation (already retrieved above)
-                
-            # Prevent zero/negative balance players from playing
-            if user_data["balance"] <= 0:
-                broke_messages = [
-                    f"💸 You need a positive balance to play roulette! Current balance: **{user_data['balance']:,}** {HXC_EMOJI}",
-                    f"🚫 Can't gamble with zero or negative balance. Get some {HXC_EMOJI} first! Balance: **{user_data['balance']:,}** {HXC_EMOJI}",
-                    f"💰 You're in debt! Come back when you have some {HXC_EMOJI} to bet. Balance: **{user_data['balance']:,}** {HXC_EMOJI}",
-                    f"⚠️ Insufficient funds for gambling. You need positive {HXC_EMOJI} to play! Balance: **{user_data['balance']:,}** {HXC_EMOJI}"
-                ]
-                await interaction.response.send_message(random.choice(broke_messages), ephemeral=True)
-                return
-                
-            # Prevent betting more than current balance
-            if bet > user_data["balance"]:
-                await interaction.response.send_message(
-                    f"❌ You can't bet more than you have! Your balance: **{user_data['balance']:,}** {HXC_EMOJI} | Bet amount: **{bet:,}** {HXC_EMOJI}", 
-                    ephemeral=True
-                )
+            if original_bet != "all" and bet > MAX_BET:
+                await interaction.response.send_message(f"❌ Maximum bet is {MAX_BET:,} {HXC_EMOJI}! Use 'all' to bet your entire balance.", ephemeral=True)
                 return
             
-            # Validate choice
-            choice = choice.lower().strip()
-            valid_colors = ["red", "black"]
-            valid_numbers = [str(i) for i in range(1, 24)]  # 1-23
-            
-            if choice not in valid_colors and choice not in valid_numbers:
+            # Prevent staking more than current balance across all bets
+            total_stake = bet * len(bets)
+            if total_stake > user_data["balance"]:
                 await interaction.response.send_message(
-                    "❌ Invalid choice! Choose 'red', 'black', or a number (1-23).", 
+                    f"❌ You can't bet more than you have! Your balance: **{user_data['balance']:,}** {HXC_EMOJI} | Total stake: **{total_stake:,}** {HXC_EMOJI}", 
                     ephemeral=True
                 )
                 return
             
-            # Deduct bet from balance
-            if not update_user_balance(supabase, str(interaction.user.id), bet, "subtract"):
+            # Deduct the stakes from balance
+            if not update_user_balance(supabase, str(interaction.user.id), total_stake, "subtract"):
                 await interaction.response.send_message("❌ Failed to process bet!", ephemeral=True)
                 return
             
-            # Spin the roulette wheel
-            winning_number = random.randint(1, 24)
-            
-            # Define red and black numbers (1-24 only)
-            red_numbers = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23]
-            black_numbers = [2, 4, 6, 8, 10, 11, 13, 15, 17, 20, 22]
-            
-            # Determine winning color
-            if winning_number in red_numbers:
-                winning_color = "red"
-            else:
-                winning_color = "black"
-            
-            # Calculate winnings
-            won = False
-            winnings = 0
-            
-            if choice.isdigit():
-                # Number bet (35:1 payout)
-                if int(choice) == winning_number:
-                    won = True
-                    winnings = bet * 36  # 35:1 + original bet
-            else:
-                # Color bet (1:1 payout, but user wins twice the bet as requested)
-                if choice == winning_color:
-                    won = True
-                    winnings = bet * 2  # User wins twice the betted amount
-                else:
-                    # Red/black losses are 1.5x the bet amount
-                    additional_loss = int(bet * 0.5)
-                    update_user_balance(supabase, str(interaction.user.id), additional_loss, "subtract")
+            # Spin the wheel once and settle every bet against it
+            pocket = wheel.spin()
+            winning_label = wheel.labels[pocket]
+            winning_color = wheel.color[pocket]
+            nets = [wheel.net(placed, pocket, bet) for placed in bets]
+            net = sum(nets)
+            returned = sum(n + bet for n in nets if n > 0)
+            penalty = sum(-n - bet for n in nets if n < -bet)
+            lost = sum(-n for n in nets if n < 0)  # Losing stakes plus any extra loss
+            result = "win" if net > 0 else "loss" if net < 0 else "push"
             
             # Create beautiful result embed with dynamic styling
             embed = discord.Embed(
                 title="🎰 Roulette Casino",
                 description="━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n🎲 **SPIN RESULTS** 🎲\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
-                color=0x00ff00 if won else 0xff0000
+                color={"win": 0x00ff00, "loss": 0xff0000, "push": 0xffcc00}[result]
             )
             
             # Add wheel emoji based on winning color
-            wheel_emoji = "🔴" if winning_color == "red" else "⚫"
+            wheel_emoji = COLOR_EMOJI[winning_color]
             
             embed.add_field(
                 name="🎯 Winning Number",
-                value=f"\n🎡 {wheel_emoji} **{winning_number}** 🎡\n🏷️ **{winning_color.upper()}**\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
+                value=f"\n🎡 {wheel_emoji} **{winning_label}** 🎡\n🏷️ **{winning_color.upper()}**\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
                 inline=False
             )
             
+            wager_lines = "\n".join(
+                f"{'✅' if n > 0 else '❌'} **{wheel.bet_label(placed).upper()}** {n:+,}"
+                for placed, n in zip(bets, nets)
+            )
             embed.add_field(
                 name="💰 Your Wager",
-                value=f"\n🎯 **{bet:,}** {HXC_EMOJI}\n🎲 **{choice.upper()}**\n",
+                value=f"\n🎯 **{bet:,}** {HXC_EMOJI} each\n{wager_lines}\n",
                 inline=True
             )
             
-            if won:
+            if result == "win":
                 embed.add_field(
                     name="🎉 JACKPOT!",
-                    value=f"\n🎊 **+{winnings:,}** {HXC_EMOJI} 🎊\n💎 **WINNER!** 💎\n",
+                    value=f"\n🎊 **+{net:,}** {HXC_EMOJI} 🎊\n💎 **WINNER!** 💎\n",
+                    inline=True
+                )
+            elif result == "push":
+                embed.add_field(
+                    name="🤝 BREAK EVEN!",
+                    value=f"\n⚖️ **±0** {HXC_EMOJI} ⚖️\n🔁 **{returned:,}** {HXC_EMOJI} **RETURNED** 🔁\n",
                     inline=True
                 )
-                # Add winnings to balance
-                update_user_balance(supabase, str(interaction.user.id), winnings, "add")
-                # Update stats (guild-specific)
-                update_roulette_stats(supabase, str(interaction.guild.id), str(interaction.user.id), "win", bet, winnings)
             else:
-                # Calculate total loss for red/black bets (1.5x)
-                if choice in ['red', 'black']:
-                    total_loss = int(bet * 1.5)
-                    embed.add_field(
-                        name="💸 BUST!",
-                        value=f"\n💀 **-{total_loss:,}** {HXC_EMOJI} 💀\n⚡ **1.5x LOSS PENALTY** ⚡\n",
-                        inline=True
-                    )
-                else:
-                    embed.add_field(
-                        name="💸 BUST!",
-                        value=f"\n💀 **-{bet:,}** {HXC_EMOJI} 💀\n🎯 **BETTER LUCK NEXT TIME** 🎯\n",
-                        inline=True
-                    )
-                # Update stats (guild-specific)
-                update_roulette_stats(supabase, str(interaction.guild.id), str(interaction.user.id), "loss", bet, 0)
+                embed.add_field(
+                    name="💸 BUST!",
+                    value=f"\n💀 **{net:,}** {HXC_EMOJI} 💀\n🎯 **BETTER LUCK NEXT TIME** 🎯\n",
+                    inline=True
+                )
             
-            # Removed new balance display as requested
+            # Pay out winning bets and charge any extra loss the table defines
+            if returned:
+                update_user_balance(supabase, str(interaction.user.id), returned, "add")
+            if penalty:
+                update_user_balance(supabase, str(interaction.user.id), penalty, "subtract")
+            # Update stats (guild-specific); winning and losing bets are counted separately
+            update_roulette_stats(
+                supabase, str(interaction.guild.id), str(interaction.user.id), result, total_stake + penalty, returned, lost
+            )
             
             embed.set_footer(text=f"🎰 Played by {interaction.user.display_name} | HexxaBot Casino 🎰")
             
@@ -274,8 +247,8 @@ def setup(bot, supabase):
                 inline=True
             )
             
-            # Net profit/loss
-            net = stats['total_won'] - stats['total_lost']
+            # Net profit/loss: everything returned minus everything staked
+            net = stats['total_won'] - stats['total_bet']
             embed.add_field(
                 name="💹 Net Profit/Loss",
                 value=f"{'📈' if net >= 0 else '📉'} **{net:,}** {HXC_EMOJI}",
@@ -296,7 +269,7 @@ def setup(bot, supabase):
             await interaction.response.send_message("❌ An error occurred while retrieving stats.", ephemeral=True)
 
     @bot.tree.command(name="roulette-leaderboard", description="View the roulette leaderboard for this server")
-    @app_commands.describe(limit="Number of users to show (1-25, default: 10)")
+    @app_commands.describe(limit="Players per page (1-25, default: 10)")
     async def roulette_leaderboard(interaction: discord.Interaction, limit: int = 10):
         """Show the roulette leaderboard for this server."""
         try:
@@ -305,39 +278,49 @@ def setup(bot, supabase):
                 await interaction.response.send_message("❌ Limit must be between 1 and 25.", ephemeral=True)
                 return
                 
-            leaderboard_data = get_roulette_leaderboard(supabase, str(interaction.guild.id), limit)
+            guild_id = str(interaction.guild.id)
+
+            async def render_page(rows, first_rank):
+                embed = discord.Embed(
+                    title="🎰 Roulette Leaderboard",
+                    description="Top players by total winnings in this server",
+                    color=0xffd700
+                )
+                
+                leaderboard_text = ""
+                medals = ["🥇", "🥈", "🥉"]
+                
+                for position, user_data in enumerate(rows, first_rank - 1):
+                    try:
+                        user = bot.get_user(int(user_data["user_id"]))
+                        username = user.display_name if user else f"User {user_data['user_id'][:8]}..."
+                        
+                        medal = medals[position] if position < 3 else f"**{position+1}.**"
+                        total_won = user_data["total_won"]
+                        
+                        leaderboard_text += f"{medal} {username} - **{total_won:,}** {HXC_EMOJI} won\n"
+                        
+                    except Exception as e:
+                        logger.error(f"Error processing user {user_data['user_id']}: {str(e)}")
+                        continue
+                
+                embed.description = leaderboard_text if leaderboard_text else "No players found."
+                embed.set_footer(text=f"Requested by {interaction.user.display_name}")
+                return embed
+
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, page_limit: get_roulette_leaderboard(supabase, guild_id, page_limit, after),
+                render_page,
+                page_size=limit
+            )
+            embed = await view.start()
             
-            if not leaderboard_data:
+            if embed is None:
                 await interaction.response.send_message("❌ No roulette data found for this server.", ephemeral=True)
                 return
             
-            embed = discord.Embed(
-                title="🎰 Roulette Leaderboard",
-                description="Top players by total winnings in this server",
-                color=0xffd700
-            )
-            
-            leaderboard_text = ""
-            medals = ["🥇", "🥈", "🥉"]
-            
-            for i, user_data in enumerate(leaderboard_data):
-                try:
-                    user = bot.get_user(int(user_data["user_id"]))
-                    username = user.display_name if user else f"User {user_data['user_id'][:8]}..."
-                    
-                    medal = medals[i] if i < 3 else f"**{i+1}.**"
-                    total_won = user_data["total_won"]
-                    
-                    leaderboard_text += f"{medal} {username} - **{total_won:,}** {HXC_EMOJI} won\n"
-                    
-                except Exception as e:
-                    logger.error(f"Error processing user {user_data['user_id']}: {str(e)}")
-                    continue
-            
-            embed.description = leaderboard_text if leaderboard_text else "No players found."
-            embed.set_footer(text=f"Requested by {interaction.user.display_name}")
-            
-            await interaction.response.send_message(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Error in roulette-leaderboard command: {str(e)}")
@@ -3,6 +3,7 @@ import random
 import logging
 from discord import app_commands
 from utils.database import get_rps_stats, update_rps_stats, get_rps_leaderboard
+from utils.leaderboard import LeaderboardView
 
 logger = logging.getLogger(__name__)
 
@@ -103,58 +104,64 @@ def setup(bot, supabase):
             return
             
         try:
-            leaderboard_data = get_rps_leaderboard(supabase, guild_id, 10)
-            
-            if not leaderboard_data:
-                await interaction.followup.send("No one has played Rock Paper Scissors yet!")
-                return
+            async def render_page(rows, first_rank):
+                # Create a nice-looking embed for the leaderboard
+                embed = discord.Embed(
+                    title="🏆 Rock Paper Scissors Leaderboard 🏆",
+                    description="Players ranked by win percentage",
+                    color=0x00ff00  # Green color
+                )
                 
-            # Create a nice-looking embed for the leaderboard
-            embed = discord.Embed(
-                title="🏆 Rock Paper Scissors Leaderboard 🏆",
-                description="Top 10 players ranked by win percentage",
-                color=0x00ff00  # Green color
-            )
-            
-            # Add guild icon to the embed if available
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
+                # Add guild icon to the embed if available
+                if interaction.guild.icon:
+                    embed.set_thumbnail(url=interaction.guild.icon.url)
+                    
+                # Add server name
+                embed.set_author(name=interaction.guild.name)
                 
-            # Add server name
-            embed.set_author(name=interaction.guild.name)
-            
-            # Add footer
-            embed.set_footer(text=f"Requested by {interaction.user.name}", 
-                           icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
-            
-            # Format the leaderboard
-            leaderboard_text = ""
-            
-            for i, player_data in enumerate(leaderboard_data, 1):
-                # Get user info if possible
-                user_id = int(player_data.get("user_id", "0"))
-                display_name = await resolve_member_name(interaction.guild, user_id)
+                # Add footer
+                embed.set_footer(text=f"Requested by {interaction.user.name}", 
+                               icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
                 
-                # Calculate win percentage
-                wins = player_data.get("wins", 0)
-                losses = player_data.get("losses", 0)
-                ties = player_data.get("ties", 0)
-                total = player_data.get("total_games", 0)
-                win_rate = (wins / total * 100) if total > 0 else 0
+                # Format the leaderboard
+                leaderboard_text = ""
                 
-                # Format medal for top 3
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                for i, player_data in enumerate(rows, first_rank):
+                    # Get user info if possible
+                    user_id = int(player_data.get("user_id", "0"))
+                    display_name = await resolve_member_name(interaction.guild, user_id)
+                    
+                    wins = player_data.get("wins", 0)
+                    losses = player_data.get("losses", 0)
+                    ties = player_data.get("ties", 0)
+                    total = player_data.get("total_games", 0)
+                    win_rate = (wins / total * 100) if total > 0 else 0
+                    
+                    # Format medal for top 3
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                    
+                    # Add player to the leaderboard text with better formatting
+                    leaderboard_text += f"**{medal} {display_name}**\n"
+                    leaderboard_text += f"┣ Win Rate: **{win_rate:.1f}%**\n"
+                    leaderboard_text += f"┣ W: **{wins}** ┃ L: **{losses}** ┃ T: **{ties}**\n"
+                    leaderboard_text += f"┗ Total Games: **{total}**\n\n"
                 
-                # Add player to the leaderboard text with better formatting
-                leaderboard_text += f"**{medal} {display_name}**\n"
-                leaderboard_text += f"┣ Win Rate: **{win_rate:.1f}%**\n"
-                leaderboard_text += f"┣ W: **{wins}** ┃ L: **{losses}** ┃ T: **{ties}**\n"
-                leaderboard_text += f"┗ Total Games: **{total}**\n\n"
+                # Add the formatted text to the embed
+                embed.description = f"Players ranked by win percentage\n\n{leaderboard_text}"
+                return embed
+            
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_rps_leaderboard(supabase, guild_id, limit, after),
+                render_page
+            )
+            embed = await view.start()
             
-            # Add the formatted text to the embed
-            embed.description = f"Top 10 players ranked by win percentage\n\n{leaderboard_text}"
+            if embed is None:
+                await interaction.followup.send("No one has played Rock Paper Scissors yet!")
+                return
             
-            await interaction.followup.send(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Failed to get RPS leaderboard: {str(e)}")
@@ -2,7 +2,10 @@ import discord
 import logging
 import asyncio
 from discord import app_commands
-from utils.database import get_tictactoe_stats, update_tictactoe_stats, get_tictactoe_leaderboard
+from utils.database import get_tictactoe_stats, update_tictactoe_stats, get_tictactoe_leaderboard, update_game_ratings
+from utils.leaderboard import LeaderboardView
+from utils.embeds import CachedEmbed, board_text
+from utils.rating import rating_text
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,7 @@ class TicTacToeGame:
         self.move_timer = None
         self.start_time = discord.utils.utcnow()
         self.moves_count = 0
+        self._embed = CachedEmbed()
 
     def get_time_left(self):
         elapsed = (discord.utils.utcnow() - self.last_move_time).total_seconds()
@@ -108,69 +112,46 @@ class TicTacToeGame:
         return False
 
     def get_board_embed(self):
-        embed = discord.Embed(
-            title="🎮 Tic Tac Toe",
-            description="Use the buttons below to make your move!",
-            color=0x00ff00
-        )
-        
-        # Create the board display with better formatting
-        board_text = "```\n"
-        for row in self.board:
-            board_text += " ".join(row) + "\n"
-        board_text += "```"
-            
-        embed.add_field(name="Game Board", value=board_text, inline=False)
+        fields = [("Game Board", board_text(tuple(map(tuple, self.board))), False)]
         
         # Add current player info with better formatting
         if self.winner:
             if self.quit_by:
-                embed.add_field(
-                    name="🏆 Game Over!",
-                    value=f"🎉 {self.winner.mention} wins!\n{self.quit_by.mention} quit the game.",
-                    inline=False
-                )
+                fields.append(("🏆 Game Over!", f"🎉 {self.winner.mention} wins!\n{self.quit_by.mention} quit the game.", False))
             else:
-                embed.add_field(
-                    name="🏆 Game Over!",
-                    value=f"🎉 {self.winner.mention} wins!",
-                    inline=False
-                )
-            embed.color = 0x00ff00  # Green for win
+                fields.append(("🏆 Game Over!", f"🎉 {self.winner.mention} wins!", False))
+            color = 0x00ff00  # Green for win
         elif self.is_draw:
-            embed.add_field(
-                name="🤝 Game Over!",
-                value="It's a draw!",
-                inline=False
-            )
-            embed.color = 0xffff00  # Yellow for draw
+            fields.append(("🤝 Game Over!", "It's a draw!", False))
+            color = 0xffff00  # Yellow for draw
         else:
             time_left = self.get_time_left()
-            embed.add_field(
-                name="⏳ Current Turn",
-                value=f"{self.current_player.mention}'s turn ({'❌' if self.current_player == self.player1 else '⭕'})\n"
-                      f"⏰ Time left: {time_left:.1f} seconds",
-                inline=False
-            )
-            embed.color = 0x3498db  # Blue for ongoing game
+            fields.append((
+                "⏳ Current Turn",
+                f"{self.current_player.mention}'s turn ({'❌' if self.current_player == self.player1 else '⭕'})\n"
+                f"⏰ Time left: {time_left:.1f} seconds",
+                False
+            ))
+            color = 0x3498db  # Blue for ongoing game
             
         # Add player info with better formatting
-        embed.add_field(
-            name="Players",
-            value=f"❌ {self.player1.mention}\n⭕ {self.player2.mention}",
-            inline=False
-        )
+        fields.append(("Players", f"❌ {self.player1.mention}\n⭕ {self.player2.mention}", False))
 
         # Add game stats
         duration = self.get_game_duration()
-        embed.add_field(
-            name="Game Stats",
-            value=f"⏱️ Duration: {duration:.1f} seconds\n"
-                  f"🎯 Moves: {self.moves_count}",
-            inline=False
+        fields.append((
+            "Game Stats",
+            f"⏱️ Duration: {duration:.1f} seconds\n"
+            f"🎯 Moves: {self.moves_count}",
+            False
+        ))
+            
+        return self._embed.render(
+            title="🎮 Tic Tac Toe",
+            description="Use the buttons below to make your move!",
+            color=color,
+            fields=fields
         )
-            
-        return embed
 
 class TicTacToeView(discord.ui.View):
     def __init__(self, game: TicTacToeGame, supabase):
@@ -283,6 +264,10 @@ class TicTacToeView(discord.ui.View):
                     str(self.game.player2.id),
                     "draw"
                 )
+            
+            # One Glicko-2 update per game, scored from player1's side
+            score = 0.5 if not self.game.winner else 1 if self.game.winner == self.game.player1 else 0
+            update_game_ratings(self.supabase, "tictactoe", guild_id, str(self.game.player1.id), str(self.game.player2.id), score)
         except Exception as e:
             logger.error(f"Failed to update Tic Tac Toe stats: {str(e)}")
             if isinstance(interaction, discord.Interaction):
@@ -419,6 +404,23 @@ class GameInviteView(discord.ui.View):
                 await self.message.edit(view=self)
             await self.channel.send(f"{self.host.mention}, {self.opponent.mention} did not respond to your game invitation in time.")
 
+async def start_tictactoe_game(channel, player1, player2, supabase):
+    """Start a game between two players in the given channel; player1 moves first."""
+    game = TicTacToeGame(player1, player2)
+    active_games[player1.id] = game
+    active_games[player2.id] = game
+    
+    game_view = TicTacToeView(game, supabase)
+    message = await channel.send(
+        f"🎮 {player1.mention} vs {player2.mention}\n"
+        f"{player1.mention} goes first!",
+        embed=game.get_board_embed(),
+        view=game_view
+    )
+    game_view.message = message
+    asyncio.create_task(game_view.start_move_timer())
+    return game
+
 def setup(bot, supabase):
     @bot.tree.command(name="tictactoe", description="Play Tic Tac Toe with another user!")
     @app_commands.describe(opponent="The user you want to play against")
@@ -480,19 +482,7 @@ def setup(bot, supabase):
             
             if view.accepted:
                 # Start the game
-                game = TicTacToeGame(interaction.user, opponent)
-                active_games[interaction.user.id] = game
-                active_games[opponent.id] = game
-                
-                game_view = TicTacToeView(game, supabase)
-                message = await interaction.channel.send(
-                    f"🎮 {interaction.user.mention} vs {opponent.mention}\n"
-                    f"{interaction.user.mention} goes first!",
-                    embed=game.get_board_embed(),
-                    view=game_view
-                )
-                game_view.message = message
-                asyncio.create_task(game_view.start_move_timer())
+                await start_tictactoe_game(interaction.channel, interaction.user, opponent, supabase)
             elif view.denied:
                 await interaction.channel.send(f"❌ {interaction.user.mention}, {opponent.mention} declined your game invitation.")
                 
@@ -540,59 +530,67 @@ def setup(bot, supabase):
             return
             
         try:
-            leaderboard_data = get_tictactoe_leaderboard(supabase, guild_id, 10)
-            
-            if not leaderboard_data:
-                await interaction.followup.send("No one has played Tic Tac Toe yet!")
-                return
+            async def render_page(rows, first_rank):
+                # Create a nice-looking embed for the leaderboard
+                embed = discord.Embed(
+                    title="🎮 Tic Tac Toe Leaderboard 🏆",
+                    description="Players ranked by rating",
+                    color=0x00ff00
+                )
                 
-            # Create a nice-looking embed for the leaderboard
-            embed = discord.Embed(
-                title="🎮 Tic Tac Toe Leaderboard 🏆",
-                description="Top 10 players ranked by win percentage",
-                color=0x00ff00
-            )
-            
-            # Add guild icon to the embed if available
-            if interaction.guild.icon:
-                embed.set_thumbnail(url=interaction.guild.icon.url)
+                # Add guild icon to the embed if available
+                if interaction.guild.icon:
+                    embed.set_thumbnail(url=interaction.guild.icon.url)
+                    
+                # Add server name
+                embed.set_author(name=interaction.guild.name)
                 
-            # Add server name
-            embed.set_author(name=interaction.guild.name)
-            
-            # Add footer
-            embed.set_footer(text=f"Requested by {interaction.user.name}", 
-                           icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
-            
-            # Format the leaderboard
-            leaderboard_text = ""
-            
-            for i, player_data in enumerate(leaderboard_data, 1):
-                # Get user info if possible
-                user_id = int(player_data.get("user_id", "0"))
-                member = interaction.guild.get_member(user_id)
-                display_name = member.display_name if member else f"Unknown Player"
+                # Add footer
+                embed.set_footer(text=f"Requested by {interaction.user.name}", 
+                               icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
                 
-                # Calculate win percentage
-                wins = player_data.get("wins", 0)
-                losses = player_data.get("losses", 0)
-                draws = player_data.get("draws", 0)
-                total = player_data.get("total_games", 0)
-                win_rate = (wins / total * 100) if total > 0 else 0
+                # Format the leaderboard
+                leaderboard_text = ""
                 
-                # Format medal for top 3
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                for i, player_data in enumerate(rows, first_rank):
+                    # Get user info if possible
+                    user_id = int(player_data.get("user_id", "0"))
+                    member = interaction.guild.get_member(user_id)
+                    display_name = member.display_name if member else f"Unknown Player"
+                    
+                    # Calculate win percentage
+                    wins = player_data.get("wins", 0)
+                    losses = player_data.get("losses", 0)
+                    draws = player_data.get("draws", 0)
+                    total = player_data.get("total_games", 0)
+                    win_rate = (wins / total * 100) if total > 0 else 0
+                    
+                    # Format medal for top 3
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"`#{i}`"
+                    
+                    # Add player to the leaderboard text with better formatting
+                    leaderboard_text += f"**{medal} {display_name}**\n"
+                    leaderboard_text += f"┣ Rating: **{rating_text(player_data)}**\n"
+                    leaderboard_text += f"┣ Win Rate: **{win_rate:.1f}%**\n"
+                    leaderboard_text += f"┣ W: **{wins}** ┃ L: **{losses}** ┃ D: **{draws}**\n"
+                    leaderboard_text += f"┗ Total Games: **{total}**\n\n"
                 
-                # Add player to the leaderboard text with better formatting
-                leaderboard_text += f"**{medal} {display_name}**\n"
-                leaderboard_text += f"┣ Win Rate: **{win_rate:.1f}%**\n"
-                leaderboard_text += f"┣ W: **{wins}** ┃ L: **{losses}** ┃ D: **{draws}**\n"
-                leaderboard_text += f"┗ Total Games: **{total}**\n\n"
+                # Add the formatted text to the embed
+                embed.description = f"Players ranked by rating\n\n{leaderboard_text}"
+                return embed
+            
+            view = LeaderboardView(
+                interaction.user.id,
+                lambda after, limit: get_tictactoe_leaderboard(supabase, guild_id, limit, after),
+                render_page
+            )
+            embed = await view.start()
             
-            # Add the formatted text to the embed
-            embed.description = f"Top 10 players ranked by win percentage\n\n{leaderboard_text}"
+            if embed is None:
+                await interaction.followup.send("No one has played Tic Tac Toe yet!")
+                return
             
-            await interaction.followup.send(embed=embed)
+            await view.send(interaction, embed)
             
         except Exception as e:
             logger.error(f"Failed to get Tic Tac Toe leaderboard: {str(e)}")
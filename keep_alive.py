@@ -10,6 +10,61 @@ try:
 except ImportError:
     discord = None
 
+try:
+    from utils.embeds import get_render_stats
+except ImportError:
+    get_render_stats = None
+
+try:
+    from utils.matchmaking import get_queue_stats
+except ImportError:
+    get_queue_stats = None
+
+try:
+    from utils.ratelimit import get_limiter_stats
+except ImportError:
+    get_limiter_stats = None
+
+try:
+    from utils.dm_router import get_router_stats
+except ImportError:
+    get_router_stats = None
+
+try:
+    from utils.job_sweeper import get_sweeper_stats
+except ImportError:
+    get_sweeper_stats = None
+
+try:
+    from utils.guild_stats import get_guild_cache_stats
+except ImportError:
+    get_guild_cache_stats = None
+
+try:
+    from utils.leaderboard import get_leaderboard_stats
+except ImportError:
+    get_leaderboard_stats = None
+
+try:
+    from utils.table_registry import get_table_registry_stats
+except ImportError:
+    get_table_registry_stats = None
+
+try:
+    from utils.db_client import get_db_client_stats
+except ImportError:
+    get_db_client_stats = None
+
+try:
+    from utils.db_pool import get_pool_stats
+except ImportError:
+    get_pool_stats = None
+
+try:
+    from utils.sqlite_backend import get_storage_stats
+except ImportError:
+    get_storage_stats = None
+
 app = Flask('', template_folder='templates')
 
 start_time = datetime.now(timezone.utc)
@@ -76,6 +131,122 @@ def build_metrics(now: datetime):
             "meta": "gateway latency reported by Discord.py"
         })
 
+    if get_render_stats is not None:
+        render_stats = get_render_stats()
+        renders = render_stats["renders"]
+        if renders:
+            avg_ms = render_stats["render_seconds"] * 1000 / renders
+            touched = render_stats["fields_updated"] + render_stats["fields_reused"]
+            reuse_pct = render_stats["fields_reused"] * 100 / touched if touched else 0
+            metrics.append({
+                "label": "embed renders",
+                "value": f"{renders:,}",
+                "meta": f"avg {avg_ms:.3f} ms, {reuse_pct:.0f}% fields reused"
+            })
+
+    if get_queue_stats is not None:
+        queue_stats = get_queue_stats()
+        if queue_stats["enqueued"]:
+            avg_wait = queue_stats["wait_seconds"] / queue_stats["waited"] if queue_stats["waited"] else 0
+            metrics.append({
+                "label": "matchmaking queue",
+                "value": f"{queue_stats['waiting']} waiting",
+                "meta": f"{queue_stats['matched']:,} matches, avg wait {avg_wait:.1f}s, {queue_stats['expired']} expired"
+            })
+
+    if get_limiter_stats is not None:
+        limiter_stats = get_limiter_stats()
+        if limiter_stats["checks"]:
+            top = ", ".join(f"/{name} {count}" for name, count in limiter_stats["top_rejected"])
+            metrics.append({
+                "label": "rate limiter",
+                "value": f"{limiter_stats['rejected']:,} rejected",
+                "meta": f"of {limiter_stats['checks']:,} checks" + (f"; {top}" if top else "") + f"; {limiter_stats['keys']:,} keys"
+            })
+
+    if get_router_stats is not None:
+        router_stats = get_router_stats()
+        if router_stats["routed"]:
+            metrics.append({
+                "label": "dm games",
+                "value": f"{router_stats['open']} active",
+                "meta": f"{router_stats['routed']:,} messages routed, {router_stats['dropped']} dropped"
+            })
+
+    if get_sweeper_stats is not None:
+        sweeper_stats = get_sweeper_stats()
+        if sweeper_stats["sweeps"]:
+            metrics.append({
+                "label": "job sweeper",
+                "value": f"{sweeper_stats['fired']:,} fired",
+                "meta": f"{sweeper_stats['sweeps']:,} sweeps, last took {sweeper_stats['last_sweep_seconds'] * 1000:.0f} ms; {sweeper_stats['notify_failed']} DMs failed"
+            })
+
+    if get_guild_cache_stats is not None:
+        guild_cache = get_guild_cache_stats()
+        if guild_cache["reads"]:
+            metrics.append({
+                "label": "server stats cache",
+                "value": f"{guild_cache['guilds']} guilds",
+                "meta": f"{guild_cache['reads']:,} reads, {guild_cache['events']:,} events, {guild_cache['reconciles']} rescans ({guild_cache['drifted']} drifted)"
+            })
+
+    if get_leaderboard_stats is not None:
+        board_stats = get_leaderboard_stats()
+        if board_stats["pages_fetched"]:
+            prefetch_pct = board_stats["prefetch_hits"] * 100 / board_stats["prefetched"] if board_stats["prefetched"] else 0
+            metrics.append({
+                "label": "leaderboard pages",
+                "value": f"{board_stats['pages_fetched']:,} fetched",
+                "meta": f"{prefetch_pct:.0f}% of prefetches used, {board_stats['render_cache_hits']:,} cached re-renders"
+            })
+
+    if get_table_registry_stats is not None:
+        registry_stats = get_table_registry_stats()
+        if registry_stats["guilds"] or registry_stats["failed"]:
+            metrics.append({
+                "label": "guild tables",
+                "value": f"{registry_stats['guilds']:,} provisioned",
+                "meta": f"{registry_stats['lazy_provisions']} on first write, {registry_stats['failed']} failed RPCs"
+            })
+
+    if get_db_client_stats is not None:
+        client_stats = get_db_client_stats()
+        if client_stats["state"] is not None:
+            state = client_stats["state"].replace("_", "-")
+            meta = f"{client_stats['calls']:,} calls, {client_stats['retries']} retries, {client_stats['timeouts']} timeouts"
+            if client_stats["hedged"]:
+                meta += f", {client_stats['hedge_wins']}/{client_stats['hedged']} hedges won"
+            if client_stats["stale_served"] or client_stats["short_circuited"]:
+                meta += f"; {client_stats['stale_served']} stale answers, {client_stats['short_circuited']} failed fast"
+            metrics.append({
+                "label": "database circuit",
+                "value": state,
+                "meta": meta + f"; opened {client_stats['circuit_opens']}x"
+            })
+
+    if get_pool_stats is not None:
+        pool_stats = get_pool_stats()
+        if pool_stats["requests"]:
+            http2_pct = pool_stats["http2_responses"] * 100 / pool_stats["requests"]
+            metrics.append({
+                "label": "database connections",
+                "value": f"{pool_stats['reuse_rate'] * 100:.1f}% reused",
+                "meta": (
+                    f"{pool_stats['requests']:,} requests on {pool_stats['new_connections']} connections, "
+                    f"{pool_stats['handshakes_last_minute']} TLS handshakes in the last minute, {http2_pct:.0f}% HTTP/2"
+                )
+            })
+
+    if get_storage_stats is not None:
+        storage_stats = get_storage_stats()
+        if storage_stats["path"] is not None:
+            metrics.append({
+                "label": "database",
+                "value": f"SQLite ({storage_stats['journal_mode']})",
+                "meta": f"{storage_stats['queries']:,} queries, {storage_stats['rpcs']:,} functions, {storage_stats['errors']} errors"
+            })
+
     return status, metrics
 
 @app.route('/')
@@ -130,18 +301,10 @@ def self_ping():
         finally:
             time.sleep(600)
 
-def supabase_keepalive(supabase):
-    """Keep Supabase connection alive with periodic queries"""
-    while True:
-        try:
-            time.sleep(900)  # Wait 15 minutes
-            supabase.table('economy').select('user_id').limit(1).execute()
-            print(f"[{datetime.now()}] Supabase keepalive successful")
-        except Exception as e:
-            print(f"[{datetime.now()}] Supabase keepalive failed: {str(e)}")
-
 def keep_alive(*args, supabase=None, bot: "discord.Client" = None):
-    # Backward compatibility for positional arguments (supabase, bot)
+    # Backward compatibility for positional arguments (supabase, bot). The
+    # supabase client needs no pinging: its connection pool keeps connections
+    # warm between commands (see utils/db_pool.py)
     if supabase is None and len(args) >= 1:
         supabase = args[0]
     if bot is None and len(args) >= 2:
@@ -152,10 +315,6 @@ def keep_alive(*args, supabase=None, bot: "discord.Client" = None):
     # Start self-ping to prevent sleeping
     Thread(target=self_ping, daemon=True).start()
 
-    # Start Supabase keepalive if provided
-    if supabase:
-        Thread(target=supabase_keepalive, args=(supabase,), daemon=True).start()
-
     if bot and discord is not None:
         def update_discord_latency():
             while True:
@@ -170,4 +329,4 @@ def keep_alive(*args, supabase=None, bot: "discord.Client" = None):
 
         Thread(target=update_discord_latency, daemon=True).start()
 
-    print("Keep-alive system started: Flask server + self-ping + Supabase keepalive")
+    print("Keep-alive system started: Flask server + self-ping")
@@ -5,6 +5,13 @@ create or replace function create_guild_tables(guild_id text)
 returns void as $$
 declare
     safe_id text := regexp_replace(guild_id, '[^0-9]', '', 'g');
+    rated_table text;
+    stats_table text;
+    global_game text[];
+    sort_key text[];
+    key_generated "char";
+    wins_expr text;
+    draws_expr text;
 begin
     -- RPS table
     execute format(
@@ -47,6 +54,39 @@ begin
     exception
         when duplicate_object then null;
     end;
+    -- Running gap aggregates; gap_histogram[g + 1] counts guesses that were g away
+    execute format('alter table %I add column if not exists gap_count integer default 0', 'guess_number_stats_' || safe_id);
+    execute format('alter table %I add column if not exists gap_sum bigint default 0', 'guess_number_stats_' || safe_id);
+    execute format(
+        'alter table %I add column if not exists gap_histogram integer[] default array_fill(0, array[100])',
+        'guess_number_stats_' || safe_id
+    );
+
+    -- Guess Number history, one append-only row per game
+    execute format(
+        'create table if not exists %I (
+            id bigint generated always as identity primary key,
+            user_id text not null,
+            won boolean not null,
+            target smallint not null,
+            guesses smallint[] not null,
+            played_at timestamp with time zone default now()
+        )', 'guess_number_games_' || safe_id);
+    execute format(
+        'create index if not exists %I on %I (user_id, played_at desc)',
+        'guess_number_games_' || safe_id || '_user_idx',
+        'guess_number_games_' || safe_id
+    );
+    execute format('alter table %I enable row level security', 'guess_number_games_' || safe_id);
+    begin
+        execute format(
+            'create policy %I on %I for all to authenticated using (true) with check (true)',
+            'rls_auth_all_guess_games_' || safe_id,
+            'guess_number_games_' || safe_id
+        );
+    exception
+        when duplicate_object then null;
+    end;
 
     -- TicTacToe table
     execute format(
@@ -161,6 +201,325 @@ begin
     exception
         when duplicate_object then null;
     end;
+
+    -- Glicko-2 ratings for two-player games. Added with alter so tables created
+    -- before ratings existed pick them up; rating_score (rating - 2 * RD) is
+    -- what leaderboards sort by, so a 1-0 newcomer does not outrank veterans.
+    foreach rated_table in array array['battle_stats_', 'tictactoe_stats_', 'flipnfind_stats_'] loop
+        execute format('alter table %I add column if not exists rating real default 1500', rated_table || safe_id);
+        execute format('alter table %I add column if not exists rating_rd real default 350', rated_table || safe_id);
+        execute format('alter table %I add column if not exists rating_vol real default 0.06', rated_table || safe_id);
+        execute format(
+            'alter table %I add column if not exists rating_score real generated always as (rating - 2 * rating_rd) stored',
+            rated_table || safe_id
+        );
+        execute format(
+            'create index if not exists %I on %I (rating_score desc)',
+            rated_table || safe_id || '_rating_idx',
+            rated_table || safe_id
+        );
+    end loop;
+
+    -- Streaming per-metric summaries (count, mean/variance, min/max, EWMA,
+    -- P² percentiles) keyed by metric name; see utils/streaming.py
+    foreach stats_table in array array['guess_number_stats_', 'flipnfind_stats_', 'kidnapped_jack_stats_'] loop
+        execute format('alter table %I add column if not exists analytics jsonb default ''{}''', stats_table || safe_id);
+    end loop;
+
+    -- Stored sort keys for the win-rate leaderboards
+    execute format(
+        'alter table %I add column if not exists win_rate real generated always as
+            (case when total_games > 0 then wins::real / total_games else 0 end) stored',
+        'rps_stats_' || safe_id
+    );
+    execute format(
+        'alter table %I add column if not exists success_rate real generated always as
+            (case when total_games > 0 then correct_guesses::real / total_games else 0 end) stored',
+        'guess_number_stats_' || safe_id
+    );
+
+    -- Flip & Find stats summed across difficulties per player, kept current by
+    -- sync_flipnfind_totals and backfilled here for rows written before it
+    execute format(
+        'create table if not exists %I (
+            user_id text primary key,
+            wins integer default 0,
+            losses integer default 0,
+            total_games integer default 0,
+            star_cards integer default 0
+        )', 'flipnfind_totals_' || safe_id);
+    execute format('alter table %I enable row level security', 'flipnfind_totals_' || safe_id);
+    begin
+        execute format(
+            'create policy %I on %I for all to authenticated using (true) with check (true)',
+            'rls_auth_all_flip_totals_' || safe_id,
+            'flipnfind_totals_' || safe_id
+        );
+    exception
+        when duplicate_object then null;
+    end;
+    execute format(
+        'insert into %I (user_id, wins, losses, total_games, star_cards)
+            select split_part(user_id, ''_'', 1), sum(coalesce(wins, 0)), sum(coalesce(losses, 0)),
+                   sum(coalesce(total_games, 0)), sum(coalesce(star_cards, 0))
+            from %I group by 1
+         on conflict (user_id) do update set wins = excluded.wins, losses = excluded.losses,
+             total_games = excluded.total_games, star_cards = excluded.star_cards',
+        'flipnfind_totals_' || safe_id,
+        'flipnfind_stats_' || safe_id
+    );
+    execute format('drop trigger if exists flipnfind_totals_sync on %I', 'flipnfind_stats_' || safe_id);
+    execute format(
+        'create trigger flipnfind_totals_sync
+            after insert or delete or update of wins, losses, total_games, star_cards on %I
+            for each row execute function sync_flipnfind_totals()',
+        'flipnfind_stats_' || safe_id
+    );
+
+    -- Leaderboard sort keys are never null: a keyset cursor can't carry a null
+    -- (PostgREST has no "lt.null"), and desc order would put null rows first.
+    -- Rows from before the constraint get the column default (generated
+    -- columns follow their inputs); tables already constrained are skipped.
+    foreach sort_key slice 1 in array array[
+        ['rps_stats_', 'wins'], ['rps_stats_', 'losses'], ['rps_stats_', 'ties'], ['rps_stats_', 'total_games'],
+        ['rps_stats_', 'win_rate'],
+        ['guess_number_stats_', 'correct_guesses'], ['guess_number_stats_', 'incorrect_guesses'],
+        ['guess_number_stats_', 'total_games'], ['guess_number_stats_', 'success_rate'],
+        ['tictactoe_stats_', 'rating'], ['tictactoe_stats_', 'rating_rd'], ['tictactoe_stats_', 'rating_score'],
+        ['battle_stats_', 'rating'], ['battle_stats_', 'rating_rd'], ['battle_stats_', 'rating_score'],
+        ['flipnfind_stats_', 'rating'], ['flipnfind_stats_', 'rating_rd'], ['flipnfind_stats_', 'rating_score'],
+        ['flipnfind_totals_', 'wins'], ['flipnfind_totals_', 'star_cards'],
+        ['kidnapped_jack_stats_', 'escapes'],
+        ['roulette_stats_', 'total_won']
+    ] loop
+        select attgenerated into key_generated from pg_attribute
+        where attrelid = to_regclass(quote_ident(sort_key[1] || safe_id))
+        and attname = sort_key[2] and not attnotnull;
+        if found then
+            if key_generated = '' then
+                execute format('update %I set %I = default where %I is null', sort_key[1] || safe_id, sort_key[2], sort_key[2]);
+            end if;
+            execute format('alter table %I alter column %I set not null', sort_key[1] || safe_id, sort_key[2]);
+        end if;
+    end loop;
+
+    -- Keyset indexes for the paged leaderboards: a page is the rows after the
+    -- previous page's last one in (sort keys, user_id) order, one range scan
+    execute format(
+        'create index if not exists %I on %I (win_rate desc, wins desc, user_id)',
+        'rps_stats_' || safe_id || '_lb_idx', 'rps_stats_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (success_rate desc, correct_guesses desc, user_id)',
+        'guess_number_stats_' || safe_id || '_lb_idx', 'guess_number_stats_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (rating_score desc, user_id)',
+        'tictactoe_stats_' || safe_id || '_lb_idx', 'tictactoe_stats_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (rating_score desc, user_id)',
+        'battle_stats_' || safe_id || '_lb_idx', 'battle_stats_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (wins desc, star_cards desc, user_id)',
+        'flipnfind_totals_' || safe_id || '_lb_idx', 'flipnfind_totals_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (escapes desc, user_id)',
+        'kidnapped_jack_stats_' || safe_id || '_lb_idx', 'kidnapped_jack_stats_' || safe_id
+    );
+    execute format(
+        'create index if not exists %I on %I (total_won desc, user_id)',
+        'roulette_stats_' || safe_id || '_lb_idx', 'roulette_stats_' || safe_id
+    );
+
+    -- Feed every game table into global_stats: {table prefix, game, wins, losses,
+    -- draws, total games} columns, '' where a game has none. The trigger is
+    -- attached and the table's existing rows backfilled in one step, only while
+    -- the trigger is missing, so no row is counted twice (a concurrent call fails
+    -- on the duplicate trigger and rolls back).
+    foreach global_game slice 1 in array array[
+        ['rps_stats_', 'rps', 'wins', 'losses', 'ties', 'total_games'],
+        ['guess_number_stats_', 'guess_number', 'correct_guesses', 'incorrect_guesses', '', 'total_games'],
+        ['tictactoe_stats_', 'tictactoe', 'wins', 'losses', 'draws', 'total_games'],
+        ['battle_stats_', 'battle', 'wins', 'losses', '', 'total_games'],
+        ['flipnfind_stats_', 'flipnfind', 'wins', 'losses', '', 'total_games'],
+        ['kidnapped_jack_stats_', 'kidnapped_jack', 'escapes', 'kidnapper_count', '', 'games_played'],
+        ['roulette_stats_', 'roulette', 'games_won', '', '', 'games_played']
+    ] loop
+        if not exists (
+            select 1 from pg_trigger
+            where tgname = 'global_stats_sync'
+            and tgrelid = to_regclass(quote_ident(global_game[1] || safe_id))
+        ) then
+            execute format(
+                'create trigger global_stats_sync after insert or update or delete on %I
+                    for each row execute function sync_global_stats(%L, %L, %L, %L, %L)',
+                global_game[1] || safe_id, global_game[2], global_game[3], global_game[4], global_game[5], global_game[6]
+            );
+            wins_expr := format('coalesce(%I, 0)', global_game[3]);
+            draws_expr := case when global_game[5] = '' then '0' else format('coalesce(%I, 0)', global_game[5]) end;
+            execute format(
+                'insert into global_stats (user_id, game, wins, losses, draws, total_games)
+                    select split_part(user_id, ''_'', 1), %L, sum(%s), sum(%s), sum(%s), sum(coalesce(%I, 0))
+                    from %I group by 1
+                 on conflict (user_id, game) do update set wins = global_stats.wins + excluded.wins,
+                     losses = global_stats.losses + excluded.losses, draws = global_stats.draws + excluded.draws,
+                     total_games = global_stats.total_games + excluded.total_games, updated_at = now()',
+                global_game[2],
+                wins_expr,
+                case when global_game[4] = ''
+                    then format('coalesce(%I, 0) - %s - %s', global_game[6], wins_expr, draws_expr)
+                    else format('coalesce(%I, 0)', global_game[4]) end,
+                draws_expr,
+                global_game[6],
+                global_game[1] || safe_id
+            );
+        end if;
+    end loop;
+end;
+$$ language plpgsql;
+
+-- Re-sums one player's Flip & Find rows (user_id is '<player>_<difficulty>')
+-- into the guild's flipnfind_totals table
+create or replace function sync_flipnfind_totals()
+returns trigger as $$
+declare
+    base_id text;
+begin
+    if TG_OP = 'DELETE' then
+        base_id := split_part(old.user_id, '_', 1);
+    else
+        base_id := split_part(new.user_id, '_', 1);
+    end if;
+    execute format(
+        'insert into %I (user_id, wins, losses, total_games, star_cards)
+            select $1, coalesce(sum(wins), 0), coalesce(sum(losses), 0),
+                   coalesce(sum(total_games), 0), coalesce(sum(star_cards), 0)
+            from %I where user_id = $1 or user_id like $1 || ''\_%%''
+         on conflict (user_id) do update set wins = excluded.wins, losses = excluded.losses,
+             total_games = excluded.total_games, star_cards = excluded.star_cards',
+        replace(TG_TABLE_NAME, 'flipnfind_stats_', 'flipnfind_totals_'),
+        TG_TABLE_NAME
+    ) using base_id;
+    return null;
+end;
+$$ language plpgsql;
+
+-- Every game's stats for one player in one guild, as a single jsonb object
+-- keyed by game (null for games they haven't played; Flip & Find keyed by
+-- difficulty). Each part is a primary-key lookup reading only the columns
+-- /stats shows.
+create or replace function get_player_summary(p_guild_id text, p_user_id text)
+returns jsonb as $$
+declare
+    safe_id text := regexp_replace(p_guild_id, '[^0-9]', '', 'g');
+    result jsonb;
+begin
+    execute format(
+        'select jsonb_build_object(
+            ''rps'', (select to_jsonb(t) from (
+                select wins, losses, ties, total_games from %I where user_id = $1) t),
+            ''guess_number'', (select to_jsonb(t) from (
+                select correct_guesses, incorrect_guesses, total_games, gap_count, gap_sum from %I where user_id = $1) t),
+            ''tictactoe'', (select to_jsonb(t) from (
+                select wins, losses, draws, total_games, rating, rating_rd from %I where user_id = $1) t),
+            ''battle'', (select to_jsonb(t) from (
+                select wins, losses, total_games, rating, rating_rd from %I where user_id = $1) t),
+            ''flipnfind'', (select jsonb_object_agg(split_part(user_id, ''_'', 2), to_jsonb(t) - ''user_id'') from (
+                select user_id, wins, losses, total_games, best_time, best_turns, star_cards from %I
+                where user_id = any(array[$1 || ''_easy'', $1 || ''_medium'', $1 || ''_hard'', $1 || ''_extreme''])) t),
+            ''kidnapped_jack'', (select to_jsonb(t) from (
+                select games_played, escapes, kidnapper_count, best_time, best_placement, total_wins from %I where user_id = $1) t),
+            ''roulette'', (select to_jsonb(t) from (
+                select games_played, games_won, total_bet, total_won, total_lost, biggest_win from %I where user_id = $1) t)
+        )',
+        'rps_stats_' || safe_id,
+        'guess_number_stats_' || safe_id,
+        'tictactoe_stats_' || safe_id,
+        'battle_stats_' || safe_id,
+        'flipnfind_stats_' || safe_id,
+        'kidnapped_jack_stats_' || safe_id,
+        'roulette_stats_' || safe_id
+    ) into result using p_user_id;
+    return result;
+end;
+$$ language plpgsql stable;
+
+-- Player totals per game across every server (bot-wide), maintained by
+-- sync_global_stats on each per-guild stats table; one row per (user, game)
+create table if not exists global_stats (
+    user_id text not null,
+    game text not null,
+    wins integer default 0,
+    losses integer default 0,
+    draws integer default 0,
+    total_games integer default 0,
+    updated_at timestamp with time zone default now(),
+    primary key (user_id, game)
+);
+
+create index if not exists global_stats_game_wins_idx on global_stats (game, wins desc, user_id);
+
+-- The leaderboard's sort key (see create_guild_tables): no nulls for keyset cursors
+update global_stats set wins = 0 where wins is null;
+alter table global_stats alter column wins set not null;
+
+alter table global_stats enable row level security;
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies 
+        where schemaname = 'public' 
+        and tablename = 'global_stats' 
+        and policyname = 'rls_auth_all_global_stats'
+    ) then
+        create policy rls_auth_all_global_stats on global_stats 
+        for all to authenticated 
+        using (true) 
+        with check (true);
+    end if;
+end $$;
+
+-- Adds the change a stats row write made to the player's global_stats row.
+-- Arguments: game, then the row's wins, losses, draws and total-games columns
+-- ('' for none; missing losses are total - wins - draws). Flip & Find rows are
+-- keyed '<player>_<difficulty>' and count toward the player.
+create or replace function sync_global_stats()
+returns trigger as $$
+declare
+    new_row jsonb := case when TG_OP = 'DELETE' then '{}'::jsonb else to_jsonb(new) end;
+    old_row jsonb := case when TG_OP = 'INSERT' then '{}'::jsonb else to_jsonb(old) end;
+    deltas integer[] := array[0, 0, 0, 0];
+    col text;
+    i integer;
+begin
+    for i in 1..4 loop
+        col := TG_ARGV[i];
+        if col <> '' then
+            deltas[i] := coalesce((new_row->>col)::integer, 0) - coalesce((old_row->>col)::integer, 0);
+        end if;
+    end loop;
+    if TG_ARGV[2] = '' then
+        deltas[2] := deltas[4] - deltas[1] - deltas[3];
+    end if;
+    if deltas = array[0, 0, 0, 0] then
+        return null;
+    end if;
+    insert into global_stats (user_id, game, wins, losses, draws, total_games)
+    values (
+        split_part(coalesce(new_row->>'user_id', old_row->>'user_id'), '_', 1),
+        TG_ARGV[0], deltas[1], deltas[2], deltas[3], deltas[4]
+    )
+    on conflict (user_id, game) do update set
+        wins = global_stats.wins + excluded.wins,
+        losses = global_stats.losses + excluded.losses,
+        draws = global_stats.draws + excluded.draws,
+        total_games = global_stats.total_games + excluded.total_games,
+        updated_at = now();
+    return null;
 end;
 $$ language plpgsql;
 
@@ -194,6 +553,58 @@ begin
     end if;
 end $$;
 
+-- Balance is the HXC leaderboard's sort key: never null, so keyset cursors and ranks hold
+update economy set balance = 1000 where balance is null;
+alter table economy alter column balance set not null;
+
+-- Balance ranking: the index serves ordered top-N reads and keyset pages
+create index if not exists economy_balance_idx on economy (balance desc, user_id);
+
+-- Top of the HXC leaderboard, refreshed every few minutes by the bot (refresh_economy_top)
+create materialized view if not exists economy_top as
+    select row_number() over (order by balance desc, user_id) as rank, user_id, balance
+    from economy
+    order by balance desc, user_id
+    limit 1000;
+create unique index if not exists economy_top_rank_idx on economy_top (rank);
+create unique index if not exists economy_top_user_idx on economy_top (user_id);
+
+-- (balance desc, user_id) order as an ascending row, so "everyone ahead of a player" is a
+-- single range of this index; balance is included for index-only counts
+create index if not exists economy_rank_idx on economy ((-balance), user_id) include (balance);
+
+create or replace function refresh_economy_top()
+returns void as $$
+begin
+    refresh materialized view concurrently economy_top;
+end;
+$$ language plpgsql security definer;
+
+-- A player's rank. Inside the top 1000 it comes from the economy_top snapshot while the
+-- player's balance still matches it; otherwise it is one plus everyone ahead of them in
+-- (balance desc, user_id) order, counted as one range of economy_rank_idx, so the cost
+-- grows with the rank. The total is the planner's row estimate, so it never needs a full count.
+create or replace function economy_rank(p_user_id text)
+returns jsonb as $$
+declare
+    v_balance integer;
+    v_ahead bigint;
+    v_total bigint;
+begin
+    select balance into v_balance from economy where user_id = p_user_id;
+    if not found then
+        return null;
+    end if;
+    select rank - 1 into v_ahead from economy_top where user_id = p_user_id and balance = v_balance;
+    if not found then
+        select count(*) into v_ahead from economy
+        where (-balance, user_id) < (-v_balance, p_user_id);
+    end if;
+    select greatest(reltuples::bigint, v_ahead + 1) into v_total from pg_class where oid = 'economy'::regclass;
+    return jsonb_build_object('rank', v_ahead + 1, 'total', v_total, 'balance', v_balance);
+end;
+$$ language plpgsql stable;
+
 -- Create social table for tracking daily/monthly/yearly rewards (global, not guild-specific)
 create table if not exists social (
     id bigserial primary key,
@@ -230,6 +641,73 @@ begin
     end if;
 end $$;
 
+-- Claims a daily, monthly or yearly reward in one round trip. The social row
+-- is locked first, so a double-clicked claim waits for the first one and
+-- then sees its cooldown. A daily streak resets after 48h without a claim;
+-- the bonus is 10% per streak day before this claim, capped at +100%.
+create or replace function claim_reward(p_user_id text, p_type text)
+returns jsonb as $$
+declare
+    now_ts timestamp with time zone := now();
+    v_cooldown interval;
+    v_base integer;
+    v_last timestamp with time zone;
+    v_streak integer;
+    v_total integer;
+    v_bonus integer;
+    v_amount integer;
+    v_balance integer;
+begin
+    case p_type
+        when 'daily' then v_cooldown := interval '1 day'; v_base := 100;
+        when 'monthly' then v_cooldown := interval '30 days'; v_base := 3000;
+        when 'yearly' then v_cooldown := interval '365 days'; v_base := 36500;
+        else return jsonb_build_object('status', 'invalid');
+    end case;
+
+    insert into social (user_id) values (p_user_id) on conflict (user_id) do nothing;
+    execute format(
+        'select last_%1$s, coalesce(%1$s_streak, 0), coalesce(total_%1$s_claimed, 0) from social where user_id = $1 for update',
+        p_type
+    ) into v_last, v_streak, v_total using p_user_id;
+
+    if v_last is not null and now_ts < v_last + v_cooldown then
+        return jsonb_build_object(
+            'status', 'cooldown',
+            'streak', v_streak,
+            'seconds_left', floor(extract(epoch from v_last + v_cooldown - now_ts))
+        );
+    end if;
+
+    if p_type = 'daily' and v_last is not null and now_ts - v_last > interval '48 hours' then
+        v_streak := 0;
+    end if;
+    v_bonus := least(v_streak * 10, 100);
+    v_amount := v_base * (100 + v_bonus) / 100;
+
+    execute format(
+        'update social set last_%1$s = $2, %1$s_streak = $3, total_%1$s_claimed = $4, updated_at = $2 where user_id = $1',
+        p_type
+    ) using p_user_id, now_ts, v_streak + 1, v_total + 1;
+
+    insert into economy (user_id, balance, total_earned)
+    values (p_user_id, 1000 + v_amount, 1000 + v_amount)
+    on conflict (user_id) do update set
+        balance = economy.balance + v_amount,
+        total_earned = economy.total_earned + v_amount,
+        updated_at = now_ts
+    returning balance into v_balance;
+
+    return jsonb_build_object(
+        'status', 'claimed',
+        'amount', v_amount,
+        'bonus', v_bonus,
+        'streak', v_streak + 1,
+        'balance', v_balance
+    );
+end;
+$$ language plpgsql;
+
 -- Create jobs table for tracking user employment (bot-wide, not guild-specific)
 create table if not exists jobs (
     id bigserial primary key,
@@ -261,4 +739,287 @@ begin
         using (true) 
         with check (true);
     end if;
-end $$;
\ No newline at end of file
+end $$;
+
+-- Work quota window: work_frequency asks for `times` shifts in every `hours` long window
+alter table jobs add column if not exists window_start timestamp with time zone default null;
+alter table jobs add column if not exists window_count integer default 0;
+-- When the player will be fired if they never work again; swept by utils/job_sweeper.py
+alter table jobs add column if not exists fire_at timestamp with time zone default null;
+create index if not exists jobs_fire_at_idx on jobs (fire_at) where fire_at is not null;
+create index if not exists jobs_unscheduled_idx on jobs (user_id) where current_job is not null and fire_at is null;
+
+-- Firing deadline for a jobs row: a window already short of its quota leads
+-- to firing one grace period after it (or an earlier miss) ends; a met window
+-- only matters once the following window is missed as well.
+create or replace function job_fire_at(
+    p_window_start timestamp with time zone,
+    p_window_count integer,
+    p_grace_start timestamp with time zone,
+    p_times integer,
+    p_hours double precision,
+    p_grace_hours double precision
+)
+returns timestamp with time zone as $$
+    select case
+        when p_window_count >= p_times then p_window_start + make_interval(secs => p_hours * 2 * 3600)
+        else coalesce(p_grace_start, p_window_start + make_interval(secs => p_hours * 3600))
+    end + make_interval(secs => p_grace_hours * 3600);
+$$ language sql immutable;
+
+-- Records one /work shift in a single round trip. Closes any quota windows
+-- that ended since the last shift (a window short of its quota starts the
+-- grace period), fires the player if the grace period has run out, and
+-- otherwise credits experience and HXC to jobs and economy together.
+-- The job's rules come from the bot's catalog as parameters.
+create or replace function record_work(
+    p_user_id text,
+    p_job text,
+    p_earnings integer,
+    p_exp integer,
+    p_times integer,
+    p_hours double precision,
+    p_grace_hours double precision,
+    p_exp_loss integer
+)
+returns jsonb as $$
+declare
+    now_ts timestamp with time zone := now();
+    v_window interval := make_interval(secs => p_hours * 3600);
+    v_grace interval := make_interval(secs => p_grace_hours * 3600);
+    v_job jobs%rowtype;
+    v_balance integer;
+    v_old_exp integer;
+    v_closed integer;
+begin
+    select * into v_job from jobs where user_id = p_user_id for update;
+    if not found or v_job.current_job is distinct from p_job then
+        return jsonb_build_object('status', 'no_job');
+    end if;
+    v_old_exp := v_job.experience;
+
+    if v_job.window_start is null then
+        v_job.window_start := now_ts;
+        v_job.window_count := 0;
+    end if;
+
+    v_closed := floor(extract(epoch from now_ts - v_job.window_start) / extract(epoch from v_window));
+    if v_closed >= 1 then
+        -- The grace period starts at the end of the first window that missed its quota
+        if v_job.grace_period_start is null then
+            if v_job.window_count < p_times then
+                v_job.grace_period_start := v_job.window_start + v_window;
+            elsif v_closed >= 2 then
+                v_job.grace_period_start := v_job.window_start + v_window * 2;
+            end if;
+        end if;
+        v_job.window_start := v_job.window_start + v_window * v_closed;
+        v_job.window_count := 0;
+    end if;
+
+    if v_job.grace_period_start is not null and now_ts > v_job.grace_period_start + v_grace then
+        update jobs set
+            current_job = null,
+            experience = greatest(0, v_job.experience - p_exp_loss),
+            work_count = 0,
+            grace_period_start = null,
+            window_start = null,
+            window_count = 0,
+            fire_at = null,
+            updated_at = now_ts
+        where user_id = p_user_id;
+        return jsonb_build_object(
+            'status', 'fired',
+            'old_experience', v_old_exp,
+            'experience', greatest(0, v_job.experience - p_exp_loss)
+        );
+    end if;
+
+    v_job.window_count := v_job.window_count + 1;
+    if v_job.window_count >= p_times then
+        v_job.grace_period_start := null;
+    end if;
+
+    update jobs set
+        experience = v_job.experience + p_exp,
+        last_work = now_ts,
+        work_count = v_job.work_count + 1,
+        total_earned = v_job.total_earned + p_earnings,
+        grace_period_start = v_job.grace_period_start,
+        window_start = v_job.window_start,
+        window_count = v_job.window_count,
+        fire_at = job_fire_at(v_job.window_start, v_job.window_count, v_job.grace_period_start, p_times, p_hours, p_grace_hours),
+        updated_at = now_ts
+    where user_id = p_user_id
+    returning * into v_job;
+
+    insert into economy (user_id, balance, total_earned)
+    values (p_user_id, 1000 + p_earnings, 1000 + p_earnings)
+    on conflict (user_id) do update set
+        balance = economy.balance + p_earnings,
+        total_earned = economy.total_earned + p_earnings,
+        updated_at = now_ts
+    returning balance into v_balance;
+
+    return jsonb_build_object(
+        'status', 'ok',
+        'old_experience', v_old_exp,
+        'experience', v_job.experience,
+        'work_count', v_job.work_count,
+        'total_earned', v_job.total_earned,
+        'window_count', v_job.window_count,
+        'window_end', v_job.window_start + v_window,
+        'grace_deadline', v_job.grace_period_start + v_grace,
+        'balance', v_balance
+    );
+end;
+$$ language plpgsql;
+
+-- Gives a firing deadline to employed rows that predate fire_at, using each
+-- job's rules from p_rules ({job: [times, hours, grace_hours]}). Rows whose
+-- job is not in p_rules are left for their next shift.
+create or replace function schedule_job_deadlines(p_rules jsonb)
+returns integer as $$
+declare
+    v_count integer;
+begin
+    update jobs j set
+        window_start = coalesce(j.window_start, j.last_work, now()),
+        window_count = coalesce(j.window_count, 0),
+        fire_at = job_fire_at(
+            coalesce(j.window_start, j.last_work, now()),
+            coalesce(j.window_count, 0),
+            j.grace_period_start,
+            (p_rules -> j.current_job ->> 0)::integer,
+            (p_rules -> j.current_job ->> 1)::double precision,
+            (p_rules -> j.current_job ->> 2)::double precision
+        )
+    where j.current_job is not null and j.fire_at is null and p_rules ? j.current_job;
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$ language plpgsql;
+
+-- Fires up to p_limit players whose deadline has passed, oldest first, in one
+-- statement. p_exp_loss maps job name to the experience penalty. Rows locked
+-- by a concurrent /work are skipped and picked up by the next sweep.
+create or replace function fire_expired_jobs(p_exp_loss jsonb, p_limit integer default 500)
+returns table (user_id text, job text, exp_lost integer) as $$
+    with due as (
+        select d.user_id, d.current_job, d.experience,
+               least(d.experience, coalesce((p_exp_loss ->> d.current_job)::integer, 0)) as loss
+        from jobs d
+        where d.fire_at <= now()
+        order by d.fire_at
+        limit p_limit
+        for update skip locked
+    )
+    update jobs j set
+        current_job = null,
+        experience = due.experience - due.loss,
+        work_count = 0,
+        grace_period_start = null,
+        window_start = null,
+        window_count = 0,
+        fire_at = null,
+        updated_at = now()
+    from due
+    where j.user_id = due.user_id
+    returning j.user_id, due.current_job, due.loss;
+$$ language sql;
+
+-- Match history for rated games (bot-wide); replayed by tools/recompute_ratings.py
+create table if not exists match_history (
+    id bigserial primary key,
+    guild_id text not null,
+    game text not null,
+    player_a text not null,
+    player_b text not null,
+    score_a real not null,
+    played_at timestamp with time zone default now()
+);
+
+create index if not exists match_history_replay_idx on match_history (guild_id, game, played_at);
+
+-- Enable RLS on match_history table
+alter table match_history enable row level security;
+
+-- Create policy for match_history table (allow all operations for authenticated users)
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies 
+        where schemaname = 'public' 
+        and tablename = 'match_history' 
+        and policyname = 'rls_auth_all_match_history'
+    ) then
+        create policy rls_auth_all_match_history on match_history 
+        for all to authenticated 
+        using (true) 
+        with check (true);
+    end if;
+end $$;
+
+-- Rate limiter state (bot-wide, shared by every bot process)
+-- tat is the GCRA "theoretical arrival time" in epoch seconds; a key whose
+-- tat has passed is back to a full burst and can be dropped.
+create table if not exists rate_limits (
+    key text primary key,
+    tat double precision not null
+);
+
+create index if not exists rate_limits_tat_idx on rate_limits (tat);
+
+-- Enable RLS on rate_limits table
+alter table rate_limits enable row level security;
+
+-- Create policy for rate_limits table (allow all operations for authenticated users)
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies 
+        where schemaname = 'public' 
+        and tablename = 'rate_limits' 
+        and policyname = 'rls_auth_all_rate_limits'
+    ) then
+        create policy rls_auth_all_rate_limits on rate_limits 
+        for all to authenticated 
+        using (true) 
+        with check (true);
+    end if;
+end $$;
+
+-- One GCRA check in a single round trip: returns 0 if the call is allowed
+-- (recording it when p_consume), otherwise the seconds until it would be.
+-- The row lock serialises concurrent checks on the same key.
+create or replace function rate_limit_acquire(
+    p_key text,
+    p_interval double precision,
+    p_tolerance double precision,
+    p_consume boolean default true
+)
+returns double precision as $$
+declare
+    now_s double precision := extract(epoch from clock_timestamp());
+    v_tat double precision;
+    v_retry double precision;
+begin
+    insert into rate_limits (key, tat) values (p_key, now_s) on conflict (key) do nothing;
+    select greatest(r.tat, now_s) into v_tat from rate_limits r where r.key = p_key for update;
+
+    v_retry := v_tat - p_tolerance - now_s;
+    if v_retry > 0 then
+        return v_retry;
+    end if;
+
+    if p_consume then
+        update rate_limits set tat = v_tat + p_interval where key = p_key;
+    end if;
+
+    -- Occasionally drop keys that have fully recovered to keep the table small
+    if random() < 0.01 then
+        delete from rate_limits where tat < now_s;
+    end if;
+    return 0;
+end;
+$$ language plpgsql;
@@ -0,0 +1,60 @@
+"""Fail on Supabase queries that fetch every column.
+
+Flags `.select("*")`, selects whose column list contains `*`, and bare
+`.select()` calls, so helpers keep naming the columns they read (see the
+*_COLUMNS constants in utils/database.py). Prints one file:line per hit and
+exits 1 if there are any.
+
+Run from the repository root:
+
+    python -m tools.check_select_star
+    python -m tools.check_select_star utils commands
+"""
+import argparse
+import ast
+import pathlib
+import sys
+
+DEFAULT_PATHS = ("bot.py", "keep_alive.py", "commands", "utils")
+
+def star_selects(path):
+    """(line, source) of every select-all call in a Python file."""
+    source = path.read_text(encoding="utf-8")
+    hits = []
+    for node in ast.walk(ast.parse(source, filename=str(path))):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "select"):
+            continue
+        if not node.args:
+            hits.append((node.lineno, ast.get_source_segment(source, node)))
+            continue
+        first = node.args[0]
+        if isinstance(first, ast.Constant) and isinstance(first.value, str) and "*" in [
+            column.strip() for column in first.value.split(",")
+        ]:
+            hits.append((node.lineno, ast.get_source_segment(source, node)))
+    return hits
+
+def python_files(paths):
+    for name in paths:
+        path = pathlib.Path(name)
+        if path.is_dir():
+            yield from sorted(path.rglob("*.py"))
+        elif path.suffix == ".py":
+            yield path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS, help="files or directories to check")
+    args = parser.parse_args()
+
+    found = 0
+    for path in python_files(args.paths):
+        for line, call in star_selects(path):
+            print(f"{path}:{line}: {call.splitlines()[0]}")
+            found += 1
+    if found:
+        print(f"{found} select-all quer{'y' if found == 1 else 'ies'}; list the columns the caller reads")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Write the built-in job catalog to a JSON file for editing.
+
+Point JOB_CATALOG_PATH at the edited file and the bot picks up changes
+within CATALOG_CHECK_INTERVAL seconds, without a restart.
+
+    python -m tools.export_job_catalog jobs.json
+"""
+import json
+import sys
+
+from commands.job import INTERVIEW_QUESTIONS, JOBS
+from utils.job_catalog import validate
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "jobs.json"
+    validate(JOBS, INTERVIEW_QUESTIONS)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"jobs": JOBS, "interview_questions": INTERVIEW_QUESTIONS}, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(JOBS)} jobs to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Offline Glicko-2 recompute from match_history.
+
+Replays every rated game for one guild and game in fixed rating periods and
+writes the results back to the stats table. Inside a period every player is
+updated together from their pre-period rating, so the per-game terms are
+computed as whole-array operations (NumPy when installed, plain Python
+otherwise). Period-based ratings differ slightly from the live per-game
+updates; that is expected Glicko-2 behaviour.
+
+Run from the repository root:
+
+    python -m tools.recompute_ratings --guild 123456789 --game battle --dry-run
+    python -m tools.recompute_ratings --guild 123456789 --game flipnfind --period-hours 6
+"""
+import argparse
+import math
+import os
+from collections import defaultdict
+
+from dateutil.parser import isoparse
+
+from utils.rating import DEFAULT_RD, DEFAULT_RATING, DEFAULT_VOL, SCALE, Rating, new_volatility, update
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PAGE_SIZE = 1000
+WRITE_CHUNK = 500
+
+def load_history(supabase, guild_id, game):
+    """All rated games for a guild and game, oldest first, fetched a page at a time."""
+    games = []
+    start = 0
+    while True:
+        response = (
+            supabase.table("match_history")
+            .select("player_a, player_b, score_a, played_at")
+            .eq("guild_id", str(guild_id))
+            .eq("game", game)
+            .order("played_at")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        games.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return games
+        start += PAGE_SIZE
+
+def split_periods(games, period_seconds):
+    """Group games into consecutive rating periods, including empty ones between active periods."""
+    if not games:
+        return []
+    buckets = defaultdict(list)
+    for game in games:
+        played_at = isoparse(game["played_at"]).timestamp()
+        buckets[int(played_at // period_seconds)].append((game["player_a"], game["player_b"], float(game["score_a"])))
+    first, last = min(buckets), max(buckets)
+    return [buckets.get(i, []) for i in range(first, last + 1)]
+
+def replay_python(periods):
+    """Reference replay using utils.rating.update for each player and period."""
+    ratings = {}
+    for period in periods:
+        results = defaultdict(list)
+        for a, b, score in period:
+            rating_a = ratings.setdefault(a, Rating())
+            rating_b = ratings.setdefault(b, Rating())
+            results[a].append((rating_b, score))
+            results[b].append((rating_a, 1 - score))
+        ratings = {user_id: update(rating, results.get(user_id, [])) for user_id, rating in ratings.items()}
+    return ratings
+
+def replay_numpy(periods):
+    """Vectorised replay: per-game expectations and sums are array ops over the whole period."""
+    index = {}
+    for period in periods:
+        for a, b, _ in period:
+            index.setdefault(a, len(index))
+            index.setdefault(b, len(index))
+    n = len(index)
+    mu = np.zeros(n)
+    phi = np.full(n, DEFAULT_RD / SCALE)
+    sigma = np.full(n, DEFAULT_VOL)
+    max_phi = DEFAULT_RD / SCALE
+
+    for period in periods:
+        if not period:
+            phi = np.minimum(np.sqrt(phi * phi + sigma * sigma), max_phi)
+            continue
+        a = np.fromiter((index[g[0]] for g in period), dtype=np.int64, count=len(period))
+        b = np.fromiter((index[g[1]] for g in period), dtype=np.int64, count=len(period))
+        s = np.fromiter((g[2] for g in period), dtype=float, count=len(period))
+        # Each game contributes once from each side
+        i = np.concatenate((a, b))
+        j = np.concatenate((b, a))
+        score = np.concatenate((s, 1 - s))
+
+        g_j = 1 / np.sqrt(1 + 3 * phi[j] ** 2 / math.pi ** 2)
+        e = 1 / (1 + np.exp(-g_j * (mu[i] - mu[j])))
+        v_inv = np.zeros(n)
+        delta_sum = np.zeros(n)
+        np.add.at(v_inv, i, g_j * g_j * e * (1 - e))
+        np.add.at(delta_sum, i, g_j * (score - e))
+
+        played = v_inv > 0
+        new_sigma = sigma.copy()
+        v = np.zeros(n)
+        v[played] = 1 / v_inv[played]
+        # The volatility root-find is iterative per player; everything around it stays vectorised
+        for k in np.flatnonzero(played):
+            new_sigma[k] = new_volatility(phi[k], sigma[k], v[k] * delta_sum[k], v[k])
+
+        phi_star = np.sqrt(phi * phi + new_sigma * new_sigma)
+        new_phi = np.minimum(phi_star, max_phi)
+        new_phi[played] = 1 / np.sqrt(1 / phi_star[played] ** 2 + 1 / v[played])
+        mu = np.where(played, mu + new_phi * new_phi * delta_sum, mu)
+        phi, sigma = new_phi, new_sigma
+
+    return {
+        user_id: Rating(mu[k] * SCALE + DEFAULT_RATING, phi[k] * SCALE, sigma[k])
+        for user_id, k in index.items()
+    }
+
+def write_ratings(supabase, table_name, ratings):
+    rows = [rating.to_row(user_id) for user_id, rating in ratings.items()]
+    for start in range(0, len(rows), WRITE_CHUNK):
+        supabase.table(table_name).upsert(rows[start:start + WRITE_CHUNK]).execute()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guild", required=True, help="guild id whose stats table to rebuild")
+    parser.add_argument("--game", required=True, choices=["battle", "tictactoe", "flipnfind"])
+    parser.add_argument("--period-hours", type=float, default=24, help="length of one rating period")
+    parser.add_argument("--dry-run", action="store_true", help="print the top ratings instead of writing them")
+    parser.add_argument("--no-numpy", action="store_true", help="use the pure-Python replay")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+    load_dotenv()
+    supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    games = load_history(supabase, args.guild, args.game)
+    periods = split_periods(games, args.period_hours * 3600)
+    replay = replay_python if args.no_numpy or np is None else replay_numpy
+    ratings = replay(periods)
+    print(f"Replayed {len(games)} games over {len(periods)} periods for {len(ratings)} players ({replay.__name__})")
+
+    if args.dry_run:
+        top = sorted(ratings.items(), key=lambda item: item[1].conservative(), reverse=True)[:10]
+        for user_id, rating in top:
+            print(f"{user_id:>24}  {rating}")
+        return
+
+    write_ratings(supabase, f"{args.game}_stats_{args.guild}", ratings)
+    print(f"Wrote {len(ratings)} ratings to {args.game}_stats_{args.guild}")
+
+if __name__ == "__main__":
+    main()
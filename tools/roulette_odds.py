@@ -0,0 +1,44 @@
+"""Exact roulette odds per bet type, with an optional Monte Carlo check.
+
+For each wheel layout prints, per unit stake, the win probability, the
+exact expected value and variance, and how many HXC the house keeps per
+1,000 staked (negative means the bet prints money). Bets of one kind with
+different odds are listed separately.
+
+Run from the repository root:
+
+    python -m tools.roulette_odds
+    python -m tools.roulette_odds --layout european classic24 --spins 1000000
+"""
+import argparse
+
+from utils.roulette import LAYOUTS, bet_odds, simulate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layout", nargs="+", choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    parser.add_argument("--spins", type=int, default=0, help="also simulate this many spins per bet type")
+    args = parser.parse_args()
+
+    for name in args.layout:
+        layout = LAYOUTS[name]
+        print(f"\n{name} ({len(layout)} pockets)")
+        header = f"  {'bet':<16} {'P(win)':>8} {'EV':>9} {'variance':>9} {'kept/1000':>10}"
+        if args.spins:
+            header += f" {'sim EV':>9} {'sim var':>9}"
+        print(header)
+        seen = set()
+        for kind, selection, probability, ev, variance in bet_odds(layout):
+            # One row per kind unless its selections have different odds
+            key = (kind, round(probability, 12), round(ev, 12))
+            if key in seen:
+                continue
+            seen.add(key)
+            row = f"  {kind:<16} {probability:>8.4f} {ev:>+9.4f} {variance:>9.3f} {-ev * 1000:>+10.1f}"
+            if args.spins:
+                sim_ev, sim_var = simulate(layout, (kind, selection), args.spins)
+                row += f" {sim_ev:>+9.4f} {sim_var:>9.3f}"
+            print(row)
+
+if __name__ == "__main__":
+    main()
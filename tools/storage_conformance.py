@@ -0,0 +1,350 @@
+"""Check that a storage backend gives the bot the answers Supabase does.
+
+Drives the utils/database.py helpers (and the rate limiter's SQL function)
+through one scenario per feature against a test guild and a handful of test
+user ids, and compares what comes back with what the Postgres schema in
+sql/initial.sql produces: stats rows, keyset leaderboard pages, the
+flipnfind_totals and global_stats triggers, rewards, /work quota windows,
+job firing, rate limits, player summaries, deletes and lazy provisioning of
+a guild's tables. One check wraps the backend in utils/db_client.py's
+ResilientClient over a connection that fails on demand, to confirm that a
+failed read is never answered with data older than a write. Rows the scenarios write are deleted before and after.
+
+Prints one line per check and exits 1 if any fails. The supabase backend
+uses SUPABASE_URL and SUPABASE_KEY from the environment or .env; pick a
+guild id no real server uses, as its per-guild tables are created.
+
+Run from the repository root:
+
+    python -m tools.storage_conformance --backend sqlite
+    python -m tools.storage_conformance --backend supabase --guild 1
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from dateutil.parser import isoparse
+
+from utils import database, table_registry
+from utils.db_client import ResilientClient
+from utils.ratelimit import Limit, SupabaseBackend
+
+USERS = [f"9000000000000000{i:02d}" for i in range(10)]
+DIFFICULTIES = ("easy", "medium", "hard", "extreme")
+JOB = "Conformance Tester"
+JOB_INFO = {"work_frequency": {"times": 2, "hours": 24}, "grace_period": 12, "exp_loss": 3}
+RATE_LIMIT_KEY = "conformance:" + USERS[0]
+GUILD_TABLES = (
+    "rps_stats_", "guess_number_stats_", "guess_number_games_", "tictactoe_stats_", "battle_stats_",
+    "flipnfind_stats_", "kidnapped_jack_stats_", "roulette_stats_",
+)
+
+class Mismatch(Exception):
+    pass
+
+def expect(actual, expected, what):
+    if actual != expected:
+        raise Mismatch(f"{what}: expected {expected!r}, got {actual!r}")
+
+def open_backend(backend, sqlite_path=":memory:"):
+    """A client for the named backend, as bot.py builds it."""
+    if backend == "sqlite":
+        from utils.sqlite_backend import SQLiteClient
+        return SQLiteClient(sqlite_path)
+    from dotenv import load_dotenv
+    from supabase import create_client
+    load_dotenv()
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+def cleanup(db, guilds, users=USERS):
+    """Delete every row the scenarios write for `users`, a hundred ids per request."""
+    chunks = [users[i:i + 100] for i in range(0, len(users), 100)]
+    for guild in guilds:
+        for prefix in GUILD_TABLES:
+            for chunk in chunks:
+                keys = chunk + [f"{user}_{d}" for user in chunk for d in DIFFICULTIES] if prefix == "flipnfind_stats_" else chunk
+                try:
+                    db.table(f"{prefix}{guild}").delete().in_("user_id", keys).execute()
+                except Exception as e:
+                    if not table_registry.is_missing_table_error(e):
+                        raise
+        db.table("match_history").delete().eq("guild_id", guild).execute()
+    for table in ("economy", "social", "jobs", "global_stats"):
+        for chunk in chunks:
+            db.table(table).delete().in_("user_id", chunk).execute()
+    db.table("rate_limits").delete().eq("key", RATE_LIMIT_KEY).execute()
+    database.refresh_economy_top(db)
+
+# ✅ Scenarios, run in order; later ones read what earlier ones wrote
+
+def check_provisioning(db, guild):
+    expect(database.create_server_tables(db, guild), True, "create_server_tables")
+    expect(database.create_server_tables(db, guild), True, "create_server_tables run twice")
+    expect(table_registry.is_provisioned(guild), True, "guild recorded as provisioned")
+
+def check_rps(db, guild):
+    for result in ("win", "win", "loss", "tie"):
+        database.update_rps_stats(db, guild, USERS[0], result)
+    expect(
+        database.get_rps_stats(db, guild, USERS[0]),
+        {"user_id": USERS[0], "wins": 2, "losses": 1, "ties": 1, "total_games": 4},
+        "get_rps_stats"
+    )
+
+def check_rps_leaderboard(db, guild):
+    # Equal win rates (1/2 = 2/4, 1/3 = 2/6) exercise the wins and user_id tie-breaks
+    records = {USERS[1]: (1, 1), USERS[2]: (2, 2), USERS[3]: (1, 2), USERS[4]: (2, 4), USERS[5]: (3, 0), USERS[6]: (0, 3)}
+    for user, (wins, losses) in records.items():
+        for result in ["win"] * wins + ["loss"] * losses:
+            database.update_rps_stats(db, guild, user, result)
+    records[USERS[0]] = (2, 2)
+    expected = sorted(records, key=lambda user: (-records[user][0] / sum(records[user]), -records[user][0], user))
+
+    seen, after = [], None
+    while True:
+        page = database.get_rps_leaderboard(db, guild, limit=3, after=after)
+        if not page:
+            break
+        expect(len(page) <= 3, True, "page size")
+        seen += [row["user_id"] for row in page]
+        after = page[-1]
+    expect(seen, expected, "leaderboard order across keyset pages")
+
+def check_guess_number(db, guild):
+    database.update_guess_stats(db, guild, USERS[0], "correct", [50, 25, 30], 30)
+    database.update_guess_stats(db, guild, USERS[0], "incorrect", [10], 90)
+    stats = database.get_guess_stats(db, guild, USERS[0])
+    expect(
+        (stats["correct_guesses"], stats["incorrect_guesses"], stats["total_games"], stats["gap_count"], stats["gap_sum"]),
+        (1, 1, 2, 4, 105), "guess stats totals"
+    )
+    expect([stats["gap_histogram"][gap] for gap in (0, 5, 20, 80)], [1, 1, 1, 1], "gap histogram")
+    expect(stats["analytics"]["attempts"]["n"], 2, "attempts summary")
+    games = (
+        db.table(f"guess_number_games_{guild}").select("won, target, guesses")
+        .eq("user_id", USERS[0]).order("id").execute().data
+    )
+    expect(games, [{"won": True, "target": 30, "guesses": [50, 25, 30]}, {"won": False, "target": 90, "guesses": [10]}], "game history")
+
+def check_ratings(db, guild):
+    database.update_tictactoe_stats(db, guild, USERS[1], "win")
+    database.update_tictactoe_stats(db, guild, USERS[2], "loss")
+    expect(database.update_game_ratings(db, "tictactoe", guild, USERS[1], USERS[2], 1) is not None, True, "update_game_ratings")
+    winner = database.get_tictactoe_stats(db, guild, USERS[1])
+    loser = database.get_tictactoe_stats(db, guild, USERS[2])
+    expect((winner["wins"], winner["rating"] > 1500, loser["rating"] < 1500), (1, True, True), "ratings moved")
+    board = [row["user_id"] for row in database.get_tictactoe_leaderboard(db, guild)]
+    expect(board, [USERS[1], USERS[2]], "rating leaderboard")
+    history = db.table("match_history").select("game, player_a, player_b, score_a").eq("guild_id", guild).execute().data
+    expect(history, [{"game": "tictactoe", "player_a": USERS[1], "player_b": USERS[2], "score_a": 1}], "match history")
+
+def check_flipnfind_totals(db, guild):
+    database.update_flipnfind_stats(db, guild, f"{USERS[0]}_easy", "win", 30.5, 12, 2)
+    database.update_flipnfind_stats(db, guild, f"{USERS[0]}_hard", "loss", 50.0, 20, 1)
+    database.update_flipnfind_stats(db, guild, f"{USERS[0]}_easy", "win", 25.0, 10, 0)
+    rows = database.get_flipnfind_stats_by_difficulty(db, guild, USERS[0], DIFFICULTIES)
+    expect(sorted(rows), ["easy", "hard"], "difficulties played")
+    expect((rows["easy"]["wins"], rows["easy"]["best_time"], rows["easy"]["best_turns"]), (2, 25.0, 10), "easy row")
+    expect(
+        database.get_flipnfind_leaderboard(db, guild),
+        [{"user_id": USERS[0], "wins": 2, "star_cards": 3}], "totals summed across difficulties"
+    )
+
+def check_other_games(db, guild):
+    database.update_kidnapped_jack_stats(db, guild, USERS[0], "escape", 40.0, 1)
+    database.update_roulette_stats(db, guild, USERS[0], "win", 100, 250)
+    database.update_roulette_stats(db, guild, USERS[0], "loss", 50, 0)
+    database.update_roulette_stats(db, guild, USERS[0], "push", 200, 200, 100)
+    jack = database.get_kidnapped_jack_stats(db, guild, USERS[0])
+    expect((jack["escapes"], jack["best_placement"], jack["total_wins"]), (1, 1, 1), "kidnapped jack row")
+    roulette = database.get_roulette_stats(db, guild, USERS[0])
+    expect(
+        {key: roulette[key] for key in ("games_played", "games_won", "games_lost", "total_bet", "total_won", "total_lost", "biggest_loss")},
+        {"games_played": 3, "games_won": 1, "games_lost": 1, "total_bet": 350, "total_won": 450, "total_lost": 150, "biggest_loss": 50},
+        "roulette row with a break-even spin"
+    )
+
+def check_global_stats(db, guild):
+    profile = database.get_global_profile(db, USERS[0])
+    got = {game: (row["wins"], row["losses"], row["draws"], row["total_games"]) for game, row in profile.items()}
+    expect(got, {
+        "rps": (2, 1, 1, 4),
+        "guess_number": (1, 1, 0, 2),
+        "flipnfind": (2, 1, 0, 3),
+        "kidnapped_jack": (1, 0, 0, 1),
+        "roulette": (1, 2, 0, 3),  # Losses are spins not won, so the push counts
+    }, "global profile")
+    # Other players share global_stats, so page until every test user has been seen
+    wins = {USERS[0]: 2, USERS[1]: 1, USERS[2]: 2, USERS[3]: 1, USERS[4]: 2, USERS[5]: 3, USERS[6]: 0}
+    board, after = [], None
+    while len(board) < len(wins):
+        page = database.get_global_leaderboard(db, "rps", limit=100, after=after)
+        if not page:
+            break
+        board += [row["user_id"] for row in page if row["user_id"] in wins]
+        after = page[-1]
+    expect(board, sorted(wins, key=lambda user: (-wins[user], user)), "global leaderboard order")
+
+def check_player_summary(db, guild):
+    summary = database.get_player_summary(db, guild, USERS[0])
+    expect(summary["rps"], {"wins": 2, "losses": 1, "ties": 1, "total_games": 4}, "summary rps")
+    expect((summary["battle"], summary["tictactoe"]), (None, None), "summary of unplayed games")
+    expect(sorted(summary["flipnfind"]), ["easy", "hard"], "summary flipnfind keys")
+    expect(summary["flipnfind"]["hard"]["star_cards"], 1, "summary flipnfind row")
+
+def check_delete(db, guild):
+    deleted = db.table(f"rps_stats_{guild}").delete().eq("user_id", USERS[6]).execute().data
+    expect(len(deleted), 1, "rows returned by delete")
+    expect(database.get_rps_stats(db, guild, USERS[6]), None, "deleted row")
+    expect(database.get_global_profile(db, USERS[6])["rps"]["total_games"], 0, "global stats after delete")
+
+def check_lazy_provisioning(db, guild):
+    other = str(int(guild) + 1)
+    table_registry.forget(other)
+    database.update_rps_stats(db, other, USERS[0], "win")
+    expect(database.get_rps_stats(db, other, USERS[0])["wins"], 1, "write to an unprovisioned guild")
+
+def check_economy(db, guild):
+    expect(database.get_user_balance(db, USERS[0])["balance"], 1000, "starting balance")
+    database.update_user_balance(db, USERS[0], 500, "add")
+    database.update_user_balance(db, USERS[0], 200, "subtract")
+    expect(
+        database.get_user_balance(db, USERS[0]),
+        {"user_id": USERS[0], "balance": 1300, "total_earned": 1500, "total_spent": 200}, "balance after add/subtract"
+    )
+    claimed = database.claim_reward(db, USERS[0], "daily")
+    expect(
+        {key: claimed.get(key) for key in ("status", "amount", "bonus", "streak", "balance")},
+        {"status": "claimed", "amount": 100, "bonus": 0, "streak": 1, "balance": 1400}, "daily claim"
+    )
+    again = database.claim_reward(db, USERS[0], "daily")
+    expect((again["status"], 86000 < again["seconds_left"] <= 86400), ("cooldown", True), "second daily claim")
+    expect(database.claim_reward(db, USERS[0], "hourly"), {"status": "invalid"}, "unknown reward")
+
+    database.get_user_balance(db, USERS[1])
+    rank, other = database.get_user_rank(db, USERS[0]), database.get_user_rank(db, USERS[1])
+    expect((rank["balance"], rank["rank"] < other["rank"]), (1400, True), "live rank")
+    expect(database.get_user_rank(db, USERS[9]), None, "rank of a user with no balance")
+    expect(database.refresh_economy_top(db), True, "refresh_economy_top")
+    page = database.get_economy_leaderboard(db, limit=5, after={"balance": 1400, "user_id": USERS[0]})
+    expect(all((row["balance"], row["user_id"]) != (1400, USERS[0]) and row["balance"] <= 1400 for row in page), True, "page after a cursor")
+
+def check_jobs(db, guild):
+    database.create_job_data(db, USERS[0])
+    expect(database.assign_job(db, USERS[0], JOB, JOB_INFO), True, "assign_job")
+    work = database.record_work(db, USERS[0], JOB, JOB_INFO, 50, 5)
+    expect(
+        {key: work.get(key) for key in ("status", "experience", "work_count", "window_count", "grace_deadline", "balance")},
+        {"status": "ok", "experience": 5, "work_count": 1, "window_count": 1, "grace_deadline": None, "balance": 1450},
+        "record_work"
+    )
+    expect(isoparse(work["window_end"]) > datetime.now(timezone.utc), True, "window end in the future")
+    expect(database.record_work(db, USERS[0], "Other Job", JOB_INFO, 50, 5), {"status": "no_job"}, "work at the wrong job")
+
+    database.create_job_data(db, USERS[1])
+    database.update_job_data(db, USERS[1], {"current_job": JOB, "last_work": datetime.now(timezone.utc).isoformat()})
+    expect(database.schedule_job_deadlines(db, {JOB: [2, 24, 12]}) >= 1, True, "schedule_job_deadlines")
+    expect(database.get_job_data(db, USERS[1])["current_job"], JOB, "scheduled player keeps the job")
+
+    past = datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=int(USERS[0][-2:]))
+    database.update_job_data(db, USERS[0], {"fire_at": past.isoformat()})
+    fired = database.fire_expired_jobs(db, {JOB: JOB_INFO["exp_loss"]}, limit=1)
+    expect(fired, [{"user_id": USERS[0], "job": JOB, "exp_lost": 3}], "fire_expired_jobs")
+    job = database.get_job_data(db, USERS[0])
+    expect((job["current_job"], job["experience"]), (None, 2), "fired player")
+
+class FlakyClient:
+    """Passes calls through to a client, except that selects on a table in `failing` lose their connection."""
+
+    def __init__(self, client):
+        self.client = client
+        self.failing = set()
+
+    def table(self, table_name):
+        return _FlakyQuery(self.client.table(table_name), table_name in self.failing)
+
+    def rpc(self, fn, params=None):
+        return self.client.rpc(fn, params or {})
+
+class _FlakyQuery:
+    def __init__(self, query, fail, first=True):
+        self._query = query
+        self._fail = fail
+        self._first = first
+
+    def __getattr__(self, name):
+        method = getattr(self._query, name)
+        # Only reads fail, so writes always reach the database
+        fail = self._fail and (name == "select" or not self._first)
+        return lambda *args, **kwargs: _FlakyQuery(method(*args, **kwargs), fail, first=False)
+
+    def execute(self):
+        if self._fail:
+            raise ConnectionError("connection lost (injected by the conformance check)")
+        return self._query.execute()
+
+def check_stale_reads(db, guild):
+    flaky = FlakyClient(db)
+    resilient = ResilientClient(flaky, sleep=lambda seconds: None, failure_threshold=100)
+    # A balance read that fails must not be answered from before a reward RPC and written back
+    database.get_user_balance(resilient, USERS[3])
+    expect(database.get_user_balance(resilient, USERS[3])["balance"], 1000, "starting balance through the wrapper")
+    expect(database.claim_reward(resilient, USERS[3], "daily")["balance"], 1100, "daily claim through the wrapper")
+    flaky.failing.add("economy")
+    expect(database.update_user_balance(resilient, USERS[3], 50, "subtract"), False, "balance write while its read fails")
+    flaky.failing.clear()
+    expect(database.get_user_balance(db, USERS[3])["balance"], 1100, "balance after the failed write")
+
+    # Display reads still fall back to their last answer, until any write drops it
+    profile = database.get_global_profile(resilient, USERS[0])
+    flaky.failing.add("global_stats")
+    expect(database.get_global_profile(resilient, USERS[0]), profile, "profile served stale while its read fails")
+    database.claim_reward(resilient, USERS[3], "daily")
+    expect(database.get_global_profile(resilient, USERS[0]), None, "profile after a write RPC")
+
+def check_rate_limit(db, guild):
+    backend, limit = SupabaseBackend(db), Limit(1, 60)
+    expect(backend.acquire(RATE_LIMIT_KEY, limit), 0.0, "first call allowed")
+    expect(backend.acquire(RATE_LIMIT_KEY, limit, consume=False) > 0, True, "peek while limited")
+    expect(59 < backend.acquire(RATE_LIMIT_KEY, limit) <= 60, True, "second call waits")
+
+CHECKS = [
+    check_provisioning, check_rps, check_rps_leaderboard, check_guess_number, check_ratings,
+    check_flipnfind_totals, check_other_games, check_global_stats, check_player_summary, check_delete,
+    check_lazy_provisioning, check_economy, check_jobs, check_stale_reads, check_rate_limit,
+]
+
+def run(db, guild):
+    """Run every check in order; returns the number that failed."""
+    failed = 0
+    for check in CHECKS:
+        name = check.__name__.removeprefix("check_")
+        try:
+            check(db, guild)
+            print(f"PASS  {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL  {name}: {str(e)}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "supabase"], default="sqlite")
+    parser.add_argument("--sqlite-path", default=":memory:", help="database file for the sqlite backend")
+    parser.add_argument("--guild", default="1", help="test guild id; the next id is used for lazy provisioning")
+    args = parser.parse_args()
+
+    db = open_backend(args.backend, args.sqlite_path)
+    guilds = [args.guild, str(int(args.guild) + 1)]
+    cleanup(db, guilds)
+    try:
+        failed = run(db, args.guild)
+    finally:
+        cleanup(db, guilds)
+    print(f"{len(CHECKS) - failed}/{len(CHECKS)} checks passed on {args.backend}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,99 @@
 from supabase import create_client
-import json
 import logging
+from utils.rating import Rating, rate_game
+from utils.streaming import histogram_add, merge_observations
+from utils import table_registry
+from utils.db_client import allow_stale
 
 logger = logging.getLogger(__name__)
 
+# Columns each helper reads. Listing them keeps unused columns (legacy jsonb
+# arrays, timestamps) off the wire; tools/check_select_star.py enforces it.
+RPS_STATS_COLUMNS = "user_id, wins, losses, ties, total_games"
+GUESS_STATS_COLUMNS = "user_id, correct_guesses, incorrect_guesses, total_games, gap_count, gap_sum, gap_histogram, analytics"
+TICTACTOE_STATS_COLUMNS = "user_id, wins, losses, draws, total_games, rating, rating_rd, rating_vol"
+BATTLE_STATS_COLUMNS = "user_id, wins, losses, total_games, rating, rating_rd, rating_vol"
+FLIPNFIND_STATS_COLUMNS = (
+    "user_id, wins, losses, total_games, best_time, best_turns, total_turns, total_time, star_cards, "
+    "rating, rating_rd, rating_vol, analytics"
+)
+FLIPNFIND_SUMMARY_COLUMNS = "user_id, wins, losses, total_games, best_time, best_turns, star_cards, analytics"
+KIDNAPPED_JACK_STATS_COLUMNS = (
+    "user_id, games_played, escapes, kidnapper_count, total_time, best_time, best_placement, "
+    "total_wins, total_placements, placement_sum, analytics"
+)
+ROULETTE_STATS_COLUMNS = "user_id, games_played, games_won, games_lost, total_bet, total_won, total_lost, biggest_win, biggest_loss"
+ECONOMY_COLUMNS = "user_id, balance, total_earned, total_spent"
+SOCIAL_COLUMNS = (
+    "user_id, last_daily, last_monthly, last_yearly, daily_streak, monthly_streak, yearly_streak, "
+    "total_daily_claimed, total_monthly_claimed, total_yearly_claimed"
+)
+JOB_COLUMNS = "user_id, current_job, experience, work_count, total_earned"
+
 def create_server_tables(supabase, guild_id):
-    """Create all necessary tables for a guild by calling the Supabase function."""
+    """Create all necessary tables for a guild by calling the Supabase function.
+
+    Returns True once the guild is provisioned; the guild is then recorded in
+    utils/table_registry.py so nothing probes its tables again.
+    """
     try:
         logger.info(f"Attempting to create tables for guild {guild_id} via RPC...")
         # Try the RPC call first
         supabase.rpc("create_guild_tables", {"guild_id": str(guild_id)}).execute()
         logger.info(f"Successfully called create_guild_tables RPC for guild {guild_id}. Tables should be up-to-date.")
+        table_registry.mark_provisioned(guild_id)
+        table_registry.registry_stats["provisioned"] += 1
+        return True
     except Exception as e:
+        table_registry.registry_stats["failed"] += 1
         logger.warning(f"RPC call failed for guild {guild_id}: {str(e)}")
         logger.info("This is normal if the SQL function hasn't been created yet.")
         logger.info("Tables will be created automatically when games are played.")
         
         # Don't treat this as a critical error - the bot can still function
-        # Tables will be created when needed by individual game functions
-        
-# Individual table creation functions are now just fallbacks and for reference
-def create_rps_table(supabase, guild_id):
-    """Create the RPS stats table for a guild if it doesn't exist."""
-    table_name = f"rps_stats_{guild_id}"
-    
+        # Tables will be created when a write finds them missing
+        return False
+
+def ensure_guild_tables(supabase, guild_id):
+    """Provision a guild's tables unless this process already has; no query when it has."""
+    if table_registry.is_provisioned(guild_id):
+        return True
+    return create_server_tables(supabase, guild_id)
+
+def _execute_guild_write(supabase, guild_id, query):
+    """Execute a write to one of a guild's tables, provisioning them and retrying once if missing."""
     try:
-        # Check if table exists
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
+        return query.execute()
     except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist: {str(e)}")
-        # We don't try to create directly - this is now handled by the create_guild_tables function
+        if not table_registry.is_missing_table_error(e):
+            raise
+        logger.warning(f"Tables missing for guild {guild_id}, provisioning: {str(e)}")
+        table_registry.forget(guild_id)
+        if not create_server_tables(supabase, guild_id):
+            raise
+        table_registry.registry_stats["lazy_provisions"] += 1
+        return query.execute()
+
+# The per-game table functions are kept for callers that want a guild's tables
+# to exist up front; they consult the registry instead of probing the table
+def create_rps_table(supabase, guild_id):
+    """Create the RPS stats table for a guild if it doesn't exist."""
+    return ensure_guild_tables(supabase, guild_id)
 
 def create_guess_number_table(supabase, guild_id):
     """Create the Guess Number stats table for a guild if it doesn't exist."""
-    table_name = f"guess_number_stats_{guild_id}"
-    
-    try:
-        # Check if table exists
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
-    except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist: {str(e)}")
-        # We don't try to create directly - this is now handled by the create_guild_tables function
+    return ensure_guild_tables(supabase, guild_id)
 
 def create_tictactoe_table(supabase, guild_id):
     """Create the Tic Tac Toe stats table for a guild if it doesn't exist."""
-    table_name = f"tictactoe_stats_{guild_id}"
-    
-    try:
-        # Check if table exists
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
-    except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist: {str(e)}")
-        # We don't try to create directly - this is now handled by the create_guild_tables function
+    return ensure_guild_tables(supabase, guild_id)
 
 def get_tictactoe_stats(supabase, guild_id, user_id):
     """Get Tic Tac Toe stats for a user."""
     table_name = f"tictactoe_stats_{guild_id}"
     
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(TICTACTOE_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting Tic Tac Toe stats: {str(e)}")
@@ -88,7 +120,7 @@ def update_tictactoe_stats(supabase, guild_id, user_id, result):
             elif result == "draw":
                 updates["draws"] = current_stats["draws"] + 1
                 
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             # Create new stats
             new_stats = {
@@ -98,21 +130,66 @@ def update_tictactoe_stats(supabase, guild_id, user_id, result):
                 "draws": 1 if result == "draw" else 0,
                 "total_games": 1
             }
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
             
     except Exception as e:
         logger.error(f"Error updating Tic Tac Toe stats: {str(e)}")
         raise
 
-def get_tictactoe_leaderboard(supabase, guild_id, limit=10):
-    """Get Tic Tac Toe leaderboard for a guild."""
-    table_name = f"tictactoe_stats_{guild_id}"
-    
+def get_tictactoe_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the Tic Tac Toe leaderboard, best conservative rating first."""
+    return get_leaderboard_page(
+        supabase, f"tictactoe_stats_{guild_id}", "wins, losses, draws, total_games, rating, rating_rd",
+        [("rating_score", True), ("user_id", False)], after, limit
+    )
+
+# ✅ Leaderboard Functions (keyset pagination)
+
+def _keyset_value(value):
+    """A cursor value as PostgREST filter text."""
+    if isinstance(value, str):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return repr(value)
+
+def _keyset_filter(order, after):
+    """PostgREST or-filter for the rows that sort after `after` in `order`.
+
+    order is a list of (column, descending) pairs whose last column is
+    unique, so (a, b, id) > (va, vb, vid) expands to
+    a < va or (a = va and b < vb) or (a = va and b = vb and id > vid)
+    with < and > swapped per direction.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        ties = [f"{prefix}.eq.{_keyset_value(after[prefix])}" for prefix, _ in order[:i]]
+        step = f"{column}.{'lt' if descending else 'gt'}.{_keyset_value(after[column])}"
+        clauses.append(f"and({','.join(ties + [step])})" if ties else step)
+    return ",".join(clauses)
+
+def get_leaderboard_page(supabase, table_name, columns, order, after=None, limit=10, where=None):
+    """Get one page of a leaderboard: the `limit` rows after the `after` row.
+
+    order is a list of (column, descending) pairs ending in user_id and
+    matching one of the table's leaderboard indexes, so every page is a
+    single index range scan however deep it is, unlike an offset. The order
+    columns are selected along with `columns`, since the next page's cursor
+    is built from them. where is an optional list of (method, column, value)
+    filters such as ("gte", "total_games", 1).
+    """
+    selected = [column.strip() for column in columns.split(",")]
+    selected += [column for column, _ in order if column not in selected]
     try:
-        response = supabase.table(table_name).select("*").order("wins", desc=True).limit(limit).execute()
-        return response.data
+        query = supabase.table(table_name).select(", ".join(selected))
+        for method, column, value in where or ():
+            query = getattr(query, method)(column, value)
+        if after is not None:
+            query = query.or_(_keyset_filter(order, after))
+        for column, descending in order:
+            query = query.order(column, desc=descending)
+        with allow_stale():
+            return query.limit(limit).execute().data
     except Exception as e:
-        logger.error(f"Error getting Tic Tac Toe leaderboard: {str(e)}")
+        logger.error(f"Error getting leaderboard page from {table_name}: {str(e)}")
         return []
 
 # ✅ Roulette Functions (Guild-specific)
@@ -120,7 +197,7 @@ def get_roulette_stats(supabase, guild_id, user_id):
     """Get roulette stats for a user in a specific guild."""
     table_name = f"roulette_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(ROULETTE_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting roulette stats for {user_id} in guild {guild_id}: {str(e)}")
@@ -160,7 +237,7 @@ def update_roulette_stats(supabase, guild_id, user_id, result, bet_amount, win_a
                 if bet_amount > current_stats["biggest_loss"]:
                     updates["biggest_loss"] = bet_amount
                     
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             # Create new stats
             new_stats = {
@@ -174,22 +251,12 @@ def update_roulette_stats(supabase, guild_id, user_id, result, bet_amount, win_a
                 "biggest_win": win_amount if result == "win" else 0,
                 "biggest_loss": bet_amount if result == "loss" else 0
             }
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
             
     except Exception as e:
         logger.error(f"Error updating roulette stats for {user_id} in guild {guild_id}: {str(e)}")
         raise
 
-def get_roulette_leaderboard(supabase, guild_id, limit=10):
-    """Get roulette leaderboard for a specific guild (by total winnings)."""
-    table_name = f"roulette_stats_{guild_id}"
-    try:
-        response = supabase.table(table_name).select("*").order("total_won", desc=True).limit(limit).execute()
-        return response.data
-    except Exception as e:
-        logger.error(f"Error getting roulette leaderboard for guild {guild_id}: {str(e)}")
-        return []
-
 # ✅ RPS Functions
 def get_rps_stats(supabase, guild_id, user_id):
     """Fetch user stats for Rock Paper Scissors."""
@@ -199,7 +266,7 @@ def get_rps_stats(supabase, guild_id, user_id):
 
     table = f"rps_stats_{guild_id}"
     try:
-        response = supabase.table(table).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table).select(RPS_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting RPS stats for user {user_id} in guild {guild_id}: {str(e)}")
@@ -222,56 +289,32 @@ def update_rps_stats(supabase, guild_id, user_id, result):
                 "ties": stats["ties"] + (1 if result == "tie" else 0),
                 "total_games": stats["total_games"] + 1
             }
-            supabase.table(table).update(update_data).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table).update(update_data).eq("user_id", user_id))
             logger.info(f"Updated RPS stats for user {user_id} in guild {guild_id}")
         else:
-            supabase.table(table).insert({
+            _execute_guild_write(supabase, guild_id, supabase.table(table).insert({
                 "user_id": user_id,
                 "wins": 1 if result == "win" else 0,
                 "losses": 1 if result == "loss" else 0,
                 "ties": 1 if result == "tie" else 0,
                 "total_games": 1
-            }).execute()
+            }))
             logger.info(f"Created new RPS stats for user {user_id} in guild {guild_id}")
     except Exception as e:
         logger.error(f"Error updating RPS stats for user {user_id} in guild {guild_id}: {str(e)}")
         raise
 
-def get_rps_leaderboard(supabase, guild_id, limit=10):
-    """Get the RPS leaderboard for a guild."""
+def get_rps_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the RPS leaderboard, by win rate then wins."""
     if not guild_id:
         logger.error("No guild_id provided for get_rps_leaderboard")
         return []
 
-    table = f"rps_stats_{guild_id}"
-    try:
-        # Use the table API directly instead of raw SQL
-        logger.info(f"Fetching RPS leaderboard for guild {guild_id}")
-        response = supabase.table(table).select("*").gte("total_games", 1).execute()
-        
-        if not response.data:
-            logger.info(f"No RPS data found for guild {guild_id}")
-            return []
-            
-        # Sort the data in Python
-        players = response.data
-        
-        # Calculate win percentage for sorting
-        for player in players:
-            total = player.get("total_games", 0)
-            if total > 0:
-                player["win_percentage"] = (player.get("wins", 0) / total) * 100
-            else:
-                player["win_percentage"] = 0
-        
-        # Sort by win percentage then by wins
-        players.sort(key=lambda x: (x.get("win_percentage", 0), x.get("wins", 0)), reverse=True)
-        
-        logger.info(f"Found {len(players)} players for RPS leaderboard in guild {guild_id}")
-        return players[:limit]
-    except Exception as e:
-        logger.error(f"Error getting RPS leaderboard for guild {guild_id}: {str(e)}")
-        return []
+    return get_leaderboard_page(
+        supabase, f"rps_stats_{guild_id}", "wins, losses, ties, total_games",
+        [("win_rate", True), ("wins", True), ("user_id", False)], after, limit,
+        where=[("gte", "total_games", 1)]
+    )
 
 
 # ✅ Guess Number Functions
@@ -283,14 +326,19 @@ def get_guess_stats(supabase, guild_id, user_id):
 
     table = f"guess_number_stats_{guild_id}"
     try:
-        response = supabase.table(table).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table).select(GUESS_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting guess stats for user {user_id} in guild {guild_id}: {str(e)}")
         return None
 
-def update_guess_stats(supabase, guild_id, user_id, result, guesses, guess_gaps):
-    """Update user stats for the Guess Number game."""
+def update_guess_stats(supabase, guild_id, user_id, result, guesses, target):
+    """Record one Guess Number game.
+
+    The stats row keeps running totals and a gap histogram, so reading stats
+    never touches past games; the game itself is appended to the guild's
+    guess_number_games table.
+    """
     if not guild_id:
         logger.error("No guild_id provided for update_guess_stats")
         return
@@ -298,73 +346,54 @@ def update_guess_stats(supabase, guild_id, user_id, result, guesses, guess_gaps)
     table = f"guess_number_stats_{guild_id}"
     try:
         stats = get_guess_stats(supabase, guild_id, user_id)
-
-        # Convert lists to JSON strings
-        guesses_json = json.dumps(guesses)
-        guess_gaps_json = json.dumps(guess_gaps)
+        gaps = [abs(target - guess) for guess in guesses]
+        correct = 1 if result == "correct" else 0
 
         if stats:
-            new_correct = stats["correct_guesses"] + (1 if result == "correct" else 0)
-            new_incorrect = stats["incorrect_guesses"] + (1 if result == "incorrect" else 0)
-            new_total = stats["total_games"] + 1
-
-            supabase.table(table).update({
-                "correct_guesses": new_correct,
-                "incorrect_guesses": new_incorrect,
-                "total_games": new_total,
-                "guesses": guesses_json,
-                "guess_gaps": guess_gaps_json
-            }).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table).update({
+                "correct_guesses": stats["correct_guesses"] + correct,
+                "incorrect_guesses": stats["incorrect_guesses"] + (1 - correct),
+                "total_games": stats["total_games"] + 1,
+                "gap_count": (stats.get("gap_count") or 0) + len(gaps),
+                "gap_sum": (stats.get("gap_sum") or 0) + sum(gaps),
+                "gap_histogram": histogram_add(stats.get("gap_histogram"), gaps),
+                "analytics": merge_observations(stats.get("analytics"), attempts=len(guesses))
+            }).eq("user_id", user_id))
             logger.info(f"Updated guess stats for user {user_id} in guild {guild_id}")
         else:
-            supabase.table(table).insert({
+            _execute_guild_write(supabase, guild_id, supabase.table(table).insert({
                 "user_id": user_id,
-                "correct_guesses": 1 if result == "correct" else 0,
-                "incorrect_guesses": 1 if result == "incorrect" else 0,
+                "correct_guesses": correct,
+                "incorrect_guesses": 1 - correct,
                 "total_games": 1,
-                "guesses": guesses_json,
-                "guess_gaps": guess_gaps_json
-            }).execute()
+                "gap_count": len(gaps),
+                "gap_sum": sum(gaps),
+                "gap_histogram": histogram_add(None, gaps),
+                "analytics": merge_observations(None, attempts=len(guesses))
+            }))
             logger.info(f"Created new guess stats for user {user_id} in guild {guild_id}")
+
+        _execute_guild_write(supabase, guild_id, supabase.table(f"guess_number_games_{guild_id}").insert({
+            "user_id": user_id,
+            "won": bool(correct),
+            "target": target,
+            "guesses": guesses
+        }))
     except Exception as e:
         logger.error(f"Error updating guess stats for user {user_id} in guild {guild_id}: {str(e)}")
         raise
 
-def get_guess_number_leaderboard(supabase, guild_id, limit=10):
-    """Get the Guess Number leaderboard for a guild."""
+def get_guess_number_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the Guess Number leaderboard, by success rate then correct guesses."""
     if not guild_id:
         logger.error("No guild_id provided for get_guess_number_leaderboard")
         return []
 
-    table = f"guess_number_stats_{guild_id}"
-    try:
-        # Use the table API directly instead of raw SQL
-        logger.info(f"Fetching Guess Number leaderboard for guild {guild_id}")
-        response = supabase.table(table).select("*").gte("total_games", 1).execute()
-        
-        if not response.data:
-            logger.info(f"No Guess Number data found for guild {guild_id}")
-            return []
-            
-        # Sort the data in Python
-        players = response.data
-        
-        # Calculate success rate for sorting
-        for player in players:
-            total = player.get("total_games", 0)
-            if total > 0:
-                player["success_rate"] = (player.get("correct_guesses", 0) / total) * 100
-            else:
-                player["success_rate"] = 0
-        
-        # Sort by success rate then by correct guesses
-        players.sort(key=lambda x: (x.get("success_rate", 0), x.get("correct_guesses", 0)), reverse=True)
-        
-        logger.info(f"Found {len(players)} players for Guess Number leaderboard in guild {guild_id}")
-        return players[:limit]
-    except Exception as e:
-        logger.error(f"Error getting Guess Number leaderboard for guild {guild_id}: {str(e)}")
-        return []
+    return get_leaderboard_page(
+        supabase, f"guess_number_stats_{guild_id}", "correct_guesses, incorrect_guesses, total_games",
+        [("success_rate", True), ("correct_guesses", True), ("user_id", False)], after, limit,
+        where=[("gte", "total_games", 1)]
+    )
 
 # ✅ Cleanup Functions
 async def get_all_users_data(supabase, guild_id):
@@ -429,12 +458,13 @@ async def clean_missing_users_data(supabase, guild, member_ids):
             except Exception as e:
                 logger.error(f"Error deleting RPS data for user {user_id}: {str(e)}")
         
-        # Delete users from Guess Number table
+        # Delete users from Guess Number tables
         for user_id in users_to_delete:
             try:
                 resp = supabase.table(guess_table).delete().eq("user_id", user_id).execute()
                 if resp and resp.data:
                     deleted_guess += len(resp.data)
+                supabase.table(f"guess_number_games_{guild_id}").delete().eq("user_id", user_id).execute()
             except Exception as e:
                 logger.error(f"Error deleting Guess Number data for user {user_id}: {str(e)}")
         
@@ -449,20 +479,13 @@ async def clean_missing_users_data(supabase, guild, member_ids):
 
 def create_battle_table(supabase, guild_id):
     """Create the Battle stats table for a guild if it doesn't exist."""
-    table_name = f"battle_stats_{guild_id}"
-    try:
-        # Check if table exists
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
-    except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist: {str(e)}")
-        # We don't try to create directly - this is now handled by the create_guild_tables function
+    return ensure_guild_tables(supabase, guild_id)
 
 def get_battle_stats(supabase, guild_id, user_id):
     """Get Battle stats for a user."""
     table_name = f"battle_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(BATTLE_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting Battle stats: {str(e)}")
@@ -481,7 +504,7 @@ def update_battle_stats(supabase, guild_id, user_id, result):
                 updates["wins"] = current_stats["wins"] + 1
             elif result == "loss":
                 updates["losses"] = current_stats["losses"] + 1
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             new_stats = {
                 "user_id": user_id,
@@ -489,44 +512,45 @@ def update_battle_stats(supabase, guild_id, user_id, result):
                 "losses": 1 if result == "loss" else 0,
                 "total_games": 1
             }
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
     except Exception as e:
         logger.error(f"Error updating Battle stats: {str(e)}")
         raise
 
-def get_battle_leaderboard(supabase, guild_id, limit=10):
-    """Get Battle leaderboard for a guild."""
-    table_name = f"battle_stats_{guild_id}"
-    try:
-        response = supabase.table(table_name).select("*").order("wins", desc=True).limit(limit).execute()
-        return response.data
-    except Exception as e:
-        logger.error(f"Error getting Battle leaderboard: {str(e)}")
-        return []
+def get_battle_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the Battle leaderboard, best conservative rating first."""
+    return get_leaderboard_page(
+        supabase, f"battle_stats_{guild_id}", "wins, losses, total_games, rating, rating_rd",
+        [("rating_score", True), ("user_id", False)], after, limit
+    )
 
 # ✅ Flip & Find Functions
 
 def create_flipnfind_table(supabase, guild_id):
     """Create the Flip & Find stats table for a guild if it doesn't exist."""
-    table_name = f"flipnfind_stats_{guild_id}"
-    try:
-        # Check if table exists
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
-    except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist: {str(e)}")
-        # We don't try to create directly - this is now handled by the create_guild_tables function
+    return ensure_guild_tables(supabase, guild_id)
 
 def get_flipnfind_stats(supabase, guild_id, user_id):
     """Get Flip & Find stats for a user (now per-difficulty, user_id should be f'{user_id}_{difficulty}')."""
     table_name = f"flipnfind_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(FLIPNFIND_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting Flip & Find stats: {str(e)}")
         return None
 
+def get_flipnfind_stats_by_difficulty(supabase, guild_id, user_id, difficulties):
+    """Get a user's Flip & Find rows for several difficulties in one query, keyed by difficulty."""
+    table_name = f"flipnfind_stats_{guild_id}"
+    try:
+        keys = {f"{user_id}_{difficulty}": difficulty for difficulty in difficulties}
+        response = supabase.table(table_name).select(FLIPNFIND_SUMMARY_COLUMNS).in_("user_id", list(keys)).execute()
+        return {keys[row["user_id"]]: row for row in response.data}
+    except Exception as e:
+        logger.error(f"Error getting Flip & Find stats: {str(e)}")
+        return {}
+
 def update_flipnfind_stats(supabase, guild_id, user_id, result, game_time=None, turns=None, star_cards=None):
     """Update Flip & Find stats for a user (now per-difficulty, user_id should be f'{user_id}_{difficulty}')."""
     table_name = f"flipnfind_stats_{guild_id}"
@@ -537,7 +561,8 @@ def update_flipnfind_stats(supabase, guild_id, user_id, result, game_time=None,
             updates = {
                 "total_games": current_stats["total_games"] + 1,
                 "total_turns": current_stats["total_turns"] + (turns or 0),
-                "total_time": current_stats["total_time"] + (game_time or 0)
+                "total_time": current_stats["total_time"] + (game_time or 0),
+                "analytics": merge_observations(current_stats.get("analytics"), time=game_time, turns=turns)
             }
             if result == "win":
                 updates["wins"] = current_stats["wins"] + 1
@@ -549,7 +574,7 @@ def update_flipnfind_stats(supabase, guild_id, user_id, result, game_time=None,
                 updates["best_turns"] = turns
             if star_cards is not None:
                 updates["star_cards"] = current_stats.get("star_cards", 0) + star_cards
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             new_stats = {
                 "user_id": user_id,
@@ -559,59 +584,65 @@ def update_flipnfind_stats(supabase, guild_id, user_id, result, game_time=None,
                 "total_turns": turns or 0,
                 "total_time": game_time or 0,
                 "best_time": game_time,
-                "best_turns": turns
+                "best_turns": turns,
+                "analytics": merge_observations(None, time=game_time, turns=turns)
             }
             if star_cards is not None:
                 new_stats["star_cards"] = star_cards
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
     except Exception as e:
         logger.error(f"Error updating Flip & Find stats: {str(e)}")
         raise
 
-def get_flipnfind_leaderboard(supabase, guild_id, limit=10):
-    """Get Flip & Find leaderboard for a guild (sum stats across all difficulties for each user)."""
-    table_name = f"flipnfind_stats_{guild_id}"
+def get_flipnfind_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the Flip & Find leaderboard (stats summed across difficulties).
+
+    Reads flipnfind_totals, which a trigger on the stats table keeps summed
+    per player.
+    """
+    return get_leaderboard_page(
+        supabase, f"flipnfind_totals_{guild_id}", "wins, star_cards",
+        [("wins", True), ("star_cards", True), ("user_id", False)], after, limit
+    )
+
+# ✅ Rating Functions (Glicko-2, battle/tictactoe/flipnfind)
+
+def update_game_ratings(supabase, game, guild_id, player_a, player_b, score_a):
+    """Apply one game's Glicko-2 update to two rows of a per-guild stats table.
+
+    score_a is 1 if player_a won, 0.5 for a draw and 0 for a loss. Both rows
+    are read in one query and written back in one upsert, and the game is
+    appended to match_history for offline recomputes.
+    """
+    table_name = f"{game}_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").execute()
-        if not response.data:
-            return []
-        from collections import defaultdict
-        agg = defaultdict(lambda: {"wins": 0, "losses": 0, "total_games": 0, "star_cards": 0, "user_id": None})
-        for row in response.data:
-            base_id = row["user_id"].split("_")[0]
-            agg[base_id]["user_id"] = base_id
-            agg[base_id]["wins"] += row.get("wins", 0)
-            agg[base_id]["losses"] += row.get("losses", 0)
-            agg[base_id]["total_games"] += row.get("total_games", 0)
-            agg[base_id]["star_cards"] += row.get("star_cards", 0)
-        leaderboard = sorted(agg.values(), key=lambda x: (x["wins"], x["star_cards"]), reverse=True)
-        return leaderboard[:limit]
+        response = supabase.table(table_name).select("user_id, rating, rating_rd, rating_vol").in_("user_id", [player_a, player_b]).execute()
+        rows = {row["user_id"]: row for row in response.data}
+        new_a, new_b = rate_game(Rating.from_row(rows.get(player_a)), Rating.from_row(rows.get(player_b)), score_a)
+        _execute_guild_write(supabase, guild_id, supabase.table(table_name).upsert([new_a.to_row(player_a), new_b.to_row(player_b)]))
+        supabase.table("match_history").insert({
+            "guild_id": str(guild_id),
+            "game": game,
+            "player_a": player_a,
+            "player_b": player_b,
+            "score_a": score_a
+        }).execute()
+        return new_a, new_b
     except Exception as e:
-        logger.error(f"Error getting Flip & Find leaderboard: {str(e)}")
-        return []
+        logger.error(f"Error updating {game} ratings: {str(e)}")
+        return None
 
 # ✅ The Kidnapped Jack Functions
 
 def create_kidnapped_jack_table(supabase, guild_id):
     """Create the Kidnapped Jack stats table for a guild if it doesn't exist."""
-    table_name = f"kidnapped_jack_stats_{guild_id}"
-    try:
-        # Check if table exists by trying to query it
-        response = supabase.table(table_name).select("*").limit(1).execute()
-        logger.info(f"Table {table_name} already exists")
-    except Exception as e:
-        logger.error(f"Table {table_name} doesn't exist or is inaccessible: {str(e)}")
-        logger.error("This table should be created by the create_guild_tables SQL function.")
-        logger.error("Please run the create_guild_tables function in your Supabase SQL editor.")
-        # Don't raise the exception - let the game continue without stats
-        return False
-    return True
+    return ensure_guild_tables(supabase, guild_id)
 
 def get_kidnapped_jack_stats(supabase, guild_id, user_id):
     """Get Kidnapped Jack stats for a user."""
     table_name = f"kidnapped_jack_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(KIDNAPPED_JACK_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting Kidnapped Jack stats: {str(e)}")
@@ -637,7 +668,8 @@ def update_kidnapped_jack_stats(supabase, guild_id, user_id, result, game_time=N
             # Update existing stats
             updates = {
                 "games_played": current_stats.get("games_played", 0) + 1,
-                "total_time": current_stats.get("total_time", 0) + (game_time or 0)
+                "total_time": current_stats.get("total_time", 0) + (game_time or 0),
+                "analytics": merge_observations(current_stats.get("analytics"), time=game_time, place=win_place or None)
             }
             
             # Update result-specific stats
@@ -660,11 +692,10 @@ def update_kidnapped_jack_stats(supabase, guild_id, user_id, result, game_time=N
                 updates["total_placements"] = current_stats.get("total_placements", 0) + 1
                 updates["placement_sum"] = current_stats.get("placement_sum", 0) + win_place
             
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             # Create new stats entry
             new_stats = {
-                "guild_id": guild_id,
                 "user_id": user_id,
                 "games_played": 1,
                 "escapes": 1 if result == "escape" else 0,
@@ -674,29 +705,69 @@ def update_kidnapped_jack_stats(supabase, guild_id, user_id, result, game_time=N
                 "best_placement": win_place if win_place > 0 else None,
                 "total_wins": 1 if win_place == 1 else 0,
                 "total_placements": 1 if win_place > 0 else 0,
-                "placement_sum": win_place if win_place > 0 else 0
+                "placement_sum": win_place if win_place > 0 else 0,
+                "analytics": merge_observations(None, time=game_time, place=win_place or None)
             }
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
     except Exception as e:
         logger.error(f"Error updating Kidnapped Jack stats: {str(e)}")
         raise
 
-def get_kidnapped_jack_leaderboard(supabase, guild_id, limit=10):
-    """Get Kidnapped Jack leaderboard for a guild."""
-    table_name = f"kidnapped_jack_stats_{guild_id}"
+def get_kidnapped_jack_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the Kidnapped Jack leaderboard, by escapes."""
+    return get_leaderboard_page(
+        supabase, f"kidnapped_jack_stats_{guild_id}", "escapes, games_played, kidnapper_count",
+        [("escapes", True), ("user_id", False)], after, limit
+    )
+
+# ✅ Player Summary (every game in one guild)
+
+def get_player_summary(supabase, guild_id, user_id):
+    """Get a user's stats for every game in a guild in one round-trip.
+
+    Returns {game: row or None}, with flipnfind as {difficulty: row}, or None
+    on error (e.g. the guild's tables don't exist yet).
+    """
     try:
-        response = supabase.table(table_name).select("*").order("escapes", desc=True).limit(limit).execute()
+        with allow_stale():
+            response = supabase.rpc("get_player_summary", {"p_guild_id": str(guild_id), "p_user_id": str(user_id)}).execute()
         return response.data
     except Exception as e:
-        logger.error(f"Error getting Kidnapped Jack leaderboard: {str(e)}")
-        return []
+        logger.error(f"Error getting player summary for {user_id} in guild {guild_id}: {str(e)}")
+        return None
+
+# ✅ Global Stats Functions (Bot-wide, summed across guilds by sync_global_stats)
+
+GLOBAL_GAMES = ("rps", "guess_number", "tictactoe", "battle", "flipnfind", "kidnapped_jack", "roulette")
+
+def get_global_profile(supabase, user_id):
+    """Get a user's totals across every server as {game: row}, in one query."""
+    try:
+        with allow_stale():
+            response = (
+                supabase.table("global_stats")
+                .select("game, wins, losses, draws, total_games")
+                .eq("user_id", str(user_id))
+                .execute()
+            )
+        return {row["game"]: row for row in response.data}
+    except Exception as e:
+        logger.error(f"Error getting global profile for {user_id}: {str(e)}")
+        return None
+
+def get_global_leaderboard(supabase, game, limit=10, after=None):
+    """Get a page of a game's cross-server leaderboard, by total wins."""
+    return get_leaderboard_page(
+        supabase, "global_stats", "wins, losses, draws, total_games", [("wins", True), ("user_id", False)], after, limit,
+        where=[("eq", "game", game)]
+    )
 
 # ✅ Economy Functions (Bot-wide, not guild-specific)
 
 def get_user_balance(supabase, user_id):
     """Get user's HXC balance."""
     try:
-        response = supabase.table("economy").select("*").eq("user_id", user_id).execute()
+        response = supabase.table("economy").select(ECONOMY_COLUMNS).eq("user_id", user_id).execute()
         if response.data:
             return response.data[0]
         else:
@@ -754,38 +825,95 @@ def update_user_balance(supabase, user_id, amount, operation="add"):
         logger.error(f"Error updating balance for {user_id}: {str(e)}")
         return False
 
-def get_economy_leaderboard(supabase, limit=10):
-    """Get economy leaderboard (richest users)."""
+ECONOMY_TOP_SIZE = 1000  # Rows kept in the economy_top materialized view
+
+def get_economy_leaderboard(supabase, limit=10, offset=0, after=None):
+    """Get a page of the economy leaderboard (richest users).
+
+    Pages inside the top ECONOMY_TOP_SIZE are a rank range on the economy_top
+    view, which is refreshed every few minutes; deeper pages read the
+    economy table through its balance index. Given the previous page's last
+    row as `after`, the page is read live from that index instead (keyset
+    pagination), and offset is ignored.
+    """
+    if after is not None:
+        return get_leaderboard_page(
+            supabase, "economy", "balance", [("balance", True), ("user_id", False)], after, limit
+        )
     try:
-        response = supabase.table("economy").select("*").order("balance", desc=True).limit(limit).execute()
-        return response.data
+        with allow_stale():
+            if offset + limit <= ECONOMY_TOP_SIZE:
+                response = (
+                    supabase.table("economy_top")
+                    .select("rank, user_id, balance")
+                    .gte("rank", offset + 1)
+                    .lte("rank", offset + limit)
+                    .order("rank")
+                    .execute()
+                )
+                if response.data:
+                    return response.data
+            response = (
+                supabase.table("economy")
+                .select("user_id, balance")
+                .order("balance", desc=True)
+                .order("user_id")
+                .range(offset, offset + limit - 1)
+                .execute()
+            )
+            return response.data
     except Exception as e:
         logger.error(f"Error getting economy leaderboard: {str(e)}")
         return []
 
+def get_user_rank(supabase, user_id):
+    """Live leaderboard position as {"rank", "total", "balance"}, or None if unknown."""
+    try:
+        with allow_stale():
+            response = supabase.rpc("economy_rank", {"p_user_id": user_id}).execute()
+        return response.data or None
+    except Exception as e:
+        logger.error(f"Error getting rank for {user_id}: {str(e)}")
+        return None
+
+def refresh_economy_top(supabase):
+    """Rebuild the economy_top leaderboard view."""
+    try:
+        supabase.rpc("refresh_economy_top", {}).execute()
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing economy leaderboard: {str(e)}")
+        return False
+
 # ✅ Roulette Functions (Guild-specific)
 
 def get_roulette_stats(supabase, guild_id, user_id):
     """Get roulette stats for a user in a guild."""
     table_name = f"roulette_stats_{guild_id}"
     try:
-        response = supabase.table(table_name).select("*").eq("user_id", user_id).execute()
+        response = supabase.table(table_name).select(ROULETTE_STATS_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting roulette stats: {str(e)}")
         return None
 
-def update_roulette_stats(supabase, guild_id, user_id, result, bet_amount, winnings):
+def update_roulette_stats(supabase, guild_id, user_id, result, bet_amount, winnings, lost=None):
     """Update roulette stats for a user.
     
     Args:
         supabase: Supabase client
         guild_id: ID of the guild
         user_id: ID of the user
-        result: 'win' or 'loss'
-        bet_amount: Amount bet
-        winnings: Amount won (0 if loss)
+        result: 'win', 'loss' or 'push' (the spin broke even)
+        bet_amount: Amount bet, plus any extra loss the table charged
+        winnings: Amount returned by the winning bets, stakes included (0 if none won)
+        lost: Amount lost on the losing bets (default: bet_amount on a loss, else 0)
+
+    A spin can win on some bets and lose on others, so both totals may grow;
+    net profit is total_won - total_bet.
     """
+    if lost is None:
+        lost = bet_amount if result == "loss" else 0
     table_name = f"roulette_stats_{guild_id}"
     try:
         current_stats = get_roulette_stats(supabase, guild_id, user_id)
@@ -795,49 +923,48 @@ def update_roulette_stats(supabase, guild_id, user_id, result, bet_amount, winni
             updates = {
                 "games_played": current_stats["games_played"] + 1,
                 "total_bet": current_stats["total_bet"] + bet_amount,
+                "total_won": current_stats["total_won"] + winnings,
+                "total_lost": current_stats["total_lost"] + lost,
                 "updated_at": "now()"
             }
             
             if result == "win":
                 updates.update({
                     "games_won": current_stats["games_won"] + 1,
-                    "total_won": current_stats["total_won"] + winnings,
                     "biggest_win": max(current_stats["biggest_win"], winnings)
                 })
-            else:
+            elif result == "loss":
                 updates.update({
-                    "total_lost": current_stats["total_lost"] + bet_amount,
-                    "biggest_loss": max(current_stats["biggest_loss"], bet_amount)
+                    "games_lost": current_stats["games_lost"] + 1,
+                    "biggest_loss": max(current_stats["biggest_loss"], bet_amount - winnings)
                 })
             
-            supabase.table(table_name).update(updates).eq("user_id", user_id).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).update(updates).eq("user_id", user_id))
         else:
             # Create new stats entry
             new_stats = {
                 "user_id": user_id,
                 "games_played": 1,
                 "games_won": 1 if result == "win" else 0,
+                "games_lost": 1 if result == "loss" else 0,
                 "total_bet": bet_amount,
-                "total_won": winnings if result == "win" else 0,
-                "total_lost": bet_amount if result == "loss" else 0,
+                "total_won": winnings,
+                "total_lost": lost,
                 "biggest_win": winnings if result == "win" else 0,
-                "biggest_loss": bet_amount if result == "loss" else 0
+                "biggest_loss": bet_amount - winnings if result == "loss" else 0
             }
-            supabase.table(table_name).insert(new_stats).execute()
+            _execute_guild_write(supabase, guild_id, supabase.table(table_name).insert(new_stats))
             
     except Exception as e:
         logger.error(f"Error updating roulette stats: {str(e)}")
         raise
 
-def get_roulette_leaderboard(supabase, guild_id, limit=10):
-    """Get roulette leaderboard for a guild."""
-    table_name = f"roulette_stats_{guild_id}"
-    try:
-        response = supabase.table(table_name).select("*").order("total_won", desc=True).limit(limit).execute()
-        return response.data
-    except Exception as e:
-        logger.error(f"Error getting roulette leaderboard: {str(e)}")
-        return []
+def get_roulette_leaderboard(supabase, guild_id, limit=10, after=None):
+    """Get a page of the roulette leaderboard for a guild, by total winnings."""
+    return get_leaderboard_page(
+        supabase, f"roulette_stats_{guild_id}", "total_won",
+        [("total_won", True), ("user_id", False)], after, limit
+    )
 
 # ✅ Social Rewards Functions (Daily/Monthly/Yearly)
 
@@ -845,7 +972,7 @@ def get_roulette_leaderboard(supabase, guild_id, limit=10):
 def get_social_data(supabase, user_id):
     """Get social rewards data for a user (global)."""
     try:
-        response = supabase.table("social").select("*").eq("user_id", user_id).execute()
+        response = supabase.table("social").select(SOCIAL_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting social data for {user_id}: {str(e)}")
@@ -870,140 +997,27 @@ def create_social_entry(supabase, user_id):
         logger.error(f"Error creating social entry for {user_id}: {str(e)}")
         return None
 
-# Update can_claim_reward to be user-specific only
-def can_claim_reward(supabase, user_id, reward_type):
-    """Check if user can claim a reward (daily/monthly/yearly)."""
-    try:
-        from datetime import datetime, timezone, timedelta
-        
-        social_data = get_social_data(supabase, user_id)
-        if not social_data:
-            return True, None, 0
-        
-        now = datetime.now(timezone.utc)
-        last_claim_field = f"last_{reward_type}"
-        streak_field = f"{reward_type}_streak"
-        
-        last_claim = social_data.get(last_claim_field)
-        current_streak = social_data.get(streak_field, 0)
-        
-        if not last_claim:
-            return True, None, current_streak
-        
-        if isinstance(last_claim, str):
-            last_claim = datetime.fromisoformat(last_claim.replace('Z', '+00:00'))
-        
-        # Calculate time differences based on reward type
-        if reward_type == "daily":
-            time_diff = timedelta(days=1)
-            next_claim = last_claim + time_diff
-        elif reward_type == "monthly":
-            time_diff = timedelta(days=30)
-            next_claim = last_claim + time_diff
-        elif reward_type == "yearly":
-            time_diff = timedelta(days=365)
-            next_claim = last_claim + time_diff
-        else:
-            return False, "Invalid reward type", current_streak
-        
-        if now >= next_claim:
-            return True, None, current_streak
-        else:
-            time_left = next_claim - now
-            hours, remainder = divmod(int(time_left.total_seconds()), 3600)
-            minutes, _ = divmod(remainder, 60)
-            
-            if hours > 0:
-                time_left_str = f"{hours}h {minutes}m"
-            else:
-                time_left_str = f"{minutes}m"
-                
-            return False, time_left_str, current_streak
-            
-    except Exception as e:
-        logger.error(f"Error checking {reward_type} claim for {user_id}: {str(e)}")
-        return False, "Error occurred", 0
-
-# Update claim_reward to be user-specific only
 def claim_reward(supabase, user_id, reward_type):
-    """Claim a reward and update social data (global)."""
+    """Claim a daily/monthly/yearly reward through the claim_reward SQL function.
+
+    The cooldown check, streak update and HXC credit happen in one
+    transaction. Returns a dict whose "status" is "claimed" (with amount,
+    bonus, streak and balance), "cooldown" (with streak and seconds_left)
+    or "invalid", or None on error.
+    """
     try:
-        from datetime import datetime, timezone, timedelta
-        
-        # Check if can claim
-        can_claim, time_left, current_streak = can_claim_reward(supabase, user_id, reward_type)
-        if not can_claim:
-            return False, 0, current_streak
-        
-        # Calculate reward amounts
-        base_rewards = {
-            "daily": 100,
-            "monthly": 3000,
-            "yearly": 36500
-        }
-        
-        base_amount = base_rewards[reward_type]
-        streak_bonus = min(current_streak * 0.1, 1.0)
-        total_amount = int(base_amount * (1 + streak_bonus))
-        
-        # Get or create social data
-        social_data = get_social_data(supabase, user_id)
-        now = datetime.now(timezone.utc)
-        last_claim_field = f"last_{reward_type}"
-        streak_field = f"{reward_type}_streak"
-        
-        if social_data:
-            last_claim = social_data.get(last_claim_field)
-            new_streak = current_streak + 1
-            
-            # For daily: reset if more than 48 hours
-            if reward_type == "daily" and last_claim:
-                if isinstance(last_claim, str):
-                    last_claim = datetime.fromisoformat(last_claim.replace('Z', '+00:00'))
-                if now - last_claim > timedelta(hours=48):
-                    new_streak = 1
-            
-            # Update social data
-            updates = {
-                last_claim_field: now.isoformat(),
-                streak_field: new_streak,
-                f"total_{reward_type}_claimed": social_data.get(f"total_{reward_type}_claimed", 0) + 1,
-                "updated_at": now.isoformat()
-            }
-            supabase.table("social").update(updates).eq("user_id", user_id).execute()
-        else:
-            # Create new entry
-            new_streak = 1
-            new_entry = {
-                "user_id": user_id,
-                last_claim_field: now.isoformat(),
-                streak_field: new_streak,
-                f"total_{reward_type}_claimed": 1,
-                "daily_streak": 1 if reward_type == "daily" else 0,
-                "monthly_streak": 1 if reward_type == "monthly" else 0,
-                "yearly_streak": 1 if reward_type == "yearly" else 0,
-                "total_daily_claimed": 1 if reward_type == "daily" else 0,
-                "total_monthly_claimed": 1 if reward_type == "monthly" else 0,
-                "total_yearly_claimed": 1 if reward_type == "yearly" else 0,
-                "created_at": now.isoformat(),
-                "updated_at": now.isoformat()
-            }
-            supabase.table("social").insert(new_entry).execute()
-        
-        # Add HXC to user balance
-        success = update_user_balance(supabase, user_id, total_amount, "add")
-        return success, total_amount, new_streak
-        
+        response = supabase.rpc("claim_reward", {"p_user_id": user_id, "p_type": reward_type}).execute()
+        return response.data or None
     except Exception as e:
         logger.error(f"Error claiming {reward_type} reward for {user_id}: {str(e)}")
-        return False, 0, 0
+        return None
 
 # ✅ Job System Functions (Bot-wide)
 
 def get_job_data(supabase, user_id):
     """Get job data for a user."""
     try:
-        response = supabase.table("jobs").select("*").eq("user_id", user_id).execute()
+        response = supabase.table("jobs").select(JOB_COLUMNS).eq("user_id", user_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error getting job data for {user_id}: {str(e)}")
@@ -1038,15 +1052,20 @@ def update_job_data(supabase, user_id, updates):
         logger.error(f"Error updating job data for {user_id}: {str(e)}")
         return False
 
-def assign_job(supabase, user_id, job_name):
-    """Assign a job to a user."""
+def assign_job(supabase, user_id, job_name, job_info):
+    """Assign a job to a user and schedule the firing deadline for its first quota window."""
     try:
-        from datetime import datetime, timezone
+        from datetime import datetime, timedelta, timezone
+        now = datetime.now(timezone.utc)
+        deadline = now + timedelta(hours=job_info["work_frequency"]["hours"] + job_info["grace_period"])
         updates = {
             "current_job": job_name,
             "work_count": 0,
             "grace_period_start": None,
-            "last_work": datetime.now(timezone.utc).isoformat()
+            "last_work": now.isoformat(),
+            "window_start": now.isoformat(),
+            "window_count": 0,
+            "fire_at": deadline.isoformat()
         }
         return update_job_data(supabase, user_id, updates)
     except Exception as e:
@@ -1059,59 +1078,57 @@ def quit_job(supabase, user_id):
         updates = {
             "current_job": None,
             "work_count": 0,
-            "grace_period_start": None
+            "grace_period_start": None,
+            "window_start": None,
+            "window_count": 0,
+            "fire_at": None
         }
         return update_job_data(supabase, user_id, updates)
     except Exception as e:
         logger.error(f"Error quitting job for {user_id}: {str(e)}")
         return False
 
-def add_work_experience(supabase, user_id, exp_amount, earnings):
-    """Add work experience and update work stats for a user."""
+def record_work(supabase, user_id, job_name, job_info, earnings, exp):
+    """Record one /work shift through the record_work SQL function.
+
+    Quota windows, grace periods, firing and the HXC payout are all handled
+    in one transaction. Returns the function's result dict, whose "status"
+    is "ok", "fired" or "no_job", or None on error.
+    """
     try:
-        from datetime import datetime, timezone
-        job_data = get_job_data(supabase, user_id)
-        if not job_data:
-            return False
-            
-        updates = {
-            "experience": job_data["experience"] + exp_amount,
-            "last_work": datetime.now(timezone.utc).isoformat(),
-            "work_count": job_data["work_count"] + 1,
-            "total_earned": job_data["total_earned"] + earnings,
-            "grace_period_start": None  # Reset grace period on successful work
-        }
-        return update_job_data(supabase, user_id, updates)
+        response = supabase.rpc("record_work", {
+            "p_user_id": user_id,
+            "p_job": job_name,
+            "p_earnings": earnings,
+            "p_exp": exp,
+            "p_times": job_info["work_frequency"]["times"],
+            "p_hours": job_info["work_frequency"]["hours"],
+            "p_grace_hours": job_info["grace_period"],
+            "p_exp_loss": job_info["exp_loss"]
+        }).execute()
+        return response.data or None
     except Exception as e:
-        logger.error(f"Error adding work experience for {user_id}: {str(e)}")
-        return False
+        logger.error(f"Error recording work for {user_id}: {str(e)}")
+        return None
+
+def fire_expired_jobs(supabase, exp_loss, limit=500):
+    """Fire up to `limit` players whose quota deadline has passed, in one statement.
 
-def start_grace_period(supabase, user_id):
-    """Start grace period for a user who hasn't worked enough."""
+    exp_loss maps job name to its experience penalty. Returns a list of
+    {"user_id", "job", "exp_lost"} dicts, or None on error.
+    """
     try:
-        from datetime import datetime, timezone
-        updates = {
-            "grace_period_start": datetime.now(timezone.utc).isoformat()
-        }
-        return update_job_data(supabase, user_id, updates)
+        response = supabase.rpc("fire_expired_jobs", {"p_exp_loss": exp_loss, "p_limit": limit}).execute()
+        return response.data or []
     except Exception as e:
-        logger.error(f"Error starting grace period for {user_id}: {str(e)}")
-        return False
+        logger.error(f"Error firing expired jobs: {str(e)}")
+        return None
 
-def fire_user(supabase, user_id, exp_penalty):
-    """Fire a user from their job and deduct experience."""
+def schedule_job_deadlines(supabase, rules):
+    """Give a firing deadline to employed players that predate it; rules maps job -> [times, hours, grace_hours]."""
     try:
-        job_data = get_job_data(supabase, user_id)
-        if not job_data:
-            return False
-            
-        updates = {
-            "current_job": None,
-            "experience": max(0, job_data["experience"] - exp_penalty),
-            "work_count": 0,
-            "grace_period_start": None
-        }
-        return update_job_data(supabase, user_id, updates)
+        response = supabase.rpc("schedule_job_deadlines", {"p_rules": rules}).execute()
+        return response.data or 0
     except Exception as e:
-        logger.error(f"Error firing user {user_id}: {str(e)}")
-        return False
+        logger.error(f"Error scheduling job deadlines: {str(e)}")
+        return 0
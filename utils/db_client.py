@@ -0,0 +1,319 @@
+"""A Supabase client wrapper that keeps the bot usable when the database isn't.
+
+ResilientClient stands in for the supabase Client everywhere: helpers keep
+building queries with table(...).select(...).eq(...).execute() and rpc(...),
+and the wrapper decides how each execute() runs.
+
+- Every read has a deadline (the timeout), after which it is abandoned.
+  Writes have none beyond the HTTP client's own timeout: an abandoned
+  write can still commit (an RPC like claim_reward credits HXC), so it
+  waits for the database's answer rather than report a failure that
+  may not be one.
+- Reads (selects, and the RPCs listed in READ_RPCS) are idempotent, so a
+  transient failure (connection error, timeout, 5xx, PostgREST pool errors)
+  is retried with jittered exponential backoff. Writes run once.
+- With hedge_after set, a read still running after that many seconds is
+  sent a second time and whichever answer arrives first is used.
+- After failure_threshold transient failures in a row the circuit opens:
+  calls fail fast with CircuitOpenError for reset_timeout seconds, then a
+  single trial call decides whether it closes again.
+- Reads made inside allow_stale() (leaderboards, profiles, summaries:
+  answers that are only shown) are remembered for max_stale seconds. Such a
+  read that fails, or that arrives while the circuit is open, gets its last
+  good answer instead, so a blip shows slightly old data rather than none.
+  Other reads never get an old answer, since a helper may write back what
+  it read (a balance, a stats row). Any successful write drops every
+  remembered read, as RPCs and triggers change tables beyond the one named.
+
+Errors that are the database's actual answer (a constraint violation, a
+missing table) are neither retried nor counted against the circuit.
+"""
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import copy
+import logging
+import random
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:
+    APIError = None
+
+logger = logging.getLogger(__name__)
+
+# RPCs that only read, and so may be retried, hedged and served stale
+READ_RPCS = frozenset({"get_player_summary", "economy_rank"})
+
+# PostgREST could not reach or get a connection from Postgres; Postgres statement timeout
+TRANSIENT_CODES = frozenset({"PGRST000", "PGRST001", "PGRST002", "PGRST003", "57014"})
+
+CACHE_PER_TABLE = 256  # Remembered reads per table
+
+# Process-wide client counters, surfaced on the status page by keep_alive.py
+client_stats = {
+    "calls": 0,
+    "retries": 0,
+    "timeouts": 0,
+    "hedged": 0,
+    "hedge_wins": 0,
+    "stale_served": 0,
+    "short_circuited": 0,
+    "circuit_opens": 0,
+}
+
+_active_client = None
+
+# Set inside allow_stale(); a ContextVar so it follows calls into asyncio.to_thread
+_stale_allowed = contextvars.ContextVar("stale_allowed", default=False)
+
+@contextlib.contextmanager
+def allow_stale():
+    """Let reads in this block fall back to a remembered answer; only for data that is shown, never written back."""
+    token = _stale_allowed.set(True)
+    try:
+        yield
+    finally:
+        _stale_allowed.reset(token)
+
+def get_db_client_stats():
+    """Return a snapshot of the client counters and the circuit state."""
+    stats = dict(client_stats)
+    stats["state"] = _active_client.breaker.state if _active_client is not None else None
+    return stats
+
+class CircuitOpenError(Exception):
+    """The database is marked unhealthy and there is no remembered answer to give."""
+
+def is_transient(error):
+    """True for failures worth retrying: the request didn't get a real answer."""
+    if isinstance(error, (TimeoutError, ConnectionError, concurrent.futures.TimeoutError)):
+        return True
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    if APIError is not None and isinstance(error, APIError):
+        code = error.code
+        return (isinstance(code, int) and code >= 500) or code in TRANSIENT_CODES
+    return False
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` transient failures in a row;
+    open -> half_open after `reset_timeout` seconds; half_open lets one call
+    through and closes on its success or reopens on its failure."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    client_stats["circuit_opens"] += 1
+                    logger.warning(f"Database circuit opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = self.clock()
+
+class _Query:
+    """Records a query builder chain so every attempt can replay it on a fresh builder."""
+
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table = table_name
+        self._calls = []
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return record
+
+    def _build(self):
+        builder = self._client.client.table(self._table)
+        for name, args, kwargs in self._calls:
+            builder = getattr(builder, name)(*args, **kwargs)
+        return builder
+
+    def execute(self):
+        is_read = bool(self._calls) and self._calls[0][0] == "select"
+        key = repr(self._calls)
+        return self._client._execute(self._table, key, is_read, lambda: self._build().execute())
+
+class _Rpc:
+    def __init__(self, client, fn, params):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def execute(self):
+        client = self._client
+        return client._execute(
+            f"rpc:{self._fn}", repr(sorted(self._params.items())), self._fn in client.read_rpcs,
+            lambda: client.client.rpc(self._fn, self._params).execute()
+        )
+
+class ResilientClient:
+    """Wraps a supabase Client; see the module docstring for what each call gets."""
+
+    def __init__(self, client, timeout=10.0, retries=2, backoff=0.1, hedge_after=None,
+                 failure_threshold=5, reset_timeout=30.0, max_stale=300.0, read_rpcs=READ_RPCS,
+                 max_workers=32, clock=time.monotonic, sleep=time.sleep):
+        global _active_client
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.max_stale = max_stale
+        self.read_rpcs = frozenset(read_rpcs)
+        self.clock = clock
+        self.sleep = sleep
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._cache = {}  # table -> OrderedDict of query key -> (stored_at, response)
+        self._cache_lock = threading.Lock()
+        self._writes = 0  # Successful writes so far; a read that overlapped one isn't remembered
+        _active_client = self
+
+    def table(self, table_name):
+        return _Query(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None):
+        return _Rpc(self, fn, params or {})
+
+    def __getattr__(self, name):
+        # auth, storage and anything else go straight to the real client
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _execute(self, table, key, is_read, run):
+        client_stats["calls"] += 1
+        if not self.breaker.allow():
+            client_stats["short_circuited"] += 1
+            return self._stale(table, key, CircuitOpenError("Database circuit is open"), is_read)
+
+        attempts = 1 + (self.retries if is_read else 0)
+        writes_before = self._writes
+        for attempt in range(attempts):
+            try:
+                response = self._attempt(run, is_read)
+            except Exception as e:
+                if not is_transient(e):
+                    # The database answered, so it is up; the error is the caller's
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if not is_read:
+                    # The write may still have gone through
+                    self._forget()
+                if attempt + 1 == attempts or not self.breaker.allow():
+                    return self._stale(table, key, e, is_read)
+                client_stats["retries"] += 1
+                self.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+                continue
+            self.breaker.record_success()
+            if not is_read:
+                self._forget()
+            elif _stale_allowed.get():
+                self._remember(table, key, response, writes_before)
+            return response
+
+    def _attempt(self, run, is_read):
+        """One call, with the deadline applied to reads; reads are hedged when hedge_after is set."""
+        primary = self._pool.submit(run)
+        if not (is_read and self.hedge_after) or self.hedge_after >= self.timeout:
+            try:
+                return primary.result(timeout=self.timeout if is_read else None)
+            except concurrent.futures.TimeoutError:
+                client_stats["timeouts"] += 1
+                raise
+
+        deadline = self.clock() + self.timeout
+        done, _ = concurrent.futures.wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        client_stats["hedged"] += 1
+        hedge = self._pool.submit(run)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=max(deadline - self.clock(), 0), return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        client_stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        client_stats["timeouts"] += 1
+        raise concurrent.futures.TimeoutError()
+
+    def _remember(self, table, key, response, writes_before):
+        with self._cache_lock:
+            if self._writes != writes_before:
+                return
+            entries = self._cache.setdefault(table, collections.OrderedDict())
+            entries[key] = (self.clock(), copy.deepcopy(response))
+            entries.move_to_end(key)
+            if len(entries) > CACHE_PER_TABLE:
+                entries.popitem(last=False)
+
+    def _forget(self):
+        with self._cache_lock:
+            self._writes += 1
+            self._cache.clear()
+
+    def _stale(self, table, key, error, is_read):
+        """The remembered answer to a failed read inside allow_stale(), or the error if there is none fresh enough."""
+        if is_read and _stale_allowed.get():
+            with self._cache_lock:
+                entry = self._cache.get(table, {}).get(key)
+            if entry is not None and self.clock() - entry[0] <= self.max_stale:
+                client_stats["stale_served"] += 1
+                logger.warning(f"Serving a {self.clock() - entry[0]:.0f}s old answer for {table}: {str(error)}")
+                return copy.deepcopy(entry[1])
+        raise error
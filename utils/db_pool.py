@@ -0,0 +1,112 @@
+"""The HTTP connection pool behind the Supabase REST client.
+
+supabase-py gives PostgREST an httpx client with default limits: HTTP/1.1
+only and idle connections dropped after 5 seconds, so a quiet minute means a
+fresh TCP + TLS handshake on the next command. use_pool swaps in a client
+with HTTP/2 (one connection multiplexes concurrent queries), an explicit
+pool size and a keep-alive expiry long enough to span gaps between
+commands. It survives the client rebuilding its PostgREST session. The bot,
+the job sweeper and the rate limiter all share the one supabase client and
+therefore this pool; prewarm opens the first connection at startup.
+
+Every request is traced through httpcore, counting new connections and TLS
+handshakes, so the status page can show how often a request reuses a warm
+connection.
+"""
+import collections
+import logging
+import time
+
+import httpx
+
+try:
+    import h2  # noqa: F401  httpx needs it for HTTP/2
+except ImportError:
+    h2 = None
+
+try:
+    from postgrest.utils import SyncClient
+except ImportError:
+    SyncClient = httpx.Client
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 32            # Connections at most; matches ResilientClient's worker threads
+KEEPALIVE_CONNECTIONS = 8  # Idle connections kept open
+KEEPALIVE_EXPIRY = 60.0    # Seconds an idle connection is kept
+
+# Process-wide pool counters, surfaced on the status page by keep_alive.py
+pool_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "tls_handshakes": 0,
+    "http2_responses": 0,
+}
+
+_handshakes = collections.deque(maxlen=1000)  # monotonic times of recent TLS handshakes
+
+def get_pool_stats():
+    """Return a snapshot of the pool counters with the reuse rate and handshakes in the last minute."""
+    stats = dict(pool_stats)
+    cutoff = time.monotonic() - 60
+    stats["handshakes_last_minute"] = sum(1 for at in list(_handshakes) if at >= cutoff)
+    stats["reuse_rate"] = 1 - stats["new_connections"] / stats["requests"] if stats["requests"] else None
+    return stats
+
+def _trace(event, info):
+    if event == "connection.connect_tcp.complete":
+        pool_stats["new_connections"] += 1
+    elif event == "connection.start_tls.complete":
+        pool_stats["tls_handshakes"] += 1
+        _handshakes.append(time.monotonic())
+
+def _on_request(request):
+    pool_stats["requests"] += 1
+    request.extensions["trace"] = _trace
+
+def _on_response(response):
+    if response.http_version == "HTTP/2":
+        pool_stats["http2_responses"] += 1
+
+def create_session(base_url, headers, timeout, pool_size=POOL_SIZE, keepalive_connections=KEEPALIVE_CONNECTIONS,
+                   keepalive_expiry=KEEPALIVE_EXPIRY, http2=True):
+    """An instrumented httpx client for PostgREST with the given pool limits."""
+    return SyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout,
+        http2=http2 and h2 is not None,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        event_hooks={"request": [_on_request], "response": [_on_response]}
+    )
+
+def use_pool(client, **limits):
+    """Make a supabase Client's PostgREST calls go through create_session(**limits)."""
+    build_postgrest = client._init_postgrest_client
+
+    def init_postgrest(rest_url, headers, schema, timeout):
+        postgrest = build_postgrest(rest_url=rest_url, headers=headers, schema=schema, timeout=timeout)
+        default_session = postgrest.session
+        postgrest.session = create_session(rest_url, default_session.headers, timeout, **limits)
+        default_session.close()
+        return postgrest
+
+    # supabase-py rebuilds its PostgREST client on auth events; every rebuild gets the pool
+    client._init_postgrest_client = init_postgrest
+    client._postgrest = None
+    return client
+
+def prewarm(client, table="economy"):
+    """Open the first pooled connection (TCP, TLS and HTTP/2 setup) before a command needs it."""
+    try:
+        started = time.perf_counter()
+        client.table(table).select("user_id").limit(0).execute()
+        logger.info(f"Database connection warmed in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not pre-warm the database connection: {str(e)}")
+        return False
@@ -0,0 +1,304 @@
+"""Dice expression engine for /diceroll.
+
+Expressions are sums of dice terms and constants, e.g. ``4d6kh3+2d8-1``:
+
+    NdS       N dice with S sides (N defaults to 1, ``d%`` is d100)
+    NdS!      exploding: a die showing S is rolled again and added
+    khK klK   keep the K highest / lowest dice (K defaults to 1)
+    dhK dlK   drop the K highest / lowest dice
+    adv dis   a d20 with advantage / disadvantage (2d20kh1 / 2d20kl1)
+
+Each term is rolled as one NumPy array when NumPy is installed (plain
+Python lists otherwise), so a roll of millions of dice is a handful of
+vectorised calls. Alongside the total every term reports a face
+histogram (binned to HISTOGRAM_BINS rows), the mean die and the expected
+value: exact while the keep/drop sums fit EXACT_EV_BUDGET, an
+order-statistic approximation beyond it.
+"""
+import heapq
+import math
+import random
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_DICE = 2_000_000 if np is not None else 100_000  # Dice per expression
+MAX_SIDES = 1_000_000
+MAX_TERMS = 20
+MAX_EXPLOSIONS = 100     # Rerolls per die before an exploding chain stops
+SHOWN_ROLLS = 20         # Individual dice listed per term
+EXACT_EV_BUDGET = 50_000  # Binomial terms the exact keep/drop expected values may sum, per expression
+HISTOGRAM_BINS = 10      # Face histogram rows per term
+
+_TOKEN = re.compile(
+    r"([+-])?(?:(adv|dis)|(\d*)d(\d+|%)(!)?(?:(kh|kl|dh|dl|k|d)(\d*))?|(\d+))"
+)
+
+class DiceError(ValueError):
+    """The expression can't be parsed or exceeds the engine's limits."""
+
+class DiceTerm:
+    """One parsed ``NdS`` term; keep is ("h" or "l", count) or None for every die."""
+
+    __slots__ = ("sign", "count", "sides", "explode", "keep", "notation")
+
+    def __init__(self, sign, count, sides, explode=False, keep=None, notation=None):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.explode = explode
+        self.keep = keep
+        self.notation = notation or f"{count}d{sides}"
+
+    def exact_cost(self):
+        """Binomial terms the exact expected value sums (0 when it has a closed form)."""
+        if self.keep is None or self.explode:
+            return 0
+        kept = self.keep[1]
+        return self.sides * min(kept, self.count - kept)
+
+    def expected(self, exact=True):
+        """Expected subtotal (before the sign), or None for exploding keep/drop terms.
+
+        With exact=False a keep/drop term uses the continuous order-statistic
+        approximation, which is close once there are more than a handful of dice.
+        """
+        s = self.sides
+        if self.keep is None:
+            per_die = (s + 1) / 2
+            if self.explode and s > 1:
+                per_die *= (1 - (1 / s) ** (MAX_EXPLOSIONS + 1)) / (1 - 1 / s)
+            return self.count * per_die
+        if self.explode:
+            return None
+        side, kept = self.keep
+        n = self.count
+        if not exact:
+            # The i-th smallest of n uniforms averages i / (n + 1); a die is about s * U + 1/2
+            ranks = kept * (2 * n - kept + 1) / 2 if side == "h" else kept * (kept + 1) / 2
+            return s * ranks / (n + 1) + kept / 2
+        # Sum of the top k dice = sum over faces x of min(#dice >= x, k)
+        total = 0.0
+        for x in range(1, s + 1):
+            p = (s - x + 1) / s
+            if side == "h":
+                total += _expected_min(n, p, kept)
+            else:
+                # Bottom k = every die >= x minus the ones that fall in the top n - k
+                total += n * p - _expected_min(n, p, n - kept)
+        return total
+
+class DiceExpression:
+    __slots__ = ("terms", "modifier", "text")
+
+    def __init__(self, terms, modifier, text):
+        self.terms = terms
+        self.modifier = modifier
+        self.text = text
+
+    @property
+    def dice(self):
+        return sum(term.count for term in self.terms)
+
+    def exact_terms(self):
+        """Which terms get an exact expected value, spending EXACT_EV_BUDGET left to right."""
+        budget, exact = EXACT_EV_BUDGET, []
+        for term in self.terms:
+            cost = term.exact_cost()
+            exact.append(cost <= budget)
+            if cost <= budget:
+                budget -= cost
+        return exact
+
+    def expected(self):
+        """Expected total as (value, exact), or None when a term has no expected value."""
+        exact = self.exact_terms()
+        values = [term.expected(term_exact) for term, term_exact in zip(self.terms, exact)]
+        if any(value is None for value in values):
+            return None
+        value = sum(term.sign * value for term, value in zip(self.terms, values)) + self.modifier
+        return value, all(exact)
+
+class TermRoll:
+    __slots__ = ("term", "subtotal", "shown", "dropped", "mean", "histogram", "explosions")
+
+    def __init__(self, term, subtotal, shown, dropped, mean, histogram, explosions):
+        self.term = term
+        self.subtotal = subtotal
+        self.shown = shown
+        self.dropped = dropped
+        self.mean = mean
+        self.histogram = histogram
+        self.explosions = explosions
+
+class DiceRoll:
+    __slots__ = ("expression", "terms", "total")
+
+    def __init__(self, expression, terms, total):
+        self.expression = expression
+        self.terms = terms
+        self.total = total
+
+    @property
+    def expected(self):
+        return self.expression.expected()
+
+def parse(text):
+    """Parse a dice expression into a DiceExpression, raising DiceError if it is invalid."""
+    compact = re.sub(r"\s*([+-])\s*", r"\1", text.strip().lower())
+    if not compact:
+        raise DiceError("Empty dice expression.")
+    terms, modifier, position = [], 0, 0
+    while position < len(compact):
+        match = _TOKEN.match(compact, position)
+        if not match or match.end() == position or (position and not match.group(1)):
+            raise DiceError(f"Couldn't read the expression at `{compact[position:] or compact}`.")
+        position = match.end()
+        sign = -1 if match.group(1) == "-" else 1
+        advantage, count, sides, explode, keep_kind, keep_count, constant = match.groups()[1:]
+        if constant is not None:
+            modifier += sign * int(constant)
+            continue
+        if advantage:
+            terms.append(DiceTerm(sign, 2, 20, keep=("h" if advantage == "adv" else "l", 1), notation=advantage))
+            continue
+        count = int(count) if count else 1
+        sides = 100 if sides == "%" else int(sides)
+        if count < 1 or sides < 1:
+            raise DiceError("Dice need at least one die and one side.")
+        if sides > MAX_SIDES:
+            raise DiceError(f"Maximum {MAX_SIDES:,} sides per die.")
+        if explode and sides == 1:
+            raise DiceError("A one-sided die can't explode.")
+        keep = None
+        if keep_kind:
+            amount = int(keep_count) if keep_count else 1
+            if keep_kind in ("k", "kh", "kl"):
+                keep = ("l" if keep_kind == "kl" else "h", amount)
+            else:
+                # Dropping the lowest k is keeping the highest count - k
+                keep = ("l" if keep_kind == "dh" else "h", count - amount)
+            if not 0 < keep[1] <= count:
+                raise DiceError(f"`{match.group(0).lstrip('+-')}` keeps {keep[1]} of {count} dice.")
+            if keep[1] == count:
+                keep = None
+        terms.append(DiceTerm(sign, count, sides, bool(explode), keep, match.group(0).lstrip("+-")))
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f"Maximum {MAX_TERMS} dice terms per expression.")
+    expression = DiceExpression(terms, modifier, compact)
+    if expression.dice > MAX_DICE:
+        raise DiceError(f"Maximum {MAX_DICE:,} dice per roll.")
+    return expression
+
+def roll(expression, rng=None):
+    """Roll a DiceExpression (or expression text). rng is a NumPy Generator or random.Random."""
+    if isinstance(expression, str):
+        expression = parse(expression)
+    if rng is None:
+        rng = np.random.default_rng() if np is not None else random.Random()
+    roll_term = _roll_numpy if np is not None and isinstance(rng, np.random.Generator) else _roll_python
+    terms = [roll_term(term, rng) for term in expression.terms]
+    total = sum(term.term.sign * term.subtotal for term in terms) + expression.modifier
+    return DiceRoll(expression, terms, total)
+
+def _roll_numpy(term, rng):
+    n, s = term.count, term.sides
+    faces = rng.integers(1, s + 1, size=n, dtype=np.int64)
+    width = _bin_width(s)
+    histogram = np.bincount((faces - 1) // width, minlength=-(-s // width))
+    values = faces
+    explosions = 0
+    if term.explode:
+        values = faces.copy()
+        chain = np.flatnonzero(faces == s)
+        for _ in range(MAX_EXPLOSIONS):
+            if not chain.size:
+                break
+            explosions += chain.size
+            extra = rng.integers(1, s + 1, size=chain.size, dtype=np.int64)
+            values[chain] += extra
+            chain = chain[extra == s]
+    kept = values
+    if term.keep is not None:
+        side, k = term.keep
+        kept = np.partition(values, n - k)[n - k:] if side == "h" else np.partition(values, k - 1)[:k]
+    return TermRoll(
+        term,
+        int(kept.sum()),
+        values[:SHOWN_ROLLS].tolist(),
+        n - kept.size,
+        float(values.mean()),
+        histogram.tolist(),
+        explosions,
+    )
+
+def _roll_python(term, rng):
+    n, s = term.count, term.sides
+    faces = [rng.randrange(s) + 1 for _ in range(n)]
+    width = _bin_width(s)
+    histogram = [0] * -(-s // width)
+    for face in faces:
+        histogram[(face - 1) // width] += 1
+    values = faces
+    explosions = 0
+    if term.explode:
+        values = list(faces)
+        chain = [i for i, face in enumerate(faces) if face == s]
+        for _ in range(MAX_EXPLOSIONS):
+            if not chain:
+                break
+            explosions += len(chain)
+            next_chain = []
+            for i in chain:
+                extra = rng.randrange(s) + 1
+                values[i] += extra
+                if extra == s:
+                    next_chain.append(i)
+            chain = next_chain
+    kept = values
+    if term.keep is not None:
+        side, k = term.keep
+        kept = heapq.nlargest(k, values) if side == "h" else heapq.nsmallest(k, values)
+    return TermRoll(term, sum(kept), values[:SHOWN_ROLLS], n - len(kept), sum(values) / n, histogram, explosions)
+
+def _expected_min(n, p, k):
+    """E[min(B, k)] for B ~ Binomial(n, p), summing whichever tail is shorter."""
+    if k <= 0:
+        return 0.0
+    if p >= 1:
+        return float(min(n, k))
+    if p <= 0:
+        return 0.0
+    if k <= n - k:
+        # k - sum_{j<k} (k - j) P(B = j)
+        return k - sum((k - j) * _binomial_pmf(n, p, j) for j in range(k))
+    # E[B] - sum_{j>k} (j - k) P(B = j)
+    return n * p - sum((j - k) * _binomial_pmf(n, p, j) for j in range(k + 1, n + 1))
+
+def _binomial_pmf(n, p, j):
+    log_pmf = math.lgamma(n + 1) - math.lgamma(j + 1) - math.lgamma(n - j + 1) + j * math.log(p) + (n - j) * math.log1p(-p)
+    return math.exp(log_pmf)
+
+def _bin_width(sides):
+    return -(-sides // HISTOGRAM_BINS)
+
+def histogram_text(histogram, sides, width=12):
+    """Bar chart of a term's binned face histogram (TermRoll.histogram) for embeds."""
+    total = sum(histogram)
+    if not total:
+        return None
+    size = _bin_width(sides)
+    rows = []
+    for index, count in enumerate(histogram):
+        start = index * size
+        label = f"{start + 1}" if size == 1 else f"{start + 1}-{min(start + size, sides)}"
+        rows.append((label, count))
+    peak = max(count for _, count in rows)
+    pad = max(len(label) for label, _ in rows)
+    return "\n".join(
+        f"{label:>{pad}} {'█' * round(width * count / peak):<{width}} {100 * count / total:.1f}%"
+        for label, count in rows
+    )
@@ -0,0 +1,63 @@
+import asyncio
+
+INBOX_SIZE = 20  # Messages buffered per player before further DMs are dropped
+
+# Process-wide router counters, surfaced on the status page by keep_alive.py
+router_stats = {
+    "open": 0,
+    "routed": 0,
+    "dropped": 0,
+}
+
+def get_router_stats():
+    """Return a snapshot of the DM router counters."""
+    return dict(router_stats)
+
+class DMRouter:
+    """Routes direct messages to the game that owns the sender.
+
+    A game opens an inbox for its player and reads messages from the returned
+    asyncio.Queue. The bot's on_message listener calls dispatch() once per
+    message, which is a single dict lookup no matter how many games are
+    running. DMs from players without an open inbox are ignored.
+    """
+
+    def __init__(self, inbox_size=INBOX_SIZE):
+        self.inbox_size = inbox_size
+        self._inboxes = {}  # user_id -> asyncio.Queue
+
+    def __len__(self):
+        return len(self._inboxes)
+
+    def __contains__(self, user_id):
+        return user_id in self._inboxes
+
+    def open(self, user_id):
+        """Open an inbox for a player. Returns None if they already have one."""
+        if user_id in self._inboxes:
+            return None
+        inbox = asyncio.Queue(self.inbox_size)
+        self._inboxes[user_id] = inbox
+        router_stats["open"] += 1
+        return inbox
+
+    def close(self, user_id):
+        if self._inboxes.pop(user_id, None) is not None:
+            router_stats["open"] -= 1
+
+    def dispatch(self, message):
+        """Deliver a DM to its sender's inbox. Returns True if a game received it."""
+        if message.guild is not None or message.author.bot:
+            return False
+        inbox = self._inboxes.get(message.author.id)
+        if inbox is None:
+            return False
+        try:
+            inbox.put_nowait(message)
+        except asyncio.QueueFull:
+            router_stats["dropped"] += 1
+            return False
+        router_stats["routed"] += 1
+        return True
+
+dm_router = DMRouter()
@@ -0,0 +1,111 @@
+import time
+import discord
+from functools import lru_cache
+
+# Process-wide render counters, surfaced on the status page by keep_alive.py
+render_stats = {
+    "renders": 0,
+    "render_seconds": 0.0,
+    "fields_updated": 0,
+    "fields_reused": 0,
+}
+
+def get_render_stats():
+    """Return a snapshot of the embed render counters."""
+    return dict(render_stats)
+
+class CachedEmbed:
+    """A discord.Embed that is patched in place instead of rebuilt.
+
+    Game views re-render on every countdown tick, but usually only the footer
+    or a single field changes. render() compares the new header, fields and
+    footer against what was rendered last time and only touches the parts
+    that differ.
+    """
+
+    def __init__(self):
+        self.embed = discord.Embed()
+        self._header = None
+        self._fields = []
+        self._footer = None
+
+    def render(self, title, description=None, color=None, fields=(), footer=None):
+        """Render the embed. ``fields`` is a sequence of (name, value, inline) tuples."""
+        start = time.perf_counter()
+        embed = self.embed
+
+        header = (title, description, color)
+        if header != self._header:
+            embed.title = title
+            embed.description = description
+            embed.color = color
+            self._header = header
+
+        fields = list(fields)
+        if len(fields) != len(self._fields):
+            embed.clear_fields()
+            for name, value, inline in fields:
+                embed.add_field(name=name, value=value, inline=inline)
+            render_stats["fields_updated"] += len(fields)
+        else:
+            for i, (new, old) in enumerate(zip(fields, self._fields)):
+                if new != old:
+                    name, value, inline = new
+                    embed.set_field_at(i, name=name, value=value, inline=inline)
+                    render_stats["fields_updated"] += 1
+                else:
+                    render_stats["fields_reused"] += 1
+        self._fields = fields
+
+        if footer != self._footer:
+            if footer is None:
+                embed.remove_footer()
+            else:
+                embed.set_footer(text=footer)
+            self._footer = footer
+
+        render_stats["renders"] += 1
+        render_stats["render_seconds"] += time.perf_counter() - start
+        return embed
+
+# ✅ Battle fragments
+
+@lru_cache(maxsize=None)
+def hp_bar(hp, max_hp):
+    hp = max(0, hp)  # Never show negative HP
+    hearts = "❤️" * (hp // 10) + "🖤" * ((max_hp - hp) // 10)
+    return f"{hearts} ({hp}/{max_hp})"
+
+@lru_cache(maxsize=None)
+def def_bar(defense, max_def):
+    shields = "🛡️" * defense + "⚪" * (max_def - defense)
+    return f"{shields} ({defense}/{max_def})"
+
+@lru_cache(maxsize=None)
+def heal_bar(heals, max_heals):
+    return f"{'💚' * heals}{'⬜' * (max_heals - heals)} ({heals}/{max_heals})"
+
+@lru_cache(maxsize=1024)
+def battle_player_block(hp, defense, heals, max_hp, max_def, max_heals):
+    """HP/DEF/Heals block shown under each battle player's name."""
+    return f"HP: {hp_bar(hp, max_hp)}\nDEF: {def_bar(defense, max_def)}\nHeals: {heal_bar(heals, max_heals)}"
+
+# ✅ Board fragments
+
+@lru_cache(maxsize=4096)
+def board_text(rows):
+    """Code-block rendering of a grid given as a tuple of row tuples."""
+    return "```\n" + "".join(" ".join(row) + "\n" for row in rows) + "```"
+
+@lru_cache(maxsize=1024)
+def flipnfind_player_block(pairs, star_cards=None):
+    """Score block for a Flip & Find player; star cards only exist on 5x5 boards."""
+    if star_cards is None:
+        return f"**Pairs: {pairs}**"
+    return f"**Pairs: {pairs}**\n🌟 Star Cards: {star_cards}"
+
+@lru_cache(maxsize=256)
+def progress_text(cards_left):
+    """Kidnapped Jack progress bar; one block per five cards, capped at ten."""
+    filled = min(10, cards_left // 5)
+    return f"```\n[{'█' * filled}{'░' * (10 - filled)}] {cards_left} cards left\n```"
@@ -0,0 +1,135 @@
+import time
+import discord
+
+RECONCILE_INTERVAL = 3600  # Seconds between full rescans of a guild's members and channels
+
+# Process-wide cache counters, surfaced on the status page by keep_alive.py
+cache_stats = {
+    "reads": 0,
+    "reconciles": 0,
+    "drifted": 0,
+    "events": 0,
+}
+
+def get_guild_cache_stats():
+    """Return a snapshot of the guild stats cache counters."""
+    stats = dict(cache_stats)
+    stats["guilds"] = len(guild_stats_cache)
+    return stats
+
+class GuildCounters:
+    """Member and channel counts for one guild, as /serverinfo shows them."""
+
+    __slots__ = ("bots", "online", "text", "voice", "categories", "news", "forums", "reconciled_at")
+
+    def __init__(self):
+        self.bots = 0
+        self.online = 0
+        self.text = 0
+        self.voice = 0
+        self.categories = 0
+        self.news = 0
+        self.forums = 0
+        self.reconciled_at = 0.0
+
+    def as_tuple(self):
+        return (self.bots, self.online, self.text, self.voice, self.categories, self.news, self.forums)
+
+def _channel_fields(channel):
+    """Counter names a channel contributes to (text includes news, like guild.text_channels)."""
+    if isinstance(channel, discord.CategoryChannel):
+        return ("categories",)
+    if isinstance(channel, discord.ForumChannel):
+        return ("forums",)
+    if isinstance(channel, discord.TextChannel):
+        return ("text", "news") if channel.is_news() else ("text",)
+    if isinstance(channel, discord.VoiceChannel):
+        return ("voice",)
+    return ()
+
+def _is_online(member):
+    return member.status != discord.Status.offline
+
+class GuildStatsCache:
+    """Per-guild counters kept current from gateway events.
+
+    A guild is scanned in full the first time it is read and then at most
+    once per RECONCILE_INTERVAL; in between, member, presence and channel
+    events adjust the counters by one, so a read is O(1) however large the
+    guild is. A reconcile that finds different numbers counts as drift.
+    """
+
+    def __init__(self, reconcile_interval=RECONCILE_INTERVAL, clock=time.monotonic):
+        self.reconcile_interval = reconcile_interval
+        self.clock = clock
+        self._guilds = {}
+
+    def __len__(self):
+        return len(self._guilds)
+
+    def get(self, guild):
+        cache_stats["reads"] += 1
+        counters = self._guilds.get(guild.id)
+        if counters is None or self.clock() - counters.reconciled_at >= self.reconcile_interval:
+            counters = self.reconcile(guild)
+        return counters
+
+    def reconcile(self, guild):
+        """Recount a guild from its member and channel caches."""
+        counters = GuildCounters()
+        for member in guild.members:
+            counters.bots += member.bot
+            counters.online += _is_online(member)
+        for channel in guild.channels:
+            for field in _channel_fields(channel):
+                setattr(counters, field, getattr(counters, field) + 1)
+        counters.reconciled_at = self.clock()
+
+        previous = self._guilds.get(guild.id)
+        if previous is not None and previous.as_tuple() != counters.as_tuple():
+            cache_stats["drifted"] += 1
+        cache_stats["reconciles"] += 1
+        self._guilds[guild.id] = counters
+        return counters
+
+    def forget(self, guild):
+        self._guilds.pop(guild.id, None)
+
+    def _adjust(self, guild_id, **deltas):
+        # Guilds nobody has asked about yet are counted on their first read
+        counters = self._guilds.get(guild_id)
+        if counters is None:
+            return
+        cache_stats["events"] += 1
+        for field, delta in deltas.items():
+            setattr(counters, field, getattr(counters, field) + delta)
+
+    def member_join(self, member):
+        self._adjust(member.guild.id, bots=int(member.bot), online=int(_is_online(member)))
+
+    def member_remove(self, member):
+        self._adjust(member.guild.id, bots=-int(member.bot), online=-int(_is_online(member)))
+
+    def presence_update(self, before, after):
+        change = int(_is_online(after)) - int(_is_online(before))
+        if change:
+            self._adjust(after.guild.id, online=change)
+
+    def channel_create(self, channel):
+        self._adjust(channel.guild.id, **{field: 1 for field in _channel_fields(channel)})
+
+    def channel_delete(self, channel):
+        self._adjust(channel.guild.id, **{field: -1 for field in _channel_fields(channel)})
+
+    def channel_update(self, before, after):
+        # Only a text <-> news conversion changes what a channel counts as
+        before_fields, after_fields = _channel_fields(before), _channel_fields(after)
+        if before_fields != after_fields:
+            deltas = {field: 0 for field in before_fields + after_fields}
+            for field in before_fields:
+                deltas[field] -= 1
+            for field in after_fields:
+                deltas[field] += 1
+            self._adjust(after.guild.id, **deltas)
+
+guild_stats_cache = GuildStatsCache()
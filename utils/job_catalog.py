@@ -0,0 +1,136 @@
+import bisect
+import json
+import logging
+import os
+import random
+import discord
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_JOB_FIELDS = (
+    "level", "pay_min", "pay_max", "exp_per_work", "exp_required", "work_cooldown",
+    "work_frequency", "grace_period", "exp_loss", "emoji", "description",
+)
+MAX_SELECT_OPTIONS = 25  # Discord's limit per select menu
+
+class JobCatalog:
+    """Jobs and interview questions indexed once for the /job and /work commands.
+
+    Jobs are kept sorted by experience requirement, so the jobs a player can
+    take are a prefix of that list found with one bisect. Select menu options
+    are built once in the same order, so a player's menu is a prefix too, and
+    each job's interview questions are dealt from a shuffled pool so players
+    see every question before any repeats.
+    """
+
+    def __init__(self, jobs, questions, source=None):
+        validate(jobs, questions)
+        self.jobs = jobs
+        self.questions = questions
+        self.source = source
+        self._ordered = sorted(jobs.items(), key=lambda item: (item[1]["exp_required"], item[1]["level"]))
+        self._thresholds = [info["exp_required"] for _, info in self._ordered]
+        self._options = self._build_options()
+        self._pools = {name: [] for name in questions}
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get(self, job_name):
+        return self.jobs.get(job_name)
+
+    def available(self, exp):
+        """(name, info) pairs the player qualifies for, lowest requirement first."""
+        return self._ordered[:bisect.bisect_right(self._thresholds, exp)]
+
+    def locked(self, exp):
+        """(name, info) pairs still out of reach, nearest first."""
+        return self._ordered[bisect.bisect_right(self._thresholds, exp):]
+
+    def unlocked_between(self, old_exp, new_exp):
+        """Jobs that became available when experience rose from old_exp to new_exp."""
+        return self._ordered[bisect.bisect_right(self._thresholds, old_exp):bisect.bisect_right(self._thresholds, new_exp)]
+
+    def select_options(self, exp, exclude=None):
+        """Prebuilt select options for the jobs the player qualifies for, minus their current job.
+
+        The current job is left out before the list is cut to MAX_SELECT_OPTIONS;
+        it is at most one option, so one spare is enough.
+        """
+        end = min(bisect.bisect_right(self._thresholds, exp), MAX_SELECT_OPTIONS + 1)
+        return [option for option in self._options[:end] if option.label != exclude][:MAX_SELECT_OPTIONS]
+
+    def draw_question(self, job_name):
+        """Next interview question for the job from its shuffled pool."""
+        pool = self._pools[job_name]
+        if not pool:
+            pool.extend(self.questions[job_name])
+            random.shuffle(pool)
+        return pool.pop()
+
+    def _build_options(self):
+        return [
+            discord.SelectOption(
+                label=name,
+                description=f"{info['description']} | Pay: {info['pay_min']}-{info['pay_max']} HXC",
+                emoji=info["emoji"]
+            )
+            for name, info in self._ordered
+        ]
+
+def validate(jobs, questions):
+    """Raise ValueError if a catalog is unusable; checked before any reload is applied."""
+    if not jobs:
+        raise ValueError("catalog has no jobs")
+    for name, info in jobs.items():
+        missing = [field for field in REQUIRED_JOB_FIELDS if field not in info]
+        if missing:
+            raise ValueError(f"job {name!r} is missing {', '.join(missing)}")
+        if info["pay_min"] > info["pay_max"]:
+            raise ValueError(f"job {name!r} has pay_min above pay_max")
+        if not questions.get(name):
+            raise ValueError(f"job {name!r} has no interview questions")
+        for question in questions[name]:
+            if not 0 <= question["correct"] < len(question["options"]):
+                raise ValueError(f"job {name!r} has a question whose answer is out of range")
+
+def load_catalog(path):
+    """Build a JobCatalog from a JSON or YAML file with "jobs" and "interview_questions" keys."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yml", ".yaml")):
+            if yaml is None:
+                raise ValueError("PyYAML is not installed; use a .json catalog")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return JobCatalog(data["jobs"], data["interview_questions"], source=path)
+
+class CatalogWatcher:
+    """Reloads the catalog file when its modification time changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+
+    def poll(self):
+        """Return a freshly loaded JobCatalog if the file changed and is valid, else None."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logger.error(f"Job catalog {self.path} is not readable: {str(e)}")
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        try:
+            catalog = load_catalog(self.path)
+        except Exception as e:
+            logger.error(f"Keeping the current job catalog; {self.path} is invalid: {str(e)}")
+            return None
+        logger.info(f"Loaded job catalog from {self.path} ({len(catalog)} jobs)")
+        return catalog
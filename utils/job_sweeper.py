@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+import discord
+from utils.database import fire_expired_jobs, schedule_job_deadlines
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 300   # Seconds between sweeps for expired grace periods
+SWEEP_BATCH = 500      # Players fired per database call
+NOTIFY_CONCURRENCY = 5 # DMs in flight at once, to stay well inside Discord's limits
+
+# Process-wide sweeper counters, surfaced on the status page by keep_alive.py
+sweeper_stats = {
+    "sweeps": 0,
+    "fired": 0,
+    "notified": 0,
+    "notify_failed": 0,
+    "errors": 0,
+    "last_sweep_at": None,
+    "last_sweep_seconds": 0.0,
+}
+
+def get_sweeper_stats():
+    """Return a snapshot of the job sweeper counters."""
+    return dict(sweeper_stats)
+
+class JobSweeper:
+    """Background task that fires players whose quota grace period has run out.
+
+    Every employed jobs row carries a fire_at deadline kept up to date by
+    record_work, so a sweep is an indexed range scan over fire_at <= now()
+    that only touches the rows that are due. They are fired SWEEP_BATCH at a
+    time in a single statement each, and the players are told by DM with at
+    most NOTIFY_CONCURRENCY messages in flight.
+
+    `catalog` is a callable returning the current JobCatalog, so penalties
+    follow catalog reloads.
+    """
+
+    def __init__(self, bot, supabase, catalog, interval=SWEEP_INTERVAL, batch_size=SWEEP_BATCH, concurrency=NOTIFY_CONCURRENCY):
+        self.bot = bot
+        self.supabase = supabase
+        self.catalog = catalog
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the sweep loop once; later calls (e.g. on reconnect) are no-ops."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.running:
+            self._task.cancel()
+
+    async def _run(self):
+        # Rows hired before fire_at existed get a deadline once per start
+        scheduled = await asyncio.to_thread(schedule_job_deadlines, self.supabase, self._rules())
+        if scheduled:
+            logger.info(f"Scheduled firing deadlines for {scheduled} employed players")
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                sweeper_stats["errors"] += 1
+                logger.error(f"Job sweep failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self):
+        """Fire every player who is due and notify them. Returns the number fired."""
+        started = time.perf_counter()
+        exp_loss = {name: info["exp_loss"] for name, info in self.catalog().jobs.items()}
+        fired = 0
+        while True:
+            # The supabase client is synchronous; keep it off the event loop
+            batch = await asyncio.to_thread(fire_expired_jobs, self.supabase, exp_loss, self.batch_size)
+            if batch is None:
+                sweeper_stats["errors"] += 1
+                break
+            fired += len(batch)
+            await self.notify(batch)
+            if len(batch) < self.batch_size:
+                break
+        sweeper_stats["sweeps"] += 1
+        sweeper_stats["fired"] += fired
+        sweeper_stats["last_sweep_at"] = time.time()
+        sweeper_stats["last_sweep_seconds"] = time.perf_counter() - started
+        if fired:
+            logger.info(f"Fired {fired} players whose grace period expired")
+        return fired
+
+    async def notify(self, fired):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(row):
+            async with semaphore:
+                await self._send_notice(row)
+
+        await asyncio.gather(*(send(row) for row in fired))
+
+    async def _send_notice(self, row):
+        info = self.catalog().get(row["job"]) or {}
+        embed = discord.Embed(
+            title="📉 You've Been Fired",
+            description=(
+                f"You missed your work quota as **{info.get('emoji', '')} {row['job']}** and the grace period ran out.\n"
+                f"You lost **{row['exp_lost']} EXP**; use `/job` to find a new position."
+            ),
+            color=discord.Color.red()
+        )
+        try:
+            user = self.bot.get_user(int(row["user_id"])) or await self.bot.fetch_user(int(row["user_id"]))
+            await user.send(embed=embed)
+            sweeper_stats["notified"] += 1
+        except (discord.Forbidden, discord.NotFound, discord.HTTPException):
+            # DMs closed or account gone; the firing itself already happened
+            sweeper_stats["notify_failed"] += 1
+
+    def _rules(self):
+        return {
+            name: [info["work_frequency"]["times"], info["work_frequency"]["hours"], info["grace_period"]]
+            for name, info in self.catalog().jobs.items()
+        }
@@ -0,0 +1,171 @@
+"""Paged leaderboard messages shared by the leaderboard commands.
+
+A LeaderboardView walks a leaderboard with keyset cursors: each page is the
+rows after the previous page's last row (see get_leaderboard_page in
+utils/database.py), so a page turn is one index range query however deep
+it goes. Pages are fetched one row long to learn whether another page
+exists, the next page is prefetched while the current one is on screen,
+and rendered embeds are cached so paging back costs nothing.
+"""
+import asyncio
+import logging
+import discord
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 10
+VIEW_TIMEOUT = 180  # Seconds of inactivity before the buttons are disabled
+
+# Process-wide paging counters, surfaced on the status page by keep_alive.py
+leaderboard_stats = {
+    "pages_fetched": 0,
+    "prefetched": 0,
+    "prefetch_hits": 0,
+    "render_cache_hits": 0,
+}
+
+def get_leaderboard_stats():
+    """Return a snapshot of the leaderboard paging counters."""
+    return dict(leaderboard_stats)
+
+class LeaderboardView(discord.ui.View):
+    """Prev/Next buttons over a keyset-paginated leaderboard.
+
+    fetch_page(after, limit) runs in a worker thread and returns up to
+    `limit` rows following the `after` row (None for the first page).
+    render_page(rows, first_rank) is a coroutine returning the page's embed.
+    Only the user who ran the command can turn the pages.
+    """
+
+    def __init__(self, owner_id, fetch_page, render_page, page_size=PAGE_SIZE, first_rank=1, timeout=VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.fetch_page = fetch_page
+        self.render_page = render_page
+        self.page_size = page_size
+        self.first_rank = first_rank
+        self.page = 0
+        self.message = None
+        self._pages = []   # (rows, has_next) per page loaded so far
+        self._embeds = {}  # Rendered embed per page index
+        self._prefetch = None
+        self._lock = asyncio.Lock()  # One page turn at a time, so double clicks don't load a page twice
+
+    async def _fetch(self, after):
+        rows = await asyncio.to_thread(self.fetch_page, after, self.page_size + 1)
+        leaderboard_stats["pages_fetched"] += 1
+        return rows[:self.page_size], len(rows) > self.page_size
+
+    async def start(self, rows=None):
+        """Load the first page and return its embed, or None if the leaderboard is empty.
+
+        rows may be a first page the caller already fetched with page_size + 1 rows.
+        """
+        if rows is None:
+            rows, has_next = await self._fetch(None)
+        else:
+            rows, has_next = rows[:self.page_size], len(rows) > self.page_size
+        if not rows:
+            return None
+        self._pages.append((rows, has_next))
+        self._schedule_prefetch()
+        self._update_buttons()
+        return await self._embed(0)
+
+    async def send(self, interaction, embed):
+        """Reply with the first page, attaching the buttons only when there is a second one."""
+        if not self._pages[0][1]:
+            self.stop()
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed)
+            else:
+                await interaction.response.send_message(embed=embed)
+            return
+        if interaction.response.is_done():
+            self.message = await interaction.followup.send(embed=embed, view=self, wait=True)
+        else:
+            await interaction.response.send_message(embed=embed, view=self)
+            self.message = await interaction.original_response()
+
+    def _schedule_prefetch(self):
+        rows, has_next = self._pages[self.page]
+        if has_next and self.page + 1 == len(self._pages) and self._prefetch is None:
+            leaderboard_stats["prefetched"] += 1
+            self._prefetch = asyncio.create_task(self._fetch(rows[-1]))
+
+    async def _load(self, index):
+        """Make sure page `index` is loaded; returns False if it turned out to be empty."""
+        if index < len(self._pages):
+            return True
+        if self._prefetch is not None:
+            task, self._prefetch = self._prefetch, None
+            try:
+                page = await task
+                leaderboard_stats["prefetch_hits"] += 1
+            except Exception as e:
+                logger.error(f"Leaderboard prefetch failed: {str(e)}")
+                page = await self._fetch(self._pages[-1][0][-1])
+        else:
+            page = await self._fetch(self._pages[-1][0][-1])
+        if not page[0]:
+            # The rows behind the cursor went away since the last page was read
+            self._pages[-1] = (self._pages[-1][0], False)
+            return False
+        self._pages.append(page)
+        return True
+
+    async def _embed(self, index):
+        embed = self._embeds.get(index)
+        if embed is not None:
+            leaderboard_stats["render_cache_hits"] += 1
+            return embed
+        rows = self._pages[index][0]
+        embed = await self.render_page(rows, self.first_rank + index * self.page_size)
+        first_page = (self.first_rank - 1) // self.page_size + 1
+        page_text = f"Page {first_page + index}"
+        if embed.footer.text:
+            embed.set_footer(text=f"{embed.footer.text} • {page_text}", icon_url=embed.footer.icon_url)
+        else:
+            embed.set_footer(text=page_text)
+        self._embeds[index] = embed
+        return embed
+
+    def _update_buttons(self):
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = not self._pages[self.page][1]
+
+    async def _show(self, interaction, step):
+        async with self._lock:
+            index = max(self.page + step, 0)
+            if not await self._load(index):
+                index = self.page
+            self.page = index
+            self._update_buttons()
+            embed = await self._embed(index)
+            await interaction.response.edit_message(embed=embed, view=self)
+            self._schedule_prefetch()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Run the command yourself to browse the leaderboard.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, -1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, 1)
+
+    async def on_timeout(self):
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,184 @@
+import heapq
+import itertools
+import time
+
+BAND_WIDTH = 200      # Rating points per skill band for ranked tickets
+BAND_WAIT = 30        # Seconds a ranked ticket waits in its band before accepting anyone
+QUEUE_TIMEOUT = 300   # Seconds before an unmatched ticket expires
+NEW_PLAYER_RATING = 1500
+
+# Process-wide queue counters, surfaced on the status page by keep_alive.py
+queue_stats = {
+    "waiting": 0,
+    "enqueued": 0,
+    "matched": 0,
+    "cancelled": 0,
+    "expired": 0,
+    "waited": 0,
+    "wait_seconds": 0.0,
+}
+
+def get_queue_stats():
+    """Return a snapshot of the matchmaking counters."""
+    return dict(queue_stats)
+
+def rating_from_stats(stats):
+    """Skill rating from a stats row: the stored Glicko-2 rating when present, else a smoothed win/loss rating."""
+    if not stats:
+        return NEW_PLAYER_RATING
+    if stats.get("rating") is not None:
+        return round(stats["rating"])
+    wins = stats.get("wins") or 0
+    losses = stats.get("losses") or 0
+    # Ten phantom games pull small samples towards the middle
+    return NEW_PLAYER_RATING + round(800 * (wins - losses) / (wins + losses + 10))
+
+class Ticket:
+    """A player waiting in a queue."""
+
+    __slots__ = ("user", "channel", "game", "guild_id", "rating", "enqueued_at", "active")
+
+    def __init__(self, user, channel, game, guild_id, rating, enqueued_at):
+        self.user = user
+        self.channel = channel
+        self.game = game
+        self.guild_id = guild_id
+        self.rating = rating
+        self.enqueued_at = enqueued_at
+        self.active = True
+
+class Matchmaker:
+    """Pairs waiting players per (game, guild) using heaps ordered by arrival time.
+
+    Unranked tickets go straight into the open pool for their game and guild.
+    Ranked tickets first wait in a skill band (rating // band_width) and are
+    only paired with players in the same band; after band_wait seconds sweep()
+    moves them into the open pool. Every operation is a heap push or pop, so
+    enqueueing and matching are O(log n). Cancelled tickets are dropped lazily
+    when they reach the top of a heap.
+    """
+
+    def __init__(self, band_width=BAND_WIDTH, band_wait=BAND_WAIT, timeout=QUEUE_TIMEOUT, clock=time.monotonic):
+        self.band_width = band_width
+        self.band_wait = band_wait
+        self.timeout = timeout
+        self.clock = clock
+        self._heaps = {}    # (game, guild_id, band) -> [(enqueued_at, seq, ticket)]; band None is the open pool
+        self._tickets = {}  # user_id -> Ticket
+        self._seq = itertools.count()
+
+    def get_ticket(self, user_id):
+        return self._tickets.get(user_id)
+
+    def depth(self, guild_id=None, game=None):
+        """Number of waiting players, optionally filtered by guild and game."""
+        return sum(
+            1 for t in self._tickets.values()
+            if (guild_id is None or t.guild_id == guild_id) and (game is None or t.game == game)
+        )
+
+    def oldest_wait(self, guild_id=None, game=None):
+        """Seconds the longest-waiting matching ticket has been queued, or 0."""
+        now = self.clock()
+        waits = [
+            now - t.enqueued_at for t in self._tickets.values()
+            if (guild_id is None or t.guild_id == guild_id) and (game is None or t.game == game)
+        ]
+        return max(waits, default=0.0)
+
+    def enqueue(self, game, guild_id, user, channel, rating=None):
+        """Queue a player. Returns the opponent's Ticket if a match was made immediately, else None."""
+        if user.id in self._tickets:
+            raise ValueError("already queued")
+        now = self.clock()
+        ticket = Ticket(user, channel, game, guild_id, rating, now)
+        queue_stats["enqueued"] += 1
+
+        band = None if rating is None else rating // self.band_width
+        opponent = None
+        if band is not None:
+            opponent = self._pop((game, guild_id, band))
+        if opponent is None:
+            opponent = self._pop((game, guild_id, None))
+        if opponent is not None:
+            self._finish(opponent, now)
+            queue_stats["matched"] += 1
+            return opponent
+
+        self._push((game, guild_id, band), ticket)
+        self._tickets[user.id] = ticket
+        queue_stats["waiting"] += 1
+        return None
+
+    def cancel(self, user_id):
+        """Remove a player from whatever queue they are in. Returns the Ticket or None."""
+        ticket = self._tickets.pop(user_id, None)
+        if ticket is None:
+            return None
+        ticket.active = False
+        queue_stats["waiting"] -= 1
+        queue_stats["cancelled"] += 1
+        return ticket
+
+    def sweep(self):
+        """Widen long-waiting ranked tickets, pair the open pools and expire stale tickets.
+
+        Returns (matches, expired) where matches is a list of (ticket, ticket) pairs.
+        """
+        now = self.clock()
+        matches, expired = [], []
+
+        for key in [k for k in self._heaps if k[2] is not None]:
+            game, guild_id, _ = key
+            heap = self._heaps[key]
+            while heap and now - heap[0][0] >= self.band_wait:
+                ticket = heapq.heappop(heap)[2]
+                if ticket.active:
+                    self._push((game, guild_id, None), ticket)
+            if not heap:
+                del self._heaps[key]
+
+        for key in [k for k in self._heaps if k[2] is None]:
+            waiting = None
+            while True:
+                ticket = self._pop(key)
+                if ticket is None:
+                    break
+                if now - ticket.enqueued_at >= self.timeout:
+                    self._finish(ticket, now, counted=False)
+                    queue_stats["expired"] += 1
+                    expired.append(ticket)
+                elif waiting is None:
+                    waiting = ticket
+                else:
+                    self._finish(waiting, now)
+                    self._finish(ticket, now)
+                    queue_stats["matched"] += 1
+                    matches.append((waiting, ticket))
+                    waiting = None
+            if waiting is not None:
+                self._push(key, waiting)
+
+        return matches, expired
+
+    def _push(self, key, ticket):
+        heapq.heappush(self._heaps.setdefault(key, []), (ticket.enqueued_at, next(self._seq), ticket))
+
+    def _pop(self, key):
+        heap = self._heaps.get(key)
+        while heap:
+            ticket = heapq.heappop(heap)[2]
+            if ticket.active:
+                if not heap:
+                    del self._heaps[key]
+                return ticket
+        self._heaps.pop(key, None)
+        return None
+
+    def _finish(self, ticket, now, counted=True):
+        ticket.active = False
+        if self._tickets.pop(ticket.user.id, None) is not None:
+            queue_stats["waiting"] -= 1
+        if counted:
+            queue_stats["waited"] += 1
+            queue_stats["wait_seconds"] += now - ticket.enqueued_at
@@ -0,0 +1,143 @@
+import logging
+import time
+from collections import Counter, OrderedDict
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+MAX_KEYS = 100_000  # In-memory backend bound; least recently used keys go first
+
+# Process-wide limiter counters, surfaced on the status page by keep_alive.py
+limiter_stats = {
+    "checks": 0,
+    "rejected": 0,
+    "backend_errors": 0,
+}
+rejected_by_command = Counter()
+
+def get_limiter_stats():
+    """Return a snapshot of the rate limiter counters."""
+    stats = dict(limiter_stats)
+    stats["keys"] = len(limiter.backend)
+    stats["top_rejected"] = rejected_by_command.most_common(3)
+    return stats
+
+class Limit:
+    """At most `rate` uses per `per` seconds, as a GCRA (a token bucket of size `rate`).
+
+    Limit(1, 30) is a plain 30 second cooldown; Limit(5, 60) allows a burst
+    of five and then one more every 12 seconds.
+    """
+
+    __slots__ = ("rate", "per", "interval", "tolerance")
+
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.interval = per / rate
+        self.tolerance = per - self.interval
+
+class MemoryBackend:
+    """Per-process GCRA state: key -> theoretical arrival time (TAT).
+
+    A key whose TAT has passed carries no information, so stale keys are
+    dropped from the least recently used end as new ones arrive, and the
+    store never holds more than max_keys entries.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tat = OrderedDict()
+
+    def __len__(self):
+        return len(self._tat)
+
+    def acquire(self, key, limit, consume=True):
+        """Returns 0 if the call conforms (recording it unless consume is False), else seconds to wait."""
+        now = self.clock()
+        tat = max(self._tat.get(key, now), now)
+        retry_after = tat - limit.tolerance - now
+        if retry_after > 0:
+            return retry_after
+        if consume:
+            self._tat[key] = tat + limit.interval
+            self._tat.move_to_end(key)
+            self._expire(now)
+        return 0.0
+
+    def _expire(self, now):
+        while self._tat:
+            key, tat = next(iter(self._tat.items()))
+            if tat > now and len(self._tat) <= self.max_keys:
+                return
+            del self._tat[key]
+
+class SupabaseBackend:
+    """GCRA state in the rate_limits table, shared by every bot process.
+
+    The check-and-update runs inside the rate_limit_acquire SQL function
+    using the database clock, so shards cannot race each other. If the
+    database is unreachable the call is allowed rather than blocking play.
+    """
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def __len__(self):
+        return 0
+
+    def acquire(self, key, limit, consume=True):
+        try:
+            response = self.supabase.rpc("rate_limit_acquire", {
+                "p_key": key,
+                "p_interval": limit.interval,
+                "p_tolerance": limit.tolerance,
+                "p_consume": consume
+            }).execute()
+            return float(response.data or 0)
+        except Exception as e:
+            limiter_stats["backend_errors"] += 1
+            logger.error(f"Rate limit check failed for {key}: {str(e)}")
+            return 0.0
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def acquire(self, name, user_id, limit):
+        """Record one use of `name` by the user. Returns 0 if allowed, else seconds until it would be."""
+        limiter_stats["checks"] += 1
+        retry_after = self.backend.acquire(f"{name}:{user_id}", limit)
+        if retry_after > 0:
+            limiter_stats["rejected"] += 1
+            rejected_by_command[name] += 1
+        return retry_after
+
+    def peek(self, name, user_id, limit):
+        """Seconds until `name` is allowed for the user, without using it up."""
+        return self.backend.acquire(f"{name}:{user_id}", limit, consume=False)
+
+limiter = RateLimiter(MemoryBackend())
+
+class RateLimited(app_commands.CheckFailure):
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"/{name} is rate limited, retry in {retry_after:.1f}s")
+
+def rate_limit(name, rate, per):
+    """App command check allowing each user `rate` uses of the command per `per` seconds.
+
+    Rejections raise RateLimited, which the tree error handler in bot.py
+    turns into an ephemeral "slow down" reply.
+    """
+    limit = Limit(rate, per)
+
+    def predicate(interaction):
+        retry_after = limiter.acquire(name, interaction.user.id, limit)
+        if retry_after > 0:
+            raise RateLimited(name, retry_after)
+        return True
+
+    return app_commands.check(predicate)
@@ -0,0 +1,123 @@
+import math
+
+# Glicko-2 system constants (Glickman, "Example of the Glicko-2 system")
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+DEFAULT_VOL = 0.06
+TAU = 0.5           # Constrains volatility change; 0.3-1.2 is sensible
+SCALE = 173.7178    # Converts between the Glicko and Glicko-2 scales
+EPSILON = 0.000001  # Convergence tolerance for the volatility iteration
+
+class Rating:
+    """A player's Glicko-2 rating, rating deviation and volatility (Glicko scale)."""
+
+    __slots__ = ("rating", "rd", "vol")
+
+    def __init__(self, rating=DEFAULT_RATING, rd=DEFAULT_RD, vol=DEFAULT_VOL):
+        self.rating = rating
+        self.rd = rd
+        self.vol = vol
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a stats row; missing or null columns fall back to the defaults."""
+        if not row:
+            return cls()
+        return cls(
+            row.get("rating") or DEFAULT_RATING,
+            row.get("rating_rd") or DEFAULT_RD,
+            row.get("rating_vol") or DEFAULT_VOL,
+        )
+
+    def to_row(self, user_id):
+        return {
+            "user_id": user_id,
+            "rating": round(self.rating, 2),
+            "rating_rd": round(self.rd, 2),
+            "rating_vol": round(self.vol, 6),
+        }
+
+    def conservative(self):
+        """Rating minus two deviations; what leaderboards sort by so 1-0 newcomers don't top veterans."""
+        return self.rating - 2 * self.rd
+
+    def __repr__(self):
+        return f"Rating({self.rating:.1f}, rd={self.rd:.1f}, vol={self.vol:.4f})"
+
+def _g(phi):
+    return 1 / math.sqrt(1 + 3 * phi * phi / (math.pi * math.pi))
+
+def _expected(mu, mu_j, g_j):
+    return 1 / (1 + math.exp(-g_j * (mu - mu_j)))
+
+def new_volatility(phi, sigma, delta, v, tau=TAU):
+    """Solve for the new volatility with the Illinois algorithm (step 5 of Glicko-2)."""
+    a = math.log(sigma * sigma)
+    delta2, phi2 = delta * delta, phi * phi
+
+    def f(x):
+        ex = math.exp(x)
+        d = phi2 + v + ex
+        return ex * (delta2 - d) / (2 * d * d) - (x - a) / (tau * tau)
+
+    big_a = a
+    if delta2 > phi2 + v:
+        big_b = math.log(delta2 - phi2 - v)
+    else:
+        k = 1
+        while f(a - k * tau) < 0:
+            k += 1
+        big_b = a - k * tau
+
+    f_a, f_b = f(big_a), f(big_b)
+    while abs(big_b - big_a) > EPSILON:
+        big_c = big_a + (big_a - big_b) * f_a / (f_b - f_a)
+        f_c = f(big_c)
+        if f_c * f_b <= 0:
+            big_a, f_a = big_b, f_b
+        else:
+            f_a /= 2
+        big_b, f_b = big_c, f_c
+    return math.exp(big_a / 2)
+
+def update(player, results, tau=TAU):
+    """Return the player's new Rating after one rating period.
+
+    ``results`` is a list of (opponent Rating, score) pairs with score 1 for
+    a win, 0.5 for a draw and 0 for a loss. An empty list only widens the
+    deviation, as Glicko-2 prescribes for inactive players.
+    """
+    mu = (player.rating - DEFAULT_RATING) / SCALE
+    phi = player.rd / SCALE
+    if not results:
+        phi_star = math.sqrt(phi * phi + player.vol * player.vol)
+        return Rating(player.rating, min(phi_star * SCALE, DEFAULT_RD), player.vol)
+
+    v_inv = 0.0
+    delta_sum = 0.0
+    for opponent, score in results:
+        mu_j = (opponent.rating - DEFAULT_RATING) / SCALE
+        g_j = _g(opponent.rd / SCALE)
+        e = _expected(mu, mu_j, g_j)
+        v_inv += g_j * g_j * e * (1 - e)
+        delta_sum += g_j * (score - e)
+    v = 1 / v_inv
+    delta = v * delta_sum
+
+    vol = new_volatility(phi, player.vol, delta, v, tau)
+    phi_star = math.sqrt(phi * phi + vol * vol)
+    new_phi = 1 / math.sqrt(1 / (phi_star * phi_star) + 1 / v)
+    new_mu = mu + new_phi * new_phi * delta_sum
+    return Rating(new_mu * SCALE + DEFAULT_RATING, new_phi * SCALE, vol)
+
+def rate_game(a, b, score_a):
+    """Rate a single game between two players, treating it as its own rating period.
+
+    Both updates use the pre-game ratings. Returns (new_a, new_b).
+    """
+    return update(a, [(b, score_a)]), update(b, [(a, 1 - score_a)])
+
+def rating_text(row):
+    """Rating with its 95% interval for stats embeds, e.g. "1623 ± 140"."""
+    rating = Rating.from_row(row)
+    return f"{rating.rating:.0f} ± {2 * rating.rd:.0f}"
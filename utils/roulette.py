@@ -0,0 +1,168 @@
+"""Table-driven roulette: wheel layouts, bet resolution and exact odds.
+
+A WheelLayout lists its pockets once and precomputes per-pocket lookup
+tuples (colour, parity, half, dozen, column), so settling a bet is one
+index and compare. Each layout carries its own payout table of
+(net payout, loss multiplier) per bet kind; the loss multiplier is how
+many stakes a losing bet costs (1 everywhere except the legacy 24-slot
+colour bet, which cost 1.5).
+
+Because every pocket is equally likely, the expected value and variance
+of a bet are exact averages over the pockets; ``bet_odds`` computes them
+for every bet a layout offers and ``simulate`` checks them by Monte
+Carlo (NumPy when installed).
+"""
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EUROPEAN_RED = frozenset({1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36})
+CLASSIC24_RED = frozenset({1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23})
+
+STANDARD_PAYOUTS = {
+    "straight": (35, 1),
+    "color": (1, 1),
+    "parity": (1, 1),
+    "half": (1, 1),
+    "dozen": (2, 1),
+    "column": (2, 1),
+}
+
+# Bet words players can type, mapped to (kind, selection)
+BET_ALIASES = {
+    "red": ("color", "red"), "black": ("color", "black"),
+    "odd": ("parity", "odd"), "even": ("parity", "even"),
+    "low": ("half", "low"), "high": ("half", "high"),
+    "dozen1": ("dozen", 1), "dozen2": ("dozen", 2), "dozen3": ("dozen", 3),
+    "1st12": ("dozen", 1), "2nd12": ("dozen", 2), "3rd12": ("dozen", 3),
+    "column1": ("column", 1), "column2": ("column", 2), "column3": ("column", 3),
+    "col1": ("column", 1), "col2": ("column", 2), "col3": ("column", 3),
+}
+
+class RouletteError(ValueError):
+    """A bet the layout doesn't offer."""
+
+class WheelLayout:
+    """Pockets of one wheel with O(1) per-pocket lookups and a payout table.
+
+    numbers[i] is the pocket's number, 0 for the zero pockets ("0", "00"),
+    which are green and lose every outside bet.
+    """
+
+    def __init__(self, name, labels, red, payouts):
+        self.name = name
+        self.labels = tuple(labels)
+        self.numbers = tuple(0 if label in ("0", "00") else int(label) for label in self.labels)
+        self.payouts = payouts
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        top = max(self.numbers)
+        self.color = tuple("green" if n == 0 else "red" if n in red else "black" for n in self.numbers)
+        self.parity = tuple(None if n == 0 else "odd" if n % 2 else "even" for n in self.numbers)
+        self.half = tuple(None if n == 0 else "low" if n <= top // 2 else "high" for n in self.numbers)
+        self.dozen = tuple(None if n == 0 else (n - 1) // 12 + 1 for n in self.numbers)
+        self.column = tuple(None if n == 0 else (n - 1) % 3 + 1 for n in self.numbers)
+        self._lookups = {
+            "straight": tuple(range(len(self.labels))),
+            "color": self.color,
+            "parity": self.parity,
+            "half": self.half,
+            "dozen": self.dozen,
+            "column": self.column,
+        }
+
+    def __len__(self):
+        return len(self.labels)
+
+    def bets(self):
+        """Every (kind, selection) the layout pays out on."""
+        return [
+            (kind, selection)
+            for kind in self.payouts
+            for selection in sorted({value for value in self._lookups[kind] if value not in (None, "green")}, key=str)
+        ]
+
+    def parse_bet(self, text):
+        """(kind, selection) for a typed bet such as "red", "dozen2" or "17"."""
+        word = "".join(text.lower().split())
+        if word in self.index:
+            bet = ("straight", self.index[word])
+        elif word in BET_ALIASES:
+            bet = BET_ALIASES[word]
+        else:
+            raise RouletteError(f"`{text.strip()}` isn't a bet on this table.")
+        kind, selection = bet
+        if kind not in self.payouts or (kind != "straight" and selection not in self._lookups[kind]):
+            raise RouletteError(f"`{text.strip()}` isn't offered on the {self.name} wheel.")
+        return bet
+
+    def bet_label(self, bet):
+        kind, selection = bet
+        if kind == "straight":
+            return self.labels[selection]
+        if kind in ("dozen", "column"):
+            return f"{kind} {selection}"
+        return selection
+
+    def wins(self, bet, pocket):
+        kind, selection = bet
+        return self._lookups[kind][pocket] == selection
+
+    def net(self, bet, pocket, stake):
+        """Net HXC for a stake on the bet when the ball lands in the pocket."""
+        payout, loss = self.payouts[bet[0]]
+        return stake * payout if self.wins(bet, pocket) else -int(stake * loss)
+
+    def mask(self, bet):
+        """Per-pocket win flags for the bet."""
+        return [self.wins(bet, pocket) for pocket in range(len(self))]
+
+    def spin(self, rng=random):
+        return rng.randrange(len(self))
+
+def _numbers(low, high):
+    return [str(n) for n in range(low, high + 1)]
+
+LAYOUTS = {
+    "european": WheelLayout("european", ["0"] + _numbers(1, 36), EUROPEAN_RED, STANDARD_PAYOUTS),
+    "american": WheelLayout("american", ["0", "00"] + _numbers(1, 36), EUROPEAN_RED, STANDARD_PAYOUTS),
+    # The original HexxaBot wheel: 1-24, no zero, 24 counted as black, 35:1
+    # straight bets and colour losses costing 1.5 stakes
+    "classic24": WheelLayout("classic24", _numbers(1, 24), CLASSIC24_RED, {"straight": (35, 1), "color": (1, 1.5)}),
+}
+
+def bet_odds(layout):
+    """Exact expected value and variance per unit stake for every bet the layout offers.
+
+    Returns a list of (kind, selection, win_probability, expected_value, variance).
+    """
+    rows = []
+    pockets = len(layout)
+    for bet in layout.bets():
+        payout, loss = layout.payouts[bet[0]]
+        if np is not None:
+            nets = np.where(np.array(layout.mask(bet)), payout, -loss)
+            hits, ev, variance = int((nets > 0).sum()), float(nets.mean()), float(nets.var())
+        else:
+            nets = [payout if won else -loss for won in layout.mask(bet)]
+            hits = sum(net > 0 for net in nets)
+            ev = sum(nets) / pockets
+            variance = sum((net - ev) ** 2 for net in nets) / pockets
+        rows.append((bet[0], bet[1], hits / pockets, ev, variance))
+    return rows
+
+def simulate(layout, bet, spins, rng=None):
+    """Monte Carlo (mean, variance) of the net per unit stake over `spins` spins."""
+    payout, loss = layout.payouts[bet[0]]
+    if np is not None and (rng is None or isinstance(rng, np.random.Generator)):
+        rng = rng if rng is not None else np.random.default_rng()
+        pockets = rng.integers(0, len(layout), size=spins)
+        nets = np.where(np.array(layout.mask(bet))[pockets], payout, -loss)
+        return float(nets.mean()), float(nets.var())
+    rng = rng if rng is not None else random.Random()
+    mask = layout.mask(bet)
+    nets = [payout if mask[rng.randrange(len(layout))] else -loss for _ in range(spins)]
+    mean = sum(nets) / spins
+    return mean, sum((net - mean) ** 2 for net in nets) / spins
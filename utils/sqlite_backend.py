@@ -0,0 +1,991 @@
+"""A local SQLite database that answers the bot's queries like Supabase does.
+
+SQLiteClient stands in for the supabase Client: utils/database.py and the
+commands build the same table(...).select(...).eq(...).execute() chains
+and call the same rpc(...) functions, and get the same rows back. Set
+DATABASE_BACKEND=sqlite (and optionally SQLITE_PATH) to run the bot on one
+file with no Supabase project; python -m tools.storage_conformance checks
+that both backends give the same answers.
+
+- The schema mirrors sql/initial.sql: per-guild tables with the same names,
+  generated sort keys and leaderboard indexes, and the bot-wide tables.
+  jsonb and integer[] columns are stored as JSON text and decoded on read;
+  timestamps are stored as UTC ISO-8601 text, which sorts in time order.
+  Counters and sort keys are NOT NULL here (the helpers never write null
+  to them), so every leaderboard page is read in index order with no sort.
+- The triggers that keep flipnfind_totals and global_stats current are
+  ported as SQLite triggers. The SQL functions (create_guild_tables,
+  claim_reward, record_work, ...) are ported to Python and each runs in
+  one transaction.
+- One connection in WAL mode (readers never wait for the writer), with
+  synchronous=NORMAL and a statement cache, so every repeated query shape
+  is prepared once. A lock serialises the bot's threads on it.
+
+Errors are raised as SQLiteError carrying the Postgres error code
+PostgREST would have sent (42P01 for a missing table, 23505 for a
+duplicate key), so callers that inspect codes behave the same.
+"""
+import json
+import logging
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "hexxabot.db"
+STATEMENT_CACHE = 256  # Prepared statements kept per connection
+BUSY_TIMEOUT_MS = 5000
+
+# Columns stored as JSON text (jsonb and integer[] in Postgres)
+JSON_COLUMNS = frozenset({"guesses", "guess_gaps", "gap_histogram", "analytics"})
+BOOLEAN_COLUMNS = frozenset({"won"})
+TIMESTAMP_COLUMNS = frozenset({
+    "last_daily", "last_monthly", "last_yearly", "last_work", "grace_period_start", "window_start",
+    "fire_at", "created_at", "updated_at", "played_at",
+})
+
+# Process-wide backend counters, surfaced on the status page by keep_alive.py
+storage_stats = {
+    "queries": 0,
+    "rpcs": 0,
+    "errors": 0,
+}
+
+_active_client = None
+
+def get_storage_stats():
+    """Return a snapshot of the backend counters, with the database file and journal mode."""
+    stats = dict(storage_stats)
+    stats["path"] = _active_client.path if _active_client is not None else None
+    stats["journal_mode"] = _active_client.journal_mode if _active_client is not None else None
+    return stats
+
+# Same text as Python's isoformat(timespec="microseconds") for UTC
+NOW = "(strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now'))"
+
+GLOBAL_SCHEMA = f"""
+create table if not exists global_stats (
+    user_id text not null,
+    game text not null,
+    wins integer not null default 0,
+    losses integer not null default 0,
+    draws integer not null default 0,
+    total_games integer not null default 0,
+    updated_at text default {NOW},
+    primary key (user_id, game)
+);
+create index if not exists global_stats_game_wins_idx on global_stats (game, wins desc, user_id);
+
+create table if not exists economy (
+    user_id text primary key not null,
+    balance integer not null default 1000,
+    total_earned integer not null default 1000,
+    total_spent integer not null default 0,
+    last_daily text default null,
+    created_at text default {NOW},
+    updated_at text default {NOW}
+);
+create index if not exists economy_balance_idx on economy (balance desc, user_id);
+
+create table if not exists economy_top (
+    rank integer primary key,
+    user_id text not null,
+    balance integer
+);
+create unique index if not exists economy_top_user_idx on economy_top (user_id);
+
+create table if not exists social (
+    id integer primary key autoincrement,
+    user_id text not null unique,
+    last_daily text,
+    last_monthly text,
+    last_yearly text,
+    daily_streak integer not null default 0,
+    monthly_streak integer not null default 0,
+    yearly_streak integer not null default 0,
+    total_daily_claimed integer not null default 0,
+    total_monthly_claimed integer not null default 0,
+    total_yearly_claimed integer not null default 0,
+    created_at text default {NOW},
+    updated_at text default {NOW}
+);
+
+create table if not exists jobs (
+    id integer primary key autoincrement,
+    user_id text not null unique,
+    current_job text default null,
+    experience integer not null default 0,
+    last_work text default null,
+    work_count integer not null default 0,
+    grace_period_start text default null,
+    total_earned integer not null default 0,
+    created_at text default {NOW},
+    updated_at text default {NOW},
+    window_start text default null,
+    window_count integer not null default 0,
+    fire_at text default null
+);
+create index if not exists jobs_fire_at_idx on jobs (fire_at) where fire_at is not null;
+create index if not exists jobs_unscheduled_idx on jobs (user_id) where current_job is not null and fire_at is null;
+
+create table if not exists match_history (
+    id integer primary key autoincrement,
+    guild_id text not null,
+    game text not null,
+    player_a text not null,
+    player_b text not null,
+    score_a real not null,
+    played_at text default {NOW}
+);
+create index if not exists match_history_replay_idx on match_history (guild_id, game, played_at);
+
+create table if not exists rate_limits (
+    key text primary key,
+    tat real not null
+);
+create index if not exists rate_limits_tat_idx on rate_limits (tat);
+"""
+
+RATING_COLUMNS = """
+    rating real not null default 1500,
+    rating_rd real not null default 350,
+    rating_vol real not null default 0.06,
+    rating_score real not null generated always as (rating - 2 * rating_rd) stored"""
+
+GAP_HISTOGRAM_DEFAULT = json.dumps([0] * 100, separators=(",", ":"))
+
+def guild_schema(g):
+    """create_guild_tables' tables and indexes for one guild id (digits only)."""
+    return [
+        f"""create table if not exists "rps_stats_{g}" (
+            user_id text primary key not null,
+            wins integer not null default 0,
+            losses integer not null default 0,
+            ties integer not null default 0,
+            total_games integer not null default 0,
+            win_rate real not null generated always as
+                (case when total_games > 0 then cast(wins as real) / total_games else 0 end) stored
+        )""",
+        f"""create table if not exists "guess_number_stats_{g}" (
+            user_id text primary key not null,
+            correct_guesses integer not null default 0,
+            incorrect_guesses integer not null default 0,
+            total_games integer not null default 0,
+            guesses text default '[]',
+            guess_gaps text default '[]',
+            gap_count integer not null default 0,
+            gap_sum integer not null default 0,
+            gap_histogram text default '{GAP_HISTOGRAM_DEFAULT}',
+            analytics text default '{{}}',
+            success_rate real not null generated always as
+                (case when total_games > 0 then cast(correct_guesses as real) / total_games else 0 end) stored
+        )""",
+        f"""create table if not exists "guess_number_games_{g}" (
+            id integer primary key autoincrement,
+            user_id text not null,
+            won integer not null,
+            target integer not null,
+            guesses text not null,
+            played_at text default {NOW}
+        )""",
+        f'create index if not exists "guess_number_games_{g}_user_idx" on "guess_number_games_{g}" (user_id, played_at desc)',
+        f"""create table if not exists "tictactoe_stats_{g}" (
+            user_id text primary key not null,
+            wins integer not null default 0,
+            losses integer not null default 0,
+            draws integer not null default 0,
+            total_games integer not null default 0,{RATING_COLUMNS}
+        )""",
+        f"""create table if not exists "battle_stats_{g}" (
+            user_id text primary key not null,
+            wins integer not null default 0,
+            losses integer not null default 0,
+            total_games integer not null default 0,{RATING_COLUMNS}
+        )""",
+        f"""create table if not exists "flipnfind_stats_{g}" (
+            user_id text primary key not null,
+            wins integer not null default 0,
+            losses integer not null default 0,
+            total_games integer not null default 0,
+            best_time real default null,
+            best_turns integer default null,
+            total_turns integer not null default 0,
+            total_time real not null default 0,
+            star_cards integer not null default 0,
+            analytics text default '{{}}',{RATING_COLUMNS}
+        )""",
+        f"""create table if not exists "kidnapped_jack_stats_{g}" (
+            user_id text primary key not null,
+            games_played integer not null default 0,
+            escapes integer not null default 0,
+            kidnapper_count integer not null default 0,
+            total_time real not null default 0,
+            best_time real default null,
+            best_placement integer default null,
+            total_wins integer not null default 0,
+            total_placements integer not null default 0,
+            placement_sum integer not null default 0,
+            analytics text default '{{}}'
+        )""",
+        f"""create table if not exists "roulette_stats_{g}" (
+            user_id text primary key not null,
+            games_played integer not null default 0,
+            games_won integer not null default 0,
+            games_lost integer not null default 0,
+            total_bet integer not null default 0,
+            total_won integer not null default 0,
+            total_lost integer not null default 0,
+            biggest_win integer not null default 0,
+            biggest_loss integer not null default 0,
+            created_at text default {NOW},
+            updated_at text default {NOW}
+        )""",
+        f"""create table if not exists "flipnfind_totals_{g}" (
+            user_id text primary key not null,
+            wins integer not null default 0,
+            losses integer not null default 0,
+            total_games integer not null default 0,
+            star_cards integer not null default 0
+        )""",
+        *(
+            f'create index if not exists "{prefix}{g}_rating_idx" on "{prefix}{g}" (rating_score desc)'
+            for prefix in ("battle_stats_", "tictactoe_stats_", "flipnfind_stats_")
+        ),
+        f'create index if not exists "rps_stats_{g}_lb_idx" on "rps_stats_{g}" (win_rate desc, wins desc, user_id)',
+        f'create index if not exists "guess_number_stats_{g}_lb_idx" on "guess_number_stats_{g}" (success_rate desc, correct_guesses desc, user_id)',
+        f'create index if not exists "tictactoe_stats_{g}_lb_idx" on "tictactoe_stats_{g}" (rating_score desc, user_id)',
+        f'create index if not exists "battle_stats_{g}_lb_idx" on "battle_stats_{g}" (rating_score desc, user_id)',
+        f'create index if not exists "flipnfind_totals_{g}_lb_idx" on "flipnfind_totals_{g}" (wins desc, star_cards desc, user_id)',
+        f'create index if not exists "kidnapped_jack_stats_{g}_lb_idx" on "kidnapped_jack_stats_{g}" (escapes desc, user_id)',
+        f'create index if not exists "roulette_stats_{g}_lb_idx" on "roulette_stats_{g}" (total_won desc, user_id)',
+    ]
+
+# {table prefix: (game, wins, losses, draws, total games)}, '' where a game has none;
+# the same mapping create_guild_tables passes to sync_global_stats
+GLOBAL_GAMES = {
+    "rps_stats_": ("rps", "wins", "losses", "ties", "total_games"),
+    "guess_number_stats_": ("guess_number", "correct_guesses", "incorrect_guesses", "", "total_games"),
+    "tictactoe_stats_": ("tictactoe", "wins", "losses", "draws", "total_games"),
+    "battle_stats_": ("battle", "wins", "losses", "", "total_games"),
+    "flipnfind_stats_": ("flipnfind", "wins", "losses", "", "total_games"),
+    "kidnapped_jack_stats_": ("kidnapped_jack", "escapes", "kidnapper_count", "", "games_played"),
+    "roulette_stats_": ("roulette", "games_won", "", "", "games_played"),
+}
+
+def _base_id(column):
+    """split_part(column, '_', 1): Flip & Find rows are '<player>_<difficulty>'."""
+    return f"substr({column}, 1, instr({column} || '_', '_') - 1)"
+
+def flipnfind_totals_sql(g):
+    """sync_flipnfind_totals as three triggers, plus the backfill create_guild_tables runs."""
+    stats, totals = f"flipnfind_stats_{g}", f"flipnfind_totals_{g}"
+    upsert = "on conflict (user_id) do update set wins = excluded.wins, losses = excluded.losses, " \
+             "total_games = excluded.total_games, star_cards = excluded.star_cards"
+    triggers = []
+    for event, row in (("insert", "new"), ("delete", "old"), ("update of wins, losses, total_games, star_cards", "new")):
+        base = _base_id(f"{row}.user_id")
+        triggers.append(
+            f'create trigger if not exists "{stats}_totals_{event.split()[0]}" after {event} on "{stats}" '
+            f"for each row begin "
+            f'insert into "{totals}" (user_id, wins, losses, total_games, star_cards) '
+            f"select {base}, coalesce(sum(wins), 0), coalesce(sum(losses), 0), "
+            f"coalesce(sum(total_games), 0), coalesce(sum(star_cards), 0) "
+            f"""from "{stats}" where user_id = {base} or user_id like {base} || '\\_%' escape '\\' """
+            f"{upsert}; end"
+        )
+    backfill = (
+        f'insert into "{totals}" (user_id, wins, losses, total_games, star_cards) '
+        f"select {_base_id('user_id')}, sum(coalesce(wins, 0)), sum(coalesce(losses, 0)), "
+        f"sum(coalesce(total_games, 0)), sum(coalesce(star_cards, 0)) "
+        f'from "{stats}" where true group by 1 {upsert}'
+    )
+    return triggers, backfill
+
+def global_stats_sql(table, game, wins, losses, draws, total):
+    """sync_global_stats for one stats table as three triggers, plus its backfill."""
+    triggers = []
+    for event in ("insert", "update", "delete"):
+        def delta(column):
+            if not column:
+                return "0"
+            new = "0" if event == "delete" else f'coalesce(new."{column}", 0)'
+            old = "0" if event == "insert" else f'coalesce(old."{column}", 0)'
+            return f"({new} - {old})"
+        d_wins, d_draws, d_total = delta(wins), delta(draws), delta(total)
+        d_losses = delta(losses) if losses else f"({d_total} - {d_wins} - {d_draws})"
+        base = _base_id(f"{'old' if event == 'delete' else 'new'}.user_id")
+        triggers.append(
+            f'create trigger "{table}_global_stats_{event}" after {event} on "{table}" for each row begin '
+            f"insert into global_stats (user_id, game, wins, losses, draws, total_games) "
+            f"select {base}, '{game}', {d_wins}, {d_losses}, {d_draws}, {d_total} "
+            f"where {d_wins} <> 0 or {d_losses} <> 0 or {d_draws} <> 0 or {d_total} <> 0 "
+            f"on conflict (user_id, game) do update set wins = global_stats.wins + excluded.wins, "
+            f"losses = global_stats.losses + excluded.losses, draws = global_stats.draws + excluded.draws, "
+            f"total_games = global_stats.total_games + excluded.total_games, updated_at = {NOW}; end"
+        )
+    wins_expr = f'coalesce("{wins}", 0)'
+    draws_expr = f'coalesce("{draws}", 0)' if draws else "0"
+    losses_expr = f'coalesce("{losses}", 0)' if losses else f'coalesce("{total}", 0) - {wins_expr} - {draws_expr}'
+    backfill = (
+        f"insert into global_stats (user_id, game, wins, losses, draws, total_games) "
+        f"select {_base_id('user_id')}, '{game}', sum({wins_expr}), sum({losses_expr}), sum({draws_expr}), "
+        f'sum(coalesce("{total}", 0)) from "{table}" where true group by 1 '
+        f"on conflict (user_id, game) do update set wins = global_stats.wins + excluded.wins, "
+        f"losses = global_stats.losses + excluded.losses, draws = global_stats.draws + excluded.draws, "
+        f"total_games = global_stats.total_games + excluded.total_games, updated_at = {NOW}"
+    )
+    return triggers, backfill
+
+class SQLiteError(Exception):
+    """A database error, with the Postgres/PostgREST code Supabase would have given."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+def _translate(error):
+    text = str(error)
+    if text.startswith("no such table: "):
+        return SQLiteError(f'relation "{text[len("no such table: "):]}" does not exist', "42P01")
+    if "UNIQUE constraint failed" in text:
+        return SQLiteError(f"duplicate key value violates unique constraint ({text})", "23505")
+    if "NOT NULL constraint failed" in text:
+        return SQLiteError(f"null value violates not-null constraint ({text})", "23502")
+    if "no such column" in text or "has no column named" in text:
+        return SQLiteError(text, "42703")
+    return SQLiteError(text)
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def _quote(name):
+    if not _IDENTIFIER.fullmatch(name):
+        raise SQLiteError(f"invalid identifier: {name!r}", "PGRST100")
+    return f'"{name}"'
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def _iso(moment):
+    return moment.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _encode(column, value):
+    """A Python value as stored in the column."""
+    if value is None:
+        return None
+    if column in JSON_COLUMNS:
+        return json.dumps(value, separators=(",", ":"))
+    if column in TIMESTAMP_COLUMNS:
+        if value == "now()":
+            return _iso(_now())
+        moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return _iso(moment)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+def _decode_row(row):
+    data = dict(row)
+    for column, value in data.items():
+        if value is None:
+            continue
+        if column in JSON_COLUMNS:
+            data[column] = json.loads(value)
+        elif column in BOOLEAN_COLUMNS:
+            data[column] = bool(value)
+    return data
+
+class SQLiteResponse:
+    """What execute() returns: the rows (or RPC result) as data, like postgrest's APIResponse."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+# PostgREST filter operators
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "like"}
+
+def parse_logic_tree(text):
+    """Parse an or_() filter such as 'a.lt.1,and(a.eq.1,id.gt."x")' into (sql, params).
+
+    Values are PostgREST's: double-quoted with backslash escapes, or bare up
+    to the next comma or parenthesis. Bare values are bound as text and
+    converted by the column's affinity, as Postgres casts them.
+    """
+    position = 0
+
+    def parse_list(joiner):
+        nonlocal position
+        parts, params = [], []
+        while True:
+            sql, part_params = parse_term()
+            parts.append(sql)
+            params.extend(part_params)
+            if position < len(text) and text[position] == ",":
+                position += 1
+                continue
+            return "(" + f" {joiner} ".join(parts) + ")", params
+
+    def parse_term():
+        nonlocal position
+        for joiner in ("and", "or"):
+            if text.startswith(f"{joiner}(", position):
+                position += len(joiner) + 1
+                result = parse_list(joiner)
+                expect(")")
+                return result
+        match = _IDENTIFIER.match(text, position)
+        if not match:
+            raise SQLiteError(f"failed to parse logic tree ({text})", "PGRST100")
+        column = match.group()
+        position = match.end()
+        expect(".")
+        dot = text.find(".", position)
+        operator = text[position:dot] if dot >= 0 else ""
+        position += len(operator)
+        expect(".")
+        value = parse_value()
+        if operator == "is":
+            if value.lower() not in ("null", "true", "false"):
+                raise SQLiteError(f"invalid is value: {value}", "PGRST100")
+            return f"{_quote(column)} is {value.lower()}", []
+        if operator not in _OPERATORS:
+            raise SQLiteError(f"unknown operator: {operator}", "PGRST100")
+        return f"{_quote(column)} {_OPERATORS[operator]} ?", [_encode(column, value)]
+
+    def parse_value():
+        nonlocal position
+        if position < len(text) and text[position] == '"':
+            position += 1
+            chars = []
+            while position < len(text) and text[position] != '"':
+                if text[position] == "\\":
+                    position += 1
+                chars.append(text[position])
+                position += 1
+            expect('"')
+            return "".join(chars)
+        end = position
+        while end < len(text) and text[end] not in ",()":
+            end += 1
+        value, position = text[position:end], end
+        return value
+
+    def expect(char):
+        nonlocal position
+        if position >= len(text) or text[position] != char:
+            raise SQLiteError(f"failed to parse logic tree ({text})", "PGRST100")
+        position += 1
+
+    result = parse_list("or")
+    if position != len(text):
+        raise SQLiteError(f"failed to parse logic tree ({text})", "PGRST100")
+    return result
+
+class _Query:
+    """A PostgREST-style request builder for one table."""
+
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table = table_name
+        self._op = "select"
+        self._columns = "*"
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # Operations
+    def select(self, *columns):
+        self._op = "select"
+        names = [name.strip() for name in ",".join(columns).split(",") if name.strip()]
+        self._columns = "*" if not names or "*" in names else ", ".join(_quote(name) for name in names)
+        return self
+
+    def insert(self, json, upsert=False):
+        self._op = "upsert" if upsert else "insert"
+        self._payload = json
+        return self
+
+    def upsert(self, json, ignore_duplicates=False, on_conflict=""):
+        self._op = "upsert"
+        self._payload = json
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = [name.strip() for name in on_conflict.split(",") if name.strip()] or None
+        return self
+
+    def update(self, json):
+        self._op = "update"
+        self._payload = json
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column, operator, value):
+        self._where.append(f"{_quote(column)} {operator} ?")
+        self._params.append(_encode(column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "<>", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def like(self, column, pattern):
+        return self._filter(column, "like", pattern.replace("*", "%"))
+
+    def is_(self, column, value):
+        value = "null" if value is None else str(value).lower()
+        if value not in ("null", "true", "false"):
+            raise SQLiteError(f"invalid is value: {value}", "PGRST100")
+        self._where.append(f"{_quote(column)} is {value}")
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self._where.append(f"{_quote(column)} in ({', '.join('?' * len(values))})")
+        self._params.extend(_encode(column, value) for value in values)
+        return self
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters):
+        sql, params = parse_logic_tree(filters)
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    # Modifiers
+    def order(self, column, desc=False, nullsfirst=None):
+        # PostgREST's defaults: nulls last ascending, first descending
+        self._order.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def execute(self):
+        table = _quote(self._table)
+        where = f" where {' and '.join(self._where)}" if self._where else ""
+        if self._op == "select":
+            sql = f"select {self._columns} from {table}{where}"
+            params = list(self._params)
+            if self._order:
+                # SQLite sorts nulls first ascending; a nulls clause that differs from an
+                # index's order stops the index serving the sort, so it is only written
+                # for columns that can hold nulls
+                not_null = self._client.not_null_columns(self._table)
+                sql += " order by " + ", ".join(
+                    f"{_quote(column)} {'desc' if desc else 'asc'}"
+                    + ("" if column in not_null else f" nulls {'first' if nulls_first else 'last'}")
+                    for column, desc, nulls_first in self._order
+                )
+            if self._limit is not None or self._offset is not None:
+                sql += " limit ? offset ?"
+                params += [-1 if self._limit is None else self._limit, self._offset or 0]
+            return SQLiteResponse(self._client._rows(sql, params))
+        if self._op == "delete":
+            return SQLiteResponse(self._client._rows(f"delete from {table}{where} returning *", self._params))
+        if self._op == "update":
+            columns = list(self._payload)
+            assignments = ", ".join(f"{_quote(column)} = ?" for column in columns)
+            params = [_encode(column, self._payload[column]) for column in columns] + self._params
+            return SQLiteResponse(self._client._rows(f"update {table} set {assignments}{where} returning *", params))
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        with self._client.transaction():
+            return SQLiteResponse([inserted for row in rows for inserted in self._insert(table, row)])
+
+    def _insert(self, table, row):
+        columns = list(row)
+        params = [_encode(column, row[column]) for column in columns]
+        if not columns:
+            return self._client._rows(f"insert into {table} default values returning *", [])
+        sql = f"insert into {table} ({', '.join(_quote(column) for column in columns)}) values ({', '.join('?' * len(columns))})"
+        if self._op == "upsert":
+            conflict = self._on_conflict or self._client.primary_key(self._table)
+            updates = [column for column in columns if column not in conflict]
+            action = "nothing" if self._ignore_duplicates or not updates else "update set " + ", ".join(
+                f"{_quote(column)} = excluded.{_quote(column)}" for column in updates
+            )
+            sql += f" on conflict ({', '.join(_quote(column) for column in conflict)}) do {action}"
+        return self._client._rows(sql + " returning *", params)
+
+class _Rpc:
+    def __init__(self, client, fn, params):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def execute(self):
+        function = RPCS.get(self._fn)
+        if function is None:
+            storage_stats["errors"] += 1
+            raise SQLiteError(f"Could not find the function public.{self._fn}", "PGRST202")
+        storage_stats["rpcs"] += 1
+        with self._client.transaction():
+            return SQLiteResponse(function(self._client, **self._params))
+
+class SQLiteClient:
+    """The supabase Client surface (table, rpc) over one SQLite database file."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        global _active_client
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._columns = {}  # table -> pragma table_xinfo rows
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, cached_statements=STATEMENT_CACHE
+        )
+        self._conn.row_factory = sqlite3.Row
+        self.journal_mode = self._conn.execute("pragma journal_mode = wal").fetchone()[0]
+        self._conn.execute("pragma synchronous = normal")
+        self._conn.execute(f"pragma busy_timeout = {BUSY_TIMEOUT_MS}")
+        with self.transaction():
+            for statement in GLOBAL_SCHEMA.split(";"):
+                if statement.strip():
+                    self._conn.execute(statement)
+        _active_client = self
+
+    def table(self, table_name):
+        return _Query(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None):
+        return _Rpc(self, fn, params or {})
+
+    def close(self):
+        self._conn.close()
+
+    def transaction(self):
+        """Hold the connection and run everything inside in one transaction; nests."""
+        return _Transaction(self)
+
+    def _table_info(self, table_name):
+        if table_name not in self._columns:
+            columns = self._rows(f"pragma table_xinfo({_quote(table_name)})", [])
+            if not columns:
+                raise SQLiteError(f'relation "{table_name}" does not exist', "42P01")
+            self._columns[table_name] = columns
+        return self._columns[table_name]
+
+    def primary_key(self, table_name):
+        columns = self._table_info(table_name)
+        return [column["name"] for column in sorted(columns, key=lambda column: column["pk"]) if column["pk"]]
+
+    def not_null_columns(self, table_name):
+        try:
+            return {column["name"] for column in self._table_info(table_name) if column["notnull"]}
+        except SQLiteError:
+            return set()
+
+    def _execute(self, sql, params=()):
+        storage_stats["queries"] += 1
+        try:
+            with self._lock:
+                return self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            storage_stats["errors"] += 1
+            raise _translate(e) from e
+
+    def _rows(self, sql, params):
+        with self._lock:
+            return [_decode_row(row) for row in self._execute(sql, params).fetchall()]
+
+    def _one(self, sql, params=()):
+        rows = self._rows(sql, params)
+        return rows[0] if rows else None
+
+class _Transaction:
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        client = self.client
+        client._lock.acquire()
+        if client._depth == 0:
+            client._conn.execute("begin immediate")
+        client._depth += 1
+        return client
+
+    def __exit__(self, exc_type, exc, tb):
+        client = self.client
+        try:
+            client._depth -= 1
+            if client._depth == 0:
+                client._conn.execute("rollback" if exc_type else "commit")
+        finally:
+            client._lock.release()
+        return False
+
+# ✅ The SQL functions from sql/initial.sql, each run in one transaction by _Rpc
+
+def create_guild_tables(db, guild_id):
+    safe_id = re.sub(r"[^0-9]", "", str(guild_id))
+    for statement in guild_schema(safe_id):
+        db._execute(statement)
+    triggers, backfill = flipnfind_totals_sql(safe_id)
+    for statement in triggers:
+        db._execute(statement)
+    db._execute(backfill)
+    # Attach each global_stats trigger and backfill its table only while the
+    # trigger is missing, so no row is counted twice
+    for prefix, mapping in GLOBAL_GAMES.items():
+        table = prefix + safe_id
+        if db._one("select 1 from sqlite_master where type = 'trigger' and name = ?", (f"{table}_global_stats_insert",)):
+            continue
+        triggers, backfill = global_stats_sql(table, *mapping)
+        for statement in triggers:
+            db._execute(statement)
+        db._execute(backfill)
+    return None
+
+def get_player_summary(db, p_guild_id, p_user_id):
+    g = re.sub(r"[^0-9]", "", str(p_guild_id))
+
+    def row(columns, table):
+        return db._one(f'select {columns} from "{table}_{g}" where user_id = ?', (p_user_id,))
+
+    keys = {f"{p_user_id}_{difficulty}": difficulty for difficulty in ("easy", "medium", "hard", "extreme")}
+    flipnfind = db._rows(
+        f'select user_id, wins, losses, total_games, best_time, best_turns, star_cards from "flipnfind_stats_{g}" '
+        f"where user_id in (?, ?, ?, ?)", list(keys)
+    )
+    return {
+        "rps": row("wins, losses, ties, total_games", "rps_stats"),
+        "guess_number": row("correct_guesses, incorrect_guesses, total_games, gap_count, gap_sum", "guess_number_stats"),
+        "tictactoe": row("wins, losses, draws, total_games, rating, rating_rd", "tictactoe_stats"),
+        "battle": row("wins, losses, total_games, rating, rating_rd", "battle_stats"),
+        "flipnfind": {keys[r.pop("user_id")]: r for r in flipnfind} or None,
+        "kidnapped_jack": row("games_played, escapes, kidnapper_count, best_time, best_placement, total_wins", "kidnapped_jack_stats"),
+        "roulette": row("games_played, games_won, total_bet, total_won, total_lost, biggest_win", "roulette_stats"),
+    }
+
+def economy_rank(db, p_user_id):
+    row = db._one("select balance from economy where user_id = ?", (p_user_id,))
+    if row is None:
+        return None
+    balance = row["balance"]
+    top = db._one("select rank from economy_top where user_id = ? and balance = ?", (p_user_id, balance))
+    if top is not None:
+        ahead = top["rank"] - 1
+    else:
+        # SQLite won't range-scan an expression index with a row value; two ranges of the balance index do
+        ahead = db._one(
+            "select (select count(*) from economy where balance > ?) "
+            "+ (select count(*) from economy where balance = ? and user_id < ?) as n",
+            (balance, balance, p_user_id)
+        )["n"]
+    total = db._one("select count(*) as n from economy")["n"]
+    return {"rank": ahead + 1, "total": max(total, ahead + 1), "balance": balance}
+
+def refresh_economy_top(db):
+    db._execute("delete from economy_top")
+    db._execute(
+        "insert into economy_top (rank, user_id, balance) "
+        "select row_number() over (order by balance desc, user_id), user_id, balance "
+        "from economy order by balance desc, user_id limit 1000"
+    )
+    return None
+
+def _credit(db, user_id, amount, now):
+    """Add HXC to a player's economy row, creating it with the starting 1000."""
+    return db._one(
+        "insert into economy (user_id, balance, total_earned) values (?, ?, ?) "
+        "on conflict (user_id) do update set balance = balance + ?, total_earned = total_earned + ?, updated_at = ? "
+        "returning balance",
+        (user_id, 1000 + amount, 1000 + amount, amount, amount, _iso(now))
+    )["balance"]
+
+REWARDS = {"daily": (timedelta(days=1), 100), "monthly": (timedelta(days=30), 3000), "yearly": (timedelta(days=365), 36500)}
+
+def claim_reward(db, p_user_id, p_type):
+    if p_type not in REWARDS:
+        return {"status": "invalid"}
+    cooldown, base = REWARDS[p_type]
+    now = _now()
+    db._execute("insert into social (user_id) values (?) on conflict (user_id) do nothing", (p_user_id,))
+    row = db._one(
+        f"select last_{p_type} as last, coalesce({p_type}_streak, 0) as streak, "
+        f"coalesce(total_{p_type}_claimed, 0) as total from social where user_id = ?", (p_user_id,)
+    )
+    last, streak = _parse_time(row["last"]), row["streak"]
+    if last is not None and now < last + cooldown:
+        return {"status": "cooldown", "streak": streak, "seconds_left": math.floor((last + cooldown - now).total_seconds())}
+
+    if p_type == "daily" and last is not None and now - last > timedelta(hours=48):
+        streak = 0
+    bonus = min(streak * 10, 100)
+    amount = base * (100 + bonus) // 100
+    db._execute(
+        f"update social set last_{p_type} = ?, {p_type}_streak = ?, total_{p_type}_claimed = ?, updated_at = ? where user_id = ?",
+        (_iso(now), streak + 1, row["total"] + 1, _iso(now), p_user_id)
+    )
+    balance = _credit(db, p_user_id, amount, now)
+    return {"status": "claimed", "amount": amount, "bonus": bonus, "streak": streak + 1, "balance": balance}
+
+def job_fire_at(window_start, window_count, grace_start, times, hours, grace_hours):
+    if window_count >= times:
+        deadline = window_start + timedelta(hours=hours * 2)
+    else:
+        deadline = grace_start or window_start + timedelta(hours=hours)
+    return deadline + timedelta(hours=grace_hours)
+
+def record_work(db, p_user_id, p_job, p_earnings, p_exp, p_times, p_hours, p_grace_hours, p_exp_loss):
+    now = _now()
+    window, grace = timedelta(hours=p_hours), timedelta(hours=p_grace_hours)
+    job = db._one("select * from jobs where user_id = ?", (p_user_id,))
+    if job is None or job["current_job"] != p_job:
+        return {"status": "no_job"}
+    old_exp = job["experience"]
+    window_start, window_count = _parse_time(job["window_start"]), job["window_count"]
+    grace_start = _parse_time(job["grace_period_start"])
+
+    if window_start is None:
+        window_start, window_count = now, 0
+
+    closed = math.floor((now - window_start) / window)
+    if closed >= 1:
+        # The grace period starts at the end of the first window that missed its quota
+        if grace_start is None:
+            if window_count < p_times:
+                grace_start = window_start + window
+            elif closed >= 2:
+                grace_start = window_start + window * 2
+        window_start += window * closed
+        window_count = 0
+
+    if grace_start is not None and now > grace_start + grace:
+        experience = max(0, job["experience"] - p_exp_loss)
+        db._execute(
+            "update jobs set current_job = null, experience = ?, work_count = 0, grace_period_start = null, "
+            "window_start = null, window_count = 0, fire_at = null, updated_at = ? where user_id = ?",
+            (experience, _iso(now), p_user_id)
+        )
+        return {"status": "fired", "old_experience": old_exp, "experience": experience}
+
+    window_count += 1
+    if window_count >= p_times:
+        grace_start = None
+
+    job = db._one(
+        "update jobs set experience = experience + ?, last_work = ?, work_count = work_count + 1, "
+        "total_earned = total_earned + ?, grace_period_start = ?, window_start = ?, window_count = ?, "
+        "fire_at = ?, updated_at = ? where user_id = ? returning experience, work_count, total_earned",
+        (
+            p_exp, _iso(now), p_earnings, grace_start and _iso(grace_start), _iso(window_start), window_count,
+            _iso(job_fire_at(window_start, window_count, grace_start, p_times, p_hours, p_grace_hours)),
+            _iso(now), p_user_id,
+        )
+    )
+    balance = _credit(db, p_user_id, p_earnings, now)
+    return {
+        "status": "ok",
+        "old_experience": old_exp,
+        "experience": job["experience"],
+        "work_count": job["work_count"],
+        "total_earned": job["total_earned"],
+        "window_count": window_count,
+        "window_end": _iso(window_start + window),
+        "grace_deadline": _iso(grace_start + grace) if grace_start is not None else None,
+        "balance": balance,
+    }
+
+def schedule_job_deadlines(db, p_rules):
+    now = _now()
+    count = 0
+    rows = db._rows(
+        "select user_id, current_job, window_start, window_count, last_work, grace_period_start "
+        "from jobs where current_job is not null and fire_at is null", []
+    )
+    for row in rows:
+        if row["current_job"] not in p_rules:
+            continue
+        times, hours, grace_hours = p_rules[row["current_job"]]
+        window_start = _parse_time(row["window_start"] or row["last_work"]) or now
+        window_count = row["window_count"] or 0
+        fire_at = job_fire_at(window_start, window_count, _parse_time(row["grace_period_start"]), int(times), hours, grace_hours)
+        db._execute(
+            "update jobs set window_start = ?, window_count = ?, fire_at = ? where user_id = ?",
+            (_iso(window_start), window_count, _iso(fire_at), row["user_id"])
+        )
+        count += 1
+    return count
+
+def fire_expired_jobs(db, p_exp_loss, p_limit=500):
+    now = _iso(_now())
+    due = db._rows(
+        "select user_id, current_job, experience from jobs where fire_at <= ? order by fire_at limit ?", [now, p_limit]
+    )
+    fired = []
+    for row in due:
+        loss = min(row["experience"], int(p_exp_loss.get(row["current_job"]) or 0))
+        db._execute(
+            "update jobs set current_job = null, experience = ?, work_count = 0, grace_period_start = null, "
+            "window_start = null, window_count = 0, fire_at = null, updated_at = ? where user_id = ?",
+            (row["experience"] - loss, now, row["user_id"])
+        )
+        fired.append({"user_id": row["user_id"], "job": row["current_job"], "exp_lost": loss})
+    return fired
+
+def rate_limit_acquire(db, p_key, p_interval, p_tolerance, p_consume=True):
+    now = time.time()
+    db._execute("insert into rate_limits (key, tat) values (?, ?) on conflict (key) do nothing", (p_key, now))
+    tat = max(db._one("select tat from rate_limits where key = ?", (p_key,))["tat"], now)
+    retry = tat - p_tolerance - now
+    if retry > 0:
+        return retry
+    if p_consume:
+        db._execute("update rate_limits set tat = ? where key = ?", (tat + p_interval, p_key))
+    # Occasionally drop keys that have fully recovered to keep the table small
+    if random.random() < 0.01:
+        db._execute("delete from rate_limits where tat < ?", (now,))
+    return 0
+
+RPCS = {
+    function.__name__: function
+    for function in (
+        create_guild_tables, get_player_summary, economy_rank, refresh_economy_top, claim_reward,
+        record_work, schedule_job_deadlines, fire_expired_jobs, rate_limit_acquire,
+    )
+}
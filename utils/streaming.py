@@ -0,0 +1,183 @@
+"""Fixed-size running aggregates for stats that would otherwise need the full history.
+
+Each helper reads or updates a small summary (counts, sums, a histogram) so
+showing a stat costs the same after ten games as after ten thousand.
+"""
+
+GAP_BINS = 100  # Guess Number gaps run 0-99; bin g counts guesses that were g away
+
+def empty_histogram(bins=GAP_BINS):
+    return [0] * bins
+
+def histogram_add(histogram, values, bins=GAP_BINS):
+    """Return a copy of the histogram with the values counted; out-of-range values land in the edge bins."""
+    histogram = list(histogram) if histogram else empty_histogram(bins)
+    histogram.extend([0] * (bins - len(histogram)))
+    for value in values:
+        histogram[min(max(int(value), 0), bins - 1)] += 1
+    return histogram
+
+def histogram_median(histogram):
+    """Median bin, matching sorted(values)[len(values) // 2]. None when empty."""
+    total = sum(histogram)
+    if not total:
+        return None
+    position = total // 2
+    seen = 0
+    for value, count in enumerate(histogram):
+        seen += count
+        if seen > position:
+            return value
+
+def histogram_mode(histogram):
+    """Most common bin (the smallest on ties). None when empty."""
+    if not histogram or not max(histogram):
+        return None
+    return max(range(len(histogram)), key=lambda value: (histogram[value], -value))
+
+EWMA_ALPHA = 0.2          # Weight of the newest game in the recent-form average
+QUANTILES = (0.5, 0.9)    # Percentiles tracked with P² estimators
+
+class P2Quantile:
+    """Jain & Chlamtac's P² estimator: one quantile from five markers, O(1) per value.
+
+    The first five values are kept exactly; after that the markers move
+    along a piecewise-parabolic fit. Only heights and positions are stored,
+    the desired positions follow from the count.
+    """
+
+    __slots__ = ("p", "heights", "positions")
+
+    def __init__(self, p, heights=None, positions=None):
+        self.p = p
+        self.heights = list(heights or [])
+        self.positions = list(positions or [])
+
+    @property
+    def count(self):
+        return self.positions[4] if self.positions else len(self.heights)
+
+    def push(self, x):
+        q, n = self.heights, self.positions
+        if not n:
+            q.append(x)
+            q.sort()
+            if len(q) == 5:
+                n.extend([1, 2, 3, 4, 5])
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        p, total = self.p, n[4]
+        increments = (0, p / 2, p, (1 + p) / 2, 1)
+        for i in (1, 2, 3):
+            d = 1 + (total - 1) * increments[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                candidate = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = candidate
+                n[i] += s
+
+    def value(self):
+        if not self.heights:
+            return None
+        if not self.positions:
+            # Fewer than five values: exact nearest-rank quantile
+            return self.heights[min(int(self.p * len(self.heights)), len(self.heights) - 1)]
+        return self.heights[2]
+
+class RunningStats:
+    """Streaming summary of one per-game metric, serialisable to a small JSON dict.
+
+    Tracks count, Welford mean/variance, min, max, an exponentially weighted
+    recent average and P² estimates of the QUANTILES. Every push is O(1) and
+    the state never grows, so it fits in a jsonb column next to the stats.
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "ewma", "quantiles")
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get("n", 0)
+        self.mean = state.get("mean", 0.0)
+        self.m2 = state.get("m2", 0.0)
+        self.min = state.get("min")
+        self.max = state.get("max")
+        self.ewma = state.get("ewma")
+        markers = state.get("q", {})
+        self.quantiles = {
+            p: P2Quantile(p, *markers.get(str(p), (None, None))) for p in QUANTILES
+        }
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        self.ewma = x if self.ewma is None else self.ewma + EWMA_ALPHA * (x - self.ewma)
+        for estimator in self.quantiles.values():
+            estimator.push(x)
+        return self
+
+    @property
+    def stdev(self):
+        """Sample standard deviation (0 with fewer than two values)."""
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    def quantile(self, p):
+        return self.quantiles[p].value()
+
+    def consistency(self):
+        """100% minus the coefficient of variation, clamped to 0-100. None until two values."""
+        if self.count < 2 or not self.mean:
+            return None
+        return max(0.0, min(100.0, 100 * (1 - self.stdev / abs(self.mean))))
+
+    def to_state(self):
+        return {
+            "n": self.count,
+            "mean": round(self.mean, 4),
+            "m2": round(self.m2, 4),
+            "min": self.min,
+            "max": self.max,
+            "ewma": None if self.ewma is None else round(self.ewma, 4),
+            "q": {
+                str(p): [[round(h, 4) for h in e.heights], e.positions]
+                for p, e in self.quantiles.items() if e.heights
+            },
+        }
+
+def merge_observations(analytics, **observations):
+    """Push one game's values into an analytics dict ({metric: RunningStats state}); None values are skipped."""
+    analytics = dict(analytics or {})
+    for name, value in observations.items():
+        if value is not None:
+            analytics[name] = RunningStats(analytics.get(name)).push(value).to_state()
+    return analytics
+
+def spread_text(state, unit="", digits=1):
+    """One-line percentile summary for embeds, e.g. "p50 41.2s · p90 58.0s · σ 6.1s"."""
+    stats = RunningStats(state)
+    if not stats.count:
+        return None
+    fmt = lambda value: f"{value:.{digits}f}{unit}"
+    text = f"p50 {fmt(stats.quantile(0.5))} · p90 {fmt(stats.quantile(0.9))}"
+    if stats.count > 1:
+        text += f" · σ {fmt(stats.stdev)}"
+    return text
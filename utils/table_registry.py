@@ -0,0 +1,46 @@
+"""Which guilds have their per-guild tables, as far as this process knows.
+
+create_server_tables records a guild here once the create_guild_tables RPC
+has run for it (on startup and on guild join), so the game code never has
+to probe for a table before using it. A write that still finds a table
+missing provisions the guild's tables and retries; see
+_execute_guild_write in utils/database.py.
+"""
+import threading
+
+# Postgres undefined_table, and PostgREST's "table not in the schema cache"
+MISSING_TABLE_CODES = frozenset({"42P01", "PGRST205"})
+
+# Process-wide provisioning counters, surfaced on the status page by keep_alive.py
+registry_stats = {
+    "provisioned": 0,
+    "lazy_provisions": 0,
+    "failed": 0,
+}
+
+_provisioned = set()
+_lock = threading.Lock()
+
+def get_table_registry_stats():
+    """Return a snapshot of the table registry counters."""
+    stats = dict(registry_stats)
+    stats["guilds"] = len(_provisioned)
+    return stats
+
+def is_provisioned(guild_id):
+    return str(guild_id) in _provisioned
+
+def mark_provisioned(guild_id):
+    with _lock:
+        _provisioned.add(str(guild_id))
+
+def forget(guild_id):
+    with _lock:
+        _provisioned.discard(str(guild_id))
+
+def is_missing_table_error(error):
+    """True if a Supabase error says the table being queried doesn't exist."""
+    if getattr(error, "code", None) in MISSING_TABLE_CODES:
+        return True
+    text = str(error)
+    return ("relation" in text and "does not exist" in text) or "Could not find the table" in text